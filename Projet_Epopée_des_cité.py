@@ -1,7 +1,216 @@
-from typing import List, Dict, Union, Tuple
+from typing import (
+    List,
+    Dict,
+    Union,
+    Tuple,
+    Callable,
+    Generator,
+    Optional,
+    Iterable,
+    Iterator,
+    TypeVar,
+    Generic,
+    TextIO,
+    Sequence,
+    Mapping,
+    MutableMapping,
+    Set,
+)
+import array
+import bisect
+import collections.abc
+import contextlib
+import contextvars
 import json
 import re
 import os
+import sys
+
+
+FICHIER_SAUVEGARDE = "partie_sauvegarder.json"
+
+SUFFIXE_JOURNAL = ".journal"
+"""Le suffixe du journal qui suit l'instantané d'une sauvegarde journalisée (voir le module journal)."""
+
+MAGIE_INSTANTANE = b"EPOPEE\x00B"
+"""Les premiers octets d'un instantané binaire de sauvegarde (voir le module instantane)."""
+
+MOTIF_PRIX = re.compile(r"(\d+) (unités d'or)")
+"""Le prix demandé par un allié dans son dialogue."""
+
+MENU_NOM = "nom"
+MENU_VILLAGE = "village"
+MENU_ALLIES = "allies"
+MENU_CHOIX_ALLIE = "choix_allie"
+MENU_LIEUX = "lieux"
+MENU_CHOIX_LIEU = "choix_lieu"
+
+TAILLE_PAGE_CARTE = 20
+"""Le nombre de lieux affichés par page de la carte."""
+AIDE_CARTE = (
+    "Commandes de la carte: :+ page suivante, :- page précédente, :ressource <nom>, :force <maximum>, "
+    ":nom <début du nom> pour filtrer, :tout pour enlever les filtres."
+)
+
+
+class Sortie:
+    """Classe qui représente la destination des affichages du jeu.
+
+    Le jeu n'appelle pas print: il écrit dans la sortie courante avec afficher(). La sortie courante est une
+    variable de contexte, qu'on change avec rediriger_sortie(): une simulation peut ignorer les affichages et
+    un serveur peut récupérer ceux de chaque session, sans toucher à sys.stdout.
+
+    Cette classe de base écrit chaque texte dans sys.stdout tel qu'il est au moment de l'écriture.
+
+    Attributes:
+        muette (bool): Si la sortie ignore tout ce qu'on lui écrit: le jeu ne construit alors pas les textes.
+    """
+
+    muette = False
+
+    def ecrire(self, texte: str) -> None:
+        """Écrit un texte, qui contient ses propres sauts de ligne."""
+        sys.stdout.write(texte)
+
+    def vider(self) -> None:
+        """Envoie ce qui attend dans un tampon: appelé avant de lire un choix du joueur."""
+
+
+class SortieTampon(Sortie):
+    """Classe qui regroupe les affichages et les écrit dans un flux par gros morceaux.
+
+    Attributes:
+        flux (TextIO): Le flux où écrire.
+        taille (int): Le nombre de caractères en attente au-delà duquel le tampon est vidé.
+
+    Exemples:
+        >>> with rediriger_sortie(SortieTampon(sys.stdout)):
+        ...     executer_partie(partie(environnement))
+    """
+
+    __slots__ = ("flux", "taille", "_morceaux", "_en_attente")
+
+    def __init__(self, flux: TextIO, taille: int = 1 << 16):
+        """Initialise un tampon vide.
+
+        Args:
+            flux (TextIO): Le flux où écrire.
+            taille (int): Le nombre de caractères en attente au-delà duquel le tampon est vidé.
+        """
+        self.flux = flux
+        self.taille = taille
+        self._morceaux: List[str] = []
+        self._en_attente = 0
+
+    def ecrire(self, texte: str) -> None:
+        """Ajoute un texte au tampon, et vide le tampon s'il est plein."""
+        self._morceaux.append(texte)
+        self._en_attente += len(texte)
+        if self._en_attente >= self.taille:
+            self.vider()
+
+    def vider(self) -> None:
+        """Écrit tout le tampon dans le flux, en une fois."""
+        if self._morceaux:
+            self.flux.write("".join(self._morceaux))
+            self._morceaux.clear()
+            self._en_attente = 0
+        self.flux.flush()
+
+
+class SortieNulle(Sortie):
+    """Classe qui ignore tous les affichages, pour jouer sans console."""
+
+    __slots__ = ()
+
+    muette = True
+
+    def ecrire(self, texte: str) -> None:
+        """N'écrit rien."""
+
+
+class SortieCapture(Sortie):
+    """Classe qui garde les affichages en mémoire.
+
+    Exemples:
+        >>> capture = SortieCapture()
+        >>> with rediriger_sortie(capture):
+        ...     Joueur("Talion", 10, 100, {"or": 0}).verification_inventaire()
+        >>> capture.texte()
+        "{'or': 0}\\n"
+    """
+
+    __slots__ = ("_morceaux",)
+
+    def __init__(self):
+        """Initialise une capture vide."""
+        self._morceaux: List[str] = []
+
+    def ecrire(self, texte: str) -> None:
+        """Garde un texte."""
+        self._morceaux.append(texte)
+
+    def texte(self) -> str:
+        """Donne tout le texte gardé."""
+        return "".join(self._morceaux)
+
+    def prendre(self) -> str:
+        """Donne tout le texte gardé et l'oublie."""
+        texte = self.texte()
+        self._morceaux.clear()
+        return texte
+
+
+_SORTIE: contextvars.ContextVar[Sortie] = contextvars.ContextVar("sortie", default=Sortie())
+
+
+def sortie_courante() -> Sortie:
+    """Donne la sortie où vont les affichages du jeu dans le contexte courant."""
+    return _SORTIE.get()
+
+
+@contextlib.contextmanager
+def rediriger_sortie(sortie: Sortie) -> Iterator[Sortie]:
+    """Gestionnaire de contexte qui envoie les affichages du jeu dans une autre sortie.
+
+    La sortie est vidée en quittant le contexte.
+
+    Args:
+        sortie (Sortie): La sortie à utiliser dans le contexte.
+
+    Returns:
+        Iterator[Sortie]: La sortie donnée.
+
+    Exemples:
+        >>> with rediriger_sortie(SortieNulle()):
+        ...     simuler_session(donnees, ["2", "1", "temple oublié"])
+    """
+    jeton = _SORTIE.set(sortie)
+    try:
+        yield sortie
+    finally:
+        _SORTIE.reset(jeton)
+        sortie.vider()
+
+
+def affichage_muet() -> bool:
+    """Indique si la sortie courante ignore les affichages: les textes longs à construire peuvent être sautés."""
+    return _SORTIE.get().muette
+
+
+def afficher(*valeurs: object, sep: str = " ", end: str = "\n") -> None:
+    """Fonction qui affiche des valeurs dans la sortie courante, comme print.
+
+    Rien n'est converti quand la sortie courante est muette.
+
+    Args:
+        valeurs (object): Les valeurs à afficher, converties avec str.
+        sep (str): Le texte mis entre les valeurs.
+        end (str): Le texte mis après la dernière valeur.
+    """
+    sortie = _SORTIE.get()
+    if not sortie.muette:
+        sortie.ecrire(sep.join(map(str, valeurs)) + end)
 
 
 class Personnage:
@@ -20,6 +229,8 @@ class Personnage:
         5
     """
 
+    __slots__ = ("nom", "force")
+
     def __init__(self, nom: str, force: int):
         """Initialise un nouveau personnage.
 
@@ -27,9 +238,21 @@ class Personnage:
             nom (str): le nom du personnage.
             force (int): les points de force du personnage.
         """
-        self.nom = nom
+        self.nom = sys.intern(nom)
         self.force = force
 
+    def vers_dict(self) -> Dict[str, Union[str, int]]:
+        """Donne les caractéristiques du personnage sous forme de dictionnaire, pour la sauvegarde.
+
+        Returns:
+            Dict[str, Union[str, int]]: Le nom et la force du personnage.
+
+        Exemples:
+            >>> Personnage(nom="Talion", force=5).vers_dict()
+            {'nom': 'Talion', 'force': 5}
+        """
+        return {"nom": self.nom, "force": self.force}
+
 
 class Png(Personnage):
     """Classe fille de Personnage et mére des classe Allie et Ennemi qui représente un personnage non jouable avec un nom, des points de force, et un dialogue.
@@ -46,6 +269,8 @@ class Png(Personnage):
         "Si tu veut que je t'aide, il faut me payer 10 unités d'or."
     """
 
+    __slots__ = ("dialogue",)
+
     def __init__(self, nom: str, force: int, dialogue: str):
         """ "Initialise un nouveau png.
 
@@ -55,7 +280,19 @@ class Png(Personnage):
             dialogue (str): Ce que dit le png.
         """
         super().__init__(nom, force)
-        self.dialogue = dialogue
+        self.dialogue = sys.intern(dialogue)
+
+    def vers_dict(self) -> Dict[str, Union[str, int]]:
+        """Donne les caractéristiques du png sous forme de dictionnaire, pour la sauvegarde.
+
+        Returns:
+            Dict[str, Union[str, int]]: Le nom, la force et le dialogue du png.
+
+        Exemples:
+            >>> Png("Talion", 5, "Bonjour").vers_dict()
+            {'nom': 'Talion', 'force': 5, 'dialogue': 'Bonjour'}
+        """
+        return {"nom": self.nom, "force": self.force, "dialogue": self.dialogue}
 
     def __str__(self) -> str:
         """Permet de donner une représentation lisible des caractéristiques d'un png (nom et force).
@@ -79,7 +316,28 @@ class Png(Personnage):
             >>> png.parler()
             "Si tu veut que je t'aide, il faut me payer 10 unités d'or."
         """
-        print(self.dialogue)
+        afficher(self.dialogue)
+
+
+def lire_prix(dialogue: str) -> Optional[int]:
+    """Lit le prix en or demandé dans un dialogue.
+
+    Args:
+        dialogue (str): Le dialogue d'un allié.
+
+    Returns:
+        Optional[int]: Le prix en unités d'or, ou None si le dialogue n'indique pas de prix.
+
+    Exemples:
+        >>> lire_prix("Je peux t'aider à explorer, mais il me faut 10 unités d'or.")
+        10
+        >>> print(lire_prix("Je peux t'aider à explorer."))
+        None
+    """
+    prix = MOTIF_PRIX.search(dialogue)
+    if not prix:
+        return None
+    return int(prix.group(1))
 
 
 class Allie(Png):
@@ -89,13 +347,19 @@ class Allie(Png):
         nom (str): Le nom de l'allié
         force (int): Les points de force de l'allié
         dialogue (str): Ce que dit l'allié
+        prix (Optional[int]): Le prix en unités d'or demandé dans le dialogue, lu une seule fois à la
+            création de l'allié; None si le dialogue n'indique pas de prix.
 
     Exemples:
         >>> allie = Allie("Talion", 5, "Si tu veut que je t'aide, il faut me payer 10 unités d'or.")
         >>> allie.parler()
         "Si tu veut que je t'aide, il faut me payer 10 unités d'or."
+        >>> allie.prix
+        10
     """
 
+    __slots__ = ("prix",)
+
     def __init__(self, nom: str, force: int, dialogue: str):
         """Initialise un nouveau allié
 
@@ -105,6 +369,7 @@ class Allie(Png):
             dialogue (str): Ce que dit l'allié
         """
         super().__init__(nom, force, dialogue)
+        self.prix = lire_prix(dialogue)
 
 
 class Ennemi(Png):
@@ -121,6 +386,8 @@ class Ennemi(Png):
         "SSSH"
     """
 
+    __slots__ = ()
+
     def __init__(self, nom: str, force: int, dialogue: str):
         """Initialise un nouveau ennemi
 
@@ -146,6 +413,8 @@ class Ressource:
         or, 20, Permet de payer un allié.
     """
 
+    __slots__ = ("nom", "quantite", "utilite")
+
     def __init__(self, nom: str, quantite: int, utilite: str):
         """Initialise une nouvelle ressource.
 
@@ -154,9 +423,21 @@ class Ressource:
             quantite (int): La quantité de la ressource
             utilite (str): L'utilité de la ressource
         """
-        self.nom = nom
+        self.nom = sys.intern(nom)
         self.quantite = quantite
-        self.utilite = utilite
+        self.utilite = sys.intern(utilite)
+
+    def vers_dict(self) -> Dict[str, Union[str, int]]:
+        """Donne les caractéristiques de la ressource sous forme de dictionnaire, pour la sauvegarde.
+
+        Returns:
+            Dict[str, Union[str, int]]: Le nom, la quantité et l'utilité de la ressource.
+
+        Exemples:
+            >>> Ressource("or", 20, "Permet de payer un allié.").vers_dict()
+            {'nom': 'or', 'quantite': 20, 'utilite': 'Permet de payer un allié.'}
+        """
+        return {"nom": self.nom, "quantite": self.quantite, "utilite": self.utilite}
 
     def __str__(self) -> str:
         """Permet de donner une représentation lisible d'une ressource.
@@ -172,6 +453,98 @@ class Ressource:
         return f"{self.nom}, {self.quantite}, {self.utilite}"
 
 
+class ListeEnnemis(list):
+    """Liste d'ennemis qui tient à jour le total de leurs points de force.
+
+    Le total est ajusté à chaque ajout, retrait ou remplacement d'ennemi, sans reparcourir la liste. La force
+    d'un ennemi ne doit donc plus changer une fois qu'il est dans la liste.
+
+    Attributes:
+        force_totale (int): La somme des points de force des ennemis de la liste.
+
+    Exemples:
+        >>> ennemis = ListeEnnemis([Ennemi("serpent géant", 8, "SSSH")])
+        >>> ennemis.append(Ennemi("loup spectral", 12, "Ouuuh"))
+        >>> ennemis.force_totale
+        20
+        >>> ennemis.clear()
+        >>> ennemis.force_totale
+        0
+    """
+
+    __slots__ = ("force_totale",)
+
+    def __init__(self, ennemis: Iterable[Ennemi] = ()):
+        """Initialise une nouvelle liste d'ennemis.
+
+        Args:
+            ennemis (Iterable[Ennemi]): Les ennemis de la liste.
+        """
+        super().__init__(ennemis)
+        self.force_totale = sum(ennemi.force for ennemi in self)
+
+    def __reduce__(self):
+        """Permet de copier la liste avec copy et de la sérialiser avec pickle."""
+        return (type(self), (list(self),))
+
+    def copy(self) -> "ListeEnnemis":
+        """Donne une copie de la liste, avec son total."""
+        return type(self)(self)
+
+    def append(self, ennemi: Ennemi) -> None:
+        super().append(ennemi)
+        self.force_totale += ennemi.force
+
+    def insert(self, position: int, ennemi: Ennemi) -> None:
+        super().insert(position, ennemi)
+        self.force_totale += ennemi.force
+
+    def extend(self, ennemis: Iterable[Ennemi]) -> None:
+        ennemis = list(ennemis)
+        super().extend(ennemis)
+        self.force_totale += sum(ennemi.force for ennemi in ennemis)
+
+    def __iadd__(self, ennemis: Iterable[Ennemi]) -> "ListeEnnemis":
+        self.extend(ennemis)
+        return self
+
+    def __imul__(self, fois: int) -> "ListeEnnemis":
+        super().__imul__(fois)
+        self.force_totale = self.force_totale * fois if fois > 0 else 0
+        return self
+
+    def remove(self, ennemi: Ennemi) -> None:
+        super().remove(ennemi)
+        self.force_totale -= ennemi.force
+
+    def pop(self, position: int = -1) -> Ennemi:
+        ennemi = super().pop(position)
+        self.force_totale -= ennemi.force
+        return ennemi
+
+    def clear(self) -> None:
+        super().clear()
+        self.force_totale = 0
+
+    def __setitem__(self, position, valeur) -> None:
+        anciens = self[position]
+        if isinstance(position, slice):
+            valeur = list(valeur)
+            super().__setitem__(position, valeur)
+            self.force_totale += sum(ennemi.force for ennemi in valeur) - sum(ennemi.force for ennemi in anciens)
+        else:
+            super().__setitem__(position, valeur)
+            self.force_totale += valeur.force - anciens.force
+
+    def __delitem__(self, position) -> None:
+        anciens = self[position]
+        super().__delitem__(position)
+        if isinstance(position, slice):
+            self.force_totale -= sum(ennemi.force for ennemi in anciens)
+        else:
+            self.force_totale -= anciens.force
+
+
 class Lieu:
     """Classe qui représente un lieu à visiter sui à un nom, une description, des ressources disponible et des ennemis à combattre.
 
@@ -179,13 +552,20 @@ class Lieu:
         nom (str): Le nom du lieu
         description (str): La description du lieu
         ressources (List[Ressources]): Une liste d'objet de type ressource qui représente toutes les ressources disponible.
-        ennemis (List[Ennemi]): Une liste d'objet de type ennemi qui représente les ennemis à combattre.
+        ennemis (ListeEnnemis): La liste des ennemis à combattre, qui tient à jour leur force totale.
+        force_ennemis (int): La force totale des ennemis du lieu, sans reparcourir la liste.
+        nombre_ennemis (int): Le nombre d'ennemis du lieu.
+
+    La représentation du lieu est gardée une fois calculée, jusqu'à ce que ses ressources ou ses ennemis soient
+    remplacés. Le jeu remplace toujours ces listes plutôt que de les modifier sur place.
 
     Exemples:
         >>> ressources = [Ressource("or", 20, "Acheter de l'aide")]
         >>> ennemis = [Ennemi("serpent géant", 8, "SSSH")]
         >>> lieu = Lieu("Temple oublié", "Un temple envahi par la végétation", ressources, ennemis)
-        >>> lieu.representation()
+        >>> lieu.force_ennemis, lieu.nombre_ennemis
+        (8, 1)
+        >>> print(lieu.representation())
         nom: Temple oublié, description: Un temple envahi par la végétation
         Voici la liste des ressources.
         or, 20, Acheter de l'aide
@@ -193,6 +573,8 @@ class Lieu:
         nom: serpent géant, force: 8
     """
 
+    __slots__ = ("nom", "description", "_ressources", "_ennemis", "_texte")
+
     def __init__(
         self,
         nom: str,
@@ -208,11 +590,63 @@ class Lieu:
             ressources (List[Ressources]): Une liste d'objet de type ressource qui représente toutes les ressources disponible.
             ennemis (List[Ennemi]): Une liste d'objet de type ennemi qui représente les ennemis à combattre.
         """
+        # Pas de sys.intern ici, contrairement aux personnages et aux ressources: chaque nom de lieu est unique,
+        # l'interner ne ferait qu'ajouter une entrée à la table des chaînes internées.
         self.nom = nom
         self.description = description
+        self._texte: Optional[str] = None
         self.ressources = ressources
         self.ennemis = ennemis
 
+    @property
+    def ressources(self) -> List[Ressource]:
+        """La liste des ressources disponibles."""
+        return self._ressources
+
+    @ressources.setter
+    def ressources(self, ressources: List[Ressource]) -> None:
+        self._ressources = ressources
+        self._texte = None
+
+    @property
+    def ennemis(self) -> ListeEnnemis:
+        """La liste des ennemis à combattre."""
+        return self._ennemis
+
+    @ennemis.setter
+    def ennemis(self, ennemis: Iterable[Ennemi]) -> None:
+        self._ennemis = ennemis if isinstance(ennemis, ListeEnnemis) else ListeEnnemis(ennemis)
+        self._texte = None
+
+    @property
+    def force_ennemis(self) -> int:
+        """La force totale des ennemis du lieu."""
+        return self._ennemis.force_totale
+
+    @property
+    def nombre_ennemis(self) -> int:
+        """Le nombre d'ennemis du lieu."""
+        return len(self._ennemis)
+
+    def vers_dict(self) -> Dict[str, Union[str, List[Dict[str, Union[str, int]]]]]:
+        """Donne les caractéristiques du lieu, ressources et ennemis compris, sous forme de dictionnaire.
+
+        Returns:
+            Dict[str, Union[str, List[Dict[str, Union[str, int]]]]]: Le nom, la description, les ressources et
+            les ennemis du lieu.
+
+        Exemples:
+            >>> lieu = Lieu("Temple oublié", "Un temple", [Ressource("or", 20, "Acheter de l'aide")], [])
+            >>> lieu.vers_dict()
+            {'nom': 'Temple oublié', 'description': 'Un temple', 'ressources': [{'nom': 'or', 'quantite': 20, 'utilite': "Acheter de l'aide"}], 'ennemis': []}
+        """
+        return {
+            "nom": self.nom,
+            "description": self.description,
+            "ressources": [ressource.vers_dict() for ressource in self.ressources],
+            "ennemis": [ennemi.vers_dict() for ennemi in self.ennemis],
+        }
+
     def representation(self) -> str:
         """Donne une représenttion complete et précise d'un lieu.
 
@@ -223,20 +657,377 @@ class Lieu:
             >>> ressources = [Ressource("or", 20, "Acheter de l'aide")]
             >>> ennemis = [Ennemi("serpent géant", 8, "SSSH")]
             >>> lieu = Lieu("Temple oublié", "Un temple envahi par la végétation", ressources, ennemis)
-            >>> lieu.representation()
+            >>> print(lieu.representation())
             nom: Temple oublié, description: Un temple envahi par la végétation
             Voici la liste des ressources.
             or, 20, Acheter de l'aide
             Voici la liste des ennemis.
             nom: serpent géant, force: 8
         """
-        print(f"nom: {self.nom}, description: {self.description}")
-        print("Voici la liste des ressources.")
-        for ressource in self.ressources:
-            print(ressource)
-        print("Voici la liste des ennemis.")
-        for ennemi in self.ennemis:
-            print(ennemi)
+        if self._texte is None:
+            lignes = [f"nom: {self.nom}, description: {self.description}", "Voici la liste des ressources."]
+            lignes.extend(map(str, self._ressources))
+            lignes.append("Voici la liste des ennemis.")
+            lignes.extend(map(str, self._ennemis))
+            self._texte = "\n".join(lignes)
+        return self._texte
+
+
+def prix_allie(allie: Allie) -> Optional[int]:
+    """Donne le prix en or demandé par un allié dans son dialogue.
+
+    Le prix est lu une seule fois, à la création de l'allié: voir Allie.prix.
+
+    Args:
+        allie (Allie): L'allié dont on cherche le prix.
+
+    Returns:
+        Optional[int]: Le prix en unités d'or, ou None si le dialogue n'indique pas de prix.
+
+    Exemples:
+        >>> prix_allie(Allie("arwen", 5, "Je peux t'aider à explorer, mais il me faut 10 unités d'or."))
+        10
+        >>> print(prix_allie(Allie("arwen", 5, "Je peux t'aider à explorer.")))
+        None
+    """
+    return allie.prix
+
+
+QUANTITE_MAXIMUM = 2**63 - 1
+"""La plus grande quantité d'une ressource dans un inventaire: celle d'un entier signé de 64 bits."""
+
+_ABSENT = -1
+"""La quantité qui marque, dans le tableau d'un inventaire, une ressource qu'il n'a pas."""
+
+_ABSENTS = array.array("q", (_ABSENT,))
+
+_IDS_RESSOURCES: Dict[str, int] = {}
+_NOMS_RESSOURCES: List[str] = []
+
+
+def id_ressource(nom: str) -> int:
+    """Donne l'identifiant d'un nom de ressource, en l'enregistrant la première fois qu'il est vu.
+
+    Les identifiants ne valent que pour le processus: ils ne sont jamais sauvegardés.
+
+    Args:
+        nom (str): Le nom de la ressource.
+
+    Returns:
+        int: L'identifiant de la ressource.
+
+    Raises:
+        TypeError: Si le nom n'est pas une chaîne.
+
+    Exemples:
+        >>> id_ressource("or") == id_ressource("or")
+        True
+    """
+    identifiant = _IDS_RESSOURCES.get(nom)
+    if identifiant is None:
+        if not isinstance(nom, str):
+            raise TypeError(f"Nom de ressource attendu, pas {nom!r}.")
+        nom = sys.intern(nom)
+        identifiant = _IDS_RESSOURCES[nom] = len(_NOMS_RESSOURCES)
+        _NOMS_RESSOURCES.append(nom)
+    return identifiant
+
+
+class ErreurInventaire(ValueError):
+    """Erreur levée quand une opération laisserait dans l'inventaire une quantité négative ou trop grande.
+
+    L'inventaire n'est alors pas modifié du tout.
+    """
+
+
+Quantites = Union[Mapping[str, int], Iterable[Tuple[str, int]]]
+"""Des quantités par nom de ressource: un dictionnaire, ou des paires (nom, quantité)."""
+
+
+class Inventaire(MutableMapping[str, int]):
+    """Inventaire du joueur: la quantité de chaque ressource, rangée par identifiant de ressource.
+
+    Les quantités sont des entiers de 64 bits dans un tableau indexé par id_ressource, où _ABSENT marque une
+    ressource que l'inventaire n'a pas; l'ordre d'arrivée des ressources est gardé à part, pour que l'inventaire
+    s'affiche et se sauvegarde comme le dictionnaire qu'il remplace. Il se lit et s'écrit d'ailleurs comme un
+    dictionnaire.
+
+    Les ajouts et retraits en nombre passent par appliquer, ajouter, retirer ou transaction, et sont appliqués
+    entièrement ou pas du tout: une quantité qui deviendrait négative ou plus grande que QUANTITE_MAXIMUM lève
+    ErreurInventaire, et l'inventaire reste tel qu'il était.
+
+    Exemples:
+        >>> inventaire = Inventaire({"or": 10})
+        >>> inventaire.ajouter([("or", 20), ("bois", 5)])
+        >>> inventaire
+        {'or': 30, 'bois': 5}
+        >>> inventaire.retirer({"or": 5, "bois": 6})
+        Traceback (most recent call last):
+        ErreurInventaire: Pas assez de bois: 5, il en faut 6.
+        >>> inventaire["or"]
+        30
+    """
+
+    __slots__ = ("_quantites", "_ordre")
+
+    def __init__(self, quantites: Quantites = ()):
+        """Initialise un nouvel inventaire.
+
+        Args:
+            quantites (Quantites): Les quantités de départ.
+
+        Raises:
+            ErreurInventaire: Si une quantité est négative ou trop grande.
+        """
+        self._quantites = tableau = array.array("q")
+        self._ordre = ordre = array.array("I")
+        if not quantites:
+            return
+        if type(quantites) is not dict and not isinstance(quantites, collections.abc.Mapping):
+            quantites = dict(quantites)
+        # L'inventaire est vide et les noms sont tous différents: chaque quantité correcte est posée directement.
+        for nom, quantite in quantites.items():
+            if not isinstance(quantite, int) or not 0 <= quantite <= QUANTITE_MAXIMUM:
+                # _appliquer lèvera l'erreur qui décrit cette quantité.
+                self._quantites = array.array("q")
+                self._ordre = array.array("I")
+                self._appliquer(quantites, 1)
+                return
+            identifiant = _IDS_RESSOURCES.get(nom)
+            if identifiant is None:
+                identifiant = id_ressource(nom)
+            if identifiant >= len(tableau):
+                tableau += _ABSENTS * (identifiant + 1 - len(tableau))
+            tableau[identifiant] = quantite
+            ordre.append(identifiant)
+
+    def __reduce__(self):
+        """Permet de copier l'inventaire avec copy et de le sérialiser avec pickle, par noms de ressources."""
+        return (type(self), (self.vers_dict(),))
+
+    def copy(self) -> "Inventaire":
+        """Donne une copie de l'inventaire."""
+        copie = type(self)()
+        copie._quantites = array.array("q", self._quantites)
+        copie._ordre = array.array("I", self._ordre)
+        return copie
+
+    def vers_dict(self) -> Dict[str, int]:
+        """Donne l'inventaire sous forme de dictionnaire, dans l'ordre d'arrivée des ressources."""
+        quantites = self._quantites
+        return {_NOMS_RESSOURCES[identifiant]: quantites[identifiant] for identifiant in self._ordre}
+
+    def __repr__(self) -> str:
+        """Représente l'inventaire comme le dictionnaire équivalent."""
+        return repr(self.vers_dict())
+
+    def __eq__(self, autre: object) -> bool:
+        """Compare l'inventaire à un autre inventaire ou à un dictionnaire."""
+        if isinstance(autre, Inventaire):
+            autre = autre.vers_dict()
+        if not isinstance(autre, collections.abc.Mapping):
+            return NotImplemented
+        return self.vers_dict() == dict(autre)
+
+    def __len__(self) -> int:
+        """Donne le nombre de ressources de l'inventaire."""
+        return len(self._ordre)
+
+    def __iter__(self) -> Iterator[str]:
+        """Parcourt les noms des ressources dans leur ordre d'arrivée."""
+        return iter([_NOMS_RESSOURCES[identifiant] for identifiant in self._ordre])
+
+    def _lire(self, nom: str) -> int:
+        """Donne la quantité d'une ressource, ou _ABSENT."""
+        identifiant = _IDS_RESSOURCES.get(nom, len(self._quantites))
+        return self._quantites[identifiant] if identifiant < len(self._quantites) else _ABSENT
+
+    def __contains__(self, nom: object) -> bool:
+        """Dit si l'inventaire a la ressource, même en quantité nulle."""
+        return self._lire(nom) != _ABSENT
+
+    def __getitem__(self, nom: str) -> int:
+        """Donne la quantité d'une ressource.
+
+        Raises:
+            KeyError: Si l'inventaire n'a pas la ressource.
+        """
+        quantite = self._lire(nom)
+        if quantite == _ABSENT:
+            raise KeyError(nom)
+        return quantite
+
+    def get(self, nom: str, defaut: Optional[int] = None) -> Optional[int]:
+        """Donne la quantité d'une ressource, ou defaut si l'inventaire ne l'a pas."""
+        quantites = self._quantites
+        identifiant = _IDS_RESSOURCES.get(nom, len(quantites))
+        quantite = quantites[identifiant] if identifiant < len(quantites) else _ABSENT
+        return defaut if quantite == _ABSENT else quantite
+
+    def __setitem__(self, nom: str, quantite: int) -> None:
+        """Remplace la quantité d'une ressource.
+
+        Raises:
+            ErreurInventaire: Si la quantité est négative ou trop grande.
+        """
+        if isinstance(quantite, int) and quantite < 0:
+            raise ErreurInventaire(f"Quantité négative pour {nom}: {quantite}.")
+        self.appliquer({nom: quantite - self.get(nom, 0)})
+
+    def __delitem__(self, nom: str) -> None:
+        """Retire une ressource de l'inventaire.
+
+        Raises:
+            KeyError: Si l'inventaire n'a pas la ressource.
+        """
+        if nom not in self:
+            raise KeyError(nom)
+        identifiant = _IDS_RESSOURCES[nom]
+        self._quantites[identifiant] = _ABSENT
+        self._ordre.remove(identifiant)
+
+    def appliquer(self, variations: Quantites) -> None:
+        """Ajoute ou retire d'un coup des quantités de ressources, toutes ou aucune.
+
+        Les variations sont appliquées dans l'ordre, et une ressource absente est ajoutée à l'inventaire, même si
+        sa variation est nulle.
+
+        Args:
+            variations (Quantites): La variation de chaque ressource, positive pour un ajout, négative pour un
+                retrait.
+
+        Raises:
+            ErreurInventaire: Si une quantité deviendrait négative ou plus grande que QUANTITE_MAXIMUM; rien
+                n'est alors modifié.
+            TypeError: Si une variation n'est pas un entier.
+
+        Exemples:
+            >>> inventaire = Inventaire({"or": 10})
+            >>> inventaire.appliquer([("or", -10), ("bois", 3), ("bois", 2)])
+            >>> inventaire
+            {'or': 0, 'bois': 5}
+        """
+        self._appliquer(variations, 0)
+
+    def _appliquer(self, variations: Quantites, signe: int) -> None:
+        """Applique des variations (signe 0), ou des quantités ajoutées (signe 1) ou retirées (signe -1), tout ou rien.
+
+        Chaque variation est vérifiée puis appliquée tout de suite; à la première erreur, les variations déjà
+        appliquées sont défaites avant de lever l'exception.
+        """
+        if type(variations) is dict:
+            paires = variations.items()
+        elif type(variations) is list or not isinstance(variations, collections.abc.Mapping):
+            paires = variations
+        else:
+            paires = variations.items()
+        quantites = self._quantites
+        ordre = self._ordre
+        taille_ordre = len(ordre)
+        ids = _IDS_RESSOURCES
+        anciennes: List[int] = []
+        try:
+            for nom, variation in paires:
+                if not isinstance(variation, int):
+                    raise TypeError(f"Quantité entière attendue pour {nom}, pas {variation!r}.")
+                if signe:
+                    if variation < 0:
+                        raise ErreurInventaire(f"Quantité négative pour {nom}: {variation}.")
+                    if signe < 0:
+                        variation = -variation
+                identifiant = ids.get(nom)
+                if identifiant is None:
+                    identifiant = id_ressource(nom)
+                if identifiant >= len(quantites):
+                    quantites += _ABSENTS * (identifiant + 1 - len(quantites))
+                avant = quantites[identifiant]
+                quantite = variation if avant == _ABSENT else avant + variation
+                if not 0 <= quantite <= QUANTITE_MAXIMUM:
+                    if quantite < 0:
+                        raise ErreurInventaire(f"Pas assez de {nom}: {max(avant, 0)}, il en faut {-variation}.")
+                    raise ErreurInventaire(f"Trop de {nom}: {quantite} dépasse {QUANTITE_MAXIMUM}.")
+                if avant == _ABSENT:
+                    ordre.append(identifiant)
+                anciennes += (identifiant, avant)
+                quantites[identifiant] = quantite
+        except BaseException:
+            for position in range(len(anciennes) - 2, -1, -2):
+                quantites[anciennes[position]] = anciennes[position + 1]
+            del ordre[taille_ordre:]
+            raise
+
+    def ajouter(self, quantites: Quantites) -> None:
+        """Ajoute d'un coup des quantités de ressources, toutes ou aucune.
+
+        Args:
+            quantites (Quantites): La quantité ajoutée de chaque ressource.
+
+        Raises:
+            ErreurInventaire: Si une quantité ajoutée est négative ou si une quantité deviendrait trop grande.
+        """
+        self._appliquer(quantites, 1)
+
+    def retirer(self, quantites: Quantites) -> None:
+        """Retire d'un coup des quantités de ressources, toutes ou aucune.
+
+        Args:
+            quantites (Quantites): La quantité retirée de chaque ressource.
+
+        Raises:
+            ErreurInventaire: Si une quantité retirée est négative ou si l'inventaire n'en a pas assez.
+        """
+        self._appliquer(quantites, -1)
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator["TransactionInventaire"]:
+        """Regroupe des ajouts et des retraits, appliqués ensemble à la fin du bloc with, tous ou aucun.
+
+        Si le bloc lève une exception, rien n'est appliqué.
+
+        Raises:
+            ErreurInventaire: Si l'ensemble des variations laisserait une quantité négative ou trop grande.
+
+        Exemples:
+            >>> with joueur.inventaire.transaction() as transaction:
+            ...     for allie in allies:
+            ...         if transaction.quantite("or") >= allie.prix:
+            ...             transaction.retirer("or", allie.prix)
+        """
+        transaction = TransactionInventaire(self)
+        yield transaction
+        self.appliquer(transaction.variations)
+
+
+class TransactionInventaire:
+    """Ajouts et retraits en attente sur un inventaire, pour Inventaire.transaction.
+
+    Attributes:
+        inventaire (Inventaire): L'inventaire de la transaction.
+        variations (Dict[str, int]): La variation en attente de chaque ressource.
+    """
+
+    __slots__ = ("inventaire", "variations")
+
+    def __init__(self, inventaire: Inventaire):
+        """Initialise une transaction vide sur un inventaire."""
+        self.inventaire = inventaire
+        self.variations: Dict[str, int] = {}
+
+    def quantite(self, nom: str) -> int:
+        """Donne la quantité d'une ressource une fois les variations en attente appliquées."""
+        return self.inventaire.get(nom, 0) + self.variations.get(nom, 0)
+
+    def ajouter(self, nom: str, quantite: int) -> None:
+        """Prévoit l'ajout d'une quantité de ressource."""
+        if quantite < 0:
+            raise ErreurInventaire(f"Quantité négative pour {nom}: {quantite}.")
+        self.variations[nom] = self.variations.get(nom, 0) + quantite
+
+    def retirer(self, nom: str, quantite: int) -> None:
+        """Prévoit le retrait d'une quantité de ressource."""
+        if quantite < 0:
+            raise ErreurInventaire(f"Quantité négative pour {nom}: {quantite}.")
+        self.variations[nom] = self.variations.get(nom, 0) - quantite
 
 
 class Joueur(Personnage):
@@ -248,7 +1039,7 @@ class Joueur(Personnage):
         nom (str): Le nom de l'avatar du joueur que le joeur à choisie au tous début du jeu.
         force (int): Les points de force de l'avatar du joueur.
         vie (int): Les points de vie du joueur. Si il n'y a plus de point de vie, le joueur est mort.
-        inventaire (Dict[str, int]): inventaire de l'avatar du joueur.
+        inventaire (Inventaire): inventaire de l'avatar du joueur. Un dictionnaire donné à la place est converti.
 
     Examples:
         >>> joueur = Joueur("Talion", 10, 100, inventaire = {"or": 0})
@@ -256,19 +1047,45 @@ class Joueur(Personnage):
         {"or": 0}
     """
 
-    def __init__(self, nom: str, force: int, vie: int, inventaire: Dict[str, int]):
+    __slots__ = ("vie", "_inventaire")
+
+    def __init__(self, nom: str, force: int, vie: int, inventaire: Union[Inventaire, Dict[str, int]]):
         """Initialises un nouveau joueur.
 
         Args:
             nom (str): Le nom de l'avatar du joueur que le joeur à choisie au tous début du jeu.
             force (int): Les points de force de l'avatar du joueur.
             vie (int): Les points de vie du joueur. Si il n'y a plus de point de vie, le joueur est mort.
-            inventaire (Dict[str, int]): inventaire de l'avatar du joueur.
+            inventaire (Union[Inventaire, Dict[str, int]]): inventaire de l'avatar du joueur.
         """
-        super().__init__(force, nom)
+        super().__init__(nom, force)
         self.vie = vie
         self.inventaire = inventaire
 
+    @property
+    def inventaire(self) -> Inventaire:
+        """L'inventaire de l'avatar du joueur."""
+        return self._inventaire
+
+    @inventaire.setter
+    def inventaire(self, inventaire: Union[Inventaire, Dict[str, int]]) -> None:
+        # type() d'abord: isinstance sur une classe abstraite est lent, et un dictionnaire est le cas courant.
+        if type(inventaire) is dict or not isinstance(inventaire, Inventaire):
+            inventaire = Inventaire(inventaire)
+        self._inventaire = inventaire
+
+    def vers_dict(self) -> Dict[str, Union[str, int, Dict[str, int]]]:
+        """Donne l'état du joueur sous forme de dictionnaire, pour la sauvegarde.
+
+        Returns:
+            Dict[str, Union[str, int, Dict[str, int]]]: Le nom, la force, la vie et l'inventaire du joueur.
+
+        Exemples:
+            >>> Joueur("Talion", 10, 100, inventaire = {"or": 0}).vers_dict()
+            {'nom': 'Talion', 'force': 10, 'vie': 100, 'inventaire': {'or': 0}}
+        """
+        return {"nom": self.nom, "force": self.force, "vie": self.vie, "inventaire": self.inventaire.vers_dict()}
+
     def afficher_lieux(self, lieux: List[Lieu]) -> None:
         """Utlise la carte pour voir tous les lieux disponible et non résolue.
 
@@ -287,9 +1104,22 @@ class Joueur(Personnage):
             Voici la liste des ennemis.
             nom: serpent géant, force: 8
         """
-        for lieu in lieux:
-            lieu.representation()
-            print("")
+        if not affichage_muet():
+            afficher("".join(f"{lieu.representation()}\n\n" for lieu in lieux), end="")
+
+    def afficher_carte(self, carte: "Carte") -> None:
+        """Utilise la carte pour voir une page des lieux disponibles, éventuellement filtrés.
+
+        Args:
+            carte (Carte): La carte, sur la page à afficher.
+
+        Exemples:
+            >>> joueur.afficher_carte(Carte(environnement.lieux, FiltreCarte(ressource="or")))
+            Carte, page 1: lieux 1 à 1 (ressource or)
+            ...
+        """
+        if not affichage_muet():
+            afficher(carte.texte(), end="")
 
     def afficher_allie(self, allies: List[Allie]) -> None:
         """Utlise le panneaux qui indique la liste des alliés disponible.
@@ -303,9 +1133,8 @@ class Joueur(Personnage):
             >>> joueur.afficher_allie(alliés)
             nom: arwen, force: 5
         """
-        for allie in allies:
-            print(allie)
-            print("")
+        if not affichage_muet():
+            afficher("".join(f"{allie}\n\n" for allie in allies), end="")
 
     def verification_inventaire(self) -> None:
         """Permet de voir l'inventaire.
@@ -315,14 +1144,19 @@ class Joueur(Personnage):
             >>> joueur.verification_inventaire()
             {"or": 0}
         """
-        print(self.inventaire)
+        afficher(self.inventaire)
 
     def ajout_objet_inventaire(self, ressources: List[Ressource]) -> None:
         """Permet de récupérer une ressource.
 
+        Toutes les ressources sont ajoutées d'un coup, ou aucune si une quantité dépasserait QUANTITE_MAXIMUM.
+
         Args:
             ressources (List[Ressource]): La liste des ressources du lieu sélectionner.
 
+        Raises:
+            ErreurInventaire: Si une quantité de l'inventaire deviendrait trop grande.
+
         Exemples:
             >>> joueur = Joueur("Talion", 10, 100, inventaire = {"or": 0})
             >>> ressources = [Ressource(or, 20, "Permet d'acheter de l'aide"), Ressource(pierres, 20, "Permet de construire de mur de pierre")]
@@ -332,12 +1166,8 @@ class Joueur(Personnage):
             {"or": 20, "pierres": 20}
 
         """
-        for ressource in ressources:
-            if ressource.nom in self.inventaire:
-                self.inventaire[ressource.nom] += ressource.quantite
-            else:
-                self.inventaire[ressource.nom] = ressource.quantite
-            print(f"Vous avez récupérer {ressource.quantite} de {ressource.nom}")
+        self._inventaire.ajouter([(ressource.nom, ressource.quantite) for ressource in ressources])
+        afficher("".join([f"Vous avez récupérer {ressource.quantite} de {ressource.nom}\n" for ressource in ressources]), end="")
 
     def payer_allie(
         self,
@@ -382,21 +1212,48 @@ class Joueur(Personnage):
             >>> joueur.force()
             15
         """
-        prix = re.search(pattern=r"(\d+) (unités d'or)", string=allie.dialogue)
+        prix = allie.prix
 
-        if not prix:
-            print("Prix non trouver donc c'est gratuit.")
+        if prix is None:
+            afficher("Prix non trouver donc c'est gratuit.")
             self.force += allie.force
             return True
-        elif int(prix.group(1)) > self.inventaire["or"]:
-            print(f"Vous n'avez pas assez d'or pour payer {allie.nom}.")
+        elif prix > self._inventaire.get("or", 0):
+            afficher(f"Vous n'avez pas assez d'or pour payer {allie.nom}.")
             return False
         else:
-            self.inventaire["or"] -= int(prix.group(1))
+            self._inventaire.retirer({"or": prix})
             self.force += allie.force
-            print("Allié payer avec succés.")
+            afficher("Allié payer avec succés.")
             return True
 
+    def payer_allies(self, allies: Iterable[Allie]) -> bool:
+        """Permet de payer plusieurs alliés d'un coup: ils sont tous recrutés, ou aucun si l'or manque pour tous.
+
+        Args:
+            allies (Iterable[Allie]): Les alliés à payer.
+
+        Returns:
+            bool: Si les alliés ont été payés.
+
+        Exemples:
+            >>> joueur = Joueur("Talion", 10, 100, inventaire = {"or": 15})
+            >>> joueur.payer_allies([arwen, aragorn])
+            Vous n'avez pas assez d'or pour payer ces 2 alliés.
+            False
+            >>> joueur.verification_inventaire()
+            {'or': 15}
+        """
+        allies = list(allies)
+        try:
+            self._inventaire.retirer({"or": sum(allie.prix or 0 for allie in allies)})
+        except ErreurInventaire:
+            afficher(f"Vous n'avez pas assez d'or pour payer ces {len(allies)} alliés.")
+            return False
+        self.force += sum(allie.force for allie in allies)
+        afficher(f"{len(allies)} alliés payés avec succès.")
+        return True
+
     def attaquer(self, force_total: int, lieu: Lieu) -> bool:
         """Permet d'attaquer tous les ennemis d'un lieu en même temps ainsi que de récupérer toutes les ressources du lieu.
 
@@ -449,28 +1306,691 @@ class Joueur(Personnage):
         """
         if self.force < force_total:
             self.vie -= force_total
-            print(
+            afficher(
                 f"Les ennemis du lieu vous ont fait {force_total} de point de dégats."
             )
             return False
         else:
-            print(
+            afficher(
                 f"Vous avez tuer tous les ennemis du lieu. Vous pouvez donc récupérer toutes les ressources du lieu."
             )
             lieu.ennemis = []
             self.ajout_objet_inventaire(lieu.ressources)
             lieu.ressources = []
-            print(f"Vous avez accomplli le lieu {lieu.nom}")
+            afficher(f"Vous avez accomplli le lieu {lieu.nom}")
             return True
 
 
-class Environnement:
-    """Cette classes représente l'environnement de jeu qui contient les informations du joueur, des alliés et des lieux.
+Nomme = TypeVar("Nomme", Allie, Lieu)
 
-    Attributes:
+
+class Repertoire(Generic[Nomme]):
+    """Classe qui représente une collection d'alliés ou de lieux indexée par leur nom.
+
+    Les éléments restent dans leur ordre d'ajout, et la recherche comme le retrait par nom se font en temps
+    constant. Le répertoire s'utilise comme une liste pour le parcours, len et remove.
+
+    Attributes:
+        retraits (List[str]): Les noms des éléments retirés, dans l'ordre des retraits. La sauvegarde
+            journalisée s'en sert pour n'écrire que ce qui a changé.
+        version (int): Augmente à chaque ajout ou retrait, pour savoir si un calcul fait sur le répertoire
+            est encore valable.
+
+    Exemples:
+        >>> lieux = Repertoire([Lieu("temple oublié", "Un temple", [], []), Lieu("forêt maudite", "Une forêt", [], [])])
+        >>> [lieu.nom for lieu in lieux]
+        ['temple oublié', 'forêt maudite']
+        >>> lieux["forêt maudite"].description
+        'Une forêt'
+        >>> lieux.retirer("temple oublié").nom
+        'temple oublié'
+        >>> len(lieux), "temple oublié" in lieux
+        (1, False)
+    """
+
+    __slots__ = ("_elements", "retraits", "version", "_index_carte")
+
+    def __init__(self, elements: Iterable[Nomme] = ()):
+        """Initialise un nouveau répertoire.
+
+        Args:
+            elements (Iterable[Nomme]): Les alliés ou les lieux du répertoire, dans l'ordre.
+
+        Raises:
+            ValueError: Si deux éléments ont le même nom.
+        """
+        self._elements: Dict[str, Nomme] = {}
+        self.retraits: List[str] = []
+        self.version = 0
+        self._index_carte: Optional["IndexCarte"] = None
+        for element in elements:
+            self.ajouter(element)
+
+    def __len__(self) -> int:
+        """Donne le nombre d'éléments du répertoire."""
+        return len(self._elements)
+
+    def __iter__(self) -> Iterator[Nomme]:
+        """Parcourt les éléments dans leur ordre d'ajout."""
+        return iter(self._elements.values())
+
+    def __contains__(self, nom: str) -> bool:
+        """Indique si un élément porte ce nom."""
+        return nom in self._elements
+
+    def __getitem__(self, nom: str) -> Nomme:
+        """Donne l'élément qui porte ce nom.
+
+        Raises:
+            KeyError: Si aucun élément ne porte ce nom.
+        """
+        return self._elements[nom]
+
+    def get(self, nom: str, defaut: Optional[Nomme] = None) -> Optional[Nomme]:
+        """Donne l'élément qui porte ce nom, ou defaut s'il n'y en a pas."""
+        return self._elements.get(nom, defaut)
+
+    def consulter(self, nom: str) -> Optional[Nomme]:
+        """Donne l'élément qui porte ce nom pour le lire sans le modifier, ou None s'il n'y en a pas."""
+        return self.get(nom)
+
+    def noms(self) -> List[str]:
+        """Donne les noms des éléments dans leur ordre d'ajout."""
+        return list(self._elements)
+
+    def ajouter(self, element: Nomme) -> None:
+        """Ajoute un élément à la fin du répertoire.
+
+        Raises:
+            ValueError: Si un élément porte déjà ce nom.
+        """
+        if element.nom in self._elements:
+            raise ValueError(f"Le nom {element.nom} est déjà utilisé.")
+        self._elements[element.nom] = element
+        self.version += 1
+
+    def retirer(self, nom: str) -> Nomme:
+        """Retire l'élément qui porte ce nom et le renvoie.
+
+        Raises:
+            KeyError: Si aucun élément ne porte ce nom.
+        """
+        element = self._elements.pop(nom)
+        self.retraits.append(nom)
+        self.version += 1
+        return element
+
+    def remove(self, element: Nomme) -> None:
+        """Retire un élément, comme list.remove.
+
+        Raises:
+            ValueError: Si l'élément n'est pas dans le répertoire.
+        """
+        if self._elements.get(element.nom) is not element:
+            raise ValueError(f"{element.nom} n'est pas dans le répertoire.")
+        del self._elements[element.nom]
+        self.retraits.append(element.nom)
+        self.version += 1
+
+
+class RepertoireSuperpose(Repertoire[Nomme]):
+    """Classe qui représente le répertoire d'une partie posé sur le répertoire partagé d'un ModeleMonde.
+
+    Le répertoire de base n'est jamais modifié: le répertoire superposé ne garde que les noms retirés, les
+    éléments ajoutés, et une copie privée de chaque élément demandé par son nom. Le jeu ne modifie un lieu
+    qu'après l'avoir obtenu par get (choix_lieux), donc sur sa copie; le parcours, qui ne sert qu'à afficher,
+    donne les éléments partagés tant qu'ils n'ont pas été copiés.
+
+    Exemples:
+        >>> modele = ModeleMonde(load_json("data.json"))
+        >>> lieux = RepertoireSuperpose(modele.lieux)
+        >>> lieux.get("temple oublié") is modele.lieux["temple oublié"]
+        False
+        >>> lieux.retirer("temple oublié").nom, len(lieux), len(modele.lieux)
+        ('temple oublié', 1, 2)
+    """
+
+    __slots__ = ("_base", "_copies", "_retires")
+
+    def __init__(self, base: Repertoire[Nomme]):
+        """Initialise un répertoire superposé, en temps constant.
+
+        Args:
+            base (Repertoire[Nomme]): Le répertoire partagé, qui ne doit plus être modifié.
+        """
+        super().__init__()
+        self._base = base
+        self._copies: Dict[str, Nomme] = {}
+        self._retires: set = set()
+
+    def _dans_base(self, nom: str) -> bool:
+        """Indique si l'élément de ce nom vient de la base et n'a pas été retiré."""
+        return nom in self._base and nom not in self._retires
+
+    def _copie(self, nom: str) -> Nomme:
+        """Donne la copie privée de l'élément de base qui porte ce nom, en la faisant si besoin."""
+        copie = self._copies.get(nom)
+        if copie is None:
+            copie = self._copies[nom] = copier_element(self._base[nom])
+        return copie
+
+    def __len__(self) -> int:
+        """Donne le nombre d'éléments du répertoire."""
+        return len(self._base) - len(self._retires) + len(self._elements)
+
+    def __iter__(self) -> Iterator[Nomme]:
+        """Parcourt les éléments dans leur ordre d'ajout, les copies privées à la place des éléments partagés."""
+        for element in self._base:
+            if element.nom not in self._retires:
+                yield self._copies.get(element.nom, element)
+        yield from list(self._elements.values())
+
+    def __contains__(self, nom: str) -> bool:
+        """Indique si un élément porte ce nom."""
+        return self._dans_base(nom) or nom in self._elements
+
+    def __getitem__(self, nom: str) -> Nomme:
+        """Donne l'élément qui porte ce nom, en copie privée s'il vient de la base.
+
+        Raises:
+            KeyError: Si aucun élément ne porte ce nom.
+        """
+        if self._dans_base(nom):
+            return self._copie(nom)
+        return self._elements[nom]
+
+    def get(self, nom: str, defaut: Optional[Nomme] = None) -> Optional[Nomme]:
+        """Donne l'élément qui porte ce nom, en copie privée s'il vient de la base, ou defaut s'il n'y en a pas."""
+        if self._dans_base(nom):
+            return self._copie(nom)
+        return self._elements.get(nom, defaut)
+
+    def consulter(self, nom: str) -> Optional[Nomme]:
+        """Donne l'élément qui porte ce nom pour le lire sans le modifier: sa copie privée s'il en a une, sinon
+        l'élément partagé, sans en faire de copie; None s'il n'y en a pas."""
+        if self._dans_base(nom):
+            return self._copies.get(nom) or self._base[nom]
+        return self._elements.get(nom)
+
+    def noms(self) -> List[str]:
+        """Donne les noms des éléments dans leur ordre d'ajout."""
+        return [nom for nom in self._base.noms() if nom not in self._retires] + list(self._elements)
+
+    def ajouter(self, element: Nomme) -> None:
+        """Ajoute un élément à la fin du répertoire.
+
+        Raises:
+            ValueError: Si un élément porte déjà ce nom.
+        """
+        if element.nom in self:
+            raise ValueError(f"Le nom {element.nom} est déjà utilisé.")
+        self._elements[element.nom] = element
+        self.version += 1
+
+    def retirer(self, nom: str) -> Nomme:
+        """Retire l'élément qui porte ce nom et le renvoie.
+
+        Raises:
+            KeyError: Si aucun élément ne porte ce nom.
+        """
+        if self._dans_base(nom):
+            element = self._copie(nom)
+            del self._copies[nom]
+            self._retires.add(nom)
+        else:
+            element = self._elements.pop(nom)
+        self.retraits.append(nom)
+        self.version += 1
+        return element
+
+    def remove(self, element: Nomme) -> None:
+        """Retire un élément, comme list.remove. L'élément partagé vaut sa copie privée.
+
+        Raises:
+            ValueError: Si l'élément n'est pas dans le répertoire.
+        """
+        nom = element.nom
+        if self._dans_base(nom):
+            present = element is self._copies.get(nom) or (nom not in self._copies and element is self._base[nom])
+        else:
+            present = self._elements.get(nom) is element
+        if not present:
+            raise ValueError(f"{nom} n'est pas dans le répertoire.")
+        self.retirer(nom)
+
+
+def copier_element(element: Nomme) -> Nomme:
+    """Fonction qui copie un allié ou un lieu, pour qu'il puisse être modifié sans toucher l'original.
+
+    Les ressources et les ennemis d'un lieu ne sont pas copiés: le jeu remplace les listes d'un lieu, mais ne
+    modifie jamais une ressource ou un ennemi.
+
+    Args:
+        element (Nomme): L'allié ou le lieu à copier.
+
+    Returns:
+        Nomme: La copie.
+    """
+    if isinstance(element, Lieu):
+        return Lieu(
+            nom=element.nom,
+            description=element.description,
+            ressources=list(element.ressources),
+            ennemis=list(element.ennemis),
+        )
+    return Allie(nom=element.nom, force=element.force, dialogue=element.dialogue)
+
+
+class RepertoireDiffere(Repertoire[Nomme]):
+    """Classe qui représente un répertoire d'alliés ou de lieux construits seulement à la première demande.
+
+    Chaque élément est d'abord gardé sous la forme de ses champs, un simple tuple, et n'est construit par la
+    fabrique que la première fois qu'on y accède ou qu'on le parcourt; il remplace alors ses champs. Un monde
+    lu en flux (voir le module chargement) ne construit ainsi que ce que les parties touchent. Le répertoire
+    se comporte pour le reste comme un Repertoire: même ordre, mêmes erreurs.
+
+    Attributes:
+        fabrique (Callable[[str, Tuple], Nomme]): Construit un élément à partir de son nom et de ses champs.
+
+    Exemples:
+        >>> allies = RepertoireDiffere(fabriquer_allie, [("arwen", (5, "Il me faut 10 unités d'or."))])
+        >>> len(allies), allies.noms()
+        (1, ['arwen'])
+        >>> allies["arwen"].prix
+        10
+    """
+
+    __slots__ = ("fabrique",)
+
+    def __init__(self, fabrique: Callable[[str, Tuple], Nomme], champs: Iterable[Tuple[str, Tuple]] = ()):
+        """Initialise le répertoire sans construire aucun élément.
+
+        Args:
+            fabrique (Callable[[str, Tuple], Nomme]): Construit un élément à partir de son nom et de ses champs.
+                Elle est gardée avec le répertoire: pour qu'il puisse être mis en cache, ce doit être une fonction
+                ou un objet du module.
+            champs (Iterable[Tuple[str, Tuple]]): Le nom et les champs de chaque élément, dans l'ordre.
+
+        Raises:
+            ValueError: Si deux éléments ont le même nom.
+        """
+        super().__init__()
+        self.fabrique = fabrique
+        for nom, valeurs in champs:
+            if nom in self._elements:
+                raise ValueError(f"Le nom {nom} est déjà utilisé.")
+            self._elements[nom] = valeurs
+            self.version += 1
+
+    def _construit(self, nom: str, valeur: Union[Tuple, Nomme]) -> Nomme:
+        """Donne l'élément de ce nom, en le construisant à partir de ses champs s'il ne l'est pas encore."""
+        if type(valeur) is tuple:
+            valeur = self._elements[nom] = self.fabrique(nom, valeur)
+        return valeur
+
+    def __iter__(self) -> Iterator[Nomme]:
+        """Parcourt les éléments dans leur ordre d'ajout, en construisant ceux qui ne le sont pas encore."""
+        for nom, valeur in self._elements.items():
+            yield self._construit(nom, valeur)
+
+    def __getitem__(self, nom: str) -> Nomme:
+        """Donne l'élément qui porte ce nom.
+
+        Raises:
+            KeyError: Si aucun élément ne porte ce nom.
+        """
+        return self._construit(nom, self._elements[nom])
+
+    def get(self, nom: str, defaut: Optional[Nomme] = None) -> Optional[Nomme]:
+        """Donne l'élément qui porte ce nom, ou defaut s'il n'y en a pas."""
+        valeur = self._elements.get(nom)
+        return defaut if valeur is None else self._construit(nom, valeur)
+
+    def retirer(self, nom: str) -> Nomme:
+        """Retire l'élément qui porte ce nom et le renvoie.
+
+        Raises:
+            KeyError: Si aucun élément ne porte ce nom.
+        """
+        self._construit(nom, self._elements[nom])
+        return super().retirer(nom)
+
+
+def fabriquer_allie(nom: str, champs: Tuple[int, str]) -> Allie:
+    """Fonction qui construit un allié d'un RepertoireDiffere à partir de sa force et de son dialogue."""
+    force, dialogue = champs
+    return Allie(nom=nom, force=force, dialogue=dialogue)
+
+
+ChampsLieu = Tuple[str, Tuple[int, ...], Tuple[int, ...]]
+"""Les champs d'un lieu pour FabriqueLieux: sa description, et les positions de ses ressources et de ses ennemis
+dans les tables de la fabrique."""
+
+
+class FabriqueLieux:
+    """Classe qui construit les lieux d'un RepertoireDiffere à partir de tables de ressources et d'ennemis.
+
+    Un lieu ne garde que les positions de ses ressources et de ses ennemis dans les tables, partagées par tous
+    les lieux: chaque ressource et chaque ennemi n'y est écrit qu'une fois.
+
+    Attributes:
+        ressources (List[Tuple[str, int, str]]): Le nom, la quantité et l'utilité de chaque ressource.
+        ennemis (List[Tuple[str, int, str]]): Le nom, la force et le dialogue de chaque ennemi.
+    """
+
+    __slots__ = ("ressources", "ennemis")
+
+    def __init__(self, ressources: List[Tuple[str, int, str]], ennemis: List[Tuple[str, int, str]]):
+        """Initialise la fabrique sur ses tables.
+
+        Args:
+            ressources (List[Tuple[str, int, str]]): Le nom, la quantité et l'utilité de chaque ressource.
+            ennemis (List[Tuple[str, int, str]]): Le nom, la force et le dialogue de chaque ennemi.
+        """
+        self.ressources = ressources
+        self.ennemis = ennemis
+
+    def __call__(self, nom: str, champs: ChampsLieu) -> Lieu:
+        """Construit le lieu de ce nom, avec des ressources et des ennemis neufs."""
+        description, positions_ressources, positions_ennemis = champs
+        return Lieu(
+            nom=nom,
+            description=description,
+            ressources=[Ressource(*self.ressources[position]) for position in positions_ressources],
+            ennemis=[Ennemi(*self.ennemis[position]) for position in positions_ennemis],
+        )
+
+
+class IndexCarte:
+    """Classe qui représente les index d'un répertoire de lieux, pour en afficher des pages filtrées.
+
+    Les lieux sont repérés par leur position dans le répertoire au moment de la construction. Les index ne
+    tiennent pas compte des retraits: la Carte vérifie pour chaque lieu s'il est encore dans le répertoire et
+    s'il passe encore le filtre. Un index est construit une fois par répertoire, et celui d'un répertoire
+    partagé sert à tous les RepertoireSuperpose posés dessus.
+
+    Attributes:
+        noms (List[str]): Les noms des lieux, par position.
+        noms_tries (List[str]): Les noms des lieux, dans l'ordre alphabétique.
+        positions_par_nom (List[int]): Les positions des lieux, dans l'ordre alphabétique de leur nom.
+        forces (List[int]): La force totale des ennemis de chaque lieu, dans l'ordre croissant.
+        positions_par_force (List[int]): Les positions des lieux, dans l'ordre croissant de leur force.
+        par_ressource (Dict[str, List[int]]): Pour chaque nom de ressource, les positions des lieux qui l'ont.
+        ajouts (int): Le nombre d'ajouts du répertoire indexé au moment de la construction.
+    """
+
+    __slots__ = (
+        "noms",
+        "noms_tries",
+        "positions_par_nom",
+        "forces",
+        "positions_par_force",
+        "par_ressource",
+        "ajouts",
+    )
+
+    def __init__(self, lieux: Repertoire[Lieu]):
+        """Construit les index d'un répertoire de lieux, en temps n log n.
+
+        Args:
+            lieux (Repertoire[Lieu]): Le répertoire à indexer.
+        """
+        self.noms: List[str] = []
+        forces = []
+        self.par_ressource: Dict[str, List[int]] = {}
+        for position, lieu in enumerate(lieux):
+            self.noms.append(lieu.nom)
+            forces.append(lieu.force_ennemis)
+            for nom in {ressource.nom for ressource in lieu.ressources}:
+                self.par_ressource.setdefault(nom, []).append(position)
+        self.positions_par_nom = sorted(range(len(self.noms)), key=self.noms.__getitem__)
+        self.noms_tries = [self.noms[position] for position in self.positions_par_nom]
+        self.positions_par_force = sorted(range(len(forces)), key=forces.__getitem__)
+        self.forces = [forces[position] for position in self.positions_par_force]
+        self.ajouts = lieux.version - len(lieux.retraits)
+
+    @staticmethod
+    def de(lieux: Repertoire[Lieu]) -> "IndexCarte":
+        """Donne l'index d'un répertoire de lieux, construit à la première demande puis gardé.
+
+        L'index est refait si des lieux ont été ajoutés au répertoire depuis sa construction.
+
+        Args:
+            lieux (Repertoire[Lieu]): Le répertoire des lieux.
+
+        Returns:
+            IndexCarte: L'index du répertoire, ou celui de sa base pour un RepertoireSuperpose sans ajout.
+        """
+        if isinstance(lieux, RepertoireSuperpose) and not lieux._elements:
+            lieux = lieux._base
+        index = lieux._index_carte
+        if index is None or index.ajouts != lieux.version - len(lieux.retraits):
+            index = lieux._index_carte = IndexCarte(lieux)
+        return index
+
+
+class FiltreCarte:
+    """Classe qui représente les conditions que doit remplir un lieu pour être affiché sur la carte.
+
+    Attributes:
+        ressource (Optional[str]): Le nom d'une ressource que le lieu doit avoir.
+        force_max (Optional[int]): La force totale des ennemis du lieu à ne pas dépasser.
+        prefixe (Optional[str]): Le début du nom du lieu.
+
+    Exemples:
+        >>> str(FiltreCarte(ressource="or", force_max=10))
+        'ressource or, force au plus 10'
+    """
+
+    __slots__ = ("ressource", "force_max", "prefixe")
+
+    def __init__(
+        self,
+        ressource: Optional[str] = None,
+        force_max: Optional[int] = None,
+        prefixe: Optional[str] = None,
+    ):
+        """Initialise un filtre; un filtre sans condition accepte tous les lieux.
+
+        Args:
+            ressource (Optional[str]): Le nom d'une ressource que le lieu doit avoir.
+            force_max (Optional[int]): La force totale des ennemis du lieu à ne pas dépasser.
+            prefixe (Optional[str]): Le début du nom du lieu.
+        """
+        self.ressource = ressource
+        self.force_max = force_max
+        self.prefixe = prefixe
+
+    def est_vide(self) -> bool:
+        """Indique si le filtre accepte tous les lieux."""
+        return self.ressource is None and self.force_max is None and not self.prefixe
+
+    def accepte(self, lieu: Lieu) -> bool:
+        """Indique si un lieu remplit les conditions du filtre."""
+        return (
+            (not self.prefixe or lieu.nom.startswith(self.prefixe))
+            and (self.force_max is None or lieu.force_ennemis <= self.force_max)
+            and (self.ressource is None or any(ressource.nom == self.ressource for ressource in lieu.ressources))
+        )
+
+    def __str__(self) -> str:
+        """Décrit les conditions du filtre."""
+        conditions = []
+        if self.prefixe:
+            conditions.append(f"nom commençant par {self.prefixe}")
+        if self.ressource is not None:
+            conditions.append(f"ressource {self.ressource}")
+        if self.force_max is not None:
+            conditions.append(f"force au plus {self.force_max}")
+        return ", ".join(conditions)
+
+
+class Carte:
+    """Classe qui représente la carte des lieux, affichée page par page et éventuellement filtrée.
+
+    Une page est trouvée grâce à l'IndexCarte du répertoire: son calcul ne dépend que de la taille de la page
+    et des lieux retirés ou écartés par le filtre en chemin, pas de la taille de la carte. Les lieux filtrés
+    par leur nom sont donnés dans l'ordre alphabétique, ceux filtrés par leur force dans l'ordre croissant de
+    force, les autres dans l'ordre de la carte.
+
+    Attributes:
+        lieux (Repertoire[Lieu]): Les lieux de la partie.
+        filtre (FiltreCarte): Le filtre des lieux affichés.
+        taille_page (int): Le nombre de lieux par page.
+
+    Exemples:
+        >>> carte = Carte(environnement.lieux, FiltreCarte(force_max=10), taille_page=1)
+        >>> [lieu.nom for lieu in carte.page()]
+        ['temple oublié']
+        >>> carte.suivante()
+        False
+    """
+
+    __slots__ = ("lieux", "filtre", "taille_page", "_index", "_debuts", "_page")
+
+    def __init__(
+        self,
+        lieux: Repertoire[Lieu],
+        filtre: Optional[FiltreCarte] = None,
+        taille_page: int = TAILLE_PAGE_CARTE,
+    ):
+        """Initialise la carte sur sa première page.
+
+        Args:
+            lieux (Repertoire[Lieu]): Les lieux de la partie.
+            filtre (Optional[FiltreCarte]): Le filtre des lieux affichés; par défaut, tous les lieux.
+            taille_page (int): Le nombre de lieux par page.
+        """
+        self.lieux = lieux
+        self.taille_page = taille_page
+        self.filtrer(filtre or FiltreCarte())
+
+    def filtrer(self, filtre: FiltreCarte) -> None:
+        """Change le filtre de la carte et revient à la première page."""
+        self.filtre = filtre
+        self._index: Optional[IndexCarte] = None
+        self._debuts: List[int] = []
+        self._page: Optional[Tuple[int, List[Lieu], Optional[int]]] = None
+
+    def _parcours(self) -> Tuple[IndexCarte, Sequence[int], int, int]:
+        """Donne l'index, la suite des positions à parcourir et ses bornes, selon l'index le plus sélectif."""
+        index = IndexCarte.de(self.lieux)
+        if self.filtre.prefixe:
+            debut = bisect.bisect_left(index.noms_tries, self.filtre.prefixe)
+            # Les noms qui commencent par le préfixe se suivent dans l'ordre alphabétique.
+            fin = bisect.bisect_left(index.noms_tries, self.filtre.prefixe + "\U0010ffff", lo=debut)
+            return index, index.positions_par_nom, debut, fin
+        if self.filtre.force_max is not None:
+            return index, index.positions_par_force, 0, bisect.bisect_right(index.forces, self.filtre.force_max)
+        if self.filtre.ressource is not None:
+            positions = index.par_ressource.get(self.filtre.ressource, [])
+            return index, positions, 0, len(positions)
+        return index, range(len(index.noms)), 0, len(index.noms)
+
+    def _suivant(
+        self, index: IndexCarte, positions: Sequence[int], curseur: int, fin: int
+    ) -> Tuple[Optional[Lieu], int]:
+        """Donne le prochain lieu présent qui passe le filtre à partir du curseur, et le curseur qui le suit."""
+        while curseur < fin:
+            lieu = self.lieux.consulter(index.noms[positions[curseur]])
+            curseur += 1
+            if lieu is not None and self.filtre.accepte(lieu):
+                return lieu, curseur
+        return None, curseur
+
+    def page(self) -> List[Lieu]:
+        """Donne les lieux de la page courante.
+
+        Returns:
+            List[Lieu]: Au plus taille_page lieux, présents dans le répertoire et acceptés par le filtre.
+        """
+        index, positions, debut, fin = self._parcours()
+        if index is not self._index:
+            # Un nouvel index (des lieux ont été ajoutés) change les positions: retour à la première page.
+            self._index = index
+            self._debuts = []
+            self._page = None
+        if not self._debuts:
+            self._debuts.append(debut)
+        curseur = self._debuts[-1]
+        if self._page is not None and self._page[0] == curseur:
+            lieux = self._page[1]
+            if all(self.lieux.consulter(lieu.nom) is lieu and self.filtre.accepte(lieu) for lieu in lieux):
+                return lieux
+        lieux = []
+        while len(lieux) < self.taille_page:
+            lieu, curseur = self._suivant(index, positions, curseur, fin)
+            if lieu is None:
+                break
+            lieux.append(lieu)
+        # Le début de la page suivante est le prochain lieu accepté, s'il y en a un.
+        prochain, apres = self._suivant(index, positions, curseur, fin)
+        self._page = (self._debuts[-1], lieux, apres - 1 if prochain is not None else None)
+        return lieux
+
+    def a_suivante(self) -> bool:
+        """Indique s'il y a une page après la page courante."""
+        self.page()
+        return self._page[2] is not None
+
+    def suivante(self) -> bool:
+        """Passe à la page suivante, s'il y en a une.
+
+        Returns:
+            bool: Si la page a changé.
+        """
+        if not self.a_suivante():
+            return False
+        self._debuts.append(self._page[2])
+        return True
+
+    def precedente(self) -> bool:
+        """Revient à la page précédente, s'il y en a une.
+
+        Returns:
+            bool: Si la page a changé.
+        """
+        if len(self._debuts) <= 1:
+            return False
+        self._debuts.pop()
+        return True
+
+    def numero_page(self) -> int:
+        """Donne le numéro de la page courante, à partir de 1."""
+        return max(len(self._debuts), 1)
+
+    def texte(self) -> str:
+        """Donne le texte de la page courante: la représentation de chaque lieu, suivie d'une ligne vide.
+
+        Quand toute la carte tient sur une page sans filtre, le texte est le même que celui de afficher_lieux;
+        sinon il commence par le numéro de la page et le filtre.
+
+        Returns:
+            str: Le texte de la page.
+        """
+        lieux = self.page()
+        corps = "".join(f"{lieu.representation()}\n\n" for lieu in lieux)
+        if self.numero_page() == 1 and not self.a_suivante() and self.filtre.est_vide():
+            return corps
+        premier = (self.numero_page() - 1) * self.taille_page + 1
+        entete = f"Carte, page {self.numero_page()}"
+        if lieux:
+            entete += f": lieux {premier} à {premier + len(lieux) - 1}"
+        if not self.filtre.est_vide():
+            entete += f" ({self.filtre})"
+        if not lieux:
+            corps = "Aucun lieu ne correspond au filtre.\n\n"
+        suite = "Page suivante avec :+.\n" if self.a_suivante() else "Dernière page.\n"
+        return f"{entete}\n\n{corps}{suite}"
+
+
+class Environnement:
+    """Cette classes représente l'environnement de jeu qui contient les informations du joueur, des alliés et des lieux.
+
+    Attributes:
         joueur (Joueur): Un objet de type joueur qui correspond à l'avatar du joueur.
-        allies (List[Allies]): Liste d'objet de type allies qui correspond à tous les alliés disponible dans la guilde des alliés.
-        lieux (List[Lieu]): Liste d'objets de type lieu qui correspond à tous les lieux disponible sur la carte.
+        allies (Repertoire[Allie]): Répertoire des alliés disponibles dans la guilde des alliés, indexé par nom.
+        lieux (Repertoire[Lieu]): Répertoire des lieux disponibles sur la carte, indexé par nom.
 
     Exemples:
         >>> joueur = Joueur("Talion", 10, 100, inventaire = {"or": 0})
@@ -483,17 +2003,431 @@ class Environnement:
         100
     """
 
-    def __init__(self, joueur: Joueur, allies: List[Allie], lieux: List[Lieu]):
+    def __init__(
+        self,
+        joueur: Joueur,
+        allies: Union[Iterable[Allie], Repertoire[Allie]],
+        lieux: Union[Iterable[Lieu], Repertoire[Lieu]],
+    ):
         """Initialise un nouveau environnement.
 
         Args:
             joueur (Joueur): Un objet de type joueur qui correspond à l'avatar du joueur.
-            allies (List[Allies]): Liste d'objet de type allies qui correspond à tous les alliés disponible dans la guilde des alliés.
-            lieux (List[Lieu]): Liste d'objets de type lieu qui correspond à tous les lieux disponible sur la carte.
+            allies (Union[Iterable[Allie], Repertoire[Allie]]): Les alliés disponibles dans la guilde des alliés.
+            lieux (Union[Iterable[Lieu], Repertoire[Lieu]]): Les lieux disponibles sur la carte.
+
+        Raises:
+            ValueError: Si deux alliés ou deux lieux ont le même nom.
         """
         self.joueur = joueur
-        self.allies = allies
-        self.lieux = lieux
+        self.allies = allies if isinstance(allies, Repertoire) else Repertoire(allies)
+        self.lieux = lieux if isinstance(lieux, Repertoire) else Repertoire(lieux)
+        self._table_prix: List[Tuple[int, int, Allie]] = []
+        self._prix_tries: List[int] = []
+        self._version_table_prix: Tuple[Optional[Repertoire[Allie]], int] = (None, -1)
+        self._abordables: Optional[Tuple[int, List[Allie]]] = None
+        self._plan: Optional["Plan"] = None
+        self._etat_plan: Optional[Tuple] = None
+
+    def allies_abordables(self, inventaire: Optional[Dict[str, int]] = None) -> List[Allie]:
+        """Donne les alliés que l'on peut payer avec l'or d'un inventaire.
+
+        Les alliés sont rangés une fois pour toutes par prix dans une table, refaite seulement quand le
+        répertoire des alliés change; chaque appel ne fait ensuite qu'une recherche par dichotomie. La
+        réponse pour la dernière quantité d'or demandée est gardée jusqu'au prochain changement de la table.
+
+        Args:
+            inventaire (Optional[Dict[str, int]]): L'inventaire qui paye; par défaut celui du joueur.
+
+        Returns:
+            List[Allie]: Les alliés gratuits ou dont le prix ne dépasse pas l'or de l'inventaire, dans l'ordre
+            du répertoire des alliés.
+
+        Exemples:
+            >>> environnement = nouvel_environnement(load_json("data.json"), "Talion")
+            >>> environnement.allies_abordables({"or": 5})
+            []
+            >>> [allie.nom for allie in environnement.allies_abordables({"or": 10})]
+            ['arwen']
+        """
+        if inventaire is None:
+            inventaire = self.joueur.inventaire
+        if self._version_table_prix != (self.allies, self.allies.version):
+            self._table_prix = sorted(
+                (allie.prix or 0, position, allie) for position, allie in enumerate(self.allies)
+            )
+            self._prix_tries = [prix for prix, _, _ in self._table_prix]
+            self._version_table_prix = (self.allies, self.allies.version)
+            self._abordables = None
+        or_disponible = inventaire.get("or", 0)
+        if self._abordables is None or self._abordables[0] != or_disponible:
+            nombre = bisect.bisect_right(self._prix_tries, or_disponible)
+            abordables = [allie for _, allie in sorted((position, allie) for _, position, allie in self._table_prix[:nombre])]
+            self._abordables = (or_disponible, abordables)
+        return list(self._abordables[1])
+
+    def conseil(self) -> "Plan":
+        """Donne l'ordre de recrutements et d'attaques conseillé pour la suite de la partie.
+
+        Le plan est calculé par planifier_route, puis gardé tant que les répertoires des alliés et des lieux,
+        la force, la vie et l'or du joueur ne changent pas.
+
+        Returns:
+            Plan: Le plan conseillé.
+        """
+        joueur = self.joueur
+        etat = (
+            self.allies,
+            self.allies.version,
+            self.lieux,
+            self.lieux.version,
+            joueur.force,
+            joueur.vie,
+            joueur.inventaire.get("or", 0),
+        )
+        if self._etat_plan != etat:
+            self._plan = planifier_route(self)
+            self._etat_plan = etat
+        return self._plan
+
+    def vers_dict(self) -> Dict[str, Union[Dict, List[Dict]]]:
+        """Donne tout l'état de la partie sous forme de dictionnaire, dans le format du fichier de sauvegarde.
+
+        Returns:
+            Dict[str, Union[Dict, List[Dict]]]: Le joueur, les alliés et les lieux.
+        """
+        return {
+            "joueur": self.joueur.vers_dict(),
+            "allies": [allie.vers_dict() for allie in self.allies],
+            "lieux": [lieu.vers_dict() for lieu in self.lieux],
+        }
+
+
+class Plan:
+    """Classe qui représente un ordre conseillé de recrutements et d'attaques.
+
+    Attributes:
+        actions (List[Tuple[str, str]]): Les actions dans l'ordre, ("recruter", nom de l'allié) ou
+            ("attaquer", nom du lieu).
+        victoire (bool): Si le plan accomplit tous les lieux.
+        lieux_accomplis (int): Le nombre de lieux accomplis à la fin du plan.
+        nombre_lieux (int): Le nombre de lieux restants avant le plan.
+        vie (int): Les points de vie du joueur à la fin du plan.
+        or_restant (int): L'or du joueur à la fin du plan.
+        exact (bool): Si le plan est sûrement le meilleur, False si la recherche a été arrêtée avant la fin.
+
+    Exemples:
+        >>> print(environnement.conseil().texte())
+        Conseil pour gagner avec 100 points de vie et 10 d'or:
+        1. attaquer temple oublié
+        2. recruter arwen
+        3. attaquer forêt maudite
+    """
+
+    __slots__ = ("actions", "victoire", "lieux_accomplis", "nombre_lieux", "vie", "or_restant", "exact")
+
+    def __init__(
+        self,
+        actions: List[Tuple[str, str]],
+        victoire: bool,
+        lieux_accomplis: int,
+        nombre_lieux: int,
+        vie: int,
+        or_restant: int,
+        exact: bool = True,
+    ):
+        """Initialise un nouveau plan."""
+        self.actions = actions
+        self.victoire = victoire
+        self.lieux_accomplis = lieux_accomplis
+        self.nombre_lieux = nombre_lieux
+        self.vie = vie
+        self.or_restant = or_restant
+        self.exact = exact
+
+    def texte(self) -> str:
+        """Donne le plan tel qu'il est affiché au joueur.
+
+        Returns:
+            str: Le bilan du plan, puis ses actions numérotées, une par ligne.
+        """
+        if self.victoire:
+            bilan = f"Conseil pour gagner avec {self.vie} points de vie et {self.or_restant} d'or:"
+        else:
+            bilan = (
+                f"Aucun ordre ne permet de gagner. Au mieux, {self.lieux_accomplis} lieux sur {self.nombre_lieux}"
+                f" accomplis, avec {self.or_restant} d'or:"
+            )
+        if not self.exact:
+            bilan += " (le meilleur trouvé, il peut y avoir mieux)"
+        lignes = [bilan] + [f"{numero}. {action} {nom}" for numero, (action, nom) in enumerate(self.actions, 1)]
+        return "\n".join(lignes)
+
+
+LIMITE_ETATS_PLAN = 20_000
+"""Le nombre d'états que le planificateur parcourt au plus, pour que le conseil reste instantané même quand les
+alliés rendent la recherche exponentielle. Quelques dizaines d'états suffisent pour les mondes habituels."""
+
+Recrutes = Tuple[int, ...]
+"""Un état du planificateur: le nombre d'alliés recrutés dans chaque classe."""
+
+
+class PlanificateurRoute:
+    """Cherche l'ordre de recrutements et d'attaques qui gagne en gardant le plus de vie, puis le plus d'or.
+
+    Une attaque gagnée ne coûte rien et rapporte l'or du lieu, et une attaque perdue coûte de la vie sans rien
+    changer d'autre: le meilleur ordre n'attaque donc un lieu que pour le gagner, et attaque chaque lieu dès
+    que la force du joueur le permet. La vie du joueur ne change alors jamais, et les lieux accomplis ne
+    dépendent que de la force, donc des alliés recrutés. Le seul choix est celui des alliés et de leur ordre.
+
+    La recherche est un parcours des alliés recrutés, par séparation et évaluation:
+        - les alliés de même force et de même prix sont interchangeables et regroupés en classes, et un état
+          ne retient que le nombre d'alliés recrutés dans chaque classe; la force, l'or et les lieux accomplis
+          s'en déduisent, et la suite de la partie aussi: chaque état n'est parcouru qu'une fois, quel que
+          soit l'ordre des recrutements qui y mène;
+        - une classe n'est recrutée que quand toutes les classes au moins aussi fortes et pas plus chères
+          sont épuisées: les échanger ne rend jamais le plan moins bon;
+        - dès que tous les lieux sont accomplis, aucun recrutement de plus n'est envisagé;
+        - un état n'est pas parcouru si même la fin la plus optimiste qu'il permet n'est pas meilleure que
+          le meilleur plan déjà trouvé. Cette fin suppose que tous les alliés restants sont recrutés pour la
+          force, et que la force qui manque pour gagner est payée au meilleur rapport force sur prix des
+          alliés restants, comme si on pouvait en recruter une fraction;
+        - les recrutements au meilleur rapport force sur prix sont essayés d'abord, pour trouver vite un bon
+          plan.
+
+    Attributes:
+        force (int): La force du joueur au départ.
+        vie (int): La vie du joueur au départ.
+        or_depart (int): L'or du joueur au départ.
+        classes (List[Tuple[int, int, List[str]]]): Pour chaque classe d'alliés, la force, le prix et les noms.
+        forces_lieux (List[int]): La force des ennemis de chaque lieu, en ordre croissant.
+        noms_lieux (List[str]): Les noms des lieux, dans le même ordre.
+        or_cumule (List[int]): L'or rapporté par les k premiers lieux, pour k de 0 au nombre de lieux.
+        limite_etats (int): Le nombre d'états parcourus au-delà duquel la recherche s'arrête.
+    """
+
+    def __init__(self, environnement: Environnement, limite_etats: int = LIMITE_ETATS_PLAN):
+        """Prépare le problème à partir de l'état d'une partie.
+
+        Args:
+            environnement (Environnement): La partie, telle qu'elle est au moment du conseil.
+            limite_etats (int, optional): Le nombre d'états parcourus au-delà duquel la recherche s'arrête et
+                donne le meilleur plan trouvé. Par défaut, LIMITE_ETATS_PLAN.
+        """
+        joueur = environnement.joueur
+        self.limite_etats = limite_etats
+        self.force = joueur.force
+        self.vie = joueur.vie
+        self.or_depart = joueur.inventaire.get("or", 0)
+        classes: Dict[Tuple[int, int], List[str]] = {}
+        for allie in environnement.allies:
+            # Un allié sans force ne fait que coûter: il n'est jamais conseillé.
+            if allie.force > 0:
+                classes.setdefault((allie.force, allie.prix or 0), []).append(allie.nom)
+        self.classes = [(force, prix, noms) for (force, prix), noms in classes.items()]
+        self._dominantes = [
+            [
+                autre
+                for autre, (force_autre, prix_autre, _) in enumerate(self.classes)
+                if autre != indice and force_autre >= force and prix_autre <= prix
+            ]
+            for indice, (force, prix, _) in enumerate(self.classes)
+        ]
+        lieux = sorted(
+            (lieu.force_ennemis, position, lieu.nom, sum(r.quantite for r in lieu.ressources if r.nom == "or"))
+            for position, lieu in enumerate(environnement.lieux)
+        )
+        self.forces_lieux = [force for force, _, _, _ in lieux]
+        self.noms_lieux = [nom for _, _, nom, _ in lieux]
+        self.or_cumule = [0]
+        for _, _, _, or_lieu in lieux:
+            self.or_cumule.append(self.or_cumule[-1] + or_lieu)
+        # Les classes dans l'ordre où les essayer: la force la moins chère d'abord.
+        self._ordre = sorted(range(len(self.classes)), key=lambda i: (self.classes[i][1] / self.classes[i][0], i))
+
+    def _bilan(self, recrutes: Recrutes) -> Tuple[int, int, int]:
+        """Donne la force, le nombre de lieux accomplis et l'or du joueur dans un état."""
+        force = self.force
+        depense = 0
+        for nombre, (force_classe, prix, _) in zip(recrutes, self.classes):
+            force += nombre * force_classe
+            depense += nombre * prix
+        accomplis = bisect.bisect_right(self.forces_lieux, force)
+        return force, accomplis, self.or_depart + self.or_cumule[accomplis] - depense
+
+    def _suivants(self, recrutes: Recrutes, or_: int) -> List[Tuple[int, Recrutes]]:
+        """Donne les recrutements utiles et possibles depuis un état, avec l'état où chacun mène."""
+        suivants = []
+        for indice in self._ordre:
+            _, prix, noms = self.classes[indice]
+            if recrutes[indice] == len(noms) or prix > or_:
+                continue
+            if any(recrutes[autre] < len(self.classes[autre][2]) for autre in self._dominantes[indice]):
+                continue
+            suivants.append((indice, recrutes[:indice] + (recrutes[indice] + 1,) + recrutes[indice + 1 :]))
+        return suivants
+
+    def _borne(self, recrutes: Recrutes, force: int, accomplis: int, or_: int) -> Tuple[bool, int, int, int]:
+        """Donne la fin la plus optimiste que permet un état, pour écarter ceux qui ne peuvent pas mieux faire."""
+        force_maximum = force
+        for nombre, (force_classe, _, noms) in zip(recrutes, self.classes):
+            force_maximum += (len(noms) - nombre) * force_classe
+        accomplis_maximum = bisect.bisect_right(self.forces_lieux, force_maximum)
+        victoire = accomplis_maximum == len(self.forces_lieux)
+        manque = self.forces_lieux[-1] - force if victoire and self.forces_lieux else 0
+        recrues = sum(recrutes) + (manque > 0)
+        cout = 0
+        for indice in self._ordre:
+            if manque <= 0:
+                break
+            force_classe, prix, noms = self.classes[indice]
+            disponibles = len(noms) - recrutes[indice]
+            if disponibles * force_classe >= manque:
+                # Le prix entier le plus bas d'une fraction d'allié.
+                cout += -(-manque * prix // force_classe)
+                break
+            cout += disponibles * prix
+            manque -= disponibles * force_classe
+        or_maximum = or_ + self.or_cumule[accomplis_maximum] - self.or_cumule[accomplis] - cout
+        return victoire, accomplis_maximum, or_maximum, -recrues
+
+    def _chercher(self) -> Tuple[Tuple[bool, int, int, int], Optional[Tuple], bool]:
+        """Parcourt les états depuis le départ et donne la meilleure fin, avec les recrutements qui y mènent.
+
+        Le parcours est en profondeur avec une pile, pour ne pas dépendre de la limite de récursion quand il
+        y a beaucoup d'alliés à recruter. Les recrutements d'un état sont gardés en liste chaînée
+        (recrutements précédents, indice de la classe), pour ne pas copier tout le chemin à chaque état.
+
+        Returns:
+            Tuple[Tuple[bool, int, int, int], Optional[Tuple], bool]: La meilleure fin (victoire, lieux accomplis,
+            or, opposé du nombre de recrues), la liste chaînée des recrutements, None s'il n'y en a aucun, et
+            False si la recherche a atteint limite_etats avant la fin.
+        """
+        nombre_lieux = len(self.forces_lieux)
+        meilleur: Optional[Tuple[bool, int, int, int]] = None
+        chemin_meilleur: Optional[Tuple] = None
+        vus: Set[Recrutes] = set()
+        pile: List[Tuple[Recrutes, Optional[Tuple]]] = [((0,) * len(self.classes), None)]
+        while pile:
+            recrutes, chemin = pile.pop()
+            if recrutes in vus:
+                continue
+            # Un état écarté le reste: le meilleur plan trouvé ne fait que s'améliorer.
+            vus.add(recrutes)
+            force, accomplis, or_ = self._bilan(recrutes)
+            fin = (accomplis == nombre_lieux, accomplis, or_, -sum(recrutes))
+            if meilleur is None or fin > meilleur:
+                meilleur, chemin_meilleur = fin, chemin
+            if fin[0] or self._borne(recrutes, force, accomplis, or_) <= meilleur:
+                continue
+            if len(vus) >= self.limite_etats:
+                return meilleur, chemin_meilleur, False
+            for indice, suivant in reversed(self._suivants(recrutes, or_)):
+                if suivant not in vus:
+                    pile.append((suivant, (chemin, indice)))
+        assert meilleur is not None
+        return meilleur, chemin_meilleur, True
+
+    def planifier(self) -> Plan:
+        """Donne le meilleur plan depuis l'état de départ.
+
+        Returns:
+            Plan: Les actions à faire dans l'ordre, et où elles mènent.
+        """
+        (victoire, accomplis_fin, or_fin, _), chemin, exact = self._chercher()
+        indices: List[int] = []
+        while chemin is not None:
+            chemin, indice = chemin
+            indices.append(indice)
+        recrutes: Recrutes = (0,) * len(self.classes)
+        actions: List[Tuple[str, str]] = []
+        accomplis = 0
+        for indice in reversed(indices + [-1]):
+            if indice >= 0:
+                actions.append(("recruter", self.classes[indice][2][recrutes[indice]]))
+                recrutes = recrutes[:indice] + (recrutes[indice] + 1,) + recrutes[indice + 1 :]
+            _, nouveaux, _ = self._bilan(recrutes)
+            actions.extend(("attaquer", nom) for nom in self.noms_lieux[accomplis:nouveaux])
+            accomplis = nouveaux
+        return Plan(actions, victoire, accomplis_fin, len(self.forces_lieux), self.vie, or_fin, exact)
+
+
+def planifier_route(environnement: Environnement) -> Plan:
+    """Fonction qui conseille un ordre de recrutements et d'attaques pour l'état actuel d'une partie.
+
+    Voir PlanificateurRoute. Environnement.conseil garde le plan tant que la partie ne change pas.
+
+    Args:
+        environnement (Environnement): La partie.
+
+    Returns:
+        Plan: Le plan qui gagne en gardant le plus de vie puis le plus d'or, ou, si aucun ne gagne, celui qui
+        accomplit le plus de lieux.
+
+    Exemples:
+        >>> plan = planifier_route(nouvel_environnement(load_json("data.json"), "Talion"))
+        >>> plan.actions
+        [('attaquer', 'temple oublié'), ('recruter', 'arwen'), ('attaquer', 'forêt maudite')]
+    """
+    return PlanificateurRoute(environnement).planifier()
+
+
+class ErreurChargement(ValueError):
+    """Erreur levée quand un fichier de monde est mal formé, avec l'endroit exact de chaque problème.
+
+    Attributes:
+        fichier (str): Le fichier en cause.
+        ligne (int): La ligne du premier problème, à partir de 1.
+        colonne (int): La colonne du premier problème, à partir de 1.
+        chemin (Optional[str]): L'élément en cause, par exemple "lieux[12].ennemis", vide pour la racine; None
+            s'il n'est pas connu.
+        message (str): La description du premier problème.
+        erreurs (List[Tuple[int, int, Optional[str], str]]): Chaque problème, dans l'ordre du fichier: sa ligne,
+            sa colonne, son chemin et sa description. Le premier est celui des attributs ci-dessus.
+    """
+
+    AFFICHEES = 20
+    """Le nombre d'erreurs détaillées dans le message; toutes restent dans erreurs."""
+
+    def __init__(
+        self,
+        fichier: str,
+        ligne: int,
+        colonne: int,
+        chemin: Optional[str],
+        message: str,
+        suivantes: Sequence[Tuple[int, int, Optional[str], str]] = (),
+    ):
+        """Initialise l'erreur.
+
+        Args:
+            fichier (str): Le fichier en cause.
+            ligne (int): La ligne du problème, à partir de 1.
+            colonne (int): La colonne du problème, à partir de 1.
+            chemin (Optional[str]): L'élément en cause, ou None s'il n'est pas connu.
+            message (str): La description du problème.
+            suivantes (Sequence[Tuple[int, int, Optional[str], str]]): Les problèmes trouvés après celui-ci,
+                avec leur ligne, leur colonne, leur chemin et leur description.
+        """
+        erreurs = [(ligne, colonne, chemin, message), *suivantes]
+        lignes = [f"{fichier}:{ligne}:{colonne}: {message}{self._dans(chemin)}"]
+        if suivantes:
+            lignes = [f"{fichier}: {len(erreurs)} erreurs"]
+            lignes += [
+                f"    {fichier}:{ligne}:{colonne}: {message}{self._dans(chemin)}"
+                for ligne, colonne, chemin, message in erreurs[: self.AFFICHEES]
+            ]
+            if len(erreurs) > self.AFFICHEES:
+                lignes.append(f"    ... et {len(erreurs) - self.AFFICHEES} autres")
+        super().__init__("\n".join(lignes))
+        self.fichier = fichier
+        self.ligne, self.colonne, self.chemin, self.message = erreurs[0]
+        self.erreurs = erreurs
+
+    @staticmethod
+    def _dans(chemin: Optional[str]) -> str:
+        """Désigne l'élément en cause à la fin d'un message, s'il est connu."""
+        return "" if chemin is None else f" (dans {chemin or 'la racine'})"
 
 
 def load_json(
@@ -502,65 +2436,398 @@ def load_json(
     """Fonction qui permet de charger des données à partir d'un fichier json.
 
     Args:
-        filename (str): Le nom du fichier à partir duquel il faut charger les données.
+        filename (str): Le nom du fichier à partir duquel il faut charger les données.
+
+    Returns:
+        Dict[str, List[Dict[str, Union[str, List[str], int]]]]: Un dictionnaire qui contient
+        trois liste de dictionnaire, le premier pour les lieux, le deuxiéme pour les
+        personnages et le troisiéme pour les ressources.
+
+    Raises:
+        FileNotFoundError: Quand le fichier n'a pas été trouver.
+        ErreurChargement: Si il y a une erreur dans le json du fichier charger, avec sa ligne et sa colonne.
+
+    Exemples:
+        >>> data = load_json("data.json")
+        >>> print(data)
+        {
+            "lieux": [
+                {"nom": "Temple Oublié", "description": "Un temple envahi par la végétation", "ressources": ["or", "pierres"], "ennemis": ["serpent géant"]},
+                {"nom": "Forêt Maudite", "description": "Une forêt sombre et mystérieuse", "ressources": ["bois", "herbes"], "ennemis": ["loup spectral"]}
+            ],
+            "personnages": [
+                {"nom": "Arwen", "type": "allié", "force": 5, "dialogue": "Je peux t'aider à explorer, mais il me faut 10 unités d'or."},
+                {"nom": "Serpent Géant", "type": "ennemi", "force": 8, "dialogue": "Sssss... Tu ne passeras pas !"}
+            ],
+            "ressources": [
+                {"nom": "or", "quantite": 20, "utilite": "Acheter de l'aide"},
+                {"nom": "bois", "quantite": 10, "utilite": "Construire des abris"}
+            ]
+        }
+        >>> data = load_json("d")
+        Traceback (most recent call last):
+            ...
+        FileNotFoundError: f"Le fichier {filename} n'a pas été trouver."
+        Si il y a une erreur dans le fichier json.
+        >>> data = load_json("data.json")
+        Traceback (most recent call last):
+            ...
+        ErreurChargement: data.json:5:18: Expecting ',' delimiter
+    """
+    try:
+        with open(file=filename, mode="r", encoding="utf-8") as fichier:
+            data = json.load(fichier)
+    except FileNotFoundError as e:
+        afficher(f"Le fichier {filename} n'a pas été trouver.")
+        return {}
+    except json.JSONDecodeError as e:
+        raise ErreurChargement(filename, e.lineno, e.colno, None, e.msg) from None
+    return data
+
+
+_MASQUE_CREATION = os.umask(0)
+os.umask(_MASQUE_CREATION)
+"""Le masque de création des fichiers du processus. os.umask ne se lit qu'en le changeant, ce qui n'est sûr
+qu'avant que des fils d'exécution créent des fichiers: il est donc lu une fois, à l'import."""
+
+
+def ecrire_atomiquement(chemin: str, contenu: Union[str, bytes], synchroniser: bool = True) -> None:
+    """Fonction qui remplace le contenu d'un fichier d'un seul coup.
+
+    Le contenu est écrit dans un fichier temporaire à côté du fichier visé, puis renommé par-dessus: après un
+    arrêt brutal, le fichier a soit l'ancien contenu, soit le nouveau, jamais un mélange. Chaque écriture a
+    son propre fichier temporaire: plusieurs processus peuvent écrire le même fichier en même temps, et le
+    dernier renommage gagne. Le fichier garde ses droits d'accès; un nouveau fichier a ceux que donnerait open().
+
+    Args:
+        chemin (str): Le fichier à écrire.
+        contenu (Union[str, bytes]): Le nouveau contenu du fichier, texte en utf-8 ou binaire.
+        synchroniser (bool): Si les données doivent être forcées sur le disque avant de rendre la main.
+    """
+    # Import local: tempfile coûte plus à importer que tout ce module, et ne sert qu'aux écritures.
+    import tempfile
+
+    if isinstance(contenu, str):
+        contenu = contenu.encode("utf-8")
+    repertoire = os.path.dirname(os.path.abspath(chemin))
+    descripteur, temporaire = tempfile.mkstemp(dir=repertoire, prefix=os.path.basename(chemin) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(descripteur, "wb") as fichier:
+            # mkstemp crée le fichier temporaire lisible par son seul propriétaire, et os.replace garde ces droits.
+            try:
+                mode = os.stat(chemin).st_mode & 0o7777
+            except FileNotFoundError:
+                mode = 0o666 & ~_MASQUE_CREATION
+            os.chmod(temporaire, mode)
+            fichier.write(contenu)
+            fichier.flush()
+            if synchroniser:
+                os.fsync(fichier.fileno())
+        os.replace(temporaire, chemin)
+    except BaseException:
+        os.unlink(temporaire)
+        raise
+    if synchroniser and hasattr(os, "O_DIRECTORY"):
+        dossier = os.open(repertoire, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dossier)
+        finally:
+            os.close(dossier)
+
+
+def est_instantane(filename: str) -> bool:
+    """Fonction qui indique si un fichier de sauvegarde est un instantané binaire plutôt qu'un fichier json.
+
+    Args:
+        filename (str): Le fichier de sauvegarde.
+
+    Returns:
+        bool: Si le fichier commence par la signature des instantanés binaires.
+    """
+    try:
+        with open(filename, "rb") as fichier:
+            return fichier.read(len(MAGIE_INSTANTANE)) == MAGIE_INSTANTANE
+    except FileNotFoundError:
+        return False
+
+
+COMPRESSIONS: Dict[str, bytes] = {"gzip": b"\x1f\x8b", "xz": b"\xfd7zXZ\x00"}
+"""Les compressions possibles d'une sauvegarde json, toutes de la bibliothèque standard, avec les premiers
+octets qui les font reconnaître à la relecture."""
+
+FORMAT_REFERENCES = "references"
+"""La valeur de la clé "format" d'une sauvegarde dont les ressources et les ennemis sont désignés par référence."""
+
+
+class VarianteSauvegarde:
+    """Classe qui représente une façon d'écrire une sauvegarde json.
+
+    Les variantes se combinent, et charger_sauvegarde les relit toutes sans qu'on lui dise laquelle:
+        - compact: le json est écrit sans indentation ni espaces;
+        - references: chaque ressource et chaque ennemi n'est écrit qu'une fois, dans les tables "ressources"
+          et "ennemis" du document, et un lieu donne la position des siens dans ces tables: le dialogue d'un
+          ennemi présent dans cent lieux n'est plus écrit cent fois. Le document porte "format": "references";
+        - compression: le fichier est compressé avec gzip ou xz, reconnus à leurs premiers octets.
+
+    Attributes:
+        compact (bool): Si le json est écrit sans indentation ni espaces.
+        references (bool): Si les ressources et les ennemis sont écrits une fois et désignés par leur position.
+        compression (Optional[str]): Une des COMPRESSIONS, ou None pour ne pas compresser.
+
+    Exemples:
+        >>> variante = VarianteSauvegarde(compact=True, references=True, compression="gzip")
+        >>> sauvegarder_partie("partie.json.gz", environnement, variante)
+        >>> restaurer_environnement(charger_sauvegarde("partie.json.gz")).joueur.nom
+        'Talion'
+    """
+
+    __slots__ = ("compact", "references", "compression")
+
+    def __init__(self, compact: bool = False, references: bool = False, compression: Optional[str] = None):
+        """Initialise une variante; sans argument, celle des sauvegardes habituelles, indentées.
+
+        Raises:
+            ValueError: Si la compression n'est pas une des COMPRESSIONS.
+        """
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"La compression {compression} n'existe pas: {', '.join(COMPRESSIONS)}.")
+        self.compact = compact
+        self.references = references
+        self.compression = compression
+
+    def __repr__(self) -> str:
+        """Donne la variante telle qu'on la construit."""
+        return (
+            f"VarianteSauvegarde(compact={self.compact}, references={self.references}, "
+            f"compression={self.compression!r})"
+        )
+
+    def __eq__(self, autre: object) -> bool:
+        """Deux variantes sont égales si elles écrivent les mêmes fichiers."""
+        if not isinstance(autre, VarianteSauvegarde):
+            return NotImplemented
+        return (self.compact, self.references, self.compression) == (autre.compact, autre.references, autre.compression)
+
+    def encoder(self, donnees: Dict[str, Union[Dict, List[Dict]]]) -> bytes:
+        """Donne le contenu du fichier de sauvegarde d'une partie.
+
+        Args:
+            donnees (Dict[str, Union[Dict, List[Dict]]]): La partie, telle que la donne Environnement.vers_dict.
+
+        Returns:
+            bytes: Le contenu du fichier.
+        """
+        if self.references:
+            donnees = avec_references(donnees)
+        if self.compact:
+            texte = json.dumps(donnees, ensure_ascii=False, separators=(",", ":"))
+        else:
+            texte = json.dumps(donnees, ensure_ascii=False, indent=2)
+        contenu = texte.encode("utf-8")
+        # Des niveaux de compression moyens: les plus forts triplent le temps d'écriture pour gagner 15 %.
+        if self.compression == "gzip":
+            # Import local: gzip et lzma ne sont chargés que pour les sauvegardes compressées.
+            import gzip
+
+            contenu = gzip.compress(contenu, compresslevel=6, mtime=0)
+        elif self.compression == "xz":
+            import lzma
+
+            contenu = lzma.compress(contenu, preset=1)
+        return contenu
+
+    @classmethod
+    def detecter(cls, filename: str) -> Optional["VarianteSauvegarde"]:
+        """Reconnaît la variante d'une sauvegarde json à ses premiers octets, sans lire tout le fichier.
+
+        Args:
+            filename (str): Le fichier de sauvegarde.
+
+        Returns:
+            Optional[VarianteSauvegarde]: La variante du fichier, ou None s'il n'existe pas.
+        """
+        try:
+            with open(filename, "rb") as fichier:
+                debut = fichier.read(64)
+        except FileNotFoundError:
+            return None
+        compression = next((nom for nom, signature in COMPRESSIONS.items() if debut.startswith(signature)), None)
+        if compression is not None:
+            with _ouvrir_compresse(filename, compression) as fichier:
+                debut = fichier.read(64)
+        # Le document commence par la clé "format" quand il y en a une: vers_dict ne l'a pas, avec_references
+        # la met en premier.
+        entete = debut.decode("utf-8", errors="replace")
+        compact = not entete.startswith("{\n")
+        references = "".join(entete.split()).startswith(f'{{"format":"{FORMAT_REFERENCES}"')
+        return cls(compact=compact, references=references, compression=compression)
+
+
+def _ouvrir_compresse(filename: str, compression: str):
+    """Ouvre en lecture un fichier compressé avec gzip ou xz."""
+    # Import local: gzip et lzma ne sont chargés que pour les sauvegardes compressées.
+    if compression == "gzip":
+        import gzip
+
+        return gzip.open(filename, "rb")
+    import lzma
+
+    return lzma.open(filename, "rb")
+
+
+def avec_references(donnees: Dict[str, Union[Dict, List[Dict]]]) -> Dict[str, Union[str, Dict, List]]:
+    """Fonction qui écrit une seule fois chaque ressource et chaque ennemi d'une partie (voir VarianteSauvegarde).
+
+    Args:
+        donnees (Dict[str, Union[Dict, List[Dict]]]): La partie, telle que la donne Environnement.vers_dict.
+
+    Returns:
+        Dict[str, Union[str, Dict, List]]: Le document de la sauvegarde, avec les tables "ressources" et "ennemis".
+
+    Exemples:
+        >>> avec_references(environnement.vers_dict())["lieux"][0]
+        {'nom': 'temple oublié', 'description': 'Un temple envahi par la végétation', 'ressources': [0, 1], 'ennemis': [0]}
+    """
+    tables: Dict[str, List[Dict]] = {"ressources": [], "ennemis": []}
+    positions: Dict[str, Dict[Tuple, int]] = {"ressources": {}, "ennemis": {}}
+    lieux = []
+    for lieu in donnees["lieux"]:
+        lieu = dict(lieu)
+        for cle in ("ressources", "ennemis"):
+            table = tables[cle]
+            position = positions[cle]
+            indices = []
+            for element in lieu[cle]:
+                valeurs = tuple(element.values())
+                indice = position.get(valeurs)
+                if indice is None:
+                    indice = position[valeurs] = len(table)
+                    table.append(element)
+                indices.append(indice)
+            lieu[cle] = indices
+        lieux.append(lieu)
+    return {
+        "format": FORMAT_REFERENCES,
+        "joueur": donnees["joueur"],
+        "allies": donnees["allies"],
+        "ressources": tables["ressources"],
+        "ennemis": tables["ennemis"],
+        "lieux": lieux,
+    }
+
+
+def sans_references(document: Dict[str, Union[str, Dict, List]]) -> Dict[str, Union[Dict, List[Dict]]]:
+    """Fonction qui remet une sauvegarde écrite avec avec_references au format de Environnement.vers_dict.
+
+    Les lieux qui désignent la même ressource ou le même ennemi partagent le même dictionnaire.
+
+    Args:
+        document (Dict[str, Union[str, Dict, List]]): Le document de la sauvegarde.
+
+    Returns:
+        Dict[str, Union[Dict, List[Dict]]]: La partie, comme la donne Environnement.vers_dict.
+
+    Raises:
+        ValueError: Si un lieu désigne une ressource ou un ennemi qui n'est pas dans les tables.
+    """
+    ressources = document["ressources"]
+    ennemis = document["ennemis"]
+    lieux = []
+    try:
+        for lieu in document["lieux"]:
+            lieu = dict(lieu)
+            lieu["ressources"] = [ressources[indice] for indice in lieu["ressources"]]
+            lieu["ennemis"] = [ennemis[indice] for indice in lieu["ennemis"]]
+            lieux.append(lieu)
+    except (IndexError, TypeError) as e:
+        raise ValueError(f"Le lieu {lieu['nom']} désigne une ressource ou un ennemi inconnu.") from e
+    return {"joueur": document["joueur"], "allies": document["allies"], "lieux": lieux}
+
+
+def decoder_sauvegarde(contenu: bytes) -> Dict[str, Union[Dict, List[Dict]]]:
+    """Fonction qui lit le contenu d'une sauvegarde json, quelle que soit sa variante.
+
+    Args:
+        contenu (bytes): Le contenu du fichier.
+
+    Returns:
+        Dict[str, Union[Dict, List[Dict]]]: La partie, comme la donne Environnement.vers_dict.
+
+    Raises:
+        JSONDecodeError: Si le contenu n'est pas du json.
+        ValueError: Si le document a un format inconnu.
+    """
+    if contenu.startswith(COMPRESSIONS["gzip"]):
+        # Import local: gzip et lzma ne sont chargés que pour les sauvegardes compressées.
+        import gzip
+
+        contenu = gzip.decompress(contenu)
+    elif contenu.startswith(COMPRESSIONS["xz"]):
+        import lzma
+
+        contenu = lzma.decompress(contenu)
+    document = json.loads(contenu)
+    format_document = document.get("format")
+    if format_document is None:
+        return document
+    if format_document == FORMAT_REFERENCES:
+        return sans_references(document)
+    raise ValueError(f"Le format de sauvegarde {format_document} est inconnu.")
+
+
+def charger_sauvegarde(filename: str) -> Dict[str, Union[Dict, List[Dict]]]:
+    """Fonction qui lit une sauvegarde json, quelle que soit sa variante (voir VarianteSauvegarde).
+
+    Args:
+        filename (str): Le fichier de sauvegarde.
 
     Returns:
-        Dict[str, List[Dict[str, Union[str, List[str], int]]]]: Un dictionnaire qui contient
-        trois liste de dictionnaire, le premier pour les lieux, le deuxiéme pour les
-        personnages et le troisiéme pour les ressources.
+        Dict[str, Union[Dict, List[Dict]]]: La partie, comme la donne Environnement.vers_dict, à donner à
+        restaurer_environnement.
 
     Raises:
-        FileNotFoundError: Quand le fichier n'a pas été trouver.
-        JSONDecodeError: Si il y a une erreur dans le json du fichier charger.
+        FileNotFoundError: Quand le fichier n'a pas été trouvé.
+        JSONDecodeError: Si le fichier n'est pas du json.
+        ValueError: Si le document a un format inconnu.
+    """
+    with open(filename, "rb") as fichier:
+        return decoder_sauvegarde(fichier.read())
 
-    Exemples:
-        >>> data = load_json("data.json")
-        >>> print(data)
-        {
-            "lieux": [
-                {"nom": "Temple Oublié", "description": "Un temple envahi par la végétation", "ressources": ["or", "pierres"], "ennemis": ["serpent géant"]},
-                {"nom": "Forêt Maudite", "description": "Une forêt sombre et mystérieuse", "ressources": ["bois", "herbes"], "ennemis": ["loup spectral"]}
-            ],
-            "personnages": [
-                {"nom": "Arwen", "type": "allié", "force": 5, "dialogue": "Je peux t'aider à explorer, mais il me faut 10 unités d'or."},
-                {"nom": "Serpent Géant", "type": "ennemi", "force": 8, "dialogue": "Sssss... Tu ne passeras pas !"}
-            ],
-            "ressources": [
-                {"nom": "or", "quantite": 20, "utilite": "Acheter de l'aide"},
-                {"nom": "bois", "quantite": 10, "utilite": "Construire des abris"}
-            ]
-        }
-        >>> data = load_json("d")
-        Traceback (most recent call last):
-            ...
-        FileNotFoundError: f"Le fichier {filename} n'a pas été trouver."
-        Si il y a une erreur dans le fichier json.
-        >>> data = load_json("data.json")
-        Traceback (most recent call last):
-            ...
-        JSONDecodeError: f"Erreur de décodage : {e}"
+
+VARIANTE_PAR_DEFAUT = VarianteSauvegarde()
+"""La variante des sauvegardes json quand aucune n'est demandée: indentées, sans références ni compression."""
+
+
+def ecrire_donnees_sauvegarde(
+    filename: str,
+    donnees: Dict[str, Union[Dict, List[Dict]]],
+    variante: VarianteSauvegarde = VARIANTE_PAR_DEFAUT,
+) -> None:
+    """Fonction qui écrit une sauvegarde json à partir des données d'une partie.
+
+    Args:
+        filename (str): nom du fichier de sauvegarde.
+        donnees (Dict[str, Union[Dict, List[Dict]]]): La partie, telle que la donne Environnement.vers_dict.
+        variante (VarianteSauvegarde, optional): Comment écrire le json. Par défaut, indenté.
     """
-    try:
-        with open(file=filename, mode="r", encoding="utf-8") as fichier:
-            data = json.load(fichier)
-    except FileNotFoundError as e:
-        print(f"Le fichier {filename} n'a pas été trouver.")
-        return {}
-    except json.JSONDecodeError as e:
-        print(f"Erreur de décodage : {e}")
-        return {}
-    return data
+    ecrire_atomiquement(filename, variante.encoder(donnees))
 
 
 def sauvegarder_partie(
     filename: str,
     environnement: Environnement,
+    variante: VarianteSauvegarde = VARIANTE_PAR_DEFAUT,
 ) -> None:
     """Fonction qui permet de sauvegarder la partie dans un fichier.
 
+    Le fichier est remplacé d'un seul coup avec ecrire_atomiquement: un arrêt pendant la sauvegarde laisse
+    l'ancienne sauvegarde intacte.
+
     Args:
         filename (str): nom du fichier de sauvegarde.
         environnement (Environnement): L'environnement qui contient tous les informations sur le joeur, les alliés et les lieux.
+        variante (VarianteSauvegarde, optional): Comment écrire le json: compact, par références, compressé
+            (voir VarianteSauvegarde). Par défaut, indenté comme ci-dessous.
 
     Exemples:
         >>> filename = "fichier_sauvegarde"
@@ -574,8 +2841,8 @@ def sauvegarder_partie(
         Le résultats dans le fichier est le suivant:
         {
             "joueur": {
-                "nom": 10,
-                "force": "Talion",
+                "nom": "Talion",
+                "force": 10,
                 "vie": 100,
                 "inventaire": {
                 "or": 0
@@ -610,267 +2877,754 @@ def sauvegarder_partie(
             ]
         }
     """
-    dict_allies = [allie.__dict__ for allie in environnement.allies]
-    dict_lieux = []
-    for lieu in environnement.lieux:
-        ressources = lieu.ressources
-        ennemis = lieu.ennemis
-        dict_ressources = [ressource.__dict__ for ressource in ressources]
-        dict_ennemis = [ennemi.__dict__ for ennemi in ennemis]
-        dict_lieux.append(
-            {
-                "nom": lieu.nom,
-                "description": lieu.description,
-                "ressources": dict_ressources,
-                "ennemis": dict_ennemis,
-            }
-        )
-    dict_environnement = {
-        "joueur": environnement.joueur.__dict__,
-        "allies": dict_allies,
-        "lieux": dict_lieux,
-    }
-    with open(file=filename, mode="w", encoding="utf-8") as fichier:
-        json.dump(dict_environnement, fichier, ensure_ascii=False, indent=2)
+    ecrire_donnees_sauvegarde(filename, environnement.vers_dict(), variante)
 
 
-def creation_environnement(
-    filename: str,
+def restaurer_environnement(
+    environnement_dict: Dict[str, Union[Dict, List[Dict]]],
 ) -> Environnement:
-    """Fonction qui permet de créer l'objet environnement correspondant à l'avancer du jeu.
+    """Fonction qui permet de recréer l'environnement d'une partie à partir des données d'une sauvegarde.
 
     Args:
-        filename (str): Le fichier qui contient les informations du jeu.
+        environnement_dict (Dict[str, Union[Dict, List[Dict]]]): Le contenu du fichier de sauvegarde.
 
     Returns:
         Environnement: Objet qui contient toutes les informations de joueur, d'alliés et de lieux.
 
     Exemples:
-        >>> filename = data.json
-        >>> creation_environnement(filename)
-        Veuillez choisir un nom. Attention vous ne pourrez pas le changer.
-        Talion
-        >>> environnement = creation_environnement(filename)
+        >>> environnement = restaurer_environnement(load_json("partie_sauvegarder.json"))
         >>> print(environnement.joueur.nom)
         Talion
     """
-    if os.path.exists("partie_sauvegarder.json"):
-        environnement_dict = load_json("partie_sauvegarder.json")
-        dict_joueur = environnement_dict["joueur"]
-        joueur = Joueur(
-            nom=dict_joueur["nom"],
-            vie=dict_joueur["vie"],
-            force=dict_joueur["force"],
-            inventaire=dict_joueur["inventaire"],
+    dict_joueur = environnement_dict["joueur"]
+    nom, force = dict_joueur["nom"], dict_joueur["force"]
+    if isinstance(force, str) and not isinstance(nom, str):
+        # Les sauvegardes écrites avant la correction de Joueur.__init__ ont le nom et la force inversés.
+        nom, force = force, nom
+    joueur = Joueur(
+        nom=nom,
+        vie=dict_joueur["vie"],
+        force=force,
+        inventaire=dict_joueur["inventaire"],
+    )
+    dict_allies = environnement_dict["allies"]
+    allies = [
+        Allie(
+            nom=allie["nom"],
+            force=allie["force"],
+            dialogue=allie["dialogue"],
         )
-        dict_allies = environnement_dict["allies"]
-        allies = [
-            Allie(
-                nom=allie["nom"],
-                force=allie["force"],
-                dialogue=allie["dialogue"],
+        for allie in dict_allies
+    ]
+    dict_lieux = environnement_dict["lieux"]
+    ressources = []
+    ennemis = []
+    lieux = []
+    for lieu in dict_lieux:
+        ressources = [
+            Ressource(
+                nom=ressource["nom"],
+                quantite=ressource["quantite"],
+                utilite=ressource["utilite"],
             )
-            for allie in dict_allies
+            for ressource in lieu["ressources"]
         ]
-        dict_lieux = environnement_dict["lieux"]
-        ressources = []
-        ennemis = []
-        lieux = []
-        for lieu in dict_lieux:
-            ressources = [
-                Ressource(
-                    nom=ressource["nom"],
-                    quantite=ressource["quantite"],
-                    utilite=ressource["utilite"],
-                )
-                for ressource in lieu["ressources"]
-            ]
-            ennemis = [
-                Ennemi(
-                    nom=ennemi["nom"],
-                    force=ennemi["force"],
-                    dialogue=ennemi["dialogue"],
-                )
-                for ennemi in lieu["ennemis"]
-            ]
-            lieux.append(
-                Lieu(
-                    nom=lieu["nom"],
-                    description=lieu["description"],
-                    ressources=ressources,
-                    ennemis=ennemis,
-                )
+        ennemis = [
+            Ennemi(
+                nom=ennemi["nom"],
+                force=ennemi["force"],
+                dialogue=ennemi["dialogue"],
             )
-
-        environnement = Environnement(joueur=joueur, allies=allies, lieux=lieux)
-    else:
-        print("Veuillez choisir un nom. Attention vous ne pourrez pas le changer.")
-        environnement_dict = load_json(filename)
-        nom = input()
-        joueur = Joueur(nom=nom, vie=100, force=10, inventaire={"or": 0})
-        personnages = environnement_dict["personnages"]
-        allies = [
-            Allie(
-                nom=personnage["nom"].lower(),
-                force=personnage["force"],
-                dialogue=personnage["dialogue"],
-            )
-            for personnage in personnages
-            if personnage["type"] == "allié"
+            for ennemi in lieu["ennemis"]
         ]
-        lieux = [
+        lieux.append(
+            Lieu(
+                nom=lieu["nom"],
+                description=lieu["description"],
+                ressources=ressources,
+                ennemis=ennemis,
+            )
+        )
+
+    return Environnement(joueur=joueur, allies=allies, lieux=lieux)
+
+
+def index_par_nom(noms: Iterable[str]) -> Dict[str, List[int]]:
+    """Fonction qui indexe des éléments par leur nom.
+
+    Args:
+        noms (Iterable[str]): Le nom de chaque élément, dans l'ordre.
+
+    Returns:
+        Dict[str, List[int]]: Pour chaque nom, les positions des éléments qui le portent, dans l'ordre.
+
+    Exemples:
+        >>> index_par_nom(["or", "bois", "or"])
+        {'or': [0, 2], 'bois': [1]}
+    """
+    index: Dict[str, List[int]] = {}
+    for position, nom in enumerate(noms):
+        index.setdefault(nom, []).append(position)
+    return index
+
+
+def positions_jointes(index: Dict[str, List[int]], noms: Iterable[str]) -> List[int]:
+    """Fonction qui donne les positions des éléments dont le nom fait partie de noms.
+
+    Le résultat est le même qu'un parcours de tous les éléments qui garde ceux dont le nom est dans noms:
+    chaque élément apparaît une seule fois, dans l'ordre des éléments, quel que soit l'ordre de noms.
+
+    Args:
+        index (Dict[str, List[int]]): L'index construit par index_par_nom.
+        noms (Iterable[str]): Les noms recherchés.
+
+    Returns:
+        List[int]: Les positions des éléments trouvés, triées.
+
+    Exemples:
+        >>> positions_jointes({'or': [0, 2], 'bois': [1]}, ["bois", "or", "or"])
+        [0, 1, 2]
+    """
+    trouvees = [position for nom in set(noms) for position in index.get(nom, ())]
+    trouvees.sort()
+    return trouvees
+
+
+def nouveau_joueur(nom: str) -> Joueur:
+    """Fonction qui crée l'avatar du joueur au début d'une nouvelle partie.
+
+    Args:
+        nom (str): Le nom de l'avatar du joueur.
+
+    Returns:
+        Joueur: L'avatar, avec 10 points de force, 100 points de vie et un inventaire sans or.
+    """
+    return Joueur(nom=nom, vie=100, force=10, inventaire={"or": 0})
+
+
+def nouvel_environnement(
+    environnement_dict: Dict[str, List[Dict[str, Union[str, List[str], int]]]],
+    nom: str,
+) -> Environnement:
+    """Fonction qui permet de créer l'environnement d'une nouvelle partie à partir des données du jeu.
+
+    Les ressources et les ennemis de chaque lieu sont retrouvés par des index de noms construits une fois
+    pour toutes: la création est linéaire en la taille des données.
+
+    Args:
+        environnement_dict (Dict[str, List[Dict[str, Union[str, List[str], int]]]]): Les données du jeu
+            chargées avec load_json.
+        nom (str): Le nom de l'avatar du joueur.
+
+    Returns:
+        Environnement: Objet qui contient toutes les informations de joueur, d'alliés et de lieux.
+
+    Exemples:
+        >>> environnement = nouvel_environnement(load_json("data.json"), "Talion")
+        >>> print(environnement.joueur.nom, environnement.joueur.force, environnement.joueur.vie)
+        Talion 10 100
+    """
+    joueur = nouveau_joueur(nom)
+    personnages = environnement_dict["personnages"]
+    allies = [
+        Allie(
+            nom=personnage["nom"].lower(),
+            force=personnage["force"],
+            dialogue=personnage["dialogue"],
+        )
+        for personnage in personnages
+        if personnage["type"] == "allié"
+    ]
+    ressources = environnement_dict["ressources"]
+    index_ressources = index_par_nom(ressource["nom"] for ressource in ressources)
+    ennemis = [personnage for personnage in personnages if personnage["type"] == "ennemi"]
+    noms_ennemis = [ennemi["nom"].lower() for ennemi in ennemis]
+    index_ennemis = index_par_nom(noms_ennemis)
+    lieux = []
+    for lieu in environnement_dict["lieux"]:
+        lieux.append(
             Lieu(
                 nom=lieu["nom"].lower(),
                 description=lieu["description"],
                 ressources=[
                     Ressource(
-                        nom=ressource["nom"],
-                        quantite=ressource["quantite"],
-                        utilite=ressource["utilite"],
+                        nom=ressources[position]["nom"],
+                        quantite=ressources[position]["quantite"],
+                        utilite=ressources[position]["utilite"],
                     )
-                    for ressource in environnement_dict["ressources"]
-                    if ressource["nom"] in lieu["ressources"]
+                    for position in positions_jointes(index_ressources, lieu["ressources"])
                 ],
                 ennemis=[
                     Ennemi(
-                        nom=personnage["nom"].lower(),
-                        force=personnage["force"],
-                        dialogue=personnage["dialogue"],
+                        nom=noms_ennemis[position],
+                        force=ennemis[position]["force"],
+                        dialogue=ennemis[position]["dialogue"],
                     )
-                    for personnage in personnages
-                    if personnage["type"] == "ennemi"
-                    and personnage["nom"].lower() in lieu["ennemis"]
+                    for position in positions_jointes(index_ennemis, lieu["ennemis"])
                 ],
             )
-            for lieu in environnement_dict["lieux"]
-        ]
-        environnement = Environnement(joueur=joueur, allies=allies, lieux=lieux)
+        )
+    return Environnement(joueur=joueur, allies=allies, lieux=lieux)
+
+
+class ModeleMonde:
+    """Classe qui représente un monde partagé par toutes les parties qui le jouent.
+
+    Les alliés et les lieux du modèle sont construits une fois, tous d'un coup ou chacun à sa première demande
+    (voir depuis_champs), et ne sont jamais modifiés. Chaque partie les voit à travers des RepertoireSuperpose,
+    qui ne gardent que ce que cette partie a changé: démarrer une partie ne coûte rien de plus que l'avatar du
+    joueur.
+
+    Attributes:
+        allies (Repertoire[Allie]): Les alliés du monde, partagés.
+        lieux (Repertoire[Lieu]): Les lieux du monde, partagés.
+
+    Exemples:
+        >>> modele = ModeleMonde(load_json("data.json"))
+        >>> environnement = modele.nouvelle_partie("Talion")
+        >>> len(environnement.lieux), environnement.joueur.vie
+        (2, 100)
+    """
+
+    __slots__ = ("allies", "lieux")
+
+    def __init__(self, environnement_dict: Dict[str, List[Dict[str, Union[str, List[str], int]]]]):
+        """Construit les alliés et les lieux du monde.
+
+        Args:
+            environnement_dict (Dict[str, List[Dict[str, Union[str, List[str], int]]]]): Les données du jeu
+                chargées avec load_json.
+        """
+        environnement = nouvel_environnement(environnement_dict, "")
+        self.allies = environnement.allies
+        self.lieux = environnement.lieux
+
+    @classmethod
+    def depuis_champs(
+        cls,
+        allies: Iterable[Tuple[str, Tuple[int, str]]],
+        lieux: Iterable[Tuple[str, ChampsLieu]],
+        ressources: List[Tuple[str, int, str]],
+        ennemis: List[Tuple[str, int, str]],
+    ) -> "ModeleMonde":
+        """Construit le modèle d'un monde donné par les champs de ses éléments, sans construire ses éléments.
+
+        Les alliés et les lieux sont gardés dans des RepertoireDiffere: chacun n'est construit qu'à sa première
+        demande, par une partie ou par le parcours de la carte. C'est ainsi que construire_modele bâtit le
+        monde lu en flux par le module chargement.
+
+        Args:
+            allies (Iterable[Tuple[str, Tuple[int, str]]]): Le nom, puis la force et le dialogue de chaque allié.
+            lieux (Iterable[Tuple[str, ChampsLieu]]): Le nom et les champs de chaque lieu (voir FabriqueLieux).
+            ressources (List[Tuple[str, int, str]]): La table des ressources des lieux.
+            ennemis (List[Tuple[str, int, str]]): La table des ennemis des lieux.
+
+        Returns:
+            ModeleMonde: Le modèle du monde.
+
+        Raises:
+            ValueError: Si deux alliés ou deux lieux ont le même nom.
+        """
+        modele = cls.__new__(cls)
+        modele.allies = RepertoireDiffere(fabriquer_allie, allies)
+        modele.lieux = RepertoireDiffere(FabriqueLieux(ressources, ennemis), lieux)
+        return modele
+
+    def nouvelle_partie(self, nom: str) -> Environnement:
+        """Crée l'environnement d'une nouvelle partie sur ce monde, en temps constant.
+
+        Args:
+            nom (str): Le nom de l'avatar du joueur.
+
+        Returns:
+            Environnement: Objet qui contient toutes les informations de joueur, d'alliés et de lieux.
+        """
+        return Environnement(
+            joueur=nouveau_joueur(nom),
+            allies=RepertoireSuperpose(self.allies),
+            lieux=RepertoireSuperpose(self.lieux),
+        )
+
+
+_MODELES: Dict[str, Tuple[int, ModeleMonde]] = {}
+
+
+def construire_modele(filename: str) -> ModeleMonde:
+    """Fonction qui lit un fichier de monde en flux, le vérifie et construit son modèle.
+
+    Le fichier est lu élément par élément par chargement.MondeFlux, sans jamais être entier en mémoire, et
+    chaque élément est vérifié avec schema.SCHEMA_MONDE dès qu'il est lu. Les alliés et les lieux ne sont
+    construits qu'à leur première demande (voir ModeleMonde.depuis_champs).
+
+    Args:
+        filename (str): Le fichier qui contient les informations du jeu.
+
+    Returns:
+        ModeleMonde: Le monde construit.
+
+    Raises:
+        FileNotFoundError: Quand le fichier n'a pas été trouvé.
+        ErreurChargement: Si le monde est mal formé ou ne respecte pas schema.SCHEMA_MONDE, avec la ligne, la
+            colonne et le chemin de chaque erreur.
+    """
+    # Import local: le module chargement importe ce module.
+    from chargement import MondeFlux
+
+    monde = MondeFlux(filename)
+    return ModeleMonde.depuis_champs(monde.champs_allies(), monde.champs_lieux(), monde.ressources, monde.ennemis)
+
+
+def modele_monde(filename: str) -> ModeleMonde:
+    """Fonction qui donne le modèle du monde décrit dans un fichier, lu une seule fois par processus.
+
+    Le fichier est relu s'il a été modifié depuis. Un monde déjà construit par un autre processus est repris
+    du cache sur disque (voir le module cache_mondes), sans relire le json ni reconstruire les objets.
+
+    Args:
+        filename (str): Le fichier qui contient les informations du jeu.
+
+    Returns:
+        ModeleMonde: Le monde partagé.
+
+    Raises:
+        FileNotFoundError: Quand le fichier n'a pas été trouvé.
+        ErreurChargement: Si le monde est mal formé ou ne respecte pas schema.SCHEMA_MONDE.
+    """
+    chemin = os.path.abspath(filename)
+    modification = os.stat(chemin).st_mtime_ns if os.path.exists(chemin) else -1
+    connu = _MODELES.get(chemin)
+    if connu is None or connu[0] != modification:
+        # Import local: le cache n'est chargé que par les programmes qui construisent un monde, et le module
+        # chargement importe ce module.
+        import chargement
+        import schema
+        from cache_mondes import cache_par_defaut, version_code
+
+        cache = cache_par_defaut()
+        if cache is None:
+            modele = construire_modele(filename)
+        else:
+            version = version_code(sys.modules[__name__], chargement, schema)
+            modele = cache.charger(filename, lambda: construire_modele(filename), version)
+        connu = _MODELES[chemin] = (modification, modele)
+    return connu[1]
+
+
+def creation_environnement(
+    filename: str,
+    fichier_sauvegarde: str = FICHIER_SAUVEGARDE,
+    nom: Optional[str] = None,
+    entree: Optional[Callable[[str], str]] = None,
+) -> Environnement:
+    """Fonction qui permet de créer l'objet environnement correspondant à l'avancer du jeu.
+
+    Args:
+        filename (str): Le fichier qui contient les informations du jeu.
+        fichier_sauvegarde (str): Le fichier de sauvegarde à reprendre s'il existe, en json de n'importe quelle
+            VarianteSauvegarde ou en instantané binaire.
+        nom (Optional[str]): Le nom de l'avatar pour une nouvelle partie. S'il n'est pas donné, il est
+            demandé au joueur.
+        entree (Optional[Callable[[str], str]]): La fonction qui demande le nom au joueur, comme pour
+            executer_partie. Par défaut, lire_choix.
+
+    Returns:
+        Environnement: Objet qui contient toutes les informations de joueur, d'alliés et de lieux.
+
+    Raises:
+        ErreurSchema: Si la sauvegarde json est mal formée, avec toutes ses erreurs.
+        ErreurChargement: Si le monde est mal formé, avec la ligne, la colonne et le chemin de chaque erreur.
+        ValueError: Si la sauvegarde est suivie d'un journal: sans lui, elle peut être en retard de plusieurs
+            sauvegardes, et la reprendre ici l'écraserait.
+
+    Exemples:
+        >>> filename = data.json
+        >>> creation_environnement(filename)
+        Veuillez choisir un nom. Attention vous ne pourrez pas le changer.
+        Talion
+        >>> environnement = creation_environnement(filename)
+        >>> print(environnement.joueur.nom)
+        Talion
+    """
+    if os.path.exists(fichier_sauvegarde) and os.path.exists(fichier_sauvegarde + SUFFIXE_JOURNAL):
+        raise ValueError(f"La sauvegarde {fichier_sauvegarde} est journalisée: elle se reprend avec journal.py.")
+    if est_instantane(fichier_sauvegarde):
+        # Import local: le module instantane importe ce module.
+        from instantane import charger_instantane
+
+        environnement = charger_instantane(fichier_sauvegarde)
+    elif os.path.exists(fichier_sauvegarde):
+        # Import local: le schéma n'est compilé que par les programmes qui chargent un monde ou une sauvegarde.
+        from schema import verifier_sauvegarde
+
+        donnees = charger_sauvegarde(fichier_sauvegarde)
+        verifier_sauvegarde(donnees, fichier_sauvegarde)
+        environnement = restaurer_environnement(donnees)
+    else:
+        modele = modele_monde(filename)
+        if nom is None:
+            afficher("Veuillez choisir un nom. Attention vous ne pourrez pas le changer.")
+            nom = (entree or lire_choix)(MENU_NOM)
+        environnement = modele.nouvelle_partie(nom)
     return environnement
 
 
-def choix_allies(environnement: Environnement) -> None:
+Partie = Generator[str, str, None]
+"""Une partie en cours: chaque valeur produite est le nom du menu qui attend un choix, et le choix du
+joueur lui est renvoyé avec send()."""
+
+
+def sauvegarde_par_defaut(environnement: Environnement) -> None:
+    """Fonction qui sauvegarde la partie dans le fichier de sauvegarde par défaut."""
+    sauvegarder_partie(FICHIER_SAUVEGARDE, environnement)
+
+
+def choix_allies(environnement: Environnement) -> Partie:
     """Fonction qui permet de choisir un alliés."""
     if len(environnement.allies) == 0:
-        print("Il n'y a plus d'allies disponible.")
+        afficher("Il n'y a plus d'allies disponible.")
     else:
         environnement.joueur.afficher_allie(environnement.allies)
-        print(
+        afficher(
             "Sélectionner le nom de l'allié que vous voulez sélectionner ou sélectionner -1 pour ne rien choisir."
         )
-        choix_allie = input().lower()
+        choix_allie = (yield MENU_CHOIX_ALLIE).lower()
+        allie = environnement.allies.get(choix_allie)
         if choix_allie == "-1":
-            print("Aucun allie choisie.")
-        elif choix_allie not in [allie.nom for allie in environnement.allies]:
-            print("L'allie sélectionner n'est pas disponible.")
-        else:
-            for allie in environnement.allies:
-                if allie.nom == choix_allie:
-                    if environnement.joueur.payer_allie(allie):
-                        environnement.allies.remove(allie)
+            afficher("Aucun allie choisie.")
+        elif allie is None:
+            afficher("L'allie sélectionner n'est pas disponible.")
+        elif environnement.joueur.payer_allie(allie):
+            environnement.allies.retirer(allie.nom)
 
 
-def choix_lieux(environnement: Environnement) -> None:
-    """Fonction qui premet de choisir un lieu."""
-    environnement.joueur.afficher_lieux(environnement.lieux)
-    print(
-        "Sélectionner le nom correspondant au lieu que vous voulez sélectionner ou sélectionner -1 pour ne rien choisir."
-    )
-    choix_lieu = input().lower()
+def commande_carte(carte: Carte, choix: str) -> bool:
+    """Fonction qui applique une commande de la carte tapée par le joueur (voir AIDE_CARTE).
+
+    Args:
+        carte (Carte): La carte affichée.
+        choix (str): Le choix du joueur.
+
+    Returns:
+        bool: Si le choix était une commande de la carte, qui commence par ":", plutôt qu'un nom de lieu.
+    """
+    if not choix.startswith(":"):
+        return False
+    commande, _, valeur = choix[1:].strip().partition(" ")
+    valeur = valeur.strip()
+    filtre = carte.filtre
+    match commande.lower():
+        case "+":
+            if not carte.suivante():
+                afficher("Il n'y a pas de page suivante.")
+        case "-":
+            if not carte.precedente():
+                afficher("Il n'y a pas de page précédente.")
+        case "ressource":
+            carte.filtrer(FiltreCarte(valeur or None, filtre.force_max, filtre.prefixe))
+        case "force" if not valeur:
+            carte.filtrer(FiltreCarte(filtre.ressource, None, filtre.prefixe))
+        case "force":
+            try:
+                carte.filtrer(FiltreCarte(filtre.ressource, int(valeur), filtre.prefixe))
+            except ValueError:
+                afficher("La force maximum doit être un nombre.")
+        case "nom":
+            carte.filtrer(FiltreCarte(filtre.ressource, filtre.force_max, valeur.lower() or None))
+        case "tout":
+            carte.filtrer(FiltreCarte())
+        case _:
+            afficher("Commande de la carte non reconnue.")
+    return True
+
+
+def choix_lieux(environnement: Environnement) -> Partie:
+    """Fonction qui premet de choisir un lieu.
+
+    La carte est affichée page par page; avant de choisir un lieu, le joueur peut changer de page ou filtrer
+    les lieux avec les commandes de AIDE_CARTE.
+    """
+    carte = Carte(environnement.lieux)
+    while True:
+        environnement.joueur.afficher_carte(carte)
+        afficher(
+            "Sélectionner le nom correspondant au lieu que vous voulez sélectionner ou sélectionner -1 pour ne rien choisir."
+        )
+        if not affichage_muet() and (carte.numero_page() > 1 or carte.a_suivante() or not carte.filtre.est_vide()):
+            afficher(AIDE_CARTE)
+        choix_lieu = yield MENU_CHOIX_LIEU
+        if not commande_carte(carte, choix_lieu):
+            break
+    choix_lieu = choix_lieu.lower()
+    lieu = environnement.lieux.get(choix_lieu)
     if choix_lieu == "-1":
-        print("Aucun lieu choisie.")
-    elif choix_lieu not in [lieu.nom for lieu in environnement.lieux]:
-        print("Le lieu sélectionner n'éxiste pas.")
+        afficher("Aucun lieu choisie.")
+    elif lieu is None:
+        afficher("Le lieu sélectionner n'éxiste pas.")
     else:
-        for lieu in environnement.lieux:
-            if lieu.nom == choix_lieu:
-                force_total = 0
-                for ennemi in lieu.ennemis:
-                    ennemi.parler()
-                    force_total += ennemi.force
-                print(
-                    "Voici la force total de tous les ennemis du lieu.",
-                    force_total,
-                )
-                if environnement.joueur.attaquer(force_total, lieu):
-                    environnement.lieux.remove(lieu)
-
-
-def menu_allies(environnement: Environnement) -> None:
+        if not affichage_muet():
+            afficher("".join(f"{ennemi.dialogue}\n" for ennemi in lieu.ennemis), end="")
+        force_total = lieu.force_ennemis
+        afficher(
+            "Voici la force total de tous les ennemis du lieu.",
+            force_total,
+        )
+        if environnement.joueur.attaquer(force_total, lieu):
+            environnement.lieux.retirer(lieu.nom)
+
+
+def menu_allies(
+    environnement: Environnement,
+    sauvegarde: Callable[[Environnement], None] = sauvegarde_par_defaut,
+) -> Partie:
     """Fonction du menu de la guilde des alliés."""
     choix_menu_allies = 0
     while choix_menu_allies != -1:
-        print(
-            "Veuillez choisir une action entre: 1: voir la liste des allié, 2: sauvegarder, 3: voir inventaire-1: Revenir à la place principale du village"
+        afficher(
+            "Veuillez choisir une action entre: 1: voir la liste des allié, 2: sauvegarder, 3: voir inventaire, 4: demander conseil-1: Revenir à la place principale du village"
         )
-        choix_menu_allies = int(input())
+        choix_menu_allies = int((yield MENU_ALLIES))
         match choix_menu_allies:
             case 1:
-                choix_allies(environnement=environnement)
+                yield from choix_allies(environnement=environnement)
             case 2:
-                sauvegarder_partie("partie_sauvegarder.json", environnement)
+                sauvegarde(environnement)
             case 3:
                 environnement.joueur.verification_inventaire()
+            case 4:
+                afficher(environnement.conseil().texte())
             case -1:
-                print("Retour à la place principale du village.")
+                afficher("Retour à la place principale du village.")
             case _:
-                print("Commande non reconnue.")
+                afficher("Commande non reconnue.")
 
 
-def menu_lieux(environnement: Environnement) -> None:
+def menu_lieux(
+    environnement: Environnement,
+    sauvegarde: Callable[[Environnement], None] = sauvegarde_par_defaut,
+) -> Partie:
     """Fonction du menu de la guilde des lieux."""
     choix_menu_lieu = 0
     while choix_menu_lieu != -1:
         if len(environnement.lieux) == 0 or environnement.joueur.vie <= 0:
             choix_menu_lieu = -1
         else:
-            print(
-                "Veuillez choisir une action entre: 1: voir la liste des lieux, 2: sauvegarder, 3: voir inventaire et -1: Revenir à la place principale du village"
+            afficher(
+                "Veuillez choisir une action entre: 1: voir la liste des lieux, 2: sauvegarder, 3: voir inventaire, 4: demander conseil et -1: Revenir à la place principale du village"
             )
-            choix_menu_lieu = int(input())
+            choix_menu_lieu = int((yield MENU_LIEUX))
             match choix_menu_lieu:
                 case 1:
-                    choix_lieux(environnement)
+                    yield from choix_lieux(environnement)
                 case 2:
-                    sauvegarder_partie("partie_sauvegarder.json", environnement)
+                    sauvegarde(environnement)
                 case 3:
                     environnement.joueur.verification_inventaire()
+                case 4:
+                    afficher(environnement.conseil().texte())
                 case -1:
-                    print("Retour à la place principale du village.")
+                    afficher("Retour à la place principale du village.")
                 case _:
-                    print("Commande non reconnue.")
+                    afficher("Commande non reconnue.")
+
+
+def partie(
+    environnement: Environnement,
+    sauvegarde: Callable[[Environnement], None] = sauvegarde_par_defaut,
+) -> Partie:
+    """Fonction de la place principale du village, qui déroule une partie jusqu'à sa fin.
 
+    La partie ne lit rien elle-même: elle produit le nom du menu qui attend un choix et reçoit le choix
+    du joueur par send(). C'est executer_partie qui la relie à la console, et le moteur de simulation
+    qui la relie à un script.
 
-def jouer_une_session(filename: str) -> None:
-    """Fonction qui permet de joueur au jeu."""
-    environnement = creation_environnement(filename)
+    Args:
+        environnement (Environnement): L'environnement de la partie.
+        sauvegarde (Callable[[Environnement], None]): La fonction appelée quand le joueur sauvegarde
+            ou quitte la partie.
+
+    Exemples:
+        >>> deroulement = partie(environnement)
+        >>> next(deroulement)
+        Bienvenue au village de Valun.
+        ...
+        'village'
+        >>> deroulement.send("2")
+        ...
+        'lieux'
+    """
     choix_centre_village = 0
     while choix_centre_village != -1:
         if len(environnement.lieux) == 0:
-            print("Vous avez gagnez")
+            afficher("Vous avez gagnez")
             choix_centre_village = -1
         elif environnement.joueur.vie <= 0:
-            print("Vous êtes mort. Game over.")
+            afficher("Vous êtes mort. Game over.")
             choix_centre_village = -1
         else:
-            print("Bienvenue au village de Valun.")
-            print(
-                "Veuillez choisir une action entre: 1: Allée dans la guilde des alliés, 2: Sortir du village, 3: sauvegarder, 4: Voir inventaire et -1: quitter"
+            afficher("Bienvenue au village de Valun.")
+            afficher(
+                "Veuillez choisir une action entre: 1: Allée dans la guilde des alliés, 2: Sortir du village, 3: sauvegarder, 4: Voir inventaire, 5: Demander conseil et -1: quitter"
             )
-            choix_centre_village = int(input())
+            choix_centre_village = int((yield MENU_VILLAGE))
             match choix_centre_village:
                 case 1:
-                    menu_allies(environnement)
+                    yield from menu_allies(environnement, sauvegarde)
                 case 2:
-                    menu_lieux(environnement)
+                    yield from menu_lieux(environnement, sauvegarde)
                 case 3:
-                    sauvegarder_partie("partie_sauvegarder.json", environnement)
+                    sauvegarde(environnement)
                 case 4:
                     environnement.joueur.verification_inventaire()
+                case 5:
+                    afficher(environnement.conseil().texte())
                 case -1:
-                    print("Vous avez quitter la partie. Sauvegarde en cours")
-                    sauvegarder_partie("partie_sauvegarder.json", environnement)
+                    afficher("Vous avez quitter la partie. Sauvegarde en cours")
+                    sauvegarde(environnement)
                 case _:
-                    print("Commande non reconnue.")
+                    afficher("Commande non reconnue.")
+
+
+def lire_choix(menu: str) -> str:
+    """Fonction qui lit le choix du joueur dans la console, après avoir vidé la sortie courante.
+
+    Args:
+        menu (str): Le nom du menu qui attend le choix.
+
+    Returns:
+        str: La ligne tapée par le joueur.
+    """
+    sortie_courante().vider()
+    return input()
+
 
+def executer_partie(
+    deroulement: Partie,
+    entree: Callable[[str], str] = lire_choix,
+) -> None:
+    """Fonction qui déroule une partie en lui donnant les choix lus avec entree.
+
+    Args:
+        deroulement (Partie): La partie à dérouler, créée avec partie().
+        entree (Callable[[str], str]): La fonction qui donne le choix du joueur pour un menu.
+    """
+    try:
+        menu = next(deroulement)
+        while True:
+            menu = deroulement.send(entree(menu))
+    except StopIteration:
+        pass
+
+
+def ecriture_sauvegarde(
+    fichier_sauvegarde: str,
+    variante: Optional[VarianteSauvegarde] = None,
+) -> Callable[[str, Environnement], None]:
+    """Fonction qui choisit comment écrire une sauvegarde, selon le format de celle qui existe déjà.
+
+    Une partie reprise depuis un instantané binaire est sauvegardée en instantané binaire, les autres en json,
+    dans la variante de la sauvegarde reprise (voir VarianteSauvegarde.detecter).
+
+    Args:
+        fichier_sauvegarde (str): Le fichier de sauvegarde de la partie.
+        variante (Optional[VarianteSauvegarde]): La variante json à utiliser quoi qu'il y ait dans le fichier.
+
+    Returns:
+        Callable[[str, Environnement], None]: sauvegarder_partie, dans la bonne variante, ou
+        sauvegarder_instantane.
+    """
+    if variante is None:
+        if est_instantane(fichier_sauvegarde):
+            # Import local: le module instantane importe ce module.
+            from instantane import sauvegarder_instantane
+
+            return sauvegarder_instantane
+        variante = VarianteSauvegarde.detecter(fichier_sauvegarde) or VARIANTE_PAR_DEFAUT
+    if variante == VARIANTE_PAR_DEFAUT:
+        return sauvegarder_partie
+
+    def sauvegarder_variante(filename: str, environnement: Environnement) -> None:
+        sauvegarder_partie(filename, environnement, variante)
+
+    return sauvegarder_variante
 
-jouer_une_session("data.json")
+
+def jouer_une_session(
+    filename: str,
+    fichier_sauvegarde: str = FICHIER_SAUVEGARDE,
+    variante: Optional[VarianteSauvegarde] = None,
+    rejeu: Optional[str] = None,
+) -> None:
+    """Fonction qui permet de joueur au jeu.
+
+    Les affichages sont regroupés dans une SortieTampon, vidée à chaque fois que le jeu attend le joueur.
+    Les sauvegardes sont écrites en arrière-plan par un EcrivainSauvegardes (voir le module ecriture), et
+    toutes sont écrites avant la fin de la session. Sans variante, la partie garde le format de la
+    sauvegarde reprise. Avec un fichier de rejeu, chaque choix du joueur y est noté par un EnregistreurRejeu
+    (voir le module rejeu).
+    """
+    # Import local: les modules ecriture et rejeu importent ce module.
+    from ecriture import EcrivainSauvegardes, ecriture_donnees
+    from rejeu import EnregistreurRejeu
+
+    with rediriger_sortie(SortieTampon(sys.stdout)), contextlib.ExitStack() as pile:
+        entree: Callable[[str], str] = lire_choix
+        if rejeu is not None:
+            entree = enregistreur = pile.enter_context(EnregistreurRejeu(rejeu, filename))
+        environnement = creation_environnement(filename, fichier_sauvegarde, entree=entree)
+        if rejeu is not None:
+            enregistreur.commencer(environnement, fichier_sauvegarde)
+        ecrire = ecriture_donnees(fichier_sauvegarde, variante)
+        with EcrivainSauvegardes() as ecrivain:
+
+            def sauvegarde(environnement: Environnement) -> None:
+                ecrivain.sauvegarder(fichier_sauvegarde, environnement, ecrire)
+
+            executer_partie(partie(environnement, sauvegarde), entree)
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: joue une partie dans la console.
+
+    Importer ce module ne lance rien; seul main() lit la ligne de commande et démarre une partie.
+
+    Exemples:
+        python Projet_Epopée_des_cité.py
+        python Projet_Epopée_des_cité.py data.json --sauvegarde ma_partie.json
+        python Projet_Epopée_des_cité.py data.json --sauvegarde ma_partie.json.gz --compact --references --compression gzip
+        python Projet_Epopée_des_cité.py data.json --sans-rejeu
+    """
+    # Import local: argparse ne sert qu'en ligne de commande, pas aux modules qui importent celui-ci.
+    import argparse
+
+    # Import local: le module rejeu importe ce module.
+    from rejeu import SUFFIXE_REJEU
+
+    analyseur = argparse.ArgumentParser(description="Joue une partie de l'Épopée des Cités Perdues dans la console.")
+    analyseur.add_argument("monde", nargs="?", default="data.json", help="le fichier de données du jeu")
+    analyseur.add_argument("--sauvegarde", default=FICHIER_SAUVEGARDE, help="le fichier de sauvegarde")
+    analyseur.add_argument("--compact", action="store_true", help="sauvegarder en json sans indentation")
+    analyseur.add_argument(
+        "--references", action="store_true", help="sauvegarder chaque ressource et chaque ennemi une seule fois"
+    )
+    analyseur.add_argument("--compression", choices=list(COMPRESSIONS), help="compresser la sauvegarde")
+    analyseur.add_argument(
+        "--rejeu", help=f"le journal où noter les choix du joueur, par défaut la sauvegarde suivie de {SUFFIXE_REJEU}"
+    )
+    analyseur.add_argument("--sans-rejeu", action="store_true", help="ne pas noter les choix du joueur")
+    options = analyseur.parse_args(arguments)
+    variante = None
+    if options.compact or options.references or options.compression:
+        variante = VarianteSauvegarde(options.compact, options.references, options.compression)
+    rejeu = None
+    if not options.sans_rejeu:
+        rejeu = options.rejeu or options.sauvegarde + SUFFIXE_REJEU
+    jouer_une_session(options.monde, options.sauvegarde, variante, rejeu)
+
+
+if __name__ == "__main__":
+    # Lancé comme script, ce fichier est le module __main__. Les modules instantane, ecriture, rejeu, chargement
+    # et journal importent Projet_Epopée_des_cité, et en chargeraient une seconde copie, avec ses propres
+    # classes et sa propre sortie (_SORTIE): la partie est donc jouée par le module importé.
+    import importlib
+
+    importlib.import_module("Projet_Epopée_des_cité").main()
@@ -0,0 +1,100 @@
+"""Mesure le démarrage d'une nouvelle partie avec et sans le cache des mondes construits.
+
+Chaque démarrage est mesuré dans un processus neuf, comme celui d'un travailleur: modele_monde puis
+nouvelle_partie, sans compter le lancement de Python ni l'import des modules. Trois cas par taille de monde:
+    - sans cache: EPOPEE_CACHE_MONDES vide, le json est lu, vérifié et construit à chaque démarrage;
+    - cache vide: le premier démarrage construit le monde et écrit son entrée;
+    - cache chaud: les démarrages suivants relisent l'entrée.
+La partie démarrée doit être la même dans les trois cas.
+
+Exemple:
+    python benchmarks/bench_cache_mondes.py --lieux 1000,10000,100000
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RACINE))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from cache_mondes import VARIABLE_CACHE  # noqa: E402
+from monde_synthetique import ecrire_monde  # noqa: E402
+
+_MESURE = """
+import hashlib, json, sys, time
+sys.path.insert(0, {racine!r})
+from Projet_Epopée_des_cité import modele_monde
+debut = time.perf_counter()
+environnement = modele_monde(sys.argv[1]).nouvelle_partie("Talion")
+duree = time.perf_counter() - debut
+empreinte = hashlib.sha256(json.dumps(environnement.vers_dict()).encode()).hexdigest()
+print(json.dumps({{"duree": duree, "empreinte": empreinte}}))
+"""
+
+
+def demarrer(monde: str, cache: str) -> Dict[str, object]:
+    """Démarre une partie dans un processus neuf.
+
+    Args:
+        monde (str): Le fichier de monde.
+        cache (str): Le dossier du cache, ou une chaîne vide pour s'en passer.
+
+    Returns:
+        Dict[str, object]: La durée du démarrage en secondes et l'empreinte de la partie démarrée.
+    """
+    sortie = subprocess.run(
+        [sys.executable, "-c", _MESURE.format(racine=str(RACINE)), monde],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, VARIABLE_CACHE: cache},
+    ).stdout
+    return json.loads(sortie)
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande.
+
+    Returns:
+        int: 1 si une partie démarrée depuis le cache diffère de celle démarrée sans, 0 sinon.
+    """
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--lieux", default="1000,10000,100000", help="tailles de monde, séparées par des virgules")
+    analyseur.add_argument("--repetitions", type=int, default=5, help="démarrages mesurés par cas")
+    options = analyseur.parse_args(arguments)
+
+    ecarts = 0
+    print(f"médiane de {options.repetitions} démarrages")
+    print(f"{'lieux':>8} {'json (Mo)':>10} {'entrée (Mo)':>12} {'sans cache (ms)':>16} {'cache vide (ms)':>16} {'cache chaud (ms)':>17}")
+    for nombre_lieux in (int(nombre) for nombre in options.lieux.split(",")):
+        with tempfile.TemporaryDirectory() as dossier:
+            monde = os.path.join(dossier, "monde.json")
+            cache = os.path.join(dossier, "cache")
+            ecrire_monde(monde, nombre_lieux)
+            sans = [demarrer(monde, "") for _ in range(options.repetitions)]
+            vide = demarrer(monde, cache)
+            chaud = [demarrer(monde, cache) for _ in range(options.repetitions)]
+            taille_entree = sum(fichier.stat().st_size for fichier in Path(cache).iterdir())
+            empreintes = {mesure["empreinte"] for mesure in sans + [vide] + chaud}
+            if len(empreintes) != 1:
+                print(f"{nombre_lieux} lieux: la partie démarrée depuis le cache diffère")
+                ecarts += 1
+            print(
+                f"{nombre_lieux:>8} {os.path.getsize(monde) / 1e6:>10.1f} {taille_entree / 1e6:>12.1f}"
+                f" {statistics.median(mesure['duree'] for mesure in sans) * 1000:>16,.1f}"
+                f" {vide['duree'] * 1000:>16,.1f}"
+                f" {statistics.median(mesure['duree'] for mesure in chaud) * 1000:>17,.1f}"
+            )
+    return 1 if ecarts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
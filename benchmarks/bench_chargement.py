@@ -0,0 +1,228 @@
+"""Compare la mémoire de pointe et le temps de chargement d'un gros monde, avec et sans chargement en flux.
+
+Chaque méthode est mesurée dans un processus neuf, pour que la mémoire de pointe (ru_maxrss) ne dépende
+que d'elle:
+    - json: load_json seul, le document entier en mémoire;
+    - json+environnement: l'ancien chemin du jeu, load_json puis nouvel_environnement;
+    - flux: MondeFlux parcourt les lieux un par un sans les garder;
+    - flux+environnement: le chemin du jeu, MondeFlux crée l'environnement sans construire ses lieux;
+    - flux+lieux: le même, puis tous les lieux sont construits en parcourant la carte.
+
+Avant les mesures, des mondes abîmés en un endroit tiré au hasard sont lus en flux avec des tampons de
+plusieurs tailles, et par load_json: l'erreur doit donner la ligne et la colonne que donne json.loads pour
+le même défaut. D'autres, bien formés mais avec un champ du mauvais type, doivent être refusés avec le
+chemin de ce champ. Enfin, l'environnement lu en flux doit être celui que construit nouvel_environnement.
+
+Exemple:
+    python benchmarks/bench_chargement.py --lieux 20000 --personnages 2000
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RACINE))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import load_json, nouvel_environnement  # noqa: E402
+from chargement import ErreurChargement, MondeFlux, iterer_sections  # noqa: E402
+from monde_synthetique import ecrire_monde, generer_monde  # noqa: E402
+
+TAILLES_TAMPON = (7, 64, 4096, 1 << 16)
+
+METHODES = ("json", "json+environnement", "flux", "flux+environnement", "flux+lieux")
+
+_MESURE = """
+import json, resource, sys, time
+sys.path.insert(0, {racine!r})
+from Projet_Epopée_des_cité import load_json, nouvel_environnement
+from chargement import MondeFlux
+methode, chemin = sys.argv[1], sys.argv[2]
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+debut = time.perf_counter()
+if methode == "json":
+    lieux = len(load_json(chemin)["lieux"])
+elif methode == "json+environnement":
+    lieux = len(nouvel_environnement(load_json(chemin), "Talion").lieux)
+elif methode == "flux":
+    lieux = sum(1 for _ in MondeFlux(chemin).lieux())
+elif methode == "flux+environnement":
+    lieux = len(MondeFlux(chemin).environnement("Talion").lieux)
+else:
+    lieux = sum(1 for _ in MondeFlux(chemin).environnement("Talion").lieux)
+duree = time.perf_counter() - debut
+pointe = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"duree": duree, "pointe_ko": pointe, "ajout_ko": pointe - base, "lieux": lieux}}))
+"""
+
+
+def mesurer(methode: str, chemin: str) -> Dict[str, float]:
+    """Mesure une méthode de chargement dans un processus neuf.
+
+    Args:
+        methode (str): Une des METHODES.
+        chemin (str): Le fichier de monde à charger.
+
+    Returns:
+        Dict[str, float]: La durée en secondes, la mémoire de pointe et son augmentation en Ko, le nombre de lieux.
+    """
+    sortie = subprocess.run(
+        [sys.executable, "-c", _MESURE.format(racine=str(RACINE)), methode, chemin],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(sortie)
+
+
+def verifier_positions(dossier: str, essais: int) -> int:
+    """Abîme un petit monde de plusieurs façons et compare la position des erreurs à celle de json.loads.
+
+    Args:
+        dossier (str): Le dossier où écrire les mondes abîmés.
+        essais (int): Le nombre de défauts tirés au hasard.
+
+    Returns:
+        int: Le nombre d'erreurs mal situées.
+    """
+    texte = json.dumps(generer_monde(50, 20, 5), ensure_ascii=False, indent=1)
+    hasard = random.Random(0)
+    defauts = {
+        "virgule manquante": lambda debut: texte[:debut] + texte[debut:].replace(",", "", 1),
+        "valeur illisible": lambda debut: texte[:debut] + texte[debut:].replace(": ", ": @", 1),
+        "chaîne coupée": lambda debut: texte[: texte.index('"', debut) + 2],
+        "fichier coupé après un élément": lambda debut: texte[: texte.index("}", debut) + 1],
+    }
+    ecarts = 0
+    for essai in range(essais):
+        nom, abimer = list(defauts.items())[essai % len(defauts)]
+        abime = abimer(hasard.randrange(texte.index('"lieux"'), len(texte) // 2))
+        try:
+            json.loads(abime)
+            continue
+        except json.JSONDecodeError as e:
+            attendu = (e.lineno, e.colno)
+        chemin = os.path.join(dossier, "abime.json")
+        with open(chemin, "w", encoding="utf-8") as fichier:
+            fichier.write(abime)
+        for taille_bloc in TAILLES_TAMPON + (None,):
+            try:
+                if taille_bloc is None:
+                    load_json(chemin)
+                else:
+                    for _ in iterer_sections(chemin, taille_bloc=taille_bloc):
+                        pass
+                trouve = None
+            except ErreurChargement as e:
+                trouve = (e.ligne, e.colonne)
+            if trouve != attendu:
+                lecteur = "load_json" if taille_bloc is None else f"tampon de {taille_bloc}"
+                print(f"{nom}, {lecteur}: erreur en {trouve} au lieu de {attendu}")
+                ecarts += 1
+    return ecarts
+
+
+def verifier_champs(dossier: str) -> int:
+    """Donne à un champ de chaque section un mauvais type et vérifie que l'erreur désigne ce champ, puis abîme
+    tous ces champs à la fois et vérifie qu'une seule erreur les donne tous, dans l'ordre du fichier.
+
+    Args:
+        dossier (str): Le dossier où écrire les mondes abîmés.
+
+    Returns:
+        int: Le nombre de champs mal typés refusés sans leur chemin, ou acceptés.
+    """
+    defauts = (
+        ("lieux", 3, "nom", 5),
+        ("lieux", 7, "ennemis", "ennemi 1"),
+        ("personnages", 2, "force", -1),
+        ("personnages", 4, "nom", None),
+        ("ressources", 1, "quantite", "dix"),
+    )
+    chemin = os.path.join(dossier, "abime.json")
+    ecarts = 0
+    for abimes in [[defaut] for defaut in defauts] + [list(defauts)]:
+        monde = generer_monde(10, 10, 5)
+        for section, indice, cle, valeur in abimes:
+            monde[section][indice][cle] = valeur
+        with open(chemin, "w", encoding="utf-8") as fichier:
+            json.dump(monde, fichier, ensure_ascii=False, indent=1)
+        attendus = [f"{section}[{indice}].{cle}" for section, indice, cle, _ in abimes]
+        try:
+            for _ in MondeFlux(chemin).lieux():
+                pass
+            trouves = []
+        except ErreurChargement as e:
+            trouves = [chemin_erreur for _, _, chemin_erreur, _ in e.erreurs]
+        if trouves != attendus:
+            print(f"{', '.join(attendus)}: erreurs dans {trouves} au lieu de {attendus}")
+            ecarts += 1
+    return ecarts
+
+
+def verifier_environnement(dossier: str) -> int:
+    """Compare l'environnement lu en flux, dont les lieux sont construits à la demande, à nouvel_environnement.
+
+    Args:
+        dossier (str): Le dossier où écrire le monde.
+
+    Returns:
+        int: 1 si les deux environnements diffèrent, 0 sinon.
+    """
+    monde = generer_monde(200, 40, 5)
+    chemin = os.path.join(dossier, "petit.json")
+    with open(chemin, "w", encoding="utf-8") as fichier:
+        json.dump(monde, fichier, ensure_ascii=False)
+    attendu = nouvel_environnement(monde, "Talion").vers_dict()
+    environnement = MondeFlux(chemin).environnement("Talion")
+    environnement.lieux["lieu 7"]
+    if environnement.vers_dict() != attendu:
+        print("l'environnement lu en flux diffère de celui de nouvel_environnement")
+        return 1
+    return 0
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande: vérifie la position des erreurs, puis compare les méthodes.
+
+    Returns:
+        int: 1 si une erreur de lecture est mal située ou ne désigne pas le champ en cause, ou si l'environnement
+        lu en flux diffère, 0 sinon.
+    """
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--lieux", type=int, default=20_000, help="nombre de lieux du monde")
+    analyseur.add_argument("--personnages", type=int, default=2_000, help="nombre de personnages du monde")
+    analyseur.add_argument("--monde", help="un fichier de monde existant, au lieu d'un monde synthétique")
+    analyseur.add_argument("--methodes", default=",".join(METHODES), help="méthodes à mesurer, séparées par des virgules")
+    analyseur.add_argument("--defauts", type=int, default=60, help="mondes abîmés dont les erreurs sont vérifiées")
+    options = analyseur.parse_args(arguments)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        ecarts = verifier_positions(dossier, options.defauts)
+        print(f"{options.defauts} mondes abîmés: {ecarts} erreurs mal situées")
+        ecarts += verifier_champs(dossier)
+        ecarts += verifier_environnement(dossier)
+        chemin = options.monde
+        if chemin is None:
+            chemin = os.path.join(dossier, "monde.json")
+            ecrire_monde(chemin, options.lieux, options.personnages)
+        print(f"{chemin}: {os.path.getsize(chemin) / 1e6:.1f} Mo")
+        print(f"{'méthode':<20} {'durée (s)':>10} {'pointe (Mo)':>12} {'ajout (Mo)':>11} {'lieux':>9}")
+        for methode in options.methodes.split(","):
+            mesure = mesurer(methode.strip(), chemin)
+            print(
+                f"{methode:<20} {mesure['duree']:>10.3f} {mesure['pointe_ko'] / 1024:>12.1f} "
+                f"{mesure['ajout_ko'] / 1024:>11.1f} {mesure['lieux']:>9}"
+            )
+    return 1 if ecarts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Compare la résolution des combats une rencontre à la fois et par lots, et vérifie qu'elles donnent le même résultat.
+
+Trois façons de résoudre les mêmes rencontres (force, vie, lieu) tirées au hasard:
+    - Joueur.attaquer, une rencontre à la fois, sur une copie du lieu et un joueur neuf (sur un échantillon);
+    - combat.combattre avec la boucle Python (vectoriser=False);
+    - combat.combattre avec numpy, s'il est installé.
+
+Pour chaque rencontre de l'échantillon, l'issue, la vie restante et l'inventaire gagné doivent être les mêmes
+par les trois chemins, et le total des ressources récupérées sur tout le lot le même par les deux derniers. Le
+temps d'un lot comprend ce total.
+
+Exemple:
+    python benchmarks/bench_combat.py --lieux 1000 --rencontres 1000000
+"""
+
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import (  # noqa: E402
+    Joueur,
+    SortieNulle,
+    copier_element,
+    nouvel_environnement,
+    rediriger_sortie,
+)
+from combat import LotLieux, ResultatCombats, _numpy, combattre  # noqa: E402
+from monde_synthetique import generer_monde  # noqa: E402
+
+
+def _debit(nombre: int, duree: float) -> str:
+    """Met en forme un débit en rencontres par seconde."""
+    return f"{nombre / duree:>14,.0f} rencontres/s".replace(",", " ")
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande.
+
+    Returns:
+        int: 1 si un chemin diffère de Joueur.attaquer sur une rencontre, 0 sinon.
+    """
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--lieux", type=int, default=1000, help="nombre de lieux du monde")
+    analyseur.add_argument("--rencontres", type=int, default=1_000_000, help="nombre de rencontres du lot")
+    analyseur.add_argument("--echantillon", type=int, default=20_000, help="rencontres vérifiées avec Joueur.attaquer")
+    options = analyseur.parse_args(arguments)
+
+    lieux = list(nouvel_environnement(generer_monde(options.lieux), "Talion").lieux)
+    hasard = random.Random(0)
+    force_maximum = max(lieu.force_ennemis for lieu in lieux)
+    forces = [hasard.randint(0, force_maximum) for _ in range(options.rencontres)]
+    vies = [hasard.randint(1, 100) for _ in range(options.rencontres)]
+    indices = [hasard.randrange(len(lieux)) for _ in range(options.rencontres)]
+    echantillon = range(min(options.echantillon, options.rencontres))
+
+    debut = time.perf_counter()
+    attendus = []
+    with rediriger_sortie(SortieNulle()):
+        for position in echantillon:
+            joueur = Joueur("Talion", forces[position], vies[position], {})
+            lieu = copier_element(lieux[indices[position]])
+            victoire = joueur.attaquer(lieu.force_ennemis, lieu)
+            attendus.append((victoire, joueur.vie, joueur.inventaire))
+    duree_attaquer = time.perf_counter() - debut
+
+    chemins = {"boucle Python": LotLieux(lieux, vectoriser=False)}
+    if _numpy() is not None:
+        chemins["numpy"] = LotLieux(lieux, vectoriser=True)
+
+    print(f"{len(lieux)} lieux, {options.rencontres} rencontres, {len(echantillon)} vérifiées")
+    print(f"{'Joueur.attaquer':<16}{_debit(len(echantillon), duree_attaquer)}")
+    ecarts = 0
+    totaux = []
+    for nom, lot in chemins.items():
+        entrees = (forces, vies)
+        lieux_rencontres = indices
+        if lot.vectorise:
+            # Un travail d'équilibrage garde ses rencontres en tableaux: la conversion n'est pas mesurée.
+            entrees = tuple(_numpy().asarray(valeurs) for valeurs in entrees)
+            lieux_rencontres = _numpy().asarray(indices)
+        debut = time.perf_counter()
+        resultat: ResultatCombats = combattre(*entrees, lot, lieux_rencontres)
+        totaux.append(resultat.totaux())
+        duree = time.perf_counter() - debut
+        obtenus = [(resultat.victoire(i), resultat.vie(i), resultat.butin(i)) for i in echantillon]
+        differences = sum(attendu != obtenu for attendu, obtenu in zip(attendus, obtenus))
+        differences += totaux[-1] != totaux[0]
+        ecarts += differences
+        remarque = f"  {differences} ÉCARTS" if differences else ""
+        acceleration = duree_attaquer / len(echantillon) * options.rencontres / duree
+        print(f"{nom:<16}{_debit(options.rencontres, duree)}  x{acceleration:,.0f}{remarque}")
+    if len(chemins) == 1:
+        print("numpy n'est pas installé: seul le chemin sans numpy est mesuré.")
+    return 1 if ecarts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
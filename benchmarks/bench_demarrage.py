@@ -0,0 +1,99 @@
+"""Mesure le temps de démarrage d'une nouvelle partie sur des mondes synthétiques de plus en plus gros.
+
+Le démarrage comprend la lecture du fichier (load_json) et la construction de l'environnement
+(nouvel_environnement). La construction d'avant, qui parcourait toutes les ressources et tous les
+personnages pour chaque lieu, est reproduite pour comparaison jusqu'à la taille --max-ancien.
+
+Exemple:
+    python benchmarks/bench_demarrage.py --tailles 1000,10000,50000
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import (  # noqa: E402
+    Allie,
+    Ennemi,
+    Environnement,
+    Joueur,
+    Lieu,
+    Ressource,
+    load_json,
+    nouvel_environnement,
+)
+from monde_synthetique import ecrire_monde  # noqa: E402
+
+
+def _ancien_nouvel_environnement(
+    environnement_dict: Dict[str, List[Dict[str, Union[str, List[str], int]]]],
+    nom: str,
+) -> Environnement:
+    """nouvel_environnement tel qu'il était avant les index de noms, en O(lieux × (ressources + personnages))."""
+    joueur = Joueur(nom=nom, vie=100, force=10, inventaire={"or": 0})
+    personnages = environnement_dict["personnages"]
+    allies = [
+        Allie(nom=personnage["nom"].lower(), force=personnage["force"], dialogue=personnage["dialogue"])
+        for personnage in personnages
+        if personnage["type"] == "allié"
+    ]
+    lieux = [
+        Lieu(
+            nom=lieu["nom"].lower(),
+            description=lieu["description"],
+            ressources=[
+                Ressource(nom=ressource["nom"], quantite=ressource["quantite"], utilite=ressource["utilite"])
+                for ressource in environnement_dict["ressources"]
+                if ressource["nom"] in lieu["ressources"]
+            ],
+            ennemis=[
+                Ennemi(nom=personnage["nom"].lower(), force=personnage["force"], dialogue=personnage["dialogue"])
+                for personnage in personnages
+                if personnage["type"] == "ennemi" and personnage["nom"].lower() in lieu["ennemis"]
+            ],
+        )
+        for lieu in environnement_dict["lieux"]
+    ]
+    return Environnement(joueur=joueur, allies=allies, lieux=lieux)
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: affiche les temps de démarrage pour chaque taille de monde."""
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument(
+        "--tailles", default="1000,10000,50000", help="nombres de lieux (et de personnages), séparés par des virgules"
+    )
+    analyseur.add_argument("--ressources", type=int, default=200, help="nombre de ressources du monde")
+    analyseur.add_argument(
+        "--max-ancien", type=int, default=5000, help="taille maximale pour mesurer la construction d'avant"
+    )
+    options = analyseur.parse_args(arguments)
+
+    print(f"{'lieux':>8} {'load_json (s)':>14} {'construction (s)':>17} {'avant (s)':>10}")
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "monde.json")
+        for taille in (int(taille) for taille in options.tailles.split(",")):
+            ecrire_monde(chemin, taille, taille, options.ressources)
+            debut = time.perf_counter()
+            donnees = load_json(chemin)
+            lecture = time.perf_counter() - debut
+            debut = time.perf_counter()
+            nouvel_environnement(donnees, "Talion")
+            construction = time.perf_counter() - debut
+            avant = "-"
+            if taille <= options.max_ancien:
+                debut = time.perf_counter()
+                _ancien_nouvel_environnement(donnees, "Talion")
+                avant = f"{time.perf_counter() - debut:.3f}"
+            print(f"{taille:>8} {lecture:>14.3f} {construction:>17.3f} {avant:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Compare l'équilibrage à la force brute sur de petits mondes: mêmes comptes, et combien plus vite.
+
+La force brute joue chaque ordre des actions un par un, avec un joueur et des lieux neufs, comme le décrit
+equilibrage.py: elle n'est possible que pour quelques alliés et quelques lieux. Les mondes comparés couvrent
+aussi les cas limites: sans lieu (victoire immédiate, or intact), sans allié, et vide.
+
+Exemple:
+    python benchmarks/bench_equilibrage.py --mondes 20 --actions 7
+"""
+
+from itertools import permutations
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import argparse
+import copy
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import Environnement, SortieNulle, nouvel_environnement, rediriger_sortie  # noqa: E402
+from equilibrage import ECHEC, MORT, VICTOIRE, Issue, equilibrer  # noqa: E402
+from monde_synthetique import generer_monde  # noqa: E402
+
+
+def force_brute(environnement: Environnement) -> Dict[Issue, int]:
+    """Joue chaque ordre des recrutements et des attaques et compte les stratégies par fin."""
+    actions = [("allie", allie.nom) for allie in environnement.allies]
+    actions += [("lieu", lieu.nom) for lieu in environnement.lieux]
+    comptes: Dict[Issue, int] = {}
+    with rediriger_sortie(SortieNulle()):
+        for ordre in permutations(actions):
+            partie = copy.deepcopy(environnement)
+            joueur = partie.joueur
+            restants = len(partie.lieux)
+            issue = VICTOIRE
+            for genre, nom in ordre:
+                if not restants:
+                    break
+                if genre == "allie":
+                    joueur.payer_allie(partie.allies[nom])
+                    continue
+                lieu = partie.lieux[nom]
+                if not joueur.attaquer(lieu.force_ennemis, lieu):
+                    issue = MORT if joueur.vie <= 0 else ECHEC
+                    break
+                restants -= 1
+            inventaire = tuple(sorted((nom, quantite) for nom, quantite in joueur.inventaire.items() if nom != "or"))
+            cle = (issue, joueur.vie, joueur.inventaire.get("or", 0), inventaire)
+            comptes[cle] = comptes.get(cle, 0) + 1
+    return comptes
+
+
+def _mondes(nombre: int, actions: int) -> List[Tuple[str, Environnement]]:
+    """Donne les mondes comparés: les cas limites, puis des mondes tirés au hasard d'au plus actions actions."""
+    mondes = [
+        ("sans lieu", nouvel_environnement(generer_monde(0, 30, 5), "Talion")),
+        ("sans allié", nouvel_environnement(generer_monde(3, 9, 5), "Talion")),
+        ("vide", nouvel_environnement(generer_monde(0, 0, 5), "Talion")),
+    ]
+    # Sans or de départ, les alliés d'un monde sans lieu seraient tous hors de prix, donc jamais recrutés.
+    for _, environnement in mondes:
+        environnement.joueur.inventaire["or"] = 40
+    hasard = random.Random(0)
+    for graine in range(nombre):
+        nombre_allies = hasard.randint(0, actions - 1)
+        nombre_lieux = hasard.randint(1, actions - nombre_allies)
+        monde = generer_monde(nombre_lieux, max(nombre_allies * 10, 10), 5, graine)
+        monde["personnages"] = [
+            personnage
+            for rang, personnage in enumerate(monde["personnages"])
+            if personnage["type"] == "ennemi" or rang < nombre_allies * 10
+        ]
+        environnement = nouvel_environnement(monde, "Talion")
+        environnement.joueur.inventaire["or"] = hasard.choice((0, 10, 40))
+        mondes.append((f"monde {graine}", environnement))
+    return mondes
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande.
+
+    Returns:
+        int: 1 si l'équilibrage ne compte pas les stratégies comme la force brute, 0 sinon.
+    """
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--mondes", type=int, default=20, help="nombre de mondes tirés au hasard")
+    analyseur.add_argument("--actions", type=int, default=7, help="nombre maximal d'alliés et de lieux par monde")
+    options = analyseur.parse_args(arguments)
+
+    ecarts = 0
+    duree_brute = duree_equilibrage = 0.0
+    for nom, environnement in _mondes(options.mondes, options.actions):
+        debut = time.perf_counter()
+        attendus = force_brute(environnement)
+        duree_brute += time.perf_counter() - debut
+        for profondeur in (1, 2):
+            debut = time.perf_counter()
+            comptes = equilibrer(environnement, processus=0, profondeur=profondeur).comptes
+            duree_equilibrage += time.perf_counter() - debut
+            if comptes != attendus:
+                print(f"{nom}, profondeur {profondeur}: {comptes} au lieu de {attendus}")
+                ecarts += 1
+    print(f"force brute: {duree_brute * 1000:,.1f} ms, équilibrage: {duree_equilibrage / 2 * 1000:,.1f} ms")
+    return 1 if ecarts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
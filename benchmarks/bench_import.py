@@ -0,0 +1,152 @@
+"""Banc d'essai du démarrage: temps d'import de chaque module du jeu, comparé à un budget.
+
+Chaque module est importé dans un nouvel interpréteur lancé avec -X importtime, plusieurs fois; le temps
+retenu est la médiane du temps cumulé de l'import du module, dépendances comprises, tel que le mesure
+l'interpréteur. Le banc vérifie aussi que l'import ne fait rien d'autre qu'importer: il ne doit rien afficher
+ni lire l'entrée standard.
+
+Les modules sont compilés une fois, dans un dossier de bytecode à part, avant d'être mesurés: comme pour un
+travailleur démarré après le premier, la compilation n'est pas comptée, même depuis une copie neuve du dépôt
+ou avec PYTHONDONTWRITEBYTECODE. Le temps d'import est rapporté à celui d'un démarrage nu de l'interpréteur
+(python -c pass) sur la même machine, pour que les budgets ne dépendent pas de sa vitesse.
+
+Le programme sort en erreur si un module dépasse son budget, pour servir de garde-fou.
+
+Exemples:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --repetitions 21 --detail serveur
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+RACINE = Path(__file__).resolve().parent.parent
+
+BUDGETS: Dict[str, float] = {
+    "Projet_Epopée_des_cité": 2.0,
+    "chargement": 2.5,
+    "simulation": 2.5,
+    "journal": 2.5,
+    "instantane": 2.5,
+    "instrumentation": 2.5,
+    "equilibrage": 2.5,
+    "ecriture": 2.5,
+    "schema": 2.5,
+    "rejeu": 2.5,
+    "cache_mondes": 2.5,
+    "serveur": 6.5,
+}
+"""Le temps d'import à ne pas dépasser pour chaque module, dépendances comprises, en nombre de démarrages nus
+de l'interpréteur. L'interpréteur lui-même (site, encodings) n'est pas compté dans le temps d'import."""
+
+
+def demarrage_nu(environnement: Dict[str, str], repetitions: int) -> float:
+    """Mesure le démarrage d'un interpréteur qui n'importe rien, de son lancement à sa fin.
+
+    Args:
+        environnement (Dict[str, str]): Les variables d'environnement des interpréteurs.
+        repetitions (int): Le nombre de démarrages mesurés.
+
+    Returns:
+        float: La médiane des durées, en millisecondes.
+    """
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], env=environnement, stdin=subprocess.DEVNULL, check=True)
+        durees.append((time.perf_counter() - debut) * 1000)
+    return statistics.median(durees)
+
+
+def importer(module: str, environnement: Dict[str, str]) -> Tuple[float, List[Tuple[int, int, str]], str]:
+    """Importe un module dans un nouvel interpréteur.
+
+    Args:
+        module (str): Le nom du module.
+        environnement (Dict[str, str]): Les variables d'environnement de l'interpréteur.
+
+    Returns:
+        Tuple[float, List[Tuple[int, int, str]], str]: Le temps cumulé de l'import en millisecondes, les lignes
+        de -X importtime (temps propre et cumulé en microsecondes, nom indenté) et ce que l'import a affiché.
+
+    Raises:
+        RuntimeError: Si l'import échoue.
+    """
+    processus = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=RACINE,
+        env=environnement,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+    )
+    lignes = []
+    erreurs = []
+    for ligne in processus.stderr.splitlines():
+        if not ligne.startswith("import time:") or "self [us]" in ligne:
+            erreurs.append(ligne)
+            continue
+        propre, cumule, nom = ligne[len("import time:") :].split("|")
+        lignes.append((int(propre), int(cumule), nom.rstrip()))
+    if processus.returncode != 0:
+        raise RuntimeError(f"L'import de {module} a échoué:\n" + "\n".join(erreurs))
+    total = next(cumule for _, cumule, nom in reversed(lignes) if nom.strip() == module)
+    return total / 1000, lignes, processus.stdout
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande.
+
+    Returns:
+        int: 1 si un module dépasse son budget ou affiche quelque chose à l'import, 0 sinon.
+    """
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--repetitions", type=int, default=11, help="nombre d'imports par module")
+    analyseur.add_argument("--modules", default=",".join(BUDGETS), help="modules à mesurer, séparés par des virgules")
+    analyseur.add_argument("--detail", help="affiche les imports les plus coûteux de ce module")
+    options = analyseur.parse_args(arguments)
+
+    echecs = 0
+    with tempfile.TemporaryDirectory() as bytecode:
+        environnement = {cle: valeur for cle, valeur in os.environ.items() if cle != "PYTHONDONTWRITEBYTECODE"}
+        environnement["PYTHONPYCACHEPREFIX"] = bytecode
+        reference = demarrage_nu(environnement, options.repetitions)
+        print(f"démarrage nu: {reference:.1f}ms")
+        print(f"{'module':<24} {'médiane':>10} {'min':>10} {'rapport':>8} {'budget':>8}")
+        for module in options.modules.split(","):
+            # Le premier import compile le module et ses dépendances; il n'est pas mesuré.
+            importer(module, environnement)
+            temps = []
+            for _ in range(options.repetitions):
+                total, lignes, affichage = importer(module, environnement)
+                temps.append(total)
+            budget = BUDGETS.get(module)
+            mediane = statistics.median(temps)
+            rapport = mediane / reference
+            remarque = ""
+            if affichage:
+                remarque = "  AFFICHE À L'IMPORT"
+                echecs += 1
+            elif budget is not None and rapport > budget:
+                remarque = "  HORS BUDGET"
+                echecs += 1
+            print(
+                f"{module:<24} {mediane:>8.1f}ms {min(temps):>8.1f}ms {rapport:>8.2f} "
+                f"{budget or float('nan'):>8.2f}{remarque}"
+            )
+            if module == options.detail:
+                for propre, cumule, nom in sorted(lignes, key=lambda ligne: -ligne[1])[:25]:
+                    print(f"    {cumule / 1000:>8.1f}ms cumulé {propre / 1000:>8.1f}ms propre {nom}")
+    return 1 if echecs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
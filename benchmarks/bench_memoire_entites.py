@@ -0,0 +1,110 @@
+"""Mesure la mémoire occupée par entité, avant et après le passage des entités aux __slots__.
+
+Les classes "avant" reproduisent les anciennes entités, dont les attributs vivaient dans un __dict__ et dont
+les noms n'étaient pas internés. Les chaînes sont recréées pour chaque entité, comme quand elles sortent
+d'un fichier json, et les noms se répètent comme dans un monde généré, sauf ceux des lieux, uniques et donc
+pas internés. Un lieu garde surtout ses deux chaînes et ses deux listes: son gain est faible.
+
+Exemple:
+    python benchmarks/bench_memoire_entites.py --nombre 200000
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Projet_Epopée_des_cité import Allie, Ennemi, Lieu, Ressource  # noqa: E402
+
+
+class _AncienPng:
+    """Png tel qu'il était avant les __slots__."""
+
+    def __init__(self, nom: str, force: int, dialogue: str):
+        self.nom = nom
+        self.force = force
+        self.dialogue = dialogue
+
+
+class _AncienneRessource:
+    """Ressource telle qu'elle était avant les __slots__."""
+
+    def __init__(self, nom: str, quantite: int, utilite: str):
+        self.nom = nom
+        self.quantite = quantite
+        self.utilite = utilite
+
+
+class _AncienLieu:
+    """Lieu tel qu'il était avant les __slots__."""
+
+    def __init__(self, nom: str, description: str, ressources: List, ennemis: List):
+        self.nom = nom
+        self.description = description
+        self.ressources = ressources
+        self.ennemis = ennemis
+
+
+def _chaine(prefixe: str, numero: int) -> str:
+    """Construit une nouvelle chaîne à chaque appel, même pour un contenu déjà vu."""
+    return "".join([prefixe, str(numero)])
+
+
+def _fabriques(avant: bool) -> Dict[str, Callable[[int], object]]:
+    """Donne, pour chaque sorte d'entité, la fonction qui crée la i-ème entité."""
+    png = _AncienPng if avant else Ennemi
+    allie = _AncienPng if avant else Allie
+    ressource = _AncienneRessource if avant else Ressource
+    lieu = _AncienLieu if avant else Lieu
+    return {
+        "Ennemi": lambda i: png(_chaine("ennemi ", i % 500), i % 30, _chaine("Grrr... ", i % 500)),
+        "Allie": lambda i: allie(_chaine("allié ", i % 500), i % 10, _chaine("Il me faut 10 unités d'or. ", i % 500)),
+        "Ressource": lambda i: ressource(_chaine("ressource ", i % 50), i % 100, _chaine("Sert à ", i % 50)),
+        "Lieu": lambda i: lieu(_chaine("lieu ", i), _chaine("Un lieu perdu numéro ", i), [], []),
+    }
+
+
+def octets_par_entite(fabrique: Callable[[int], object], nombre: int) -> float:
+    """Mesure avec tracemalloc la mémoire retenue par nombre entités, divisée par nombre."""
+    gc.collect()
+    tracemalloc.start()
+    entites = [fabrique(i) for i in range(nombre)]
+    occupe, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # La liste qui retient les entités n'en fait pas partie.
+    occupe -= sys.getsizeof(entites)
+    del entites
+    return occupe / nombre
+
+
+def main(arguments: List[str] = None) -> None:
+    """Affiche les octets par entité avant et après, et le gain."""
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--nombre", "-n", type=int, default=100_000, help="nombre d'entités de chaque sorte")
+    analyseur.add_argument("--json", action="store_true", help="affiche le résultat en json")
+    options = analyseur.parse_args(arguments)
+
+    avant = _fabriques(avant=True)
+    apres = _fabriques(avant=False)
+    resultats = {}
+    for sorte in avant:
+        octets_avant = octets_par_entite(avant[sorte], options.nombre)
+        octets_apres = octets_par_entite(apres[sorte], options.nombre)
+        resultats[sorte] = {"avant": round(octets_avant, 1), "apres": round(octets_apres, 1)}
+
+    if options.json:
+        print(json.dumps({"nombre": options.nombre, "octets_par_entite": resultats}, indent=2))
+        return
+    print(f"{'entité':<10} {'avant':>10} {'après':>10} {'gain':>7}   ({options.nombre} entités de chaque sorte)")
+    for sorte, mesure in resultats.items():
+        gain = 1 - mesure["apres"] / mesure["avant"]
+        print(f"{sorte:<10} {mesure['avant']:>10.1f} {mesure['apres']:>10.1f} {gain:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
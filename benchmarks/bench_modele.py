@@ -0,0 +1,84 @@
+"""Compare le coût d'une nouvelle partie construite en entier et posée sur un monde partagé.
+
+Pour --sessions parties sur un même monde synthétique, le banc mesure le temps de création de chaque partie
+et la mémoire qu'elle garde en propre (tracemalloc), avant qu'elle ne commence puis après quelques lieux
+attaqués.
+
+Exemple:
+    python benchmarks/bench_modele.py --lieux 2000 --sessions 500
+"""
+
+from pathlib import Path
+from typing import Callable, List, Optional
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import (  # noqa: E402
+    Environnement,
+    ModeleMonde,
+    SortieNulle,
+    nouvel_environnement,
+    rediriger_sortie,
+)
+from monde_synthetique import generer_monde  # noqa: E402
+
+
+def _attaquer(environnement: Environnement, nombre: int) -> None:
+    """Attaque les premiers lieux de la carte, comme le fait choix_lieux, sans afficher la carte."""
+    with rediriger_sortie(SortieNulle()):
+        for nom in environnement.lieux.noms()[:nombre]:
+            lieu = environnement.lieux.get(nom)
+            if environnement.joueur.attaquer(lieu.force_ennemis, lieu):
+                environnement.lieux.retirer(nom)
+
+
+def mesurer(creer: Callable[[int], Environnement], sessions: int, attaques: int) -> List[float]:
+    """Crée les parties et donne le temps de création, la mémoire par partie et la mémoire après les attaques.
+
+    Args:
+        creer (Callable[[int], Environnement]): Crée la i-ème partie.
+        sessions (int): Le nombre de parties.
+        attaques (int): Le nombre de lieux attaqués dans chaque partie.
+
+    Returns:
+        List[float]: Microsecondes par création, octets par partie neuve, octets par partie après les attaques.
+    """
+    gc.collect()
+    tracemalloc.start()
+    debut = time.perf_counter()
+    parties = [creer(i) for i in range(sessions)]
+    duree = time.perf_counter() - debut
+    neuves = tracemalloc.get_traced_memory()[0]
+    for environnement in parties:
+        _attaquer(environnement, attaques)
+    jouees = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return [duree * 1e6 / sessions, neuves / sessions, jouees / sessions]
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: affiche les deux mesures côte à côte."""
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--lieux", type=int, default=2000, help="nombre de lieux (et de personnages) du monde")
+    analyseur.add_argument("--sessions", type=int, default=200, help="nombre de parties créées")
+    analyseur.add_argument("--attaques", type=int, default=5, help="nombre de lieux attaqués par partie")
+    options = analyseur.parse_args(arguments)
+
+    donnees = generer_monde(options.lieux)
+    modele = ModeleMonde(donnees)
+    complete = mesurer(lambda i: nouvel_environnement(donnees, f"joueur {i}"), options.sessions, options.attaques)
+    partagee = mesurer(lambda i: modele.nouvelle_partie(f"joueur {i}"), options.sessions, options.attaques)
+    print(f"{options.sessions} parties sur un monde de {options.lieux} lieux")
+    print(f"{'':<12} {'création (µs)':>14} {'octets/partie':>14} {'après attaques':>15}")
+    for nom, mesure in (("complète", complete), ("partagée", partagee)):
+        print(f"{nom:<12} {mesure[0]:>14,.1f} {mesure[1]:>14,.0f} {mesure[2]:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare la recherche des alliés abordables avant et après la lecture unique des prix.
+
+Avant, chaque question relisait le prix dans le dialogue de chaque allié avec re.search; maintenant, le prix
+est lu à la création de l'allié et Environnement.allies_abordables interroge une table triée par prix.
+
+Exemple:
+    python benchmarks/bench_prix.py --allies 2000 --requetes 2000
+"""
+
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import Allie, Environnement, nouvel_environnement  # noqa: E402
+from monde_synthetique import generer_monde  # noqa: E402
+
+
+def _ancien_prix(allie: Allie) -> Optional[int]:
+    """prix_allie tel qu'il était: le dialogue est relu à chaque appel."""
+    prix = re.search(pattern=r"(\d+) (unités d'or)", string=allie.dialogue)
+    if not prix:
+        return None
+    return int(prix.group(1))
+
+
+def _anciens_abordables(environnement: Environnement, inventaire: dict) -> List[Allie]:
+    """La recherche des alliés abordables telle que la faisait la politique gloutonne."""
+    return [allie for allie in environnement.allies if (_ancien_prix(allie) or 0) <= inventaire.get("or", 0)]
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: mesure les deux recherches sur les mêmes inventaires."""
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--allies", type=int, default=2000, help="nombre d'alliés du monde")
+    analyseur.add_argument("--requetes", type=int, default=2000, help="nombre de recherches")
+    options = analyseur.parse_args(arguments)
+
+    environnement = nouvel_environnement(generer_monde(10, options.allies * 10, 5), "Talion")
+    hasard = random.Random(0)
+    inventaires = [{"or": hasard.choice((0, 5, 10, 20, 40))} for _ in range(options.requetes)]
+
+    debut = time.perf_counter()
+    avant = [_anciens_abordables(environnement, inventaire) for inventaire in inventaires]
+    duree_avant = time.perf_counter() - debut
+    debut = time.perf_counter()
+    apres = [environnement.allies_abordables(inventaire) for inventaire in inventaires]
+    duree_apres = time.perf_counter() - debut
+    assert avant == apres
+
+    print(f"{len(environnement.allies)} alliés, {options.requetes} recherches")
+    print(f"avant: {duree_avant * 1e6 / options.requetes:10.1f} µs par recherche")
+    print(f"après: {duree_apres * 1e6 / options.requetes:10.1f} µs par recherche")
+
+
+if __name__ == "__main__":
+    main()
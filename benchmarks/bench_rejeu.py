@@ -0,0 +1,127 @@
+"""Mesure le journal de rejeu: coût de l'enregistrement, taille du journal, vitesse du rejeu et des sauts.
+
+Une longue session est jouée par la politique gloutonne sur un monde synthétique, avec et sans
+EnregistreurRejeu; la durée de la session comprend celle de la politique. Le journal obtenu est ensuite:
+    - rejoué en entier depuis le début, pour mesurer le nombre de choix rejoués par seconde;
+    - parcouru par sauts à des étapes tirées au hasard, avec et sans les points de reprise.
+Chaque saut doit donner exactement l'état obtenu en rejouant la session pas à pas, et le rejeu complet l'état
+de la session enregistrée.
+
+Exemple:
+    python benchmarks/bench_rejeu.py --lieux 2000 --intervalle 100
+"""
+
+from pathlib import Path
+from typing import Callable, List, Optional
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import (  # noqa: E402
+    MENU_NOM,
+    Environnement,
+    SortieNulle,
+    creation_environnement,
+    executer_partie,
+    partie,
+    rediriger_sortie,
+)
+from monde_synthetique import ecrire_monde  # noqa: E402
+from rejeu import EnregistreurRejeu, Rejoueur, SessionEnregistree, lire_rejeu  # noqa: E402
+from simulation import politique_gloutonne  # noqa: E402
+
+
+def _jouer(monde: str, dossier: str, enregistrer: Optional[str], intervalle: int) -> Environnement:
+    """Joue une nouvelle partie avec la politique gloutonne, en notant les choix si enregistrer est donné."""
+    partie_en_cours: List[Environnement] = []
+
+    def entree(menu: str) -> str:
+        return "Talion" if menu == MENU_NOM else politique_gloutonne(partie_en_cours[0], menu)
+
+    with rediriger_sortie(SortieNulle()):
+        enregistreur = EnregistreurRejeu(enregistrer, monde, entree, intervalle) if enregistrer else None
+        choisir: Callable[[str], str] = enregistreur or entree
+        environnement = creation_environnement(monde, os.path.join(dossier, "absente.json"), entree=choisir)
+        partie_en_cours.append(environnement)
+        if enregistreur is not None:
+            enregistreur.commencer(environnement)
+        executer_partie(partie(environnement, lambda environnement: None), choisir)
+        if enregistreur is not None:
+            enregistreur.fermer()
+    return environnement
+
+
+def _sans_points(session: SessionEnregistree) -> SessionEnregistree:
+    """Donne la même session, sans ses points de reprise."""
+    copie = SessionEnregistree(session.monde, session.empreinte, session.depart)
+    copie.choix = session.choix
+    return copie
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande.
+
+    Returns:
+        int: 1 si un rejeu ne redonne pas l'état de la session, 0 sinon.
+    """
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--lieux", type=int, default=2_000, help="nombre de lieux du monde")
+    analyseur.add_argument("--intervalle", type=int, default=100, help="choix entre deux points de reprise")
+    analyseur.add_argument("--sauts", type=int, default=20, help="nombre d'étapes tirées au hasard")
+    options = analyseur.parse_args(arguments)
+
+    ecarts = 0
+    with tempfile.TemporaryDirectory() as dossier:
+        monde = os.path.join(dossier, "monde.json")
+        chemin = os.path.join(dossier, "session.rejeu")
+        ecrire_monde(monde, options.lieux)
+
+        debut = time.perf_counter()
+        _jouer(monde, dossier, None, options.intervalle)
+        duree_sans = time.perf_counter() - debut
+        debut = time.perf_counter()
+        attendu = _jouer(monde, dossier, chemin, options.intervalle).vers_dict()
+        duree_avec = time.perf_counter() - debut
+
+        session = lire_rejeu(chemin)[-1]
+        etapes = len(session.choix)
+        print(f"{options.lieux} lieux, session de {etapes} choix, {len(session.points)} points de reprise")
+        print(f"journal: {os.path.getsize(chemin) / 1024:,.1f} Ko, {os.path.getsize(chemin) / etapes:.1f} octets par choix")
+        print(f"session jouée: {duree_sans * 1000:,.1f} ms sans journal, {duree_avec * 1000:,.1f} ms avec")
+
+        debut = time.perf_counter()
+        rejoueur = Rejoueur(_sans_points(session))
+        rejoueur.jusqu_a_la_fin()
+        duree = time.perf_counter() - debut
+        print(f"rejeu complet: {duree * 1000:,.1f} ms, {etapes / duree:,.0f} choix/s")
+        if rejoueur.environnement.vers_dict() != attendu:
+            print("le rejeu complet ne redonne pas l'état de la session")
+            ecarts += 1
+
+        cibles = sorted(random.Random(0).sample(range(etapes + 1), min(options.sauts, etapes + 1)))
+        pas_a_pas = Rejoueur(_sans_points(session))
+        for nom, avec_points in (("sans points de reprise", False), ("avec points de reprise", True)):
+            durees = []
+            for cible in cibles:
+                debut = time.perf_counter()
+                rejoueur = Rejoueur(session if avec_points else _sans_points(session))
+                rejoueur.aller_a(cible)
+                durees.append(time.perf_counter() - debut)
+                if avec_points:
+                    pas_a_pas.aller_a(cible)
+                    if rejoueur.environnement.vers_dict() != pas_a_pas.environnement.vers_dict():
+                        print(f"le saut à l'étape {cible} ne redonne pas l'état du rejeu pas à pas")
+                        ecarts += 1
+            print(f"saut à une étape au hasard, {nom}: médiane {statistics.median(durees) * 1000:,.2f} ms")
+    return 1 if ecarts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
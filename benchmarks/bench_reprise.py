@@ -0,0 +1,58 @@
+"""Compare le temps de reprise d'une grande partie sauvegardée en json et en instantané binaire.
+
+La reprise est mesurée jusqu'au premier choix du joueur (creation_environnement), puis jusqu'à l'attaque
+d'un lieu pris au hasard, qui oblige l'instantané à construire ce lieu et ses ennemis.
+
+Exemple:
+    python benchmarks/bench_reprise.py --lieux 200000
+"""
+
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import creation_environnement, nouvel_environnement, sauvegarder_partie  # noqa: E402
+from instantane import sauvegarder_instantane  # noqa: E402
+from monde_synthetique import generer_monde  # noqa: E402
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: écrit la même partie dans les deux formats et mesure la reprise."""
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--lieux", type=int, default=100_000, help="nombre de lieux (et de personnages)")
+    options = analyseur.parse_args(arguments)
+
+    environnement = nouvel_environnement(generer_monde(options.lieux), "Talion")
+    nom_lieu = random.Random(0).choice(environnement.lieux.noms())
+    with tempfile.TemporaryDirectory() as dossier:
+        fichiers = {
+            "json": os.path.join(dossier, "partie.json"),
+            "binaire": os.path.join(dossier, "partie.bin"),
+        }
+        sauvegarder_partie(fichiers["json"], environnement)
+        sauvegarder_instantane(fichiers["binaire"], environnement)
+        del environnement
+        print(f"{'format':<8} {'taille (Mo)':>12} {'reprise (s)':>12} {'premier lieu (ms)':>18}")
+        for format_, chemin in fichiers.items():
+            debut = time.perf_counter()
+            reprise = creation_environnement("data.json", chemin)
+            duree = time.perf_counter() - debut
+            debut = time.perf_counter()
+            reprise.lieux[nom_lieu].force_ennemis
+            premier_lieu = time.perf_counter() - debut
+            print(
+                f"{format_:<8} {os.path.getsize(chemin) / 1e6:>12.1f} {duree:>12.4f} {premier_lieu * 1000:>18.3f}"
+            )
+            del reprise
+
+
+if __name__ == "__main__":
+    main()
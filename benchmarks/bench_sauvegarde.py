@@ -0,0 +1,94 @@
+"""Mesure la latence d'une sauvegarde en fonction de la taille du monde, complète ou journalisée.
+
+Entre deux sauvegardes, le joueur fait ce qu'il fait entre deux passages au menu: il recrute un allié,
+accomplit un lieu et gagne de l'or. La sauvegarde complète (sauvegarder_partie) réécrit tout le monde; la
+sauvegarde journalisée n'écrit que ces changements, et un instantané toutes les --compaction sauvegardes.
+
+Exemple:
+    python benchmarks/bench_sauvegarde.py --tailles 1000,10000,100000
+"""
+
+from pathlib import Path
+from typing import Callable, List, Optional
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import Environnement, nouvel_environnement, sauvegarder_partie  # noqa: E402
+from journal import COMPACTION, SauvegardeJournalisee  # noqa: E402
+from monde_synthetique import generer_monde  # noqa: E402
+
+
+def _jouer_un_tour(environnement: Environnement) -> None:
+    """Fait les changements d'un tour de jeu: un allié recruté, un lieu accompli, de l'or gagné."""
+    if len(environnement.allies):
+        environnement.allies.retirer(next(iter(environnement.allies)).nom)
+    if len(environnement.lieux):
+        environnement.lieux.retirer(next(iter(environnement.lieux)).nom)
+    environnement.joueur.inventaire["or"] += 10
+    environnement.joueur.vie -= 1
+
+
+def mesurer(
+    taille: int, sauvegarde: Callable[[Environnement], None], sauvegardes: int
+) -> List[float]:
+    """Mesure la durée de chaque sauvegarde sur un monde neuf de la taille donnée.
+
+    Args:
+        taille (int): Le nombre de lieux et de personnages du monde.
+        sauvegarde (Callable[[Environnement], None]): La fonction de sauvegarde à mesurer.
+        sauvegardes (int): Le nombre de sauvegardes à faire.
+
+    Returns:
+        List[float]: La durée de chaque sauvegarde, en secondes.
+    """
+    environnement = nouvel_environnement(generer_monde(taille), "Talion")
+    sauvegarde(environnement)
+    durees = []
+    for _ in range(sauvegardes):
+        _jouer_un_tour(environnement)
+        debut = time.perf_counter()
+        sauvegarde(environnement)
+        durees.append(time.perf_counter() - debut)
+    return durees
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: affiche la latence des sauvegardes pour chaque taille de monde."""
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--tailles", default="1000,10000,100000", help="nombres de lieux, séparés par des virgules")
+    analyseur.add_argument("--sauvegardes", type=int, default=50, help="nombre de sauvegardes mesurées par taille")
+    analyseur.add_argument("--compaction", type=int, default=COMPACTION, help="lignes de journal avant un instantané")
+    analyseur.add_argument(
+        "--sans-fsync", action="store_true", help="ne pas forcer les écritures journalisées sur le disque"
+    )
+    options = analyseur.parse_args(arguments)
+
+    print(f"{'lieux':>8} {'complète (ms)':>14} {'journal médiane (ms)':>21} {'journal max (ms)':>17}")
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in (int(taille) for taille in options.tailles.split(",")):
+            chemin_complet = os.path.join(dossier, f"complete_{taille}.json")
+            complete = mesurer(
+                taille, lambda environnement: sauvegarder_partie(chemin_complet, environnement), options.sauvegardes
+            )
+            journalisee = mesurer(
+                taille,
+                SauvegardeJournalisee(
+                    os.path.join(dossier, f"journal_{taille}.json"), options.compaction, not options.sans_fsync
+                ),
+                options.sauvegardes,
+            )
+            print(
+                f"{taille:>8} {statistics.median(complete) * 1000:>14.2f} "
+                f"{statistics.median(journalisee) * 1000:>21.3f} {max(journalisee) * 1000:>17.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare les variantes de sauvegarde: taille du fichier, temps d'écriture et temps de reprise.
+
+Chaque combinaison de VarianteSauvegarde (compact, références, compression) sauvegarde la même partie avec
+sauvegarder_partie, puis la reprend avec charger_sauvegarde et restaurer_environnement, plusieurs fois; le
+temps retenu est la médiane. L'instantané binaire est mesuré aussi, pour comparaison. La partie reprise doit
+être exactement la partie sauvegardée.
+
+Exemple:
+    python benchmarks/bench_sauvegardes.py --lieux 10000 --personnages 10000
+"""
+
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import (  # noqa: E402
+    COMPRESSIONS,
+    Environnement,
+    VarianteSauvegarde,
+    charger_sauvegarde,
+    nouvel_environnement,
+    restaurer_environnement,
+    sauvegarder_partie,
+)
+from instantane import charger_instantane, sauvegarder_instantane  # noqa: E402
+from monde_synthetique import generer_monde  # noqa: E402
+
+
+def _mediane(operation: Callable[[], object], repetitions: int) -> Tuple[float, object]:
+    """Donne la durée médiane d'une opération, en secondes, et son dernier résultat."""
+    durees = []
+    resultat = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = operation()
+        durees.append(time.perf_counter() - debut)
+    return statistics.median(durees), resultat
+
+
+def _nom(variante: VarianteSauvegarde) -> str:
+    """Nomme une variante par ce qui la distingue des sauvegardes indentées."""
+    parties = [nom for nom, actif in (("compact", variante.compact), ("références", variante.references)) if actif]
+    if variante.compression:
+        parties.append(variante.compression)
+    return "+".join(parties) or "indenté"
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande.
+
+    Returns:
+        int: 1 si une variante ne redonne pas la partie sauvegardée, 0 sinon.
+    """
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--lieux", type=int, default=10_000, help="nombre de lieux du monde")
+    analyseur.add_argument("--personnages", type=int, default=10_000, help="nombre de personnages du monde")
+    analyseur.add_argument("--repetitions", type=int, default=5, help="mesures par variante")
+    options = analyseur.parse_args(arguments)
+
+    environnement = nouvel_environnement(generer_monde(options.lieux, options.personnages), "Talion")
+    attendu = environnement.vers_dict()
+    variantes = [
+        VarianteSauvegarde(compact, references, compression)
+        for compression, compact, references in itertools.product((None, *COMPRESSIONS), (False, True), (False, True))
+    ]
+    ecarts = 0
+    print(f"{options.lieux} lieux, {options.personnages} personnages, médiane de {options.repetitions} mesures")
+    print(f"{'variante':<28} {'taille (Ko)':>12} {'écriture (ms)':>14} {'reprise (ms)':>13}")
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "sauvegarde")
+        mesures: List[Tuple[str, Callable[[], None], Callable[[], Environnement]]] = [
+            (
+                _nom(variante),
+                lambda variante=variante: sauvegarder_partie(chemin, environnement, variante),
+                lambda: restaurer_environnement(charger_sauvegarde(chemin)),
+            )
+            for variante in variantes
+        ]
+        mesures.append(
+            ("instantané binaire", lambda: sauvegarder_instantane(chemin, environnement), lambda: charger_instantane(chemin))
+        )
+        for nom, sauvegarder, reprendre in mesures:
+            duree_ecriture, _ = _mediane(sauvegarder, options.repetitions)
+            taille = os.path.getsize(chemin)
+            duree_reprise, reprise = _mediane(reprendre, options.repetitions)
+            remarque = ""
+            if reprise.vers_dict() != attendu:
+                remarque = "  PARTIE DIFFÉRENTE"
+                ecarts += 1
+            print(f"{nom:<28} {taille / 1024:>12,.1f} {duree_ecriture * 1000:>14,.1f} {duree_reprise * 1000:>13,.1f}{remarque}")
+    return 1 if ecarts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Mesure le surcoût de la validation par schéma au chargement des gros mondes et des grosses sauvegardes.
+
+Pour chaque taille de monde, trois temps sont comparés, en médiane de plusieurs mesures:
+    - lecture: json.loads du fichier déjà en mémoire;
+    - validation: verifier_monde, ou verifier_sauvegarde pour la sauvegarde de la partie;
+    - construction: ModeleMonde, ou restaurer_environnement pour la sauvegarde.
+Le surcoût est la validation rapportée à la lecture et à la construction, ce que coûtait le chargement
+sans elle.
+
+Le monde est ensuite abîmé en plusieurs endroits tirés au hasard: la validation doit signaler chaque
+défaut, une seule fois, avec son chemin.
+
+Exemple:
+    python benchmarks/bench_schema.py --lieux 1000,10000,100000
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import ModeleMonde, restaurer_environnement  # noqa: E402
+from monde_synthetique import generer_monde  # noqa: E402
+from schema import ErreurSchema, verifier_monde, verifier_sauvegarde  # noqa: E402
+
+
+def _mediane(operation: Callable[[], Any], repetitions: int) -> Tuple[float, Any]:
+    """Donne la durée médiane d'une opération, en secondes, et son dernier résultat."""
+    durees = []
+    resultat = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = operation()
+        durees.append(time.perf_counter() - debut)
+    return statistics.median(durees), resultat
+
+
+def _abimer(monde: Dict[str, List[Dict[str, Any]]], defauts: int, graine: int) -> List[str]:
+    """Abîme un monde en plusieurs éléments distincts et donne le chemin attendu de chaque défaut."""
+    hasard = random.Random(graine)
+    attendus = []
+    for indice in hasard.sample(range(len(monde["lieux"])), defauts):
+        lieu = monde["lieux"][indice]
+        match hasard.randrange(3):
+            case 0:
+                del lieu["description"]
+                attendus.append(f"lieux[{indice}]")
+            case 1:
+                lieu["ennemis"] = [None] + lieu["ennemis"]
+                attendus.append(f"lieux[{indice}].ennemis[0]")
+            case _:
+                lieu["nom"] = len(lieu["nom"])
+                attendus.append(f"lieux[{indice}].nom")
+    return sorted(attendus)
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande.
+
+    Returns:
+        int: 1 si la validation refuse un document correct ou manque un défaut, 0 sinon.
+    """
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--lieux", default="1000,10000,100000", help="tailles de monde, séparées par des virgules")
+    analyseur.add_argument("--repetitions", type=int, default=5, help="mesures par opération")
+    analyseur.add_argument("--defauts", type=int, default=25, help="défauts introduits dans le monde abîmé")
+    options = analyseur.parse_args(arguments)
+
+    ecarts = 0
+    print(f"médiane de {options.repetitions} mesures")
+    print(f"{'document':<24} {'lecture (ms)':>13} {'validation (ms)':>16} {'construction (ms)':>18} {'surcoût':>8}")
+    for nombre_lieux in (int(nombre) for nombre in options.lieux.split(",")):
+        monde = generer_monde(nombre_lieux)
+        sauvegarde = ModeleMonde(monde).nouvelle_partie("Talion").vers_dict()
+        documents = (
+            (f"monde {nombre_lieux:,} lieux", monde, verifier_monde, ModeleMonde),
+            (f"sauvegarde {nombre_lieux:,} lieux", sauvegarde, verifier_sauvegarde, restaurer_environnement),
+        )
+        for nom, donnees, valider, construire in documents:
+            texte = json.dumps(donnees, ensure_ascii=False)
+            duree_lecture, relu = _mediane(lambda: json.loads(texte), options.repetitions)
+            try:
+                duree_validation, _ = _mediane(lambda: valider(relu, nom), options.repetitions)
+            except ErreurSchema as e:
+                print(f"{nom}: document correct refusé\n{e}")
+                ecarts += 1
+                continue
+            duree_construction, _ = _mediane(lambda: construire(relu), options.repetitions)
+            surcout = duree_validation / (duree_lecture + duree_construction)
+            print(
+                f"{nom:<24} {duree_lecture * 1000:>13,.1f} {duree_validation * 1000:>16,.1f}"
+                f" {duree_construction * 1000:>18,.1f} {surcout:>8.1%}"
+            )
+
+        defauts = min(options.defauts, nombre_lieux)
+        attendus = _abimer(monde, defauts, graine=nombre_lieux)
+        try:
+            verifier_monde(monde, "monde abîmé")
+            trouves: List[str] = []
+        except ErreurSchema as e:
+            trouves = sorted(chemin for chemin, _ in e.erreurs)
+        if trouves != attendus:
+            print(f"monde abîmé de {nombre_lieux:,} lieux: {defauts} défauts attendus, {len(trouves)} signalés")
+            ecarts += 1
+    return 1 if ecarts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
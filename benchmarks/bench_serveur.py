@@ -0,0 +1,94 @@
+"""Mesure la mémoire du serveur de jeu par session inactive, et le temps de réponse à un choix.
+
+Le serveur tourne dans un processus à part, sur une socket unix. Le banc ouvre --sessions connexions, donne
+un nom à chaque joueur et les laisse attendre au village; la mémoire du serveur (VmRSS) est relevée avant et
+après. Chaque joueur fait ensuite un même choix, tous en même temps.
+
+Exemple:
+    python benchmarks/bench_serveur.py --sessions 5000
+"""
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RACINE = Path(__file__).resolve().parent.parent
+
+
+def memoire_ko(pid: int) -> int:
+    """Donne la mémoire résidente d'un processus, en Ko, lue dans /proc."""
+    with open(f"/proc/{pid}/status", encoding="utf-8") as fichier:
+        for ligne in fichier:
+            if ligne.startswith("VmRSS:"):
+                return int(ligne.split()[1])
+    raise RuntimeError("VmRSS introuvable")
+
+
+async def _connecter(chemin: str, numero: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Ouvre une session et l'amène au menu du village."""
+    lecteur, ecrivain = await asyncio.open_unix_connection(chemin)
+    await lecteur.readuntil(b"nom> ")
+    ecrivain.write(f"joueur {numero}\n".encode("utf-8"))
+    await lecteur.readuntil(b"village> ")
+    return lecteur, ecrivain
+
+
+async def _choisir(lecteur: asyncio.StreamReader, ecrivain: asyncio.StreamWriter, choix: str, invite: bytes) -> None:
+    """Envoie un choix et attend l'invite suivante."""
+    ecrivain.write(choix.encode("utf-8") + b"\n")
+    await lecteur.readuntil(invite)
+
+
+async def _mesurer(chemin: str, pid: int, sessions: int) -> None:
+    """Ouvre les sessions, relève la mémoire, puis fait jouer tous les joueurs en même temps."""
+    avant = memoire_ko(pid)
+    debut = time.perf_counter()
+    connexions = []
+    for paquet in range(0, sessions, 100):
+        connexions += await asyncio.gather(
+            *(_connecter(chemin, numero) for numero in range(paquet, min(paquet + 100, sessions)))
+        )
+    ouverture = time.perf_counter() - debut
+    apres = memoire_ko(pid)
+    print(f"{sessions} sessions ouvertes en {ouverture:.2f} s")
+    print(f"mémoire du serveur: {avant / 1024:.1f} Mo à vide, {apres / 1024:.1f} Mo avec les sessions")
+    print(f"soit {(apres - avant) * 1024 / sessions / 1024:.1f} Ko par session inactive")
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(_choisir(lecteur, ecrivain, "2", b"lieux> ") for lecteur, ecrivain in connexions))
+    duree = time.perf_counter() - debut
+    print(f"un choix pour chaque joueur: {duree:.2f} s, {sessions / duree:,.0f} choix/s")
+    for _, ecrivain in connexions:
+        ecrivain.close()
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: lance le serveur et mesure."""
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--sessions", type=int, default=2000, help="nombre de sessions simultanées")
+    analyseur.add_argument("--monde", default=str(RACINE / "data.json"), help="le fichier de données du jeu")
+    options = analyseur.parse_args(arguments)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "serveur.sock")
+        serveur = subprocess.Popen(
+            [sys.executable, str(RACINE / "serveur.py"), options.monde, "--unix", chemin,
+             "--dossier", os.path.join(dossier, "sauvegardes")]
+        )
+        try:
+            while not os.path.exists(chemin):
+                time.sleep(0.05)
+            asyncio.run(_mesurer(chemin, serveur.pid, options.sessions))
+        finally:
+            serveur.terminate()
+            serveur.wait()
+
+
+if __name__ == "__main__":
+    main()
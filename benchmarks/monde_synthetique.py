@@ -0,0 +1,132 @@
+"""Génération de mondes synthétiques au format de data.json, de taille quelconque.
+
+Les noms sont uniques et les lieux désignent des ressources et des ennemis qui existent, comme dans
+data.json. Le monde peut être écrit en flux dans un fichier, sans jamais être entier en mémoire.
+
+Exemple:
+    python benchmarks/monde_synthetique.py monde.json --lieux 1000000
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+import argparse
+import json
+import random
+
+
+def _ressources(nombre: int) -> Iterator[Dict[str, Any]]:
+    """Donne les ressources du monde; la première est toujours l'or."""
+    yield {"nom": "or", "quantite": 20, "utilite": "Acheter de l'aide"}
+    for i in range(1, nombre):
+        yield {"nom": f"ressource {i}", "quantite": 5 + i % 20, "utilite": f"Construire l'ouvrage {i % 7}"}
+
+
+def _personnages(nombre: int, hasard: random.Random) -> Iterator[Dict[str, Any]]:
+    """Donne les personnages du monde: un allié pour neuf ennemis."""
+    for i in range(nombre):
+        if i % 10 == 0:
+            prix = hasard.choice((5, 10, 20, 40))
+            yield {
+                "nom": f"Allié {i}",
+                "type": "allié",
+                "force": hasard.randint(2, 8),
+                "dialogue": f"Je peux t'aider à explorer, mais il me faut {prix} unités d'or.",
+            }
+        else:
+            yield {
+                "nom": f"Ennemi {i}",
+                "type": "ennemi",
+                "force": hasard.randint(3, 15),
+                "dialogue": f"Grrr... tu ne passeras pas ! ({i % 13})",
+            }
+
+
+def _lieux(
+    nombre: int, nombre_personnages: int, nombre_ressources: int, hasard: random.Random
+) -> Iterator[Dict[str, Any]]:
+    """Donne les lieux du monde, chacun avec deux ressources et un à trois ennemis."""
+    ennemis = [i for i in range(nombre_personnages) if i % 10] or [1]
+    noms_ressources = ["or"] + [f"ressource {i}" for i in range(1, nombre_ressources)]
+    for i in range(nombre):
+        yield {
+            "nom": f"Lieu {i}",
+            "description": f"Un lieu perdu, le numéro {i}",
+            "ressources": hasard.sample(noms_ressources, min(2, len(noms_ressources))),
+            "ennemis": [f"ennemi {hasard.choice(ennemis)}" for _ in range(hasard.randint(1, 3))],
+        }
+
+
+def generer_monde(
+    nombre_lieux: int,
+    nombre_personnages: Optional[int] = None,
+    nombre_ressources: int = 50,
+    graine: int = 0,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Fonction qui génère un monde en mémoire.
+
+    Args:
+        nombre_lieux (int): Le nombre de lieux.
+        nombre_personnages (Optional[int]): Le nombre de personnages; par défaut autant que de lieux.
+        nombre_ressources (int): Le nombre de ressources.
+        graine (int): La graine du hasard, pour que le monde soit toujours le même.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Le monde, au format de data.json.
+    """
+    nombre_personnages = nombre_lieux if nombre_personnages is None else nombre_personnages
+    hasard = random.Random(graine)
+    return {
+        "lieux": list(_lieux(nombre_lieux, nombre_personnages, nombre_ressources, hasard)),
+        "personnages": list(_personnages(nombre_personnages, hasard)),
+        "ressources": list(_ressources(nombre_ressources)),
+    }
+
+
+def _ecrire_tableau(fichier: TextIO, cle: str, elements: Iterator[Dict[str, Any]]) -> None:
+    """Écrit un tableau json élément par élément."""
+    fichier.write(f'  "{cle}": [\n')
+    for position, element in enumerate(elements):
+        if position:
+            fichier.write(",\n")
+        fichier.write("    " + json.dumps(element, ensure_ascii=False))
+    fichier.write("\n  ]")
+
+
+def ecrire_monde(
+    chemin: str,
+    nombre_lieux: int,
+    nombre_personnages: Optional[int] = None,
+    nombre_ressources: int = 50,
+    graine: int = 0,
+) -> None:
+    """Fonction qui écrit un monde dans un fichier, en flux.
+
+    Le monde écrit est le même que celui de generer_monde avec les mêmes arguments.
+
+    Args:
+        chemin (str): Le fichier à écrire.
+        nombre_lieux (int): Le nombre de lieux.
+        nombre_personnages (Optional[int]): Le nombre de personnages; par défaut autant que de lieux.
+        nombre_ressources (int): Le nombre de ressources.
+        graine (int): La graine du hasard.
+    """
+    nombre_personnages = nombre_lieux if nombre_personnages is None else nombre_personnages
+    hasard = random.Random(graine)
+    with open(chemin, "w", encoding="utf-8") as fichier:
+        fichier.write("{\n")
+        _ecrire_tableau(fichier, "lieux", _lieux(nombre_lieux, nombre_personnages, nombre_ressources, hasard))
+        fichier.write(",\n")
+        _ecrire_tableau(fichier, "personnages", _personnages(nombre_personnages, hasard))
+        fichier.write(",\n")
+        _ecrire_tableau(fichier, "ressources", _ressources(nombre_ressources))
+        fichier.write("\n}\n")
+
+
+if __name__ == "__main__":
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("chemin", help="le fichier à écrire")
+    analyseur.add_argument("--lieux", type=int, default=10_000, help="nombre de lieux")
+    analyseur.add_argument("--personnages", type=int, default=None, help="nombre de personnages")
+    analyseur.add_argument("--ressources", type=int, default=50, help="nombre de ressources")
+    analyseur.add_argument("--graine", type=int, default=0, help="graine du hasard")
+    options = analyseur.parse_args()
+    ecrire_monde(options.chemin, options.lieux, options.personnages, options.ressources, options.graine)
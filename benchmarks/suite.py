@@ -0,0 +1,379 @@
+"""Suite de bancs d'essai des chemins critiques du jeu, avec un rapport json comparable d'une exécution à l'autre.
+
+Chaque cas prépare ses données sur un monde synthétique au format de data.json, puis chronomètre une opération
+autant de fois que nécessaire pour remplir --duree secondes. Le rapport donne, pour chaque cas, le nombre
+d'opérations par seconde, les percentiles de latence et la mémoire de pointe d'une opération (tracemalloc);
+il est écrit en json avec --sortie. --comparer relit un rapport précédent, affiche les écarts et sort en
+erreur si un cas a ralenti de plus de --seuil.
+
+Exemples:
+    python benchmarks/suite.py --taille 1000 --sortie avant.json
+    python benchmarks/suite.py --taille 1000 --sortie apres.json --comparer avant.json
+    python benchmarks/suite.py --cas load_json,sauvegarder_partie
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Projet_Epopée_des_cité import (  # noqa: E402
+    Environnement,
+    Joueur,
+    SortieNulle,
+    creation_environnement,
+    load_json,
+    nouvel_environnement,
+    rediriger_sortie,
+    sauvegarder_partie,
+)
+from ecriture import EcrivainSauvegardes  # noqa: E402
+from instantane import sauvegarder_instantane  # noqa: E402
+from monde_synthetique import ecrire_monde, generer_monde  # noqa: E402
+from simulation import politique_gloutonne, simuler_session  # noqa: E402
+
+
+Operation = Callable[[], Any]
+"""Un cas donne une suite d'opérations prêtes à chronométrer; leur préparation n'est pas chronométrée."""
+
+PERCENTILES = (50, 90, 99)
+
+
+class Contexte:
+    """Classe qui regroupe les données communes à tous les cas: le monde, ses fichiers et ses parties.
+
+    Attributes:
+        dossier (str): Le dossier temporaire des fichiers du banc.
+        monde (str): Le fichier du monde synthétique.
+        donnees (Dict): Le monde chargé avec load_json.
+        environnement (Environnement): Une partie neuve sur ce monde.
+    """
+
+    def __init__(self, dossier: str, taille: int, graine: int):
+        """Écrit le monde synthétique et ses sauvegardes.
+
+        Args:
+            dossier (str): Le dossier temporaire des fichiers du banc.
+            taille (int): Le nombre de lieux et de personnages du monde.
+            graine (int): La graine du hasard.
+        """
+        self.dossier = dossier
+        self.hasard = random.Random(graine)
+        self.monde = os.path.join(dossier, "monde.json")
+        ecrire_monde(self.monde, taille, taille, graine=graine)
+        self.donnees = load_json(self.monde)
+        self.environnement = nouvel_environnement(self.donnees, "Talion")
+        self.sauvegarde_json = os.path.join(dossier, "sauvegarde.json")
+        sauvegarder_partie(self.sauvegarde_json, self.environnement)
+        self.sauvegarde_binaire = os.path.join(dossier, "sauvegarde.bin")
+        sauvegarder_instantane(self.sauvegarde_binaire, self.environnement)
+        self.sans_sauvegarde = os.path.join(dossier, "absente.json")
+
+
+def _repeter(operation: Operation) -> Iterator[Operation]:
+    """Répète indéfiniment une opération qui n'a pas besoin de préparation."""
+    while True:
+        yield operation
+
+
+def cas_load_json(contexte: Contexte) -> Iterator[Operation]:
+    """load_json sur le fichier du monde."""
+    return _repeter(lambda: load_json(contexte.monde))
+
+
+def cas_nouvel_environnement(contexte: Contexte) -> Iterator[Operation]:
+    """Construction complète d'une partie à partir des données déjà chargées."""
+    return _repeter(lambda: nouvel_environnement(contexte.donnees, "Talion"))
+
+
+def cas_creation_nouvelle_partie(contexte: Contexte) -> Iterator[Operation]:
+    """creation_environnement sans sauvegarde: une nouvelle partie sur le monde partagé."""
+    return _repeter(lambda: creation_environnement(contexte.monde, contexte.sans_sauvegarde, nom="Talion"))
+
+
+def cas_creation_reprise_json(contexte: Contexte) -> Iterator[Operation]:
+    """creation_environnement qui reprend une sauvegarde json."""
+    return _repeter(lambda: creation_environnement(contexte.monde, contexte.sauvegarde_json))
+
+
+def cas_creation_reprise_binaire(contexte: Contexte) -> Iterator[Operation]:
+    """creation_environnement qui reprend un instantané binaire."""
+    return _repeter(lambda: creation_environnement(contexte.monde, contexte.sauvegarde_binaire))
+
+
+def cas_sauvegarder_partie(contexte: Contexte) -> Iterator[Operation]:
+    """sauvegarder_partie de toute la partie en json."""
+    chemin = os.path.join(contexte.dossier, "banc.json")
+    return _repeter(lambda: sauvegarder_partie(chemin, contexte.environnement))
+
+
+def cas_sauvegarde_arriere_plan(contexte: Contexte) -> Iterator[Operation]:
+    """EcrivainSauvegardes.sauvegarder de toute la partie: ce que le joueur attend, l'écriture se fait à côté."""
+    chemin = os.path.join(contexte.dossier, "banc_arriere_plan.json")
+    # Le bloc with se ferme quand le cas est abandonné, et attend les écritures avant que le dossier soit effacé.
+    with EcrivainSauvegardes() as ecrivain:
+        while True:
+            yield lambda: ecrivain.sauvegarder(chemin, contexte.environnement)
+
+
+def cas_attaquer(contexte: Contexte) -> Iterator[Operation]:
+    """Joueur.attaquer sur un lieu du monde, une fois gagné et une fois perdu."""
+    lieux = list(contexte.environnement.lieux)
+    victoire = False
+    while True:
+        modele = contexte.hasard.choice(lieux)
+        lieu = type(modele)(modele.nom, modele.description, list(modele.ressources), list(modele.ennemis))
+        victoire = not victoire
+        joueur = Joueur("Talion", lieu.force_ennemis + (0 if victoire else -1), 100, {"or": 0})
+        yield lambda: joueur.attaquer(lieu.force_ennemis, lieu)
+
+
+def cas_payer_allie(contexte: Contexte) -> Iterator[Operation]:
+    """Joueur.payer_allie sur un allié du monde, avec ou sans assez d'or."""
+    allies = list(contexte.environnement.allies)
+    while True:
+        allie = contexte.hasard.choice(allies)
+        joueur = Joueur("Talion", 10, 100, {"or": contexte.hasard.choice((0, 10, 100))})
+        yield lambda: joueur.payer_allie(allie)
+
+
+def cas_ajout_objet_inventaire(contexte: Contexte) -> Iterator[Operation]:
+    """Joueur.ajout_objet_inventaire avec les ressources d'un lieu du monde."""
+    lieux = list(contexte.environnement.lieux)
+    joueur = Joueur("Talion", 10, 100, {"or": 0})
+    while True:
+        ressources = contexte.hasard.choice(lieux).ressources
+        yield lambda: joueur.ajout_objet_inventaire(ressources)
+
+
+def cas_transaction_inventaire(contexte: Contexte) -> Iterator[Operation]:
+    """Inventaire.transaction: le butin de 100 lieux du monde et 20 achats d'alliés, appliqués d'un coup."""
+    lieux = list(contexte.environnement.lieux)
+    allies = list(contexte.environnement.allies)
+    joueur = Joueur("Talion", 10, 100, {"or": 0})
+    while True:
+        butin = [
+            (ressource.nom, ressource.quantite)
+            for lieu in contexte.hasard.sample(lieux, min(100, len(lieux)))
+            for ressource in lieu.ressources
+        ]
+        prix = [allie.prix or 0 for allie in contexte.hasard.sample(allies, min(20, len(allies)))]
+
+        def operation() -> None:
+            with joueur.inventaire.transaction() as transaction:
+                for nom, quantite in butin:
+                    transaction.ajouter(nom, quantite)
+                for montant in prix:
+                    if transaction.quantite("or") >= montant:
+                        transaction.retirer("or", montant)
+
+        yield operation
+
+
+def cas_session_scriptee(contexte: Contexte) -> Iterator[Operation]:
+    """Une session complète rejouée depuis un script, sur un petit monde de la taille de data.json."""
+    donnees = generer_monde(4, 10, 6)
+    choix: List[str] = []
+
+    def enregistrer(environnement: Environnement, menu: str) -> str:
+        reponse = politique_gloutonne(environnement, menu)
+        choix.append(reponse)
+        return reponse
+
+    simuler_session(donnees, politique=enregistrer)
+    # La politique gloutonne ne quitte jamais: le script se termine en quittant depuis le village.
+    choix.append("-1")
+    return _repeter(lambda: simuler_session(donnees, choix))
+
+
+CAS: Dict[str, Callable[[Contexte], Iterator[Operation]]] = {
+    "load_json": cas_load_json,
+    "nouvel_environnement": cas_nouvel_environnement,
+    "creation_nouvelle_partie": cas_creation_nouvelle_partie,
+    "creation_reprise_json": cas_creation_reprise_json,
+    "creation_reprise_binaire": cas_creation_reprise_binaire,
+    "sauvegarder_partie": cas_sauvegarder_partie,
+    "sauvegarde_arriere_plan": cas_sauvegarde_arriere_plan,
+    "attaquer": cas_attaquer,
+    "payer_allie": cas_payer_allie,
+    "ajout_objet_inventaire": cas_ajout_objet_inventaire,
+    "transaction_inventaire": cas_transaction_inventaire,
+    "session_scriptee": cas_session_scriptee,
+}
+
+
+def mesurer(iterations: Iterator[Operation], duree: float, minimum: int, maximum: int) -> Dict[str, Any]:
+    """Chronomètre les opérations d'un cas.
+
+    Args:
+        iterations (Iterator[Operation]): Les opérations du cas.
+        duree (float): Le temps chronométré visé, en secondes.
+        minimum (int): Le nombre minimum d'opérations.
+        maximum (int): Le nombre maximum d'opérations.
+
+    Returns:
+        Dict[str, Any]: Le nombre d'opérations, les opérations par seconde, les latences en microsecondes et la
+        mémoire de pointe d'une opération en octets.
+    """
+    latences = []
+    total = 0.0
+    gc.collect()
+    for operation in iterations:
+        debut = time.perf_counter()
+        operation()
+        latence = time.perf_counter() - debut
+        latences.append(latence)
+        total += latence
+        if len(latences) >= maximum or (total >= duree and len(latences) >= minimum):
+            break
+    operation = next(iterations)
+    gc.collect()
+    tracemalloc.start()
+    operation()
+    pointe = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    quantiles = statistics.quantiles(latences, n=100, method="inclusive") if len(latences) > 1 else latences * 99
+    return {
+        "operations": len(latences),
+        "operations_par_seconde": len(latences) / total if total else float("inf"),
+        "latence_us": {
+            "moyenne": statistics.fmean(latences) * 1e6,
+            **{f"p{p}": quantiles[p - 1] * 1e6 for p in PERCENTILES},
+            "max": max(latences) * 1e6,
+        },
+        "memoire_pointe_octets": pointe,
+    }
+
+
+def executer(
+    taille: int, cas: List[str], duree: float, minimum: int, maximum: int, graine: int
+) -> Dict[str, Any]:
+    """Exécute les cas demandés et donne le rapport.
+
+    Args:
+        taille (int): Le nombre de lieux et de personnages du monde synthétique.
+        cas (List[str]): Les noms des cas à exécuter.
+        duree (float): Le temps chronométré visé par cas, en secondes.
+        minimum (int): Le nombre minimum d'opérations par cas.
+        maximum (int): Le nombre maximum d'opérations par cas.
+        graine (int): La graine du hasard.
+
+    Returns:
+        Dict[str, Any]: Le rapport: la description de l'exécution et les mesures de chaque cas.
+    """
+    rapport: Dict[str, Any] = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plateforme": platform.platform(),
+            "taille": taille,
+            "duree_par_cas": duree,
+            "graine": graine,
+        },
+        "cas": {},
+    }
+    with tempfile.TemporaryDirectory() as dossier:
+        contexte = Contexte(dossier, taille, graine)
+        for nom in cas:
+            with rediriger_sortie(SortieNulle()):
+                mesure = mesurer(CAS[nom](contexte), duree, minimum, maximum)
+            rapport["cas"][nom] = mesure
+            print(
+                f"{nom:<26} {mesure['operations_par_seconde']:>14,.1f} op/s  "
+                f"p50 {mesure['latence_us']['p50']:>12,.1f} µs  p99 {mesure['latence_us']['p99']:>12,.1f} µs  "
+                f"pointe {mesure['memoire_pointe_octets'] / 1024:>10,.1f} Ko",
+                file=sys.stderr,
+            )
+    rapport["meta"]["rss_max_ko"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rapport
+
+
+def comparer(ancien: Dict[str, Any], nouveau: Dict[str, Any], seuil: float) -> List[str]:
+    """Compare deux rapports et affiche l'écart de chaque cas commun.
+
+    Args:
+        ancien (Dict[str, Any]): Le rapport de référence.
+        nouveau (Dict[str, Any]): Le rapport à comparer.
+        seuil (float): Le ralentissement relatif au-delà duquel un cas est une régression (0.1 pour 10 %).
+
+    Returns:
+        List[str]: Les noms des cas en régression.
+    """
+    if ancien["meta"].get("taille") != nouveau["meta"].get("taille"):
+        print(
+            f"Attention: tailles différentes ({ancien['meta'].get('taille')} et {nouveau['meta'].get('taille')}).",
+            file=sys.stderr,
+        )
+    regressions = []
+    print(f"{'cas':<26} {'op/s avant':>14} {'op/s après':>14} {'écart':>8} {'p99 avant':>12} {'p99 après':>12}")
+    for nom, mesure in nouveau["cas"].items():
+        reference = ancien["cas"].get(nom)
+        if reference is None:
+            continue
+        ecart = mesure["operations_par_seconde"] / reference["operations_par_seconde"] - 1
+        marque = ""
+        if ecart < -seuil:
+            regressions.append(nom)
+            marque = "  RÉGRESSION"
+        print(
+            f"{nom:<26} {reference['operations_par_seconde']:>14,.1f} {mesure['operations_par_seconde']:>14,.1f} "
+            f"{ecart:>+8.1%} {reference['latence_us']['p99']:>12,.1f} {mesure['latence_us']['p99']:>12,.1f}{marque}"
+        )
+    return regressions
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande: exécute la suite, écrit le rapport et compare.
+
+    Returns:
+        int: 1 si un cas a régressé par rapport au rapport de --comparer, 0 sinon.
+    """
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("--taille", type=int, default=1000, help="nombre de lieux et de personnages du monde")
+    analyseur.add_argument("--cas", default=",".join(CAS), help="cas à exécuter, séparés par des virgules")
+    analyseur.add_argument("--duree", type=float, default=1.0, help="temps chronométré visé par cas, en secondes")
+    analyseur.add_argument("--minimum", type=int, default=5, help="nombre minimum d'opérations par cas")
+    analyseur.add_argument("--maximum", type=int, default=1_000_000, help="nombre maximum d'opérations par cas")
+    analyseur.add_argument("--graine", type=int, default=0, help="graine du hasard")
+    analyseur.add_argument("--sortie", help="fichier json où écrire le rapport")
+    analyseur.add_argument("--comparer", help="rapport json de référence")
+    analyseur.add_argument("--seuil", type=float, default=0.10, help="ralentissement toléré avant régression")
+    options = analyseur.parse_args(arguments)
+
+    cas = [nom.strip() for nom in options.cas.split(",") if nom.strip()]
+    inconnus = [nom for nom in cas if nom not in CAS]
+    if inconnus:
+        analyseur.error(f"cas inconnus: {', '.join(inconnus)}; cas possibles: {', '.join(CAS)}")
+    rapport = executer(options.taille, cas, options.duree, options.minimum, options.maximum, options.graine)
+    if options.sortie:
+        with open(options.sortie, "w", encoding="utf-8") as fichier:
+            json.dump(rapport, fichier, ensure_ascii=False, indent=2)
+    if options.comparer:
+        with open(options.comparer, "r", encoding="utf-8") as fichier:
+            ancien = json.load(fichier)
+        regressions = comparer(ancien, rapport, options.seuil)
+        if regressions:
+            print(f"Régressions: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    elif not options.sortie:
+        json.dump(rapport, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""Cache sur disque des mondes construits: un démarrage ne relit ni ne reconstruit un monde déjà vu.
+
+modele_monde ne construit un monde qu'une fois par processus, mais chaque nouveau processus paie encore la
+lecture du json, sa validation et la construction de tous les objets. Le cache garde l'objet construit,
+sérialisé avec pickle, dans un fichier nommé par une empreinte sha256 qui couvre:
+    - le contenu du fichier de monde, pas son nom ni sa date: deux copies d'un monde partagent leur entrée;
+    - la version du code qui construit l'objet (voir version_code): sources des modules, version de Python.
+Un monde ou un code modifié donne donc une autre clé: les anciennes entrées ne servent plus, sans qu'il soit
+besoin de les invalider, et finissent évincées.
+
+La taille du dossier est bornée: au-delà de taille_max, les entrées les moins récemment utilisées sont
+effacées. La date de modification d'une entrée sert de date d'utilisation; elle est mise à jour à chaque
+lecture. Plusieurs processus peuvent partager le dossier: chaque entrée est écrite dans un fichier temporaire
+qui lui est propre puis renommée, et une entrée illisible est reconstruite.
+
+pickle exécute du code en chargeant: le dossier du cache est créé accessible au seul utilisateur, et ne doit
+pas être partagé avec d'autres. Il se règle avec la variable d'environnement EPOPEE_CACHE_MONDES: un dossier,
+ou une chaîne vide pour désactiver le cache.
+
+Exemples:
+    >>> cache = CacheMondes("/tmp/cache_mondes")
+    >>> modele = cache.charger("data.json", lambda: ModeleMonde(load_json("data.json")), version_code(module))
+"""
+
+from types import ModuleType
+from typing import Callable, List, Optional, Tuple, TypeVar
+import gc
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+
+T = TypeVar("T")
+
+VARIABLE_CACHE = "EPOPEE_CACHE_MONDES"
+TAILLE_MAX_CACHE = 256 * 1024 * 1024
+SUFFIXE_ENTREE = ".pickle"
+
+
+def dossier_par_defaut() -> str:
+    """Donne le dossier de cache de l'utilisateur pour les mondes, selon XDG_CACHE_HOME s'il est défini."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "epopee_des_cites", "mondes")
+
+
+def version_code(*modules: ModuleType) -> str:
+    """Fonction qui donne la version du code qui construit un objet, pour l'inclure dans la clé du cache.
+
+    La version couvre le nom et le source de chaque module, la version de Python et celle de pickle. Le nom
+    compte: un module lancé comme programme s'appelle __main__, et pickle note ce nom avec chaque classe.
+
+    Args:
+        *modules (ModuleType): Les modules qui définissent l'objet mis en cache et sa construction.
+
+    Returns:
+        str: L'empreinte sha256 de tout cela, en hexadécimal.
+    """
+    empreinte = hashlib.sha256(f"{sys.version_info[:2]} {pickle.HIGHEST_PROTOCOL}".encode())
+    for module in modules:
+        empreinte.update(module.__name__.encode())
+        fichier = getattr(module, "__file__", None)
+        if fichier is not None:
+            with open(fichier, "rb") as source:
+                empreinte.update(source.read())
+    return empreinte.hexdigest()
+
+
+def cle_monde(filename: str, version: str) -> str:
+    """Fonction qui donne la clé d'un fichier de monde: l'empreinte de la version du code et du contenu.
+
+    Raises:
+        OSError: Si le fichier ne peut pas être lu.
+    """
+    empreinte = hashlib.sha256(version.encode())
+    with open(filename, "rb") as fichier:
+        for bloc in iter(lambda: fichier.read(1 << 20), b""):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+class CacheMondes:
+    """Classe qui représente un dossier de mondes construits, indexés par contenu et bornés en taille.
+
+    Attributes:
+        dossier (str): Le dossier des entrées, créé à la première écriture.
+        taille_max (int): La taille totale des entrées au-delà de laquelle les plus anciennes sont effacées.
+        lus (int): Le nombre d'objets lus dans le cache.
+        construits (int): Le nombre d'objets construits faute d'entrée utilisable.
+    """
+
+    __slots__ = ("dossier", "taille_max", "lus", "construits")
+
+    def __init__(self, dossier: str, taille_max: int = TAILLE_MAX_CACHE):
+        """Initialise le cache, sans rien lire ni écrire.
+
+        Args:
+            dossier (str): Le dossier des entrées.
+            taille_max (int): La taille totale maximale des entrées, en octets.
+        """
+        self.dossier = dossier
+        self.taille_max = taille_max
+        self.lus = 0
+        self.construits = 0
+
+    def charger(self, filename: str, construire: Callable[[], T], version: str) -> T:
+        """Donne l'objet construit à partir d'un fichier, lu dans le cache ou construit puis mis en cache.
+
+        Un fichier illisible n'est pas mis en cache: construire est appelé et signale l'erreur comme
+        d'habitude. Une erreur du cache lui-même (dossier impossible à écrire, entrée abîmée) n'empêche
+        jamais de construire l'objet.
+
+        Args:
+            filename (str): Le fichier de monde.
+            construire (Callable[[], T]): La construction de l'objet, appelée seulement sans entrée utilisable.
+            version (str): La version du code qui construit l'objet (voir version_code).
+
+        Returns:
+            T: L'objet, tel que construire le donne.
+        """
+        try:
+            cle = cle_monde(filename, version)
+        except OSError:
+            return construire()
+        chemin = os.path.join(self.dossier, cle + SUFFIXE_ENTREE)
+        try:
+            with open(chemin, "rb") as fichier:
+                contenu = fichier.read()
+        except OSError:
+            contenu = None
+        if contenu is not None:
+            try:
+                objet = _depickler(contenu)
+            except Exception:
+                # Une entrée écrite à moitié, ou par un code dont les classes ont disparu: elle est remplacée.
+                pass
+            else:
+                self.lus += 1
+                try:
+                    os.utime(chemin)
+                except OSError:
+                    pass
+                return objet
+        objet = construire()
+        self.construits += 1
+        try:
+            self._ecrire(chemin, pickle.dumps(objet, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            # Un cache impossible à écrire (disque plein, dossier interdit) n'empêche pas de jouer.
+            pass
+        return objet
+
+    def _ecrire(self, chemin: str, contenu: bytes) -> None:
+        """Écrit une entrée puis évince les plus anciennes si le cache est trop gros.
+
+        Plusieurs processus peuvent écrire la même entrée en même temps: chacun a son fichier temporaire,
+        et le dernier renommage gagne.
+        """
+        if len(contenu) > self.taille_max:
+            return
+        os.makedirs(self.dossier, mode=0o700, exist_ok=True)
+        descripteur, temporaire = tempfile.mkstemp(dir=self.dossier, suffix=".tmp")
+        try:
+            with os.fdopen(descripteur, "wb") as fichier:
+                fichier.write(contenu)
+            os.replace(temporaire, chemin)
+        except BaseException:
+            os.unlink(temporaire)
+            raise
+        self.evincer()
+
+    def entrees(self) -> List[Tuple[float, int, str]]:
+        """Donne les entrées du cache: date de dernière utilisation, taille et chemin, des plus anciennes aux
+        plus récentes."""
+        entrees = []
+        try:
+            noms = os.listdir(self.dossier)
+        except FileNotFoundError:
+            return []
+        for nom in noms:
+            if nom.endswith(SUFFIXE_ENTREE):
+                chemin = os.path.join(self.dossier, nom)
+                try:
+                    etat = os.stat(chemin)
+                except FileNotFoundError:
+                    continue
+                entrees.append((etat.st_mtime, etat.st_size, chemin))
+        entrees.sort()
+        return entrees
+
+    def evincer(self) -> int:
+        """Efface les entrées les moins récemment utilisées jusqu'à ce que le cache tienne dans taille_max.
+
+        Returns:
+            int: Le nombre d'entrées effacées.
+        """
+        entrees = self.entrees()
+        taille = sum(taille for _, taille, _ in entrees)
+        effacees = 0
+        for _, taille_entree, chemin in entrees:
+            if taille <= self.taille_max:
+                break
+            try:
+                os.unlink(chemin)
+                effacees += 1
+            except FileNotFoundError:
+                # Un autre processus l'a effacée en même temps.
+                pass
+            taille -= taille_entree
+        return effacees
+
+
+def _depickler(contenu: bytes) -> object:
+    """Désérialise une entrée, sans ramasse-miettes pendant la création des objets.
+
+    Un monde compte des centaines de milliers de petits objets: le ramasse-miettes, déclenché par leur
+    création, parcourrait plusieurs fois tout ce qui est déjà chargé et triplerait la durée.
+    """
+    actif = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(contenu)
+    finally:
+        if actif:
+            gc.enable()
+
+
+def cache_par_defaut() -> Optional[CacheMondes]:
+    """Fonction qui donne le cache réglé par la variable d'environnement EPOPEE_CACHE_MONDES.
+
+    Returns:
+        Optional[CacheMondes]: Le cache du dossier donné, ou de dossier_par_defaut si la variable n'est pas
+        définie; None si elle est vide.
+    """
+    dossier = os.environ.get(VARIABLE_CACHE)
+    if dossier == "":
+        return None
+    return CacheMondes(dossier or dossier_par_defaut())
@@ -0,0 +1,347 @@
+"""Chargement en flux des très gros fichiers de monde.
+
+load_json lit tout le fichier d'un coup avec json.load, puis nouvel_environnement construit tous les lieux.
+Ici, les tableaux "lieux", "personnages" et "ressources" sont lus élément par élément, avec un tampon de
+taille bornée: la mémoire dépend de la taille du plus gros élément, pas de celle du fichier.
+
+Le fichier est lu deux fois. La première lecture ne garde que les personnages et les ressources, qui servent
+à construire les lieux; la seconde produit les lieux un par un, à la demande. Chaque élément est vérifié avec
+le schéma de sa section (voir schema.SCHEMA_MONDE) dès qu'il est lu, et la lecture continue après une erreur:
+toutes les erreurs du fichier sont levées ensemble à la fin de la première lecture, chacune avec sa ligne, sa
+colonne et son chemin json.
+
+Exemple:
+    >>> monde = MondeFlux("data.json")
+    >>> for lieu in monde.lieux():
+    ...     print(lieu.nom, lieu.force_ennemis)
+    temple oublié 8
+    forêt maudite 12
+"""
+
+from typing import Any, Dict, List, Iterator, Tuple, Optional, TextIO
+import json
+
+from Projet_Epopée_des_cité import (
+    Allie,
+    ChampsLieu,
+    Environnement,
+    ErreurChargement,
+    FabriqueLieux,
+    Lieu,
+    ModeleMonde,
+    fabriquer_allie,
+    index_par_nom,
+    nouveau_joueur,
+    positions_jointes,
+)
+from schema import SCHEMA_MONDE, Verificateur, compiler
+
+
+TAILLE_BLOC = 1 << 16
+TAILLE_MAX_ELEMENT = 64 << 20
+SECTIONS = ("lieux", "personnages", "ressources")
+
+_VERIFIER_ELEMENT: Dict[str, Verificateur] = {section: compiler(SCHEMA_MONDE[section][0]) for section in SECTIONS}
+"""Le schéma compilé d'un élément de chaque section: un élément est vérifié dès qu'il est lu."""
+
+
+class _Lecteur:
+    """Lecteur json incrémental: avance dans le texte d'un fichier en ne gardant qu'un tampon borné."""
+
+    def __init__(self, fichier: TextIO, nom: str, taille_bloc: int, taille_max: int):
+        self._fichier = fichier
+        self._nom = nom
+        self._taille_bloc = taille_bloc
+        self._taille_max = taille_max
+        self._decodeur = json.JSONDecoder()
+        self._tampon = ""
+        self._pos = 0
+        self._fin = False
+        # Ligne et colonne du caractère _compte du tampon: les retours à la ligne sont comptés au fil de la
+        # lecture, une seule fois chacun.
+        self._compte = 0
+        self._ligne = 1
+        self._colonne = 1
+
+    def _remplir(self, taille: int = 0) -> bool:
+        """Jette la partie déjà lue du tampon et lit au moins un bloc de plus. Renvoie False en fin de fichier."""
+        if self._fin:
+            return False
+        if self._pos:
+            self.situer()
+            self._tampon = self._tampon[self._pos :]
+            self._pos = 0
+            self._compte = 0
+        bloc = self._fichier.read(max(taille, self._taille_bloc))
+        if not bloc:
+            self._fin = True
+            return False
+        self._tampon += bloc
+        return True
+
+    def _avancer(self, pos: int) -> Tuple[int, int]:
+        """Donne la ligne et la colonne de la position pos du tampon, qui doit suivre _compte."""
+        pos = max(pos, self._compte)
+        segment = self._tampon[self._compte : pos]
+        retours = segment.count("\n")
+        if retours:
+            return self._ligne + retours, pos - self._compte - segment.rfind("\n")
+        return self._ligne, self._colonne + len(segment)
+
+    def situer(self) -> Tuple[int, int]:
+        """Donne la ligne et la colonne de la position courante, et les retient."""
+        self._ligne, self._colonne = self._avancer(self._pos)
+        self._compte = self._pos
+        return self._ligne, self._colonne
+
+    def erreur(self, chemin: str, message: str, pos: Optional[int] = None) -> ErreurChargement:
+        """Construit une erreur située à la position pos du tampon (par défaut la position courante)."""
+        ligne, colonne = self._avancer(self._pos if pos is None else pos)
+        return ErreurChargement(self._nom, ligne, colonne, chemin, message)
+
+    def caractere(self) -> str:
+        """Passe les blancs et donne le caractère suivant sans le consommer ("" en fin de fichier)."""
+        while True:
+            tampon, pos = self._tampon, self._pos
+            while pos < len(tampon) and tampon[pos] in " \t\r\n":
+                pos += 1
+            self._pos = pos
+            if pos < len(tampon):
+                return tampon[pos]
+            if not self._remplir():
+                return ""
+
+    def attendre(self, attendus: str, chemin: str) -> str:
+        """Consomme le caractère suivant, qui doit faire partie de attendus, et le renvoie."""
+        caractere = self.caractere()
+        if not caractere or caractere not in attendus:
+            attendu = " ou ".join(repr(c) for c in attendus)
+            if not caractere:
+                raise self.erreur(chemin, f"{attendu} attendu avant la fin du fichier")
+            raise self.erreur(chemin, f"{attendu} attendu, {caractere!r} trouvé")
+        self._pos += 1
+        return caractere
+
+    def valeur(self, chemin: str) -> Any:
+        """Décode la valeur json suivante en lisant autant de blocs que nécessaire."""
+        if not self.caractere():
+            raise self.erreur(chemin, "valeur attendue avant la fin du fichier")
+        while True:
+            try:
+                valeur, fin = self._decodeur.raw_decode(self._tampon, self._pos)
+            except json.JSONDecodeError as e:
+                # La valeur est peut-être seulement coupée par la fin du tampon: on double ce qui en est lu et
+                # on réessaie, jusqu'à la taille maximale d'un élément.
+                lu = len(self._tampon) - self._pos
+                debut = self._pos
+                if lu < self._taille_max and self._remplir(lu):
+                    continue
+                # _remplir a pu jeter le début du tampon avant de trouver la fin du fichier: e.pos compte depuis
+                # l'ancien début.
+                raise self.erreur(chemin, e.msg, e.pos - debut + self._pos) from None
+            else:
+                # Un nombre collé à la fin du tampon peut continuer dans le bloc suivant.
+                debut = self._pos
+                if fin == len(self._tampon) and not self._fin and self._remplir():
+                    continue
+                # Comme plus haut, _remplir a pu jeter le début du tampon avant de trouver la fin du fichier.
+                self._pos = fin - debut + self._pos
+                return valeur
+
+
+def iterer_sections(
+    filename: str,
+    sections: Tuple[str, ...] = SECTIONS,
+    taille_bloc: int = TAILLE_BLOC,
+    taille_max_element: int = TAILLE_MAX_ELEMENT,
+) -> Iterator[Tuple[str, int, Any, Tuple[int, int]]]:
+    """Fonction qui parcourt les éléments des tableaux de premier niveau d'un fichier json, un par un.
+
+    Les clés qui ne sont pas dans sections sont lues puis oubliées, sans être gardées en mémoire.
+
+    Args:
+        filename (str): Le fichier à lire.
+        sections (Tuple[str, ...]): Les clés de premier niveau dont on veut les éléments.
+        taille_bloc (int): Le nombre de caractères lus à la fois.
+        taille_max_element (int): La taille au-delà de laquelle un élément illisible est déclaré mal formé.
+
+    Yields:
+        Tuple[str, int, Any, Tuple[int, int]]: La section, l'indice de l'élément dans son tableau, l'élément
+        décodé, et la ligne et la colonne où il commence.
+
+    Raises:
+        FileNotFoundError: Quand le fichier n'a pas été trouvé.
+        ErreurChargement: Si le fichier est mal formé ou qu'une des sections manque, avec la ligne, la colonne
+            et l'élément en cause.
+    """
+    manquantes = list(sections)
+    with open(file=filename, mode="r", encoding="utf-8") as fichier:
+        lecteur = _Lecteur(fichier, filename, taille_bloc, taille_max_element)
+        lecteur.attendre("{", "")
+        if lecteur.caractere() == "}":
+            if manquantes:
+                raise lecteur.erreur("", f"clé {manquantes[0]!r} manquante")
+            lecteur.attendre("}", "")
+        else:
+            while True:
+                cle = lecteur.valeur("")
+                if not isinstance(cle, str):
+                    raise lecteur.erreur("", "nom de clé attendu")
+                lecteur.attendre(":", cle)
+                if cle in manquantes:
+                    manquantes.remove(cle)
+                if lecteur.caractere() == "[":
+                    # Même les tableaux ignorés sont lus élément par élément, pour que la mémoire reste bornée.
+                    lecteur.attendre("[", cle)
+                    indice = 0
+                    if lecteur.caractere() == "]":
+                        lecteur.attendre("]", cle)
+                    else:
+                        while True:
+                            lecteur.caractere()
+                            position = lecteur.situer()
+                            element = lecteur.valeur(f"{cle}[{indice}]")
+                            if cle in sections:
+                                yield cle, indice, element, position
+                            indice += 1
+                            if lecteur.attendre(",]", f"{cle}[{indice}]") == "]":
+                                break
+                elif cle in sections:
+                    raise lecteur.erreur(cle, "tableau attendu")
+                else:
+                    lecteur.valeur(cle)
+                if lecteur.caractere() == "}" and manquantes:
+                    raise lecteur.erreur("", f"clé {manquantes[0]!r} manquante")
+                if lecteur.attendre(",}", "") == "}":
+                    break
+        if lecteur.caractere():
+            raise lecteur.erreur("", "contenu inattendu après la fin du document")
+
+
+class MondeFlux:
+    """Classe qui représente un fichier de monde lu en flux.
+
+    Les personnages et les ressources sont gardés sous forme de tables de champs, indexées par nom; les lieux
+    sont relus à chaque parcours de champs_lieux() ou de lieux(). construire_modele en fait le modèle du jeu,
+    dont chaque lieu et chaque allié n'est construit qu'à sa première demande.
+
+    Attributes:
+        filename (str): Le fichier du monde.
+        ressources (List[Tuple[str, int, str]]): Le nom, la quantité et l'utilité de chaque ressource.
+        ennemis (List[Tuple[str, int, str]]): Le nom en minuscules, la force et le dialogue de chaque ennemi.
+    """
+
+    def __init__(self, filename: str, taille_bloc: int = TAILLE_BLOC):
+        """Lit les personnages et les ressources du monde.
+
+        Args:
+            filename (str): Le fichier du monde.
+            taille_bloc (int): Le nombre de caractères lus à la fois.
+
+        Raises:
+            FileNotFoundError: Quand le fichier n'a pas été trouvé.
+            ErreurChargement: Si le fichier est mal formé, ou que des éléments ne respectent pas le schéma de
+                leur section, avec toutes les erreurs du fichier.
+        """
+        self.filename = filename
+        self._taille_bloc = taille_bloc
+        self._allies: List[Tuple[str, Tuple[int, str]]] = []
+        self.ressources: List[Tuple[str, int, str]] = []
+        self.ennemis: List[Tuple[str, int, str]] = []
+        # Les lieux sont lus de toute façon pour passer leur tableau: ils sont vérifiés dès cette lecture, pour
+        # que les erreurs de tout le fichier soient données ensemble.
+        for section, element in self._parcourir(SECTIONS):
+            if section == "lieux":
+                continue
+            if section == "ressources":
+                self.ressources.append((element["nom"], element["quantite"], element["utilite"]))
+            elif element["type"] == "allié":
+                self._allies.append((element["nom"].lower(), (element["force"], element["dialogue"])))
+            else:
+                self.ennemis.append((element["nom"].lower(), element["force"], element["dialogue"]))
+        self._index_ressources = index_par_nom(champs[0] for champs in self.ressources)
+        self._index_ennemis = index_par_nom(champs[0] for champs in self.ennemis)
+
+    def _parcourir(self, sections: Tuple[str, ...]) -> Iterator[Tuple[str, Any]]:
+        """Parcourt les éléments des sections qui respectent le schéma de leur section.
+
+        Les éléments en erreur sont passés, et leurs erreurs notées avec la ligne et la colonne où ils
+        commencent. Une erreur de syntaxe arrête la lecture et s'ajoute aux précédentes.
+
+        Yields:
+            Tuple[str, Any]: La section et l'élément, dans l'ordre du fichier.
+
+        Raises:
+            ErreurChargement: À la fin du parcours, avec toutes les erreurs trouvées, s'il y en a.
+        """
+        erreurs: List[Tuple[int, int, Optional[str], str]] = []
+        trouvees: List[Tuple[str, str]] = []
+        try:
+            for section, indice, element, position in iterer_sections(self.filename, sections, self._taille_bloc):
+                _VERIFIER_ELEMENT[section](element, (None, section), indice, trouvees)
+                if trouvees:
+                    erreurs += [(*position, chemin, message) for chemin, message in trouvees]
+                    trouvees.clear()
+                else:
+                    yield section, element
+        except ErreurChargement as e:
+            erreurs += e.erreurs
+        if erreurs:
+            raise ErreurChargement(self.filename, *erreurs[0], suivantes=erreurs[1:])
+
+    def champs_allies(self) -> List[Tuple[str, Tuple[int, str]]]:
+        """Donne le nom, puis la force et le dialogue de chaque allié, dans l'ordre du fichier."""
+        return list(self._allies)
+
+    def allies(self) -> List[Allie]:
+        """Donne les alliés du monde, dans l'ordre du fichier."""
+        return [fabriquer_allie(nom, champs) for nom, champs in self._allies]
+
+    def champs_lieux(self) -> Iterator[Tuple[str, ChampsLieu]]:
+        """Relit le fichier et donne les champs des lieux un par un, sans construire les lieux.
+
+        Yields:
+            Tuple[str, ChampsLieu]: Le nom en minuscules de chaque lieu, dans l'ordre du fichier, avec sa
+            description et les positions de ses ressources et de ses ennemis dans ressources et ennemis.
+
+        Raises:
+            ErreurChargement: Après le dernier lieu, si le fichier est mal formé ou que des lieux ne respectent
+                pas le schéma des lieux, avec toutes leurs erreurs.
+        """
+        for _, element in self._parcourir(("lieux",)):
+            yield element["nom"].lower(), (
+                element["description"],
+                tuple(positions_jointes(self._index_ressources, element["ressources"])),
+                tuple(positions_jointes(self._index_ennemis, element["ennemis"])),
+            )
+
+    def lieux(self) -> Iterator[Lieu]:
+        """Relit le fichier et construit les lieux un par un, avec leurs ressources et leurs ennemis.
+
+        Yields:
+            Lieu: Chaque lieu du monde, dans l'ordre du fichier.
+
+        Raises:
+            ErreurChargement: Après le dernier lieu, si le fichier est mal formé ou que des lieux ne respectent
+                pas le schéma des lieux, avec toutes leurs erreurs.
+        """
+        fabrique = FabriqueLieux(self.ressources, self.ennemis)
+        for nom, champs in self.champs_lieux():
+            yield fabrique(nom, champs)
+
+    def environnement(self, nom: str) -> Environnement:
+        """Crée l'environnement d'une nouvelle partie, comme nouvel_environnement, mais sans construire les
+        alliés ni les lieux: chacun ne l'est qu'à sa première demande.
+
+        Args:
+            nom (str): Le nom de l'avatar du joueur.
+
+        Returns:
+            Environnement: Objet qui contient toutes les informations de joueur, d'alliés et de lieux.
+
+        Raises:
+            ErreurChargement: Après le dernier lieu, si le fichier est mal formé ou que des lieux ne respectent
+                pas le schéma des lieux, avec toutes leurs erreurs.
+        """
+        modele = ModeleMonde.depuis_champs(self.champs_allies(), self.champs_lieux(), self.ressources, self.ennemis)
+        return Environnement(joueur=nouveau_joueur(nom), allies=modele.allies, lieux=modele.lieux)
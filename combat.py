@@ -0,0 +1,292 @@
+"""Résolution des combats par lots, pour évaluer des millions de rencontres (force, vie, lieu) d'un coup.
+
+Joueur.attaquer résout une rencontre à la fois: le joueur gagne si sa force est au moins égale à la force
+totale des ennemis du lieu, et récupère alors toutes les ressources du lieu; sinon il perd autant de points de
+vie que cette force. combattre() applique exactement la même règle à des tableaux de forces et de vies de
+joueurs et à des indices de lieux, et donne pour chaque rencontre l'issue, la vie restante et les quantités de
+ressources récupérées.
+
+Les rencontres sont indépendantes: chacune se joue contre le lieu tel qu'il est dans le lot, et aucun lieu
+n'est vidé par une victoire. Les lieux sont mis en colonnes une fois pour toutes dans un LotLieux.
+
+numpy est facultatif. S'il est installé, les calculs sont faits sur des tableaux d'entiers de 64 bits, et les
+forces, les vies et les indices de lieux se combinent selon les règles de diffusion de numpy (par exemple, des
+joueurs en colonne contre tous les lieux en ligne). Sinon, ou avec vectoriser=False, une boucle Python fait
+le même calcul sur des listes de même longueur.
+
+Exemples:
+    >>> lot = LotLieux(environnement.lieux)
+    >>> resultat = combattre([10, 3], [100, 100], lot, [0, 0])
+    >>> resultat.victoires, resultat.vies
+    (array([ True, False]), array([100,  92]))
+    >>> resultat.butin(0)
+    {'or': 20, 'pierres': 20}
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import functools
+
+from Projet_Epopée_des_cité import Lieu
+
+
+Position = Union[int, Tuple[int, ...]]
+"""La position d'une rencontre dans les tableaux de résultats: un entier, ou un tuple après diffusion."""
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy() -> Optional[Any]:
+    """Donne le module numpy, importé au premier lot, ou None s'il n'est pas installé."""
+    try:
+        # Import local: numpy est facultatif, et long à importer pour qui ne combat pas par lots.
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class LotLieux:
+    """Classe qui met en colonnes les lieux d'un lot de combats.
+
+    Attributes:
+        noms (List[str]): Le nom de chaque lieu.
+        forces (Sequence[int]): La force totale des ennemis de chaque lieu.
+        ressources (List[str]): Les noms des ressources, une colonne chacune, dans l'ordre où elles apparaissent.
+        quantites (Sequence[Sequence[int]]): Pour chaque lieu, la quantité de chaque ressource, ressources
+            en double additionnées.
+        vectorise (bool): Si les colonnes sont des tableaux numpy.
+
+    Exemples:
+        >>> lot = LotLieux(environnement.lieux)
+        >>> lot.forces[0], lot.ressources
+        (8, ['or', 'pierres', 'bois', 'herbes'])
+    """
+
+    __slots__ = ("noms", "forces", "ressources", "quantites", "vectorise", "_butins")
+
+    def __init__(self, lieux: Iterable[Lieu], vectoriser: Optional[bool] = None):
+        """Met les lieux en colonnes.
+
+        Args:
+            lieux (Iterable[Lieu]): Les lieux du lot, dans l'ordre de leurs indices.
+            vectoriser (Optional[bool]): True pour utiliser numpy, False pour la boucle Python, None pour
+                utiliser numpy s'il est installé.
+
+        Raises:
+            ImportError: Si vectoriser vaut True et que numpy n'est pas installé.
+        """
+        numpy = _numpy()
+        if vectoriser and numpy is None:
+            raise ImportError("numpy n'est pas installé: utilisez vectoriser=False.")
+        self.vectorise = numpy is not None if vectoriser is None else vectoriser
+        self.noms: List[str] = []
+        forces: List[int] = []
+        colonnes: Dict[str, int] = {}
+        self._butins: List[Dict[str, int]] = []
+        for lieu in lieux:
+            self.noms.append(lieu.nom)
+            forces.append(lieu.force_ennemis)
+            # Le même butin que Joueur.ajout_objet_inventaire sur un inventaire vide: mêmes clés, même ordre.
+            butin: Dict[str, int] = {}
+            for ressource in lieu.ressources:
+                colonnes.setdefault(ressource.nom, len(colonnes))
+                butin[ressource.nom] = butin.get(ressource.nom, 0) + ressource.quantite
+            self._butins.append(butin)
+        self.ressources = list(colonnes)
+        quantites = [[0] * len(colonnes) for _ in self._butins]
+        for ligne, butin in zip(quantites, self._butins):
+            for nom, quantite in butin.items():
+                ligne[colonnes[nom]] = quantite
+        if self.vectorise:
+            self.forces = numpy.array(forces, dtype=numpy.int64)
+            self.quantites = numpy.array(quantites, dtype=numpy.int64).reshape(len(forces), len(colonnes))
+        else:
+            self.forces = forces
+            self.quantites = quantites
+
+    def __len__(self) -> int:
+        """Donne le nombre de lieux du lot."""
+        return len(self.noms)
+
+    def butin(self, indice: int) -> Dict[str, int]:
+        """Donne ce que rapporte la victoire sur un lieu, tel que Joueur.attaquer l'ajoute à l'inventaire.
+
+        Args:
+            indice (int): L'indice du lieu dans le lot.
+
+        Returns:
+            Dict[str, int]: La quantité récupérée de chaque ressource du lieu, même nulle.
+        """
+        return dict(self._butins[indice])
+
+
+class ResultatCombats:
+    """Classe qui représente l'issue d'un lot de rencontres.
+
+    Le butin de chaque rencontre n'est pas gardé: il se déduit de l'issue et du lieu, et une matrice rencontres
+    par ressources prendrait vite des centaines de mégaoctets. butins() la construit à la demande, et totaux()
+    s'en passe.
+
+    Attributes:
+        lot (LotLieux): Les lieux du lot.
+        lieux (Sequence[int]): L'indice du lieu de chaque rencontre.
+        victoires (Sequence[bool]): Si le joueur a gagné chaque rencontre.
+        vies (Sequence[int]): La vie du joueur après chaque rencontre; elle peut être négative, comme avec
+            Joueur.attaquer.
+    """
+
+    __slots__ = ("lot", "lieux", "victoires", "vies")
+
+    def __init__(self, lot: LotLieux, lieux: Sequence[int], victoires: Sequence[bool], vies: Sequence[int]):
+        """Initialise le résultat d'un lot de rencontres."""
+        self.lot = lot
+        self.lieux = lieux
+        self.victoires = victoires
+        self.vies = vies
+
+    def __len__(self) -> int:
+        """Donne le nombre de rencontres, sur la première dimension des tableaux."""
+        return len(self.victoires)
+
+    def _valeur(self, tableau, position: Position):
+        """Lit un élément d'un tableau de résultats, numpy ou liste."""
+        if self.lot.vectorise:
+            return tableau[position].item()
+        return tableau[position]
+
+    def victoire(self, position: Position) -> bool:
+        """Donne l'issue d'une rencontre, comme la renvoie Joueur.attaquer."""
+        return bool(self._valeur(self.victoires, position))
+
+    def vie(self, position: Position) -> int:
+        """Donne la vie du joueur après une rencontre."""
+        return int(self._valeur(self.vies, position))
+
+    def butin(self, position: Position) -> Dict[str, int]:
+        """Donne ce qu'une rencontre ajoute à l'inventaire du joueur.
+
+        Args:
+            position (Position): La position de la rencontre.
+
+        Returns:
+            Dict[str, int]: Les ressources du lieu et leurs quantités en cas de victoire, un dictionnaire vide
+            sinon.
+        """
+        if not self.victoire(position):
+            return {}
+        return self.lot.butin(int(self._valeur(self.lieux, position)))
+
+    def butins(self):
+        """Donne la quantité récupérée de chaque ressource du lot (colonnes de lot.ressources) à chaque rencontre.
+
+        Returns:
+            Un tableau numpy de la forme des rencontres plus une dimension pour les ressources, ou une liste de
+            lignes sans numpy; les quantités sont nulles en cas de défaite.
+        """
+        if self.lot.vectorise:
+            numpy = _numpy()
+            return numpy.where(self.victoires[..., numpy.newaxis], self.lot.quantites[self.lieux], 0)
+        rien = [0] * len(self.lot.ressources)
+        return [
+            list(self.lot.quantites[indice]) if victoire else list(rien)
+            for victoire, indice in zip(self.victoires, self.lieux)
+        ]
+
+    def totaux(self) -> Dict[str, int]:
+        """Donne la quantité totale de chaque ressource récupérée sur l'ensemble des rencontres.
+
+        Returns:
+            Dict[str, int]: Pour chaque ressource du lot, la somme des quantités récupérées.
+        """
+        if self.lot.vectorise:
+            numpy = _numpy()
+            gagnes = numpy.bincount(self.lieux[self.victoires], minlength=len(self.lot))
+            sommes = gagnes @ self.lot.quantites
+        else:
+            gagnes = [0] * len(self.lot)
+            for victoire, indice in zip(self.victoires, self.lieux):
+                if victoire:
+                    gagnes[indice] += 1
+            sommes = [0] * len(self.lot.ressources)
+            for nombre, ligne in zip(gagnes, self.lot.quantites):
+                if nombre:
+                    for colonne, quantite in enumerate(ligne):
+                        sommes[colonne] += nombre * quantite
+        return {nom: int(somme) for nom, somme in zip(self.lot.ressources, sommes)}
+
+
+def combattre(
+    forces: Union[int, Sequence[int]],
+    vies: Union[int, Sequence[int]],
+    lot: LotLieux,
+    lieux: Optional[Union[int, Sequence[int]]] = None,
+) -> ResultatCombats:
+    """Résout un lot de rencontres indépendantes avec la règle de Joueur.attaquer.
+
+    Args:
+        forces (Union[int, Sequence[int]]): La force du joueur à chaque rencontre.
+        vies (Union[int, Sequence[int]]): La vie du joueur avant chaque rencontre.
+        lot (LotLieux): Les lieux du lot.
+        lieux (Optional[Union[int, Sequence[int]]]): L'indice dans le lot du lieu de chaque rencontre. Par
+            défaut, la rencontre i se joue contre le lieu i.
+
+    Returns:
+        ResultatCombats: L'issue, la vie restante et le butin de chaque rencontre.
+
+    Raises:
+        ValueError: Si les tableaux ne se combinent pas: longueurs différentes sans numpy, formes
+            incompatibles avec numpy.
+        IndexError: Si un indice de lieu est hors du lot.
+
+    Exemples:
+        >>> lot = LotLieux(environnement.lieux)
+        >>> resultat = combattre([[10], [3]], 100, lot, range(len(lot)))
+        >>> resultat.victoires.shape
+        (2, 2)
+    """
+    if lieux is None:
+        lieux = range(len(lot))
+    if lot.vectorise:
+        return _combattre_numpy(forces, vies, lot, lieux)
+    return _combattre_boucle(forces, vies, lot, lieux)
+
+
+def _combattre_numpy(forces, vies, lot: LotLieux, lieux) -> ResultatCombats:
+    """combattre() sur des tableaux numpy diffusés les uns contre les autres."""
+    numpy = _numpy()
+    forces, vies, lieux = numpy.broadcast_arrays(
+        numpy.asarray(forces, dtype=numpy.int64),
+        numpy.asarray(vies, dtype=numpy.int64),
+        numpy.asarray(lieux, dtype=numpy.intp),
+    )
+    if lieux.size and (lieux.min() < 0 or lieux.max() >= len(lot)):
+        raise IndexError(f"Indice de lieu hors du lot de {len(lot)} lieux.")
+    ennemis = lot.forces[lieux]
+    victoires = forces >= ennemis
+    vies = numpy.where(victoires, vies, vies - ennemis)
+    return ResultatCombats(lot, lieux, victoires, vies)
+
+
+def _combattre_boucle(forces, vies, lot: LotLieux, lieux) -> ResultatCombats:
+    """combattre() sans numpy: une boucle Python sur des listes de même longueur."""
+    lieux = [lieux] if isinstance(lieux, int) else list(lieux)
+    forces = [forces] if isinstance(forces, int) else list(forces)
+    vies = [vies] if isinstance(vies, int) else list(vies)
+    nombre = max(len(lieux), len(forces), len(vies))
+    # Un nombre seul vaut pour toutes les rencontres, comme avec numpy.
+    lieux, forces, vies = (valeurs * nombre if len(valeurs) == 1 else valeurs for valeurs in (lieux, forces, vies))
+    if not len(lieux) == len(forces) == len(vies) == nombre:
+        raise ValueError("Sans numpy, les forces, les vies et les lieux doivent avoir la même longueur.")
+    for indice in lieux:
+        if not 0 <= indice < len(lot):
+            raise IndexError(f"Indice de lieu hors du lot de {len(lot)} lieux.")
+    victoires = []
+    restantes = []
+    for force, vie, indice in zip(forces, vies, lieux):
+        ennemis = lot.forces[indice]
+        if force < ennemis:
+            victoires.append(False)
+            restantes.append(vie - ennemis)
+        else:
+            victoires.append(True)
+            restantes.append(vie)
+    return ResultatCombats(lot, lieux, victoires, restantes)
@@ -0,0 +1,298 @@
+"""Écriture des sauvegardes en arrière-plan: le joueur n'attend plus le disque quand il sauvegarde.
+
+Sauvegarder ne fait que photographier la partie (voir Photographie: quelques millisecondes pour dix mille
+lieux, là où vers_dict en prend près de cent, et rien de plus pour une partie reprise d'un instantané
+binaire, quelle que soit sa taille), puis confier la photographie à un fil d'écriture. Le fil la met au
+format de sauvegarde et l'écrit avec ecrire_atomiquement (fichier temporaire puis renommage): le jeu peut
+continuer pendant ce temps.
+
+Les sauvegardes d'un même fichier qui attendent encore leur tour sont fusionnées: seule la plus récente est
+écrite. Le fil n'écrit qu'un fichier à la fois, donc deux écritures d'un même fichier ne se croisent jamais.
+
+Rien n'est perdu en quittant: EcrivainSauvegardes.attendre rend la main quand tout ce qui a été confié est
+écrit, et la sortie du bloc with attend puis arrête le fil. Une erreur d'écriture est relancée à l'appel
+suivant de sauvegarder ou d'attendre.
+
+Exemples:
+    >>> with EcrivainSauvegardes() as ecrivain:
+    ...     ecrivain.sauvegarder("partie.json", environnement)
+    ...     environnement.joueur.vie -= 10
+    ...     ecrivain.sauvegarder("partie.json", environnement)
+    >>> load_json("partie.json")["joueur"]["vie"]
+    90
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+import threading
+
+from Projet_Epopée_des_cité import (
+    VARIANTE_PAR_DEFAUT,
+    Environnement,
+    Lieu,
+    Repertoire,
+    VarianteSauvegarde,
+    ecrire_atomiquement,
+    ecrire_donnees_sauvegarde,
+    est_instantane,
+)
+from instantane import (
+    EtatElement,
+    PhotographieRepertoire,
+    RepertoireParesseux,
+    champs_etat,
+    encoder_champs,
+    etat_element,
+)
+
+
+Donnees = Dict[str, Union[Dict, List[Dict]]]
+"""Une partie dans le format du fichier de sauvegarde, telle que la donne Environnement.vers_dict."""
+
+
+class Photographie:
+    """Classe qui représente l'état d'une partie à un instant, pris sans rien mettre au format de sauvegarde.
+
+    Le joueur est copié. Les alliés ne sont jamais modifiés par le jeu: la photographie garde les objets.
+    D'un lieu, le jeu ne change que les listes des ressources et des ennemis, en les remplaçant sans jamais
+    modifier leur contenu (voir copier_element): la photographie garde le nom, la description et les listes
+    du moment. Les alliés et les lieux d'une partie reprise d'un instantané binaire sont photographiés sans
+    être construits (voir instantane.PhotographieRepertoire). La mise au format, le plus long, est faite par
+    vers_dict ou champs_lieux, dans le fil d'écriture.
+
+    Attributes:
+        joueur (Dict[str, Union[str, int, Dict[str, int]]]): Le joueur, tel que le donne Joueur.vers_dict.
+        allies (Union[List[EtatElement], PhotographieRepertoire]): Les alliés, dans l'ordre.
+        lieux (Union[List[EtatElement], PhotographieRepertoire]): Les champs des lieux, dans l'ordre.
+    """
+
+    __slots__ = ("joueur", "allies", "lieux")
+
+    def __init__(self, environnement: Environnement):
+        """Photographie une partie.
+
+        Args:
+            environnement (Environnement): La partie.
+        """
+        self.joueur = environnement.joueur.vers_dict()
+        self.allies = _photographier(environnement.allies)
+        self.lieux = _photographier(environnement.lieux)
+
+    def champs_allies(self) -> Iterator[Tuple[str, int, str]]:
+        """Parcourt le nom, la force et le dialogue de chaque allié photographié."""
+        if isinstance(self.allies, PhotographieRepertoire):
+            return self.allies.champs()
+        return (champs_etat(allie) for allie in self.allies)
+
+    def champs_lieux(self) -> Iterator[Tuple]:
+        """Parcourt les champs de chaque lieu photographié, ressources et ennemis compris, sous forme de champs."""
+        if isinstance(self.lieux, PhotographieRepertoire):
+            return self.lieux.champs()
+        return (champs_etat(lieu) for lieu in self.lieux)
+
+    def vers_dict(self) -> Donnees:
+        """Donne la partie photographiée dans le format du fichier de sauvegarde, comme Environnement.vers_dict."""
+        if isinstance(self.allies, PhotographieRepertoire):
+            allies = self.allies.vers_dicts()
+        else:
+            allies = [allie.vers_dict() for allie in self.allies]
+        if isinstance(self.lieux, PhotographieRepertoire):
+            lieux = self.lieux.vers_dicts()
+        else:
+            lieux = [Lieu(*champs).vers_dict() for champs in self.lieux]
+        return {"joueur": self.joueur, "allies": allies, "lieux": lieux}
+
+
+def _photographier(repertoire: Repertoire) -> Union[List[EtatElement], PhotographieRepertoire]:
+    """Photographie les alliés ou les lieux d'une partie, sans construire ceux qui sont restés dans un instantané."""
+    if isinstance(repertoire, RepertoireParesseux):
+        return repertoire.photographier()
+    return [etat_element(element) for element in repertoire]
+
+
+Ecriture = Callable[[str, Photographie], None]
+"""Écrit une photographie de partie dans un fichier de sauvegarde."""
+
+
+def ecrire_json(filename: str, photographie: Photographie) -> None:
+    """Fonction qui écrit la photographie d'une partie dans une sauvegarde json, dans la variante par défaut.
+
+    Args:
+        filename (str): nom du fichier de sauvegarde.
+        photographie (Photographie): La partie.
+    """
+    ecrire_donnees_sauvegarde(filename, photographie.vers_dict())
+
+
+def ecrire_instantane(filename: str, photographie: Photographie) -> None:
+    """Fonction qui écrit la photographie d'une partie dans un instantané binaire, directement depuis ses champs.
+
+    Args:
+        filename (str): nom du fichier de sauvegarde.
+        photographie (Photographie): La partie.
+    """
+    contenu = encoder_champs(photographie.joueur, photographie.champs_allies(), photographie.champs_lieux())
+    ecrire_atomiquement(filename, contenu)
+
+
+def ecriture_donnees(fichier_sauvegarde: str, variante: Optional[VarianteSauvegarde] = None) -> Ecriture:
+    """Fonction qui choisit comment écrire une photographie, selon le format de la sauvegarde qui existe déjà.
+
+    Comme ecriture_sauvegarde: une partie reprise depuis un instantané binaire est sauvegardée en instantané
+    binaire, les autres en json, dans la variante de la sauvegarde reprise.
+
+    Args:
+        fichier_sauvegarde (str): Le fichier de sauvegarde de la partie.
+        variante (Optional[VarianteSauvegarde]): La variante json à utiliser quoi qu'il y ait dans le fichier.
+
+    Returns:
+        Ecriture: ecrire_instantane, ou ecrire_json dans la bonne variante.
+    """
+    if variante is None:
+        if est_instantane(fichier_sauvegarde):
+            return ecrire_instantane
+        variante = VarianteSauvegarde.detecter(fichier_sauvegarde) or VARIANTE_PAR_DEFAUT
+    if variante == VARIANTE_PAR_DEFAUT:
+        return ecrire_json
+
+    def ecrire_variante(filename: str, photographie: Photographie) -> None:
+        ecrire_donnees_sauvegarde(filename, photographie.vers_dict(), variante)
+
+    return ecrire_variante
+
+
+class EcrivainSauvegardes:
+    """Classe qui écrit les sauvegardes d'une ou de plusieurs parties dans un fil d'écriture.
+
+    Le fil est démarré à la première sauvegarde. C'est un fil démon: un programme qui s'arrête sans appeler
+    fermer, ni sortir du bloc with, perd les sauvegardes qui n'étaient pas encore écrites.
+
+    Attributes:
+        ecrites (int): Le nombre de sauvegardes écrites.
+        fusionnees (int): Le nombre de sauvegardes remplacées par une plus récente avant d'être écrites.
+    """
+
+    __slots__ = ("_condition", "_en_attente", "_en_cours", "_fil", "_erreur", "_ferme", "ecrites", "fusionnees")
+
+    def __init__(self):
+        """Initialise un écrivain sans fil d'écriture."""
+        self._condition = threading.Condition()
+        # Les sauvegardes qui attendent leur tour, par fichier, dans l'ordre où elles ont été demandées.
+        self._en_attente: Dict[str, Tuple[Photographie, Ecriture]] = {}
+        self._en_cours = False
+        self._fil: Optional[threading.Thread] = None
+        self._erreur: Optional[BaseException] = None
+        self._ferme = False
+        self.ecrites = 0
+        self.fusionnees = 0
+
+    def __enter__(self) -> "EcrivainSauvegardes":
+        """Donne l'écrivain, qui sera fermé à la sortie du bloc with."""
+        return self
+
+    def __exit__(self, *exception) -> None:
+        """Attend que tout soit écrit puis arrête le fil d'écriture."""
+        self.fermer()
+
+    def sauvegarder(
+        self,
+        filename: str,
+        environnement: Environnement,
+        ecrire: Ecriture = ecrire_json,
+    ) -> None:
+        """Photographie la partie et confie son écriture au fil, sans attendre qu'elle soit écrite.
+
+        Args:
+            filename (str): nom du fichier de sauvegarde.
+            environnement (Environnement): La partie à sauvegarder.
+            ecrire (Ecriture, optional): Comment écrire la photographie. Par défaut, en json.
+
+        Raises:
+            OSError: Si une sauvegarde précédente n'a pas pu être écrite.
+            RuntimeError: Si l'écrivain est fermé.
+        """
+        self.confier(filename, Photographie(environnement), ecrire)
+
+    def confier(
+        self,
+        filename: str,
+        photographie: Photographie,
+        ecrire: Ecriture = ecrire_json,
+    ) -> None:
+        """Confie au fil l'écriture d'une photographie, qui remplace celle du même fichier pas encore écrite.
+
+        Args:
+            filename (str): nom du fichier de sauvegarde.
+            photographie (Photographie): La partie à sauvegarder.
+            ecrire (Ecriture, optional): Comment écrire la photographie. Par défaut, en json.
+
+        Raises:
+            OSError: Si une sauvegarde précédente n'a pas pu être écrite.
+            RuntimeError: Si l'écrivain est fermé.
+        """
+        with self._condition:
+            self._relancer_erreur()
+            if self._ferme:
+                raise RuntimeError("L'écrivain des sauvegardes est fermé.")
+            if filename in self._en_attente:
+                self.fusionnees += 1
+            self._en_attente[filename] = (photographie, ecrire)
+            if self._fil is None:
+                self._fil = threading.Thread(target=self._ecrire, name="ecriture-sauvegardes", daemon=True)
+                self._fil.start()
+            self._condition.notify_all()
+
+    def attendre(self) -> None:
+        """Rend la main quand toutes les sauvegardes confiées sont écrites.
+
+        Raises:
+            OSError: Si une sauvegarde n'a pas pu être écrite.
+        """
+        with self._condition:
+            while self._en_attente or self._en_cours:
+                self._condition.wait()
+            self._relancer_erreur()
+
+    def fermer(self) -> None:
+        """Attend que toutes les sauvegardes confiées soient écrites, puis arrête le fil d'écriture.
+
+        Raises:
+            OSError: Si une sauvegarde n'a pas pu être écrite.
+        """
+        try:
+            self.attendre()
+        finally:
+            with self._condition:
+                self._ferme = True
+                self._condition.notify_all()
+            if self._fil is not None:
+                self._fil.join()
+
+    def _relancer_erreur(self) -> None:
+        """Relance l'erreur de la dernière écriture ratée, une seule fois. Appelée avec le verrou pris."""
+        erreur, self._erreur = self._erreur, None
+        if erreur is not None:
+            raise erreur
+
+    def _ecrire(self) -> None:
+        """Boucle du fil d'écriture: écrit les sauvegardes une à une jusqu'à la fermeture."""
+        while True:
+            with self._condition:
+                while not self._en_attente and not self._ferme:
+                    self._condition.wait()
+                if not self._en_attente:
+                    return
+                filename = next(iter(self._en_attente))
+                photographie, ecrire = self._en_attente.pop(filename)
+                self._en_cours = True
+            erreur = None
+            try:
+                ecrire(filename, photographie)
+            except Exception as e:
+                erreur = e
+            with self._condition:
+                self._en_cours = False
+                if erreur is None:
+                    self.ecrites += 1
+                else:
+                    self._erreur = erreur
+                self._condition.notify_all()
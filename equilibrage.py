@@ -0,0 +1,572 @@
+"""Outil d'équilibrage: quel ordre de recrutement et d'attaque gagne le plus souvent, et à quel prix.
+
+Une stratégie est un ordre sur toutes les actions possibles: recruter chaque allié de la guilde et attaquer
+chaque lieu de la carte, une fois chacun. Elle est jouée avec Joueur.payer_allie et Joueur.attaquer jusqu'à
+la victoire (tous les lieux accomplis), ou jusqu'à la première attaque perdue, qui arrête la stratégie
+(le joueur est mort ou son plan a échoué). Un allié trop cher est simplement passé.
+
+Toutes les stratégies sont comptées, mais pas jouées une à une:
+    - les alliés de même force et de même prix, et les lieux de même force et de mêmes ressources, sont
+      interchangeables et regroupés en classes;
+    - les alliés plus chers que tout l'or du monde ne peuvent jamais être recrutés: ils sont mis de côté et
+      leurs recrutements sont comptés par un simple facteur;
+    - les stratégies avancent d'une action à la fois, et les débuts de stratégie qui mènent au même état
+      intermédiaire du joueur (actions restantes par classe, force, vie, or) sont fusionnés, si bien que
+      la suite n'est explorée qu'une fois pour eux tous;
+    - l'effet de chaque action selon la force, la vie et l'or du joueur n'est calculé qu'une fois;
+    - dès qu'une stratégie est terminée, toutes les façons d'ordonner les actions restantes sont comptées
+      d'un coup.
+
+Le travail est découpé selon les premières actions et réparti sur tous les cœurs avec un pool de processus;
+les résultats partiels sont affichés au fur et à mesure.
+
+Exemple en ligne de commande:
+    python equilibrage.py data.json --profondeur 2
+"""
+
+from typing import List, Dict, Tuple, Optional, Iterator
+import math
+
+from Projet_Epopée_des_cité import (
+    Allie,
+    Environnement,
+    Joueur,
+    Lieu,
+    SortieNulle,
+    load_json,
+    nouvel_environnement,
+    rediriger_sortie,
+)
+
+
+VICTOIRE = "victoire"
+MORT = "mort"
+ECHEC = "echec"
+
+Etat = Tuple[Tuple[int, ...], int, int, int]
+"""Un état intermédiaire: actions restantes par classe, force, vie et or du joueur."""
+
+Issue = Tuple[str, int, int, Tuple[Tuple[str, int], ...]]
+"""La fin d'une stratégie: issue, vie, or, et le reste de l'inventaire trié par nom."""
+
+Meilleur = Optional[Tuple[bool, int, int, Tuple[int, ...]]]
+"""La meilleure fin depuis un état: victoire, vie, or, et la suite des classes d'actions qui y mène."""
+
+
+class _Classe:
+    """Classe d'actions interchangeables: recruter l'un des alliés, ou attaquer l'un des lieux, d'un groupe.
+
+    Attributes:
+        allie (Optional[Allie]): L'allié représentant la classe, pour une classe de recrutements.
+        lieu (Optional[Lieu]): Le lieu représentant la classe, pour une classe d'attaques.
+        membres (List[str]): Les noms des alliés ou des lieux de la classe.
+    """
+
+    def __init__(self, allie: Optional[Allie] = None, lieu: Optional[Lieu] = None):
+        """Initialise une classe à partir de son représentant.
+
+        Args:
+            allie (Optional[Allie]): L'allié représentant la classe.
+            lieu (Optional[Lieu]): Le lieu représentant la classe.
+        """
+        self.allie = allie
+        self.lieu = lieu
+        self.membres: List[str] = []
+
+    def libelle(self, nom: str) -> str:
+        """Donne le libellé de l'action pour le membre nom."""
+        return f"recruter {nom}" if self.allie is not None else f"attaquer {nom}"
+
+
+class MondeCompact:
+    """Le monde vu par l'équilibrage: le joueur de départ et les classes d'actions.
+
+    Attributes:
+        joueur (Joueur): Le joueur au début des stratégies.
+        classes (List[_Classe]): Les classes de recrutements puis les classes d'attaques.
+        nombre_allies (int): Le nombre de classes de recrutements en tête de classes.
+        inertes (List[str]): Les alliés plus chers que tout l'or que le joueur peut gagner. Leur recrutement
+            échoue toujours et ne change rien: ils sont retirés des classes, et chaque ordre des autres
+            actions compte pour toutes les façons d'y insérer leurs recrutements.
+    """
+
+    def __init__(self, environnement: Environnement):
+        """Regroupe les alliés et les lieux de l'environnement en classes interchangeables.
+
+        Args:
+            environnement (Environnement): L'environnement à équilibrer.
+        """
+        joueur = environnement.joueur
+        self.joueur = Joueur(joueur.nom, joueur.force, joueur.vie, dict(joueur.inventaire))
+        or_maximum = joueur.inventaire.get("or", 0) + sum(
+            ressource.quantite for lieu in environnement.lieux for ressource in lieu.ressources if ressource.nom == "or"
+        )
+        self.inertes: List[str] = []
+        classes_allies: Dict[Tuple, _Classe] = {}
+        for allie in environnement.allies:
+            if (allie.prix or 0) > or_maximum:
+                self.inertes.append(allie.nom)
+                continue
+            # Deux alliés au même dialogue ont le même prix: la force et le dialogue suffisent.
+            cle = (allie.force, allie.dialogue)
+            classes_allies.setdefault(cle, _Classe(allie=allie)).membres.append(allie.nom)
+        classes_lieux: Dict[Tuple, _Classe] = {}
+        for lieu in environnement.lieux:
+            cle = (
+                lieu.force_ennemis,
+                tuple(sorted((ressource.nom, ressource.quantite) for ressource in lieu.ressources)),
+            )
+            classes_lieux.setdefault(cle, _Classe(lieu=lieu)).membres.append(lieu.nom)
+        self.nombre_allies = len(classes_allies)
+        self.classes = list(classes_allies.values()) + list(classes_lieux.values())
+
+    def etat_initial(self) -> Etat:
+        """Donne l'état du joueur avant la première action."""
+        return (
+            tuple(len(classe.membres) for classe in self.classes),
+            self.joueur.force,
+            self.joueur.vie,
+            self.joueur.inventaire.get("or", 0),
+        )
+
+    def nombre_strategies(self) -> int:
+        """Donne le nombre total de stratégies, c'est-à-dire d'ordres sur toutes les actions."""
+        return math.factorial(sum(len(classe.membres) for classe in self.classes) + len(self.inertes))
+
+    def facteur_inertes(self) -> int:
+        """Donne le nombre de stratégies représentées par chaque ordre des actions hors alliés inertes."""
+        actives = sum(len(classe.membres) for classe in self.classes)
+        return self.nombre_strategies() // math.factorial(actives)
+
+
+class _Explorateur:
+    """Compte les fins de toutes les stratégies à partir d'un état.
+
+    Attributes:
+        monde (MondeCompact): Le monde exploré.
+        effets (Dict[Tuple[int, int, int, int], Tuple[int, int, int, bool]]): L'effet déjà calculé de chaque
+            action selon la force, la vie et l'or du joueur.
+        inventaires (Dict[Tuple[int, ...], Tuple[Tuple[str, int], ...]]): L'inventaire hors or déjà calculé
+            selon les lieux restants.
+        factorielles (List[int]): Les factorielles de 0 au nombre total d'actions.
+    """
+
+    def __init__(self, monde: MondeCompact):
+        """Initialise un explorateur sans rien de calculé.
+
+        Args:
+            monde (MondeCompact): Le monde à explorer.
+        """
+        self.monde = monde
+        self.inventaires: Dict[Tuple[int, ...], Tuple[Tuple[str, int], ...]] = {}
+        self.factorielles = [math.factorial(n) for n in range(sum(monde.etat_initial()[0]) + 1)]
+        self.effets: Dict[Tuple[int, int, int, int], Tuple[int, int, int, bool]] = {}
+
+    def appliquer(self, etat: Etat, indice: int) -> Tuple[Etat, Optional[str]]:
+        """Joue une action de la classe indice avec les vraies méthodes de Joueur.
+
+        Args:
+            etat (Etat): L'état avant l'action.
+            indice (int): L'indice de la classe de l'action.
+
+        Returns:
+            Tuple[Etat, Optional[str]]: L'état après l'action, et l'issue si la stratégie s'arrête là. Un lieu
+            dont l'attaque est perdue reste compté dans les actions restantes, car il n'est pas accompli.
+        """
+        restants, force, vie, or_ = etat
+        cle = (indice, force, vie, or_)
+        effet = self.effets.get(cle)
+        if effet is None:
+            effet = self.effets[cle] = self._jouer(*cle)
+        force, vie, or_, reussi = effet
+        suivants = restants[:indice] + (restants[indice] - 1,) + restants[indice + 1 :]
+        issue = None
+        if indice >= self.monde.nombre_allies:
+            if not reussi:
+                issue = MORT if vie <= 0 else ECHEC
+                suivants = restants
+            elif not any(suivants[self.monde.nombre_allies :]):
+                issue = VICTOIRE
+        return (suivants, force, vie, or_), issue
+
+    def _jouer(self, indice: int, force: int, vie: int, or_: int) -> Tuple[int, int, int, bool]:
+        """Joue une action sur un joueur jetable et donne sa force, sa vie et son or après l'action."""
+        classe = self.monde.classes[indice]
+        joueur = Joueur(self.monde.joueur.nom, force, vie, {"or": or_})
+        if classe.allie is not None:
+            reussi = joueur.payer_allie(classe.allie)
+        else:
+            modele = classe.lieu
+            lieu = Lieu(modele.nom, modele.description, list(modele.ressources), modele.ennemis.copy())
+            reussi = joueur.attaquer(lieu.force_ennemis, lieu)
+        return joueur.force, joueur.vie, joueur.inventaire.get("or", 0), reussi
+
+    def issue(self, etat: Etat, issue: str) -> Issue:
+        """Donne la fin d'une stratégie arrêtée dans l'état etat."""
+        restants, _, vie, or_ = etat
+        lieux_restants = restants[self.monde.nombre_allies :]
+        inventaire = self.inventaires.get(lieux_restants)
+        if inventaire is None:
+            quantites = {nom: quantite for nom, quantite in self.monde.joueur.inventaire.items() if nom != "or"}
+            for indice in range(self.monde.nombre_allies, len(self.monde.classes)):
+                accomplis = len(self.monde.classes[indice].membres) - restants[indice]
+                for ressource in self.monde.classes[indice].lieu.ressources if accomplis else ():
+                    if ressource.nom != "or":
+                        quantites[ressource.nom] = quantites.get(ressource.nom, 0) + accomplis * ressource.quantite
+            inventaire = self.inventaires[lieux_restants] = tuple(sorted(quantites.items()))
+        return issue, vie, or_, inventaire
+
+    def explorer(self, etat: Etat, nombre: int = 1, chemin: Tuple = ()) -> Tuple[Dict[Issue, int], Meilleur]:
+        """Compte, pour chaque fin possible, le nombre d'ordres des actions restantes qui y mènent.
+
+        Les stratégies avancent d'une action à la fois, couche par couche. Les débuts de stratégie qui mènent
+        au même état sont fusionnés en additionnant leurs nombres, si bien que seule la couche courante est
+        gardée en mémoire.
+
+        Args:
+            etat (Etat): L'état de départ.
+            nombre (int): Le nombre de débuts de stratégie qui mènent à etat.
+            chemin (Tuple): Les classes d'actions qui mènent à etat, en liste chaînée (précédent, indice).
+
+        Returns:
+            Tuple[Dict[Issue, int], Meilleur]: Le nombre de stratégies par fin, et la meilleure fin.
+        """
+        comptes: Dict[Issue, int] = {}
+        meilleur = None
+        couche = {etat: (nombre, chemin)}
+        while couche:
+            suivante: Dict[Etat, Tuple[int, Tuple]] = {}
+            for etat, (nombre, chemin) in couche.items():
+                restants = etat[0]
+                total_restant = sum(restants)
+                if not any(restants[self.monde.nombre_allies :]):
+                    # Monde sans aucun lieu: la partie est gagnée avant toute action, et chaque ordre des
+                    # recrutements restants mène à cette même fin, l'or intact.
+                    cle = self.issue(etat, VICTOIRE)
+                    comptes[cle] = comptes.get(cle, 0) + nombre * self.factorielles[total_restant]
+                    meilleur = max(meilleur or (True, cle[1], cle[2], chemin), (True, cle[1], cle[2], chemin))
+                    continue
+                for indice, effectif in enumerate(restants):
+                    if not effectif:
+                        continue
+                    suivant, fin = self.appliquer(etat, indice)
+                    nombre_suivant = nombre * effectif
+                    if fin is not None:
+                        cle = self.issue(suivant, fin)
+                        total = nombre_suivant * self.factorielles[total_restant - 1]
+                        comptes[cle] = comptes.get(cle, 0) + total
+                        candidat = (fin == VICTOIRE, cle[1], cle[2])
+                        if meilleur is None or candidat > meilleur[:3]:
+                            meilleur = candidat + ((chemin, indice),)
+                    elif suivant in suivante:
+                        deja, chemin_suivant = suivante[suivant]
+                        suivante[suivant] = (deja + nombre_suivant, chemin_suivant)
+                    else:
+                        suivante[suivant] = (nombre_suivant, (chemin, indice))
+            couche = suivante
+        if meilleur is not None:
+            meilleur = meilleur[:3] + (_deplier(meilleur[3]),)
+        return comptes, meilleur
+
+
+def _deplier(chemin: Tuple) -> Tuple[int, ...]:
+    """Transforme une liste chaînée (précédent, indice) en tuple d'indices."""
+    indices = []
+    while chemin:
+        chemin, indice = chemin
+        indices.append(indice)
+    return tuple(reversed(indices))
+
+
+class ResultatPartiel:
+    """Résultat d'une branche de stratégies qui commencent toutes par les mêmes actions.
+
+    Attributes:
+        prefixe (Tuple[int, ...]): Les classes des premières actions de la branche.
+        comptes (Dict[Issue, int]): Le nombre de stratégies de la branche pour chaque fin.
+        meilleur (Meilleur): La meilleure fin de la branche et les classes d'actions qui y mènent.
+    """
+
+    def __init__(self, prefixe: Tuple[int, ...], comptes: Dict[Issue, int], meilleur: Meilleur):
+        """Initialise le résultat d'une branche.
+
+        Args:
+            prefixe (Tuple[int, ...]): Les classes des premières actions de la branche.
+            comptes (Dict[Issue, int]): Le nombre de stratégies de la branche pour chaque fin.
+            meilleur (Meilleur): La meilleure fin de la branche.
+        """
+        self.prefixe = prefixe
+        self.comptes = comptes
+        self.meilleur = meilleur
+
+    @property
+    def total(self) -> int:
+        """Le nombre de stratégies de la branche."""
+        return sum(self.comptes.values())
+
+    @property
+    def victoires(self) -> int:
+        """Le nombre de stratégies gagnantes de la branche."""
+        return sum(nombre for cle, nombre in self.comptes.items() if cle[0] == VICTOIRE)
+
+
+_explorateur: Optional[_Explorateur] = None
+
+
+def _initialiser(monde: MondeCompact) -> None:
+    """Prépare l'explorateur d'un processus du pool; les effets déjà calculés servent à toutes ses branches."""
+    global _explorateur
+    _explorateur = _Explorateur(monde)
+
+
+def _evaluer_branche(prefixe: Tuple[int, ...]) -> ResultatPartiel:
+    """Compte les fins de toutes les stratégies qui commencent par les classes d'actions prefixe."""
+    with rediriger_sortie(SortieNulle()):
+        etat = _explorateur.monde.etat_initial()
+        multiplicite = _explorateur.monde.facteur_inertes()
+        total_restant = sum(etat[0])
+        for indice in prefixe:
+            multiplicite *= etat[0][indice]
+            total_restant -= 1
+            etat, fin = _explorateur.appliquer(etat, indice)
+            if fin is not None:
+                # Seule la dernière action d'une branche peut finir la stratégie (voir _branches_distinctes).
+                cle = _explorateur.issue(etat, fin)
+                nombre = multiplicite * _explorateur.factorielles[total_restant]
+                return ResultatPartiel(prefixe, {cle: nombre}, (fin == VICTOIRE, cle[1], cle[2], prefixe))
+        comptes, meilleur = _explorateur.explorer(etat, multiplicite)
+    if meilleur is not None:
+        meilleur = meilleur[:3] + (prefixe + meilleur[3],)
+    return ResultatPartiel(prefixe, comptes, meilleur)
+
+
+def _prefixes(monde: MondeCompact, profondeur: int) -> List[Tuple[int, ...]]:
+    """Découpe les stratégies en branches selon leurs profondeur premières classes d'actions."""
+    prefixes: List[Tuple[int, ...]] = [()]
+    restants = monde.etat_initial()[0]
+    for _ in range(profondeur):
+        suivants = []
+        for prefixe in prefixes:
+            utilises = [prefixe.count(indice) for indice in range(len(restants))]
+            possibles = [indice for indice in range(len(restants)) if restants[indice] > utilises[indice]]
+            suivants.extend(prefixe + (indice,) for indice in possibles)
+        if not suivants:
+            break
+        prefixes = suivants
+    return prefixes
+
+
+def evaluer(
+    monde: MondeCompact,
+    processus: Optional[int] = None,
+    profondeur: int = 1,
+) -> Iterator[ResultatPartiel]:
+    """Fonction qui évalue toutes les stratégies du monde et donne les résultats branche par branche.
+
+    Les branches qui se terminent avant profondeur actions (victoire ou attaque perdue) sont tout de même
+    correctement comptées, car la fin est détectée pendant l'application du préfixe.
+
+    Args:
+        monde (MondeCompact): Le monde à équilibrer.
+        processus (Optional[int]): Le nombre de processus du pool; par défaut tous les cœurs. Avec 0, tout est
+            calculé dans le processus courant.
+        profondeur (int): Le nombre de premières actions qui définissent une branche.
+
+    Yields:
+        ResultatPartiel: Le résultat de chaque branche, dans l'ordre où elles se terminent.
+    """
+    prefixes = _branches_distinctes(monde, profondeur)
+    if processus == 0:
+        _initialiser(monde)
+        for prefixe in prefixes:
+            yield _evaluer_branche(prefixe)
+        return
+    # Import local: concurrent.futures est long à importer et ne sert qu'au processus principal.
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=processus, initializer=_initialiser, initargs=(monde,)) as pool:
+        for futur in as_completed([pool.submit(_evaluer_branche, prefixe) for prefixe in prefixes]):
+            yield futur.result()
+
+
+def _branches_distinctes(monde: MondeCompact, profondeur: int) -> List[Tuple[int, ...]]:
+    """Donne les branches à évaluer, en s'arrêtant plus tôt pour les préfixes qui finissent la stratégie."""
+    if not any(monde.etat_initial()[0][monde.nombre_allies :]):
+        # Sans lieu, la stratégie est gagnée avant sa première action: une seule branche, vide.
+        return [()]
+    with rediriger_sortie(SortieNulle()):
+        explorateur = _Explorateur(monde)
+        branches = []
+        for prefixe in _prefixes(monde, profondeur):
+            etat = monde.etat_initial()
+            for position, indice in enumerate(prefixe):
+                etat, fin = explorateur.appliquer(etat, indice)
+                if fin is not None:
+                    prefixe = prefixe[: position + 1]
+                    break
+            if prefixe not in branches:
+                branches.append(prefixe)
+    return branches
+
+
+class Bilan:
+    """Classe qui agrège les résultats de toutes les branches.
+
+    Attributes:
+        monde (MondeCompact): Le monde équilibré.
+        comptes (Dict[Issue, int]): Le nombre de stratégies pour chaque fin.
+        branches (List[ResultatPartiel]): Les résultats de chaque branche.
+    """
+
+    def __init__(self, monde: MondeCompact):
+        """Initialise un bilan vide.
+
+        Args:
+            monde (MondeCompact): Le monde équilibré.
+        """
+        self.monde = monde
+        self.comptes: Dict[Issue, int] = {}
+        self.branches: List[ResultatPartiel] = []
+
+    def ajouter(self, resultat: ResultatPartiel) -> None:
+        """Ajoute le résultat d'une branche au bilan."""
+        self.branches.append(resultat)
+        for cle, nombre in resultat.comptes.items():
+            self.comptes[cle] = self.comptes.get(cle, 0) + nombre
+
+    @property
+    def total(self) -> int:
+        """Le nombre de stratégies déjà comptées."""
+        return sum(self.comptes.values())
+
+    @property
+    def taux_victoire(self) -> float:
+        """La proportion de stratégies gagnantes parmi celles déjà comptées."""
+        victoires = sum(nombre for cle, nombre in self.comptes.items() if cle[0] == VICTOIRE)
+        return victoires / self.total if self.total else 0.0
+
+    def repartition_issues(self) -> Dict[str, int]:
+        """Donne le nombre de stratégies par issue."""
+        return self._repartition(lambda cle: cle[0])
+
+    def repartition_vie(self) -> Dict[int, int]:
+        """Donne le nombre de stratégies pour chaque quantité de vie restante."""
+        return self._repartition(lambda cle: cle[1])
+
+    def repartition_inventaire(self) -> Dict[str, Dict[int, int]]:
+        """Donne, pour chaque ressource, le nombre de stratégies pour chaque quantité finale."""
+        noms = {"or"} | {nom for cle in self.comptes for nom, _ in cle[3]}
+        return {
+            nom: self._repartition(
+                lambda cle, nom=nom: cle[2] if nom == "or" else dict(cle[3]).get(nom, 0)
+            )
+            for nom in sorted(noms)
+        }
+
+    def _repartition(self, critere) -> Dict:
+        """Regroupe les comptes selon critere(fin)."""
+        repartition: Dict = {}
+        for cle, nombre in self.comptes.items():
+            valeur = critere(cle)
+            repartition[valeur] = repartition.get(valeur, 0) + nombre
+        return dict(sorted(repartition.items()))
+
+    def meilleure_strategie(self) -> Optional[Tuple[bool, int, int, List[str]]]:
+        """Donne la meilleure stratégie trouvée: gagnante si possible, puis avec le plus de vie, puis d'or.
+
+        Returns:
+            Optional[Tuple[bool, int, int, List[str]]]: Victoire, vie et or restants, et la suite des actions
+            avant l'arrêt de la stratégie.
+        """
+        candidats = [branche.meilleur for branche in self.branches if branche.meilleur is not None]
+        if not candidats:
+            return None
+        victoire, vie, or_, classes = max(candidats, key=lambda candidat: candidat[:3])
+        utilises: Dict[int, int] = {}
+        actions = []
+        for indice in classes:
+            classe = self.monde.classes[indice]
+            rang = utilises.get(indice, 0)
+            utilises[indice] = rang + 1
+            actions.append(classe.libelle(classe.membres[rang]))
+        return victoire, vie, or_, actions
+
+    def libelle_branche(self, resultat: ResultatPartiel) -> str:
+        """Donne un libellé lisible des premières actions d'une branche."""
+        utilises: Dict[int, int] = {}
+        libelles = []
+        for indice in resultat.prefixe:
+            classe = self.monde.classes[indice]
+            rang = utilises.get(indice, 0)
+            utilises[indice] = rang + 1
+            libelles.append(classe.libelle(classe.membres[rang]))
+        return " puis ".join(libelles) or "(toutes)"
+
+
+def equilibrer(
+    environnement: Environnement,
+    processus: Optional[int] = None,
+    profondeur: int = 1,
+) -> Bilan:
+    """Fonction qui évalue toutes les stratégies d'un environnement et renvoie le bilan complet.
+
+    Args:
+        environnement (Environnement): L'environnement à équilibrer.
+        processus (Optional[int]): Le nombre de processus du pool; par défaut tous les cœurs.
+        profondeur (int): Le nombre de premières actions qui définissent une branche.
+
+    Returns:
+        Bilan: Les comptes de toutes les stratégies.
+
+    Exemples:
+        >>> bilan = equilibrer(nouvel_environnement(load_json("data.json"), "Talion"))
+        >>> bilan.total, bilan.taux_victoire
+        (6, 0.16666666666666666)
+    """
+    monde = MondeCompact(environnement)
+    bilan = Bilan(monde)
+    for resultat in evaluer(monde, processus, profondeur):
+        bilan.ajouter(resultat)
+    return bilan
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: affiche les résultats partiels puis le bilan."""
+    # Import local: argparse ne sert qu'en ligne de commande, pas aux modules qui importent celui-ci.
+    import argparse
+
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("monde", nargs="?", default="data.json", help="le fichier de données du jeu")
+    analyseur.add_argument("--processus", "-j", type=int, default=None, help="nombre de processus (0: aucun)")
+    analyseur.add_argument("--profondeur", type=int, default=1, help="nombre d'actions par branche")
+    options = analyseur.parse_args(arguments)
+
+    environnement = nouvel_environnement(load_json(options.monde), "équilibrage")
+    monde = MondeCompact(environnement)
+    bilan = Bilan(monde)
+    print(
+        f"{monde.nombre_strategies()} stratégies, {len(monde.classes)} classes d'actions, "
+        f"{len(monde.inertes)} alliés hors de prix."
+    )
+    for resultat in evaluer(monde, options.processus, options.profondeur):
+        bilan.ajouter(resultat)
+        taux = resultat.victoires / resultat.total if resultat.total else 0.0
+        print(
+            f"[{len(bilan.branches)}] {bilan.libelle_branche(resultat)}: {taux:.1%} de victoires "
+            f"(cumul {bilan.taux_victoire:.1%} sur {bilan.total} stratégies)"
+        )
+    print("Issues:", bilan.repartition_issues())
+    print("Vie restante:", bilan.repartition_vie())
+    for nom, repartition in bilan.repartition_inventaire().items():
+        print(f"Inventaire {nom}:", repartition)
+    meilleure = bilan.meilleure_strategie()
+    if meilleure is not None:
+        victoire, vie, or_, actions = meilleure
+        print(
+            f"Meilleure stratégie ({'victoire' if victoire else 'défaite'}, vie {vie}, or {or_}): "
+            + ", ".join(actions)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,676 @@
+"""Instantané binaire des parties sauvegardées, lu par mmap pour reprendre les très grands mondes sans attendre.
+
+Le fichier json de sauvegarde doit être entièrement relu et tous ses objets reconstruits avant de jouer. Un
+instantané binaire se compose d'enregistrements de taille fixe (les nombres sont des entiers de 64 bits) et
+d'une table de chaînes pour les noms, descriptions, dialogues et utilités. Il est projeté en mémoire avec
+mmap: à la reprise, seul le joueur est construit, et chaque allié ou lieu (avec ses ressources et ses
+ennemis) n'est construit que la première fois qu'on y accède.
+
+Organisation du fichier, en petit-boutiste:
+    - l'en-tête: MAGIE, la version, le joueur (nom, force, vie) et le numéro de génération;
+    - la table des sections: pour chaque section, sa position dans le fichier et son nombre d'éléments;
+    - les sections: chaînes, inventaire, alliés, lieux, ressources, ennemis, et pour les alliés comme pour les
+      lieux un index trié par nom, qui permet de les retrouver sans rien construire.
+
+creation_environnement reconnaît un instantané à sa signature, et le convertit sans perte depuis et vers le
+format json avec convertir().
+
+Exemple:
+    python instantane.py partie_sauvegarder.json partie_sauvegarder.bin
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import json
+import mmap
+import struct
+
+from Projet_Epopée_des_cité import (
+    MAGIE_INSTANTANE,
+    Allie,
+    Ennemi,
+    Environnement,
+    Joueur,
+    Lieu,
+    Nomme,
+    Repertoire,
+    Ressource,
+    ecrire_atomiquement,
+    est_instantane,
+    restaurer_environnement,
+)
+
+
+VERSION = 1
+
+ENTETE = struct.Struct("<8sHHIqqQ")
+"""Signature, version, réservé, nom du joueur, force, vie, génération."""
+
+SECTIONS = ("chaines", "inventaire", "allies", "index_allies", "lieux", "index_lieux", "ressources", "ennemis")
+TABLE_SECTIONS = struct.Struct("<" + "QQ" * len(SECTIONS))
+"""Pour chaque section, sa position et son nombre d'éléments."""
+
+POSITION_CHAINE = struct.Struct("<Q")
+INVENTAIRE = struct.Struct("<Iq")
+"""Nom et quantité d'une entrée de l'inventaire."""
+PNG = struct.Struct("<IqI")
+"""Nom, force et dialogue d'un allié ou d'un ennemi; nom, quantité et utilité d'une ressource."""
+LIEU = struct.Struct("<IIIIII")
+"""Nom, description, première ressource, nombre de ressources, premier ennemi, nombre d'ennemis."""
+INDICE = struct.Struct("<I")
+"""Indice d'un élément dans sa section; c'est aussi le nom, premier champ de tout enregistrement."""
+TAILLES = {"allies": PNG.size, "lieux": LIEU.size}
+
+
+class _TableChaines:
+    """Table des chaînes d'un instantané en cours d'écriture: chaque chaîne n'y est qu'une fois."""
+
+    def __init__(self):
+        self.indices: Dict[str, int] = {}
+
+    def __call__(self, chaine: str) -> int:
+        """Donne l'indice de la chaîne, en l'ajoutant si besoin."""
+        indice = self.indices.get(chaine)
+        if indice is None:
+            if not isinstance(chaine, str):
+                raise ValueError(f"Chaîne attendue, pas {chaine!r}.")
+            indice = self.indices[chaine] = len(self.indices)
+        return indice
+
+    def section(self) -> bytes:
+        """Donne la section des chaînes: les positions de chaque chaîne, puis toutes les chaînes en utf-8."""
+        encodees = [chaine.encode("utf-8") for chaine in self.indices]
+        positions = bytearray()
+        position = 0
+        for encodee in encodees:
+            positions += POSITION_CHAINE.pack(position)
+            position += len(encodee)
+        positions += POSITION_CHAINE.pack(position)
+        return bytes(positions) + b"".join(encodees)
+
+
+class Instantane:
+    """Classe qui donne accès aux enregistrements d'un instantané projeté en mémoire.
+
+    Rien n'est lu à l'ouverture en dehors de l'en-tête: chaque accès lit directement les octets du fichier.
+
+    Attributes:
+        chemin (str): Le fichier de l'instantané.
+        generation (int): Le numéro de génération de l'instantané.
+    """
+
+    def __init__(self, chemin: str):
+        """Ouvre et projette l'instantané en mémoire.
+
+        Args:
+            chemin (str): Le fichier de l'instantané.
+
+        Raises:
+            FileNotFoundError: Quand le fichier n'a pas été trouvé.
+            ValueError: Si le fichier n'est pas un instantané d'une version connue.
+        """
+        self.chemin = chemin
+        with open(chemin, "rb") as fichier:
+            self._memoire = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._memoire) < ENTETE.size + TABLE_SECTIONS.size:
+            raise ValueError(f"{chemin} est trop court pour être un instantané.")
+        magie, version, _, self._nom_joueur, self._force, self._vie, self.generation = ENTETE.unpack_from(
+            self._memoire
+        )
+        if magie != MAGIE_INSTANTANE:
+            raise ValueError(f"{chemin} n'est pas un instantané.")
+        if version != VERSION:
+            raise ValueError(f"{chemin} est un instantané de version {version}, version {VERSION} attendue.")
+        table = TABLE_SECTIONS.unpack_from(self._memoire, ENTETE.size)
+        self._sections = {nom: (table[2 * i], table[2 * i + 1]) for i, nom in enumerate(SECTIONS)}
+        position, nombre = self._sections["chaines"]
+        self._debut_chaines = position + POSITION_CHAINE.size * (nombre + 1)
+
+    def _position(self, section: str, indice: int, taille: int) -> int:
+        """Donne la position du indice-ième enregistrement d'une section."""
+        return self._sections[section][0] + indice * taille
+
+    def nombre(self, section: str) -> int:
+        """Donne le nombre d'éléments d'une section."""
+        return self._sections[section][1]
+
+    def _octets_chaine(self, indice: int) -> bytes:
+        """Donne la chaîne d'indice donné, encodée en utf-8."""
+        position = self._position("chaines", indice, POSITION_CHAINE.size)
+        (debut,) = POSITION_CHAINE.unpack_from(self._memoire, position)
+        (fin,) = POSITION_CHAINE.unpack_from(self._memoire, position + POSITION_CHAINE.size)
+        return self._memoire[self._debut_chaines + debut : self._debut_chaines + fin]
+
+    def chaine(self, indice: int) -> str:
+        """Donne la chaîne d'indice donné de la table des chaînes."""
+        return self._octets_chaine(indice).decode("utf-8")
+
+    def joueur(self) -> Joueur:
+        """Construit le joueur de l'instantané."""
+        inventaire = {}
+        for i in range(self.nombre("inventaire")):
+            nom, quantite = INVENTAIRE.unpack_from(self._memoire, self._position("inventaire", i, INVENTAIRE.size))
+            inventaire[self.chaine(nom)] = quantite
+        return Joueur(nom=self.chaine(self._nom_joueur), force=self._force, vie=self._vie, inventaire=inventaire)
+
+    def _png(self, section: str, indice: int) -> Tuple[str, int, str]:
+        """Donne les trois champs d'un enregistrement d'allié, d'ennemi ou de ressource."""
+        nom, nombre, texte = PNG.unpack_from(self._memoire, self._position(section, indice, PNG.size))
+        return self.chaine(nom), nombre, self.chaine(texte)
+
+    def champs_allie(self, indice: int) -> Tuple[str, int, str]:
+        """Donne le nom, la force et le dialogue d'un allié."""
+        return self._png("allies", indice)
+
+    def champs_lieu(
+        self, indice: int
+    ) -> Tuple[str, str, List[Tuple[str, int, str]], List[Tuple[str, int, str]]]:
+        """Donne le nom, la description, les ressources et les ennemis d'un lieu, sous forme de champs."""
+        nom, description, ressource, ressources, ennemi, ennemis = LIEU.unpack_from(
+            self._memoire, self._position("lieux", indice, LIEU.size)
+        )
+        return (
+            self.chaine(nom),
+            self.chaine(description),
+            [self._png("ressources", i) for i in range(ressource, ressource + ressources)],
+            [self._png("ennemis", i) for i in range(ennemi, ennemi + ennemis)],
+        )
+
+    def nom(self, section: str, indice: int) -> str:
+        """Donne le nom de l'allié ou du lieu d'indice donné, sans lire ses autres champs."""
+        (nom,) = INDICE.unpack_from(self._memoire, self._position(section, indice, TAILLES[section]))
+        return self.chaine(nom)
+
+    def chercher(self, section: str, nom: str) -> Optional[int]:
+        """Cherche un allié ou un lieu par son nom, par dichotomie dans l'index trié de sa section.
+
+        Args:
+            section (str): "allies" ou "lieux".
+            nom (str): Le nom cherché.
+
+        Returns:
+            Optional[int]: L'indice de l'élément, ou None si aucun élément ne porte ce nom.
+        """
+        cle = nom.encode("utf-8")
+        index = "index_" + section
+        bas, haut = 0, self.nombre(index)
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            (indice,) = INDICE.unpack_from(self._memoire, self._position(index, milieu, INDICE.size))
+            (nom_indice,) = INDICE.unpack_from(self._memoire, self._position(section, indice, TAILLES[section]))
+            octets = self._octets_chaine(nom_indice)
+            if octets == cle:
+                return indice
+            if octets < cle:
+                bas = milieu + 1
+            else:
+                haut = milieu
+        return None
+
+    def fermer(self) -> None:
+        """Libère la projection en mémoire. Les éléments pas encore construits ne sont plus accessibles."""
+        self._memoire.close()
+
+
+class RepertoireParesseux(Repertoire[Nomme]):
+    """Classe qui représente un répertoire d'alliés ou de lieux dont les éléments restent dans un instantané.
+
+    Un élément n'est construit que la première fois qu'on y accède, puis gardé: les changements qu'on lui fait
+    ne sont jamais perdus. Les éléments ajoutés après le chargement vont à la fin, comme dans un Repertoire.
+
+    Exemples:
+        >>> lieux = charger_instantane("partie_sauvegarder.bin").lieux
+        >>> len(lieux), "temple oublié" in lieux
+        (2, True)
+        >>> lieux["temple oublié"].force_ennemis
+        8
+    """
+
+    __slots__ = ("_instantane", "_section", "_charges", "_retires")
+
+    def __init__(self, instantane: Instantane, section: str):
+        """Initialise le répertoire sur une section de l'instantané.
+
+        Args:
+            instantane (Instantane): L'instantané qui contient les éléments.
+            section (str): "allies" ou "lieux".
+        """
+        super().__init__()
+        self._instantane = instantane
+        self._section = section
+        self._charges: Dict[int, Nomme] = {}
+        self._retires: set = set()
+
+    def _construire(self, indice: int) -> Nomme:
+        """Donne l'élément d'indice donné de l'instantané, en le construisant s'il ne l'est pas encore."""
+        element = self._charges.get(indice)
+        if element is None:
+            if self._section == "allies":
+                nom, force, dialogue = self._instantane.champs_allie(indice)
+                element = Allie(nom=nom, force=force, dialogue=dialogue)
+            else:
+                nom, description, ressources, ennemis = self._instantane.champs_lieu(indice)
+                element = Lieu(
+                    nom=nom,
+                    description=description,
+                    ressources=[Ressource(*champs) for champs in ressources],
+                    ennemis=[Ennemi(*champs) for champs in ennemis],
+                )
+            self._charges[indice] = element
+        return element
+
+    def _indice(self, nom: str) -> Optional[int]:
+        """Donne l'indice dans l'instantané de l'élément qui porte ce nom, s'il n'a pas été retiré."""
+        indice = self._instantane.chercher(self._section, nom)
+        if indice is None or indice in self._retires:
+            return None
+        return indice
+
+    def _indices(self) -> Iterator[int]:
+        """Parcourt les indices des éléments de l'instantané qui n'ont pas été retirés."""
+        return (i for i in range(self._instantane.nombre(self._section)) if i not in self._retires)
+
+    def __len__(self) -> int:
+        """Donne le nombre d'éléments du répertoire."""
+        return self._instantane.nombre(self._section) - len(self._retires) + len(self._elements)
+
+    def __iter__(self) -> Iterator[Nomme]:
+        """Parcourt les éléments dans leur ordre d'ajout, en construisant ceux qui ne le sont pas encore."""
+        for indice in self._indices():
+            yield self._construire(indice)
+        yield from list(self._elements.values())
+
+    def __contains__(self, nom: str) -> bool:
+        """Indique si un élément porte ce nom."""
+        return self._indice(nom) is not None or nom in self._elements
+
+    def __getitem__(self, nom: str) -> Nomme:
+        """Donne l'élément qui porte ce nom.
+
+        Raises:
+            KeyError: Si aucun élément ne porte ce nom.
+        """
+        indice = self._indice(nom)
+        if indice is None:
+            return self._elements[nom]
+        return self._construire(indice)
+
+    def get(self, nom: str, defaut: Optional[Nomme] = None) -> Optional[Nomme]:
+        """Donne l'élément qui porte ce nom, ou defaut s'il n'y en a pas."""
+        indice = self._indice(nom)
+        if indice is None:
+            return self._elements.get(nom, defaut)
+        return self._construire(indice)
+
+    def noms(self) -> List[str]:
+        """Donne les noms des éléments dans leur ordre d'ajout, sans construire les éléments."""
+        return [self._instantane.nom(self._section, i) for i in self._indices()] + list(self._elements)
+
+    def ajouter(self, element: Nomme) -> None:
+        """Ajoute un élément à la fin du répertoire.
+
+        Raises:
+            ValueError: Si un élément porte déjà ce nom.
+        """
+        if element.nom in self:
+            raise ValueError(f"Le nom {element.nom} est déjà utilisé.")
+        self._elements[element.nom] = element
+        self.version += 1
+
+    def retirer(self, nom: str) -> Nomme:
+        """Retire l'élément qui porte ce nom et le renvoie.
+
+        Raises:
+            KeyError: Si aucun élément ne porte ce nom.
+        """
+        indice = self._indice(nom)
+        if indice is None:
+            element = self._elements.pop(nom)
+        else:
+            element = self._construire(indice)
+            self._retires.add(indice)
+            del self._charges[indice]
+        self.retraits.append(nom)
+        self.version += 1
+        return element
+
+    def remove(self, element: Nomme) -> None:
+        """Retire un élément, comme list.remove.
+
+        Raises:
+            ValueError: Si l'élément n'est pas dans le répertoire.
+        """
+        if self.get(element.nom) is not element:
+            raise ValueError(f"{element.nom} n'est pas dans le répertoire.")
+        self.retirer(element.nom)
+
+    def champs(self) -> Iterator[Tuple]:
+        """Parcourt les champs de chaque élément, sans construire ceux qui ne le sont pas encore.
+
+        Yields:
+            Tuple: (nom, force, dialogue) pour un allié; (nom, description, ressources, ennemis) pour un lieu,
+            avec les ressources et les ennemis sous forme de champs.
+        """
+        for indice in self._indices():
+            element = self._charges.get(indice)
+            if element is not None:
+                yield _champs(element)
+            elif self._section == "allies":
+                yield self._instantane.champs_allie(indice)
+            else:
+                yield self._instantane.champs_lieu(indice)
+        for element in list(self._elements.values()):
+            yield _champs(element)
+
+    def photographier(self) -> "PhotographieRepertoire":
+        """Photographie le répertoire sans construire ni lire ses éléments (voir PhotographieRepertoire)."""
+        return PhotographieRepertoire(self)
+
+
+EtatElement = Union[Allie, Tuple[str, str, List[Ressource], List[Ennemi]]]
+"""Un allié, que le jeu ne modifie jamais, ou le nom, la description, les ressources et les ennemis d'un lieu:
+les listes que le jeu remplace sans jamais modifier leur contenu (voir copier_element)."""
+
+
+class PhotographieRepertoire:
+    """Classe qui représente l'état d'un RepertoireParesseux à un instant, sans construire ni lire ses éléments.
+
+    La photographie ne copie que ce qui a changé depuis le chargement: les indices retirés, et l'état des
+    éléments construits ou ajoutés. Son coût ne dépend donc pas de la taille du monde. Les éléments restés
+    dans l'instantané n'en sont lus que par champs(), qui peut être appelé depuis un autre fil d'exécution:
+    l'instantané n'est jamais modifié, et le remplacer sur le disque ne change pas sa projection en mémoire.
+    """
+
+    __slots__ = ("_instantane", "_section", "_retires", "_construits", "_ajoutes")
+
+    def __init__(self, repertoire: RepertoireParesseux):
+        """Photographie un répertoire.
+
+        Args:
+            repertoire (RepertoireParesseux): Le répertoire d'alliés ou de lieux.
+        """
+        self._instantane = repertoire._instantane
+        self._section = repertoire._section
+        self._retires = frozenset(repertoire._retires)
+        self._construits = {indice: etat_element(element) for indice, element in repertoire._charges.items()}
+        self._ajoutes = [etat_element(element) for element in repertoire._elements.values()]
+
+    def __len__(self) -> int:
+        """Donne le nombre d'éléments photographiés."""
+        return self._instantane.nombre(self._section) - len(self._retires) + len(self._ajoutes)
+
+    def champs(self) -> Iterator[Tuple]:
+        """Parcourt les champs de chaque élément, sous la même forme que RepertoireParesseux.champs."""
+        for indice in range(self._instantane.nombre(self._section)):
+            if indice in self._retires:
+                continue
+            etat = self._construits.get(indice)
+            if etat is not None:
+                yield champs_etat(etat)
+            elif self._section == "allies":
+                yield self._instantane.champs_allie(indice)
+            else:
+                yield self._instantane.champs_lieu(indice)
+        for etat in self._ajoutes:
+            yield champs_etat(etat)
+
+    def vers_dicts(self) -> List[Dict[str, Any]]:
+        """Donne les éléments photographiés dans le format du fichier de sauvegarde json."""
+        return [_dict_champs(champs) for champs in self.champs()]
+
+
+def etat_element(element: Union[Allie, Lieu]) -> EtatElement:
+    """Donne ce qu'il faut garder d'un allié ou d'un lieu pour le photographier, sans rien copier."""
+    if isinstance(element, Lieu):
+        return element.nom, element.description, element.ressources, element.ennemis
+    return element
+
+
+def champs_etat(etat: EtatElement) -> Tuple:
+    """Donne les champs d'un allié ou d'un lieu photographié, sous la même forme que RepertoireParesseux.champs."""
+    if isinstance(etat, tuple):
+        nom, description, ressources, ennemis = etat
+        return (
+            nom,
+            description,
+            [(ressource.nom, ressource.quantite, ressource.utilite) for ressource in ressources],
+            [(ennemi.nom, ennemi.force, ennemi.dialogue) for ennemi in ennemis],
+        )
+    return etat.nom, etat.force, etat.dialogue
+
+
+def _champs(element: Union[Allie, Lieu]) -> Tuple:
+    """Donne les champs d'un allié ou d'un lieu construit, sous la même forme que RepertoireParesseux.champs."""
+    return champs_etat(etat_element(element))
+
+
+def _dict_champs(champs: Tuple) -> Dict[str, Any]:
+    """Met les champs d'un allié ou d'un lieu dans le format du fichier de sauvegarde json."""
+    if len(champs) == 3:
+        nom, force, dialogue = champs
+        return {"nom": nom, "force": force, "dialogue": dialogue}
+    nom, description, ressources, ennemis = champs
+    return {
+        "nom": nom,
+        "description": description,
+        "ressources": [
+            {"nom": nom_ressource, "quantite": quantite, "utilite": utilite}
+            for nom_ressource, quantite, utilite in ressources
+        ],
+        "ennemis": [
+            {"nom": nom_ennemi, "force": force, "dialogue": dialogue} for nom_ennemi, force, dialogue in ennemis
+        ],
+    }
+
+
+def _champs_repertoire(repertoire: Repertoire) -> Iterator[Tuple]:
+    """Parcourt les champs des éléments d'un répertoire, en évitant de construire ceux d'un instantané."""
+    if isinstance(repertoire, RepertoireParesseux):
+        return repertoire.champs()
+    return (_champs(element) for element in repertoire)
+
+
+def _entier(valeur: Any, description: str) -> int:
+    """Vérifie qu'une valeur tient dans un enregistrement de 64 bits."""
+    if not isinstance(valeur, int) or isinstance(valeur, bool) or not -(1 << 63) <= valeur < (1 << 63):
+        raise ValueError(f"{description}: entier de 64 bits attendu, pas {valeur!r}.")
+    return valeur
+
+
+def encoder_instantane(environnement: Environnement, generation: int = 0) -> bytes:
+    """Fonction qui encode un environnement en instantané binaire.
+
+    Les alliés et les lieux d'un environnement chargé depuis un instantané sont recopiés sans être construits.
+
+    Args:
+        environnement (Environnement): L'environnement de la partie.
+        generation (int): Le numéro de génération de l'instantané.
+
+    Returns:
+        bytes: Le contenu du fichier de l'instantané.
+
+    Raises:
+        ValueError: Si une force, une vie ou une quantité n'est pas un entier de 64 bits.
+    """
+    return encoder_champs(
+        environnement.joueur.vers_dict(),
+        _champs_repertoire(environnement.allies),
+        _champs_repertoire(environnement.lieux),
+        generation,
+    )
+
+
+def encoder_champs(
+    joueur: Dict[str, Any],
+    allies: Iterable[Tuple[str, int, str]],
+    lieux: Iterable[Tuple[str, str, List[Tuple[str, int, str]], List[Tuple[str, int, str]]]],
+    generation: int = 0,
+) -> bytes:
+    """Fonction qui encode une partie donnée par ses champs en instantané binaire.
+
+    Args:
+        joueur (Dict[str, Any]): Le joueur, tel que le donne Joueur.vers_dict.
+        allies (Iterable[Tuple[str, int, str]]): Les champs de chaque allié, comme RepertoireParesseux.champs.
+        lieux (Iterable[Tuple[str, str, List[Tuple[str, int, str]], List[Tuple[str, int, str]]]]): Les champs
+            de chaque lieu, comme RepertoireParesseux.champs.
+        generation (int): Le numéro de génération de l'instantané.
+
+    Returns:
+        bytes: Le contenu du fichier de l'instantané.
+
+    Raises:
+        ValueError: Si une force, une vie ou une quantité n'est pas un entier de 64 bits.
+    """
+    chaines = _TableChaines()
+    inventaire = bytearray()
+    for nom, quantite in joueur["inventaire"].items():
+        inventaire += INVENTAIRE.pack(chaines(nom), _entier(quantite, f"inventaire[{nom!r}]"))
+
+    allies_encodes = bytearray()
+    noms_allies = []
+    for nom, force, dialogue in allies:
+        allies_encodes += PNG.pack(chaines(nom), _entier(force, f"force de {nom}"), chaines(dialogue))
+        noms_allies.append(nom)
+
+    lieux_encodes = bytearray()
+    ressources = bytearray()
+    ennemis = bytearray()
+    noms_lieux = []
+    nombre_ressources = nombre_ennemis = 0
+    for nom, description, champs_ressources, champs_ennemis in lieux:
+        lieux_encodes += LIEU.pack(
+            chaines(nom),
+            chaines(description),
+            nombre_ressources,
+            len(champs_ressources),
+            nombre_ennemis,
+            len(champs_ennemis),
+        )
+        for nom_ressource, quantite, utilite in champs_ressources:
+            ressources += PNG.pack(
+                chaines(nom_ressource), _entier(quantite, f"quantité de {nom_ressource}"), chaines(utilite)
+            )
+        for nom_ennemi, force, dialogue in champs_ennemis:
+            ennemis += PNG.pack(chaines(nom_ennemi), _entier(force, f"force de {nom_ennemi}"), chaines(dialogue))
+        nombre_ressources += len(champs_ressources)
+        nombre_ennemis += len(champs_ennemis)
+        noms_lieux.append(nom)
+
+    nom_joueur = chaines(joueur["nom"])
+    index_allies = b"".join(
+        INDICE.pack(i) for i in sorted(range(len(noms_allies)), key=noms_allies.__getitem__)
+    )
+    index_lieux = b"".join(INDICE.pack(i) for i in sorted(range(len(noms_lieux)), key=noms_lieux.__getitem__))
+    sections = [
+        (chaines.section(), len(chaines.indices)),
+        (bytes(inventaire), len(joueur["inventaire"])),
+        (bytes(allies_encodes), len(noms_allies)),
+        (index_allies, len(noms_allies)),
+        (bytes(lieux_encodes), len(noms_lieux)),
+        (index_lieux, len(noms_lieux)),
+        (bytes(ressources), nombre_ressources),
+        (bytes(ennemis), nombre_ennemis),
+    ]
+    table = []
+    position = ENTETE.size + TABLE_SECTIONS.size
+    for contenu, nombre in sections:
+        table += [position, nombre]
+        position += len(contenu)
+    entete = ENTETE.pack(
+        MAGIE_INSTANTANE,
+        VERSION,
+        0,
+        nom_joueur,
+        _entier(joueur["force"], "force du joueur"),
+        _entier(joueur["vie"], "vie du joueur"),
+        generation,
+    )
+    return entete + TABLE_SECTIONS.pack(*table) + b"".join(contenu for contenu, _ in sections)
+
+
+def sauvegarder_instantane(filename: str, environnement: Environnement, generation: int = 0) -> None:
+    """Fonction qui sauvegarde la partie dans un instantané binaire.
+
+    Le fichier est remplacé d'un seul coup: un instantané encore projeté en mémoire, même celui d'où vient
+    l'environnement, reste lisible jusqu'à sa fermeture.
+
+    Args:
+        filename (str): nom du fichier de sauvegarde.
+        environnement (Environnement): L'environnement de la partie.
+        generation (int): Le numéro de génération de l'instantané.
+    """
+    ecrire_atomiquement(filename, encoder_instantane(environnement, generation))
+
+
+def charger_instantane(filename: str) -> Environnement:
+    """Fonction qui reprend une partie depuis un instantané binaire.
+
+    Seul le joueur est construit; les alliés et les lieux le sont à la demande.
+
+    Args:
+        filename (str): Le fichier de l'instantané.
+
+    Returns:
+        Environnement: Objet qui contient toutes les informations de joueur, d'alliés et de lieux.
+
+    Raises:
+        FileNotFoundError: Quand le fichier n'a pas été trouvé.
+        ValueError: Si le fichier n'est pas un instantané d'une version connue.
+    """
+    instantane = Instantane(filename)
+    return Environnement(
+        joueur=instantane.joueur(),
+        allies=RepertoireParesseux(instantane, "allies"),
+        lieux=RepertoireParesseux(instantane, "lieux"),
+    )
+
+
+def instantane_vers_dict(filename: str) -> Dict[str, Any]:
+    """Fonction qui relit un instantané dans le format du fichier de sauvegarde json.
+
+    Args:
+        filename (str): Le fichier de l'instantané.
+
+    Returns:
+        Dict[str, Any]: Le joueur, les alliés et les lieux, plus la génération si elle n'est pas nulle.
+    """
+    instantane = Instantane(filename)
+    try:
+        dictionnaire: Dict[str, Any] = {
+            "joueur": instantane.joueur().vers_dict(),
+            "allies": [_dict_champs(champs) for champs in RepertoireParesseux(instantane, "allies").champs()],
+            "lieux": [_dict_champs(champs) for champs in RepertoireParesseux(instantane, "lieux").champs()],
+        }
+    finally:
+        instantane.fermer()
+    if instantane.generation:
+        dictionnaire["generation"] = instantane.generation
+    return dictionnaire
+
+
+def convertir(source: str, destination: str) -> None:
+    """Fonction qui convertit une sauvegarde json en instantané binaire, ou l'inverse.
+
+    Le format de la source est reconnu à sa signature. La conversion est sans perte dans les deux sens.
+
+    Args:
+        source (str): La sauvegarde à convertir.
+        destination (str): Le fichier à écrire, dans l'autre format.
+    """
+    if est_instantane(source):
+        dictionnaire = instantane_vers_dict(source)
+        ecrire_atomiquement(destination, json.dumps(dictionnaire, ensure_ascii=False, indent=2))
+    else:
+        with open(source, "r", encoding="utf-8") as fichier:
+            dictionnaire = json.load(fichier)
+        environnement = restaurer_environnement(dictionnaire)
+        sauvegarder_instantane(destination, environnement, dictionnaire.get("generation", 0))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    analyseur = argparse.ArgumentParser(description="Convertit une sauvegarde json en instantané binaire, ou l'inverse.")
+    analyseur.add_argument("source", help="la sauvegarde à convertir")
+    analyseur.add_argument("destination", help="le fichier à écrire, dans l'autre format")
+    options = analyseur.parse_args()
+    convertir(options.source, options.destination)
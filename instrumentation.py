@@ -0,0 +1,384 @@
+"""Instrumentation du jeu: nombre d'appels et durées des actions des menus, des combats, des paiements, des
+sauvegardes et des chargements, et profilage d'une session à la demande.
+
+L'instrumentation est désactivée par défaut et ne coûte alors rien: aucune fonction du jeu n'est modifiée.
+activer() remplace les fonctions suivies par des versions chronométrées, dans leur module et dans tous les
+modules qui les ont importées, et desactiver() remet les originales. Les mesures vont dans le registre
+global REGISTRE, qui agrège toutes les sessions, et dans le registre de la session en cours, ouverte avec
+session(). La session en cours est une variable de contexte: chaque tâche asyncio du serveur a la sienne.
+
+Les mesures sont nommées par catégorie:
+    - "action <menu> <choix>" pour chaque choix du joueur, de l'envoi du choix au menu suivant;
+    - "combat attaquer" et "combat payer_allie" pour les méthodes de Joueur;
+    - "sauvegarde <fonction>" et "chargement <fonction>" pour les écritures et lectures de fichiers.
+
+Exemples:
+    python instrumentation.py data.json --mesures mesures.json --profil session.prof
+    python -m pstats session.prof
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import contextlib
+import contextvars
+import cProfile
+import functools
+import json
+import sys
+import threading
+import time
+
+import Projet_Epopée_des_cité as jeu
+
+
+class Serie:
+    """Classe qui représente les durées d'une mesure: nombre, total, extrêmes et histogramme.
+
+    L'histogramme compte les durées par puissance de deux de microsecondes: la case k contient les durées
+    comprises entre 2**(k-1) et 2**k microsecondes.
+
+    Attributes:
+        nombre (int): Le nombre de durées.
+        total (float): La somme des durées, en secondes.
+        minimum (float): La plus courte durée, en secondes.
+        maximum (float): La plus longue durée, en secondes.
+        histogramme (List[int]): Le nombre de durées de chaque case.
+    """
+
+    __slots__ = ("nombre", "total", "minimum", "maximum", "histogramme")
+
+    def __init__(self):
+        """Initialise une série vide."""
+        self.nombre = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = 0.0
+        self.histogramme: List[int] = []
+
+    def ajouter(self, duree: float) -> None:
+        """Ajoute une durée, en secondes."""
+        self.nombre += 1
+        self.total += duree
+        self.minimum = min(self.minimum, duree)
+        self.maximum = max(self.maximum, duree)
+        case = int(duree * 1e6).bit_length()
+        if case >= len(self.histogramme):
+            self.histogramme.extend([0] * (case + 1 - len(self.histogramme)))
+        self.histogramme[case] += 1
+
+    def vers_dict(self) -> Dict[str, Any]:
+        """Donne la série sous forme de dictionnaire, avec les durées en microsecondes.
+
+        Returns:
+            Dict[str, Any]: Le nombre, le total, la moyenne, les extrêmes et l'histogramme, dont les clés sont
+            les bornes supérieures des cases.
+        """
+        return {
+            "nombre": self.nombre,
+            "total_us": self.total * 1e6,
+            "moyenne_us": self.total / self.nombre * 1e6 if self.nombre else 0.0,
+            "min_us": self.minimum * 1e6 if self.nombre else 0.0,
+            "max_us": self.maximum * 1e6,
+            "histogramme_us": {str(2**case): nombre for case, nombre in enumerate(self.histogramme) if nombre},
+        }
+
+
+class Registre:
+    """Classe qui regroupe les séries de mesures, par nom.
+
+    Un registre peut recevoir des mesures de plusieurs fils à la fois: les sauvegardes du serveur sont
+    écrites hors de la boucle asyncio.
+
+    Attributes:
+        nom (str): Le nom du registre, celui du joueur pour une session.
+        series (Dict[str, Serie]): Les séries, par nom de mesure.
+        profil (Optional[cProfile.Profile]): Le profileur de la session, s'il a été demandé.
+    """
+
+    __slots__ = ("nom", "series", "profil", "_verrou")
+
+    def __init__(self, nom: str = ""):
+        """Initialise un registre vide.
+
+        Args:
+            nom (str): Le nom du registre.
+        """
+        self.nom = nom
+        self.series: Dict[str, Serie] = {}
+        self.profil: Optional[cProfile.Profile] = None
+        self._verrou = threading.Lock()
+
+    def ajouter(self, mesure: str, duree: float) -> None:
+        """Ajoute une durée à la série d'une mesure.
+
+        Args:
+            mesure (str): Le nom de la mesure.
+            duree (float): La durée, en secondes.
+        """
+        with self._verrou:
+            serie = self.series.get(mesure)
+            if serie is None:
+                serie = self.series[mesure] = Serie()
+            serie.ajouter(duree)
+
+    def reinitialiser(self) -> None:
+        """Oublie toutes les mesures."""
+        with self._verrou:
+            self.series.clear()
+
+    def vers_dict(self) -> Dict[str, Any]:
+        """Donne le registre sous forme de dictionnaire, les séries triées par nom."""
+        with self._verrou:
+            mesures = {mesure: self.series[mesure].vers_dict() for mesure in sorted(self.series)}
+        return {"nom": self.nom, "mesures": mesures}
+
+    def exporter(self, chemin: str) -> None:
+        """Écrit le registre dans un fichier json, d'un seul coup.
+
+        Args:
+            chemin (str): Le fichier à écrire.
+        """
+        jeu.ecrire_atomiquement(chemin, json.dumps(self.vers_dict(), ensure_ascii=False, indent=2), synchroniser=False)
+
+    def __str__(self) -> str:
+        """Affiche une ligne par mesure: nombre d'appels, durée totale et durée moyenne."""
+        lignes = []
+        with self._verrou:
+            for mesure in sorted(self.series):
+                serie = self.series[mesure]
+                lignes.append(
+                    f"{mesure:<40} {serie.nombre:>8} appels {serie.total * 1e3:>12.3f} ms "
+                    f"{serie.total / serie.nombre * 1e6:>12.1f} µs/appel"
+                )
+        return "\n".join(lignes)
+
+
+REGISTRE = Registre("global")
+"""Le registre qui agrège les mesures de toutes les sessions."""
+
+_SESSION: contextvars.ContextVar[Optional[Registre]] = contextvars.ContextVar("session", default=None)
+_REMPLACEMENTS: List[Tuple[Any, str, Any]] = []
+
+
+def enregistrer(mesure: str, duree: float) -> None:
+    """Fonction qui ajoute une durée au registre global et au registre de la session en cours.
+
+    Args:
+        mesure (str): Le nom de la mesure.
+        duree (float): La durée, en secondes.
+    """
+    REGISTRE.ajouter(mesure, duree)
+    registre = _SESSION.get()
+    if registre is not None:
+        registre.ajouter(mesure, duree)
+
+
+def chronometrer(mesure: str, fonction: Callable) -> Callable:
+    """Fonction qui enveloppe une fonction pour enregistrer la durée de chaque appel.
+
+    Args:
+        mesure (str): Le nom de la mesure.
+        fonction (Callable): La fonction à chronométrer.
+
+    Returns:
+        Callable: La fonction chronométrée, qui garde la fonction d'origine dans __wrapped__.
+    """
+
+    @functools.wraps(fonction)
+    def chronometree(*args, **kwargs):
+        debut = time.perf_counter()
+        try:
+            return fonction(*args, **kwargs)
+        finally:
+            enregistrer(mesure, time.perf_counter() - debut)
+
+    return chronometree
+
+
+def nom_action(menu: str, choix: str) -> str:
+    """Fonction qui nomme la mesure d'un choix du joueur.
+
+    Pour les menus numériques, le choix fait partie du nom; pour les menus où le joueur tape un nom d'allié ou
+    de lieu, seul le menu compte, pour que le nombre de mesures ne dépende pas de la taille du monde.
+
+    Exemples:
+        >>> nom_action("village", "2")
+        'action village 2'
+        >>> nom_action("choix_lieu", "temple oublié")
+        'action choix_lieu'
+    """
+    if menu in (jeu.MENU_CHOIX_ALLIE, jeu.MENU_CHOIX_LIEU):
+        return f"action {menu}"
+    try:
+        return f"action {menu} {int(choix)}"
+    except ValueError:
+        return f"action {menu} invalide"
+
+
+def instrumenter_partie(deroulement: jeu.Partie) -> jeu.Partie:
+    """Fonction qui enveloppe une partie pour chronométrer chaque choix du joueur.
+
+    Le temps mesuré va de l'envoi du choix au menu suivant: c'est le travail fait par le jeu pour ce choix,
+    sans l'attente du joueur. Si la session en cours a un profileur, il n'est actif que pendant ce travail,
+    ce qui isole la session même quand le serveur en fait avancer d'autres entre deux choix.
+
+    Args:
+        deroulement (Partie): La partie à envelopper.
+
+    Returns:
+        Partie: Une partie qui produit les mêmes menus et transmet les mêmes choix.
+    """
+    action = "action démarrage"
+    choix: Optional[str] = None
+    try:
+        while True:
+            registre = _SESSION.get()
+            profil = registre.profil if registre is not None else None
+            if profil is not None:
+                profil.enable()
+            debut = time.perf_counter()
+            try:
+                menu = next(deroulement) if choix is None else deroulement.send(choix)
+            except StopIteration:
+                return
+            finally:
+                enregistrer(action, time.perf_counter() - debut)
+                if profil is not None:
+                    profil.disable()
+            choix = yield menu
+            action = nom_action(menu, choix)
+    finally:
+        deroulement.close()
+
+
+def _partie_instrumentee(partie: Callable[..., jeu.Partie]) -> Callable[..., jeu.Partie]:
+    """Enveloppe la fonction partie pour que chaque partie créée soit instrumentée."""
+
+    @functools.wraps(partie)
+    def partie_instrumentee(*args, **kwargs) -> jeu.Partie:
+        return instrumenter_partie(partie(*args, **kwargs))
+
+    return partie_instrumentee
+
+
+def _cibles() -> List[Tuple[Any, str, Callable[[Callable], Callable]]]:
+    """Donne les fonctions suivies: leur module ou leur classe, leur nom et comment les envelopper."""
+    # Import local: les formats de sauvegarde ne sont chargés que si l'instrumentation est activée.
+    import ecriture
+    import instantane
+    import journal
+
+    return [
+        (jeu, "partie", _partie_instrumentee),
+        (jeu.Joueur, "attaquer", functools.partial(chronometrer, "combat attaquer")),
+        (jeu.Joueur, "payer_allie", functools.partial(chronometrer, "combat payer_allie")),
+        (jeu, "load_json", functools.partial(chronometrer, "chargement load_json")),
+        (jeu, "restaurer_environnement", functools.partial(chronometrer, "chargement restaurer_environnement")),
+        (jeu, "creation_environnement", functools.partial(chronometrer, "chargement creation_environnement")),
+        (instantane, "charger_instantane", functools.partial(chronometrer, "chargement charger_instantane")),
+        (journal.SauvegardeJournalisee, "charger", functools.partial(chronometrer, "chargement journal")),
+        (jeu, "sauvegarder_partie", functools.partial(chronometrer, "sauvegarde sauvegarder_partie")),
+        (jeu, "ecrire_donnees_sauvegarde", functools.partial(chronometrer, "sauvegarde ecrire_donnees_sauvegarde")),
+        (ecriture.EcrivainSauvegardes, "sauvegarder", functools.partial(chronometrer, "sauvegarde arriere_plan")),
+        (instantane, "sauvegarder_instantane", functools.partial(chronometrer, "sauvegarde sauvegarder_instantane")),
+        (journal.SauvegardeJournalisee, "__call__", functools.partial(chronometrer, "sauvegarde journal")),
+    ]
+
+
+def est_actif() -> bool:
+    """Indique si l'instrumentation est activée."""
+    return bool(_REMPLACEMENTS)
+
+
+def activer() -> None:
+    """Fonction qui active l'instrumentation en remplaçant les fonctions suivies par leur version chronométrée.
+
+    Une fonction de module est remplacée dans son module et dans chaque module déjà chargé qui l'a importée
+    sous le même nom (par exemple serveur.partie); une méthode est remplacée dans sa classe. Sans effet si
+    l'instrumentation est déjà active.
+    """
+    if est_actif():
+        return
+    for cible, attribut, envelopper in _cibles():
+        originale = getattr(cible, attribut)
+        remplacante = envelopper(originale)
+        if isinstance(cible, type):
+            _remplacer(cible, attribut, originale, remplacante)
+            continue
+        for module in list(sys.modules.values()):
+            if getattr(module, attribut, None) is originale:
+                _remplacer(module, attribut, originale, remplacante)
+
+
+def _remplacer(cible: Any, attribut: str, originale: Any, remplacante: Any) -> None:
+    """Remplace un attribut et retient l'original pour desactiver()."""
+    _REMPLACEMENTS.append((cible, attribut, originale))
+    setattr(cible, attribut, remplacante)
+
+
+def desactiver() -> None:
+    """Fonction qui désactive l'instrumentation en remettant les fonctions d'origine. Les mesures sont gardées."""
+    while _REMPLACEMENTS:
+        cible, attribut, originale = _REMPLACEMENTS.pop()
+        setattr(cible, attribut, originale)
+
+
+@contextlib.contextmanager
+def session(nom: str, fichier: Optional[str] = None, profil: Optional[str] = None) -> Iterator[Optional[Registre]]:
+    """Gestionnaire de contexte qui ouvre la session de mesures d'un joueur.
+
+    Les mesures prises dans le contexte vont aussi dans le registre de la session. Sans instrumentation
+    active, le contexte ne fait rien.
+
+    Args:
+        nom (str): Le nom du joueur.
+        fichier (Optional[str]): Le fichier json où écrire les mesures de la session à sa fin.
+        profil (Optional[str]): Le fichier où écrire le profil cProfile de la session, lisible avec pstats.
+
+    Returns:
+        Iterator[Optional[Registre]]: Le registre de la session, ou None sans instrumentation active.
+
+    Exemples:
+        >>> activer()
+        >>> with session("Talion", profil="talion.prof"):
+        ...     jouer_une_session("data.json")
+    """
+    if not est_actif():
+        yield None
+        return
+    registre = Registre(nom)
+    if profil is not None:
+        registre.profil = cProfile.Profile()
+    jeton = _SESSION.set(registre)
+    try:
+        yield registre
+    finally:
+        _SESSION.reset(jeton)
+        if fichier is not None:
+            registre.exporter(fichier)
+        if registre.profil is not None:
+            registre.profil.dump_stats(profil)
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: joue une partie instrumentée et affiche ses mesures."""
+    # Import local: argparse ne sert qu'en ligne de commande, pas aux modules qui importent celui-ci.
+    import argparse
+
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("monde", nargs="?", default="data.json", help="le fichier de données du jeu")
+    analyseur.add_argument("--sauvegarde", default=jeu.FICHIER_SAUVEGARDE, help="le fichier de sauvegarde")
+    analyseur.add_argument("--mesures", help="le fichier json où écrire les mesures de la session")
+    analyseur.add_argument("--profil", help="le fichier où écrire le profil cProfile de la session")
+    options = analyseur.parse_args(arguments)
+
+    activer()
+    try:
+        with session("console", options.mesures, options.profil) as registre:
+            jeu.jouer_une_session(options.monde, options.sauvegarde)
+    finally:
+        desactiver()
+    print(registre, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
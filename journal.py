@@ -0,0 +1,281 @@
+"""Sauvegarde journalisée: un instantané complet de la partie, suivi d'un journal des changements.
+
+sauvegarder_partie réécrit tout le joueur, tous les alliés et tous les lieux à chaque sauvegarde. Ici, une
+sauvegarde n'ajoute au journal qu'une ligne json avec ce qui a changé depuis la précédente: alliés recrutés,
+lieux accomplis, nouvelle force, nouvelle vie et variations de l'inventaire. Toutes les COMPACTION
+sauvegardes, le journal est condensé dans un nouvel instantané.
+
+L'instantané a le format du fichier de sauvegarde habituel, avec en plus son numéro de génération, mais il
+ne suffit pas à reprendre la partie: sans le journal, il peut être en retard de COMPACTION sauvegardes.
+Les sauvegardes journalisées ont donc leur propre fichier par défaut, FICHIER_INSTANTANE, et
+creation_environnement refuse de reprendre une sauvegarde suivie d'un journal. Chaque ligne du journal
+porte aussi un numéro de génération, ce qui rend la sauvegarde sûre en cas d'arrêt brutal:
+    - l'instantané est écrit dans un fichier temporaire puis renommé, il est donc toujours complet;
+    - les lignes du journal déjà comprises dans l'instantané sont ignorées à la relecture;
+    - une dernière ligne écrite à moitié est ignorée, puis effacée avant la sauvegarde suivante.
+
+Exemple:
+    python journal.py data.json
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+
+from Projet_Epopée_des_cité import (
+    SUFFIXE_JOURNAL,
+    Environnement,
+    Repertoire,
+    creation_environnement,
+    ecrire_atomiquement,
+    executer_partie,
+    partie,
+    restaurer_environnement,
+)
+from schema import verifier_sauvegarde
+
+
+COMPACTION = 100
+FICHIER_INSTANTANE = "partie_journalisee.json"
+
+
+class SuiviChangements:
+    """Classe qui retient l'état d'une partie pour calculer ensuite ce qui a changé depuis.
+
+    Les changements suivis sont ceux que fait le jeu: alliés recrutés, lieux accomplis, nouvelle force,
+    nouvelle vie et variations de l'inventaire. Ils s'écrivent comme une ligne du journal et se rejouent avec
+    appliquer_changements.
+
+    Exemples:
+        >>> suivi = SuiviChangements()
+        >>> suivi.retenir(environnement)
+        >>> environnement.joueur.vie -= 10
+        >>> suivi.changements(environnement)
+        {'vie': 90}
+    """
+
+    def __init__(self):
+        """Initialise un suivi qui n'a encore rien retenu."""
+        self._environnement: Optional[Environnement] = None
+        self._joueur: Tuple[str, int, int, Dict[str, int]] = ("", 0, 0, {})
+        self._allies: Tuple[Optional[Repertoire], int, int] = (None, 0, 0)
+        self._lieux: Tuple[Optional[Repertoire], int, int] = (None, 0, 0)
+
+    def changements(self, environnement: Environnement) -> Optional[Dict[str, Any]]:
+        """Calcule ce qui a changé depuis le dernier appel à retenir.
+
+        Le calcul ne dépend que du nombre de changements, pas de la taille du monde.
+
+        Args:
+            environnement (Environnement): L'environnement de la partie.
+
+        Returns:
+            Optional[Dict[str, Any]]: Les changements, sous la forme d'une ligne de journal sans sa génération,
+            ou None s'ils ne peuvent pas s'écrire ainsi.
+        """
+        if environnement is not self._environnement:
+            return None
+        joueur = environnement.joueur
+        nom, force, vie, inventaire = self._joueur
+        if joueur.nom != nom or not inventaire.keys() <= joueur.inventaire.keys():
+            return None
+        changements: Dict[str, Any] = {}
+        if joueur.force != force:
+            changements["force"] = joueur.force
+        if joueur.vie != vie:
+            changements["vie"] = joueur.vie
+        variations = {
+            cle: quantite - inventaire.get(cle, 0)
+            for cle, quantite in joueur.inventaire.vers_dict().items()
+            if quantite != inventaire.get(cle, 0) or cle not in inventaire
+        }
+        if variations:
+            changements["inventaire"] = variations
+        for cle, repertoire, (suivi, vus, taille) in (
+            ("allies_recrutes", environnement.allies, self._allies),
+            ("lieux_accomplis", environnement.lieux, self._lieux),
+        ):
+            if repertoire is not suivi:
+                return None
+            retires = repertoire.retraits[vus:]
+            if len(repertoire) != taille - len(retires):
+                return None
+            if retires:
+                changements[cle] = retires
+        return changements
+
+    def retenir(self, environnement: Environnement) -> None:
+        """Retient l'état de la partie, d'où partiront les prochains changements."""
+        joueur = environnement.joueur
+        self._environnement = environnement
+        self._joueur = (joueur.nom, joueur.force, joueur.vie, joueur.inventaire.vers_dict())
+        self._allies = (environnement.allies, len(environnement.allies.retraits), len(environnement.allies))
+        self._lieux = (environnement.lieux, len(environnement.lieux.retraits), len(environnement.lieux))
+
+
+class SauvegardeJournalisee(SuiviChangements):
+    """Classe qui sauvegarde une partie dans un instantané et un journal des changements.
+
+    Un objet SauvegardeJournalisee s'utilise comme fonction de sauvegarde de partie(): à chaque appel, il
+    compare l'environnement à l'état de la sauvegarde précédente et n'écrit que la différence. Les changements
+    suivis sont ceux que fait le jeu; tout autre changement (un joueur renommé, un allié ajouté, un répertoire
+    remplacé) est détecté et provoque un nouvel instantané.
+
+    Attributes:
+        chemin (str): Le fichier de l'instantané. Le journal est à côté, avec le suffixe ".journal".
+        compaction (int): Le nombre de lignes de journal au-delà duquel un nouvel instantané est écrit.
+        synchroniser (bool): Si chaque écriture est forcée sur le disque.
+        generation (int): Le numéro de la dernière sauvegarde écrite.
+
+    Exemples:
+        >>> sauvegarde = SauvegardeJournalisee("partie_journalisee.json")
+        >>> environnement = sauvegarde.charger() or creation_environnement("data.json", nom="Talion")
+        >>> executer_partie(partie(environnement, sauvegarde))
+    """
+
+    def __init__(self, chemin: str = FICHIER_INSTANTANE, compaction: int = COMPACTION, synchroniser: bool = True):
+        """Initialise la sauvegarde, sans rien lire ni écrire.
+
+        Args:
+            chemin (str): Le fichier de l'instantané.
+            compaction (int): Le nombre de lignes de journal au-delà duquel un nouvel instantané est écrit.
+            synchroniser (bool): Si chaque écriture est forcée sur le disque.
+        """
+        self.chemin = chemin
+        self.compaction = compaction
+        self.synchroniser = synchroniser
+        super().__init__()
+        self.generation = 0
+        self._lignes = 0
+
+    @property
+    def chemin_journal(self) -> str:
+        """Le fichier du journal."""
+        return self.chemin + SUFFIXE_JOURNAL
+
+    def charger(self) -> Optional[Environnement]:
+        """Relit l'instantané puis rejoue le journal.
+
+        Une fin de journal illisible, laissée par un arrêt pendant une écriture, est ignorée et effacée.
+
+        Returns:
+            Optional[Environnement]: L'environnement sauvegardé, ou None s'il n'y a pas de sauvegarde.
+
+        Raises:
+            json.JSONDecodeError: Si l'instantané est illisible.
+            ErreurSchema: Si l'instantané est mal formé, avec toutes ses erreurs.
+        """
+        if not os.path.exists(self.chemin):
+            return None
+        with open(self.chemin, "r", encoding="utf-8") as fichier:
+            instantane = json.load(fichier)
+        verifier_sauvegarde(instantane, self.chemin)
+        environnement = restaurer_environnement(instantane)
+        self.generation = instantane.get("generation", 0)
+        self._lignes = 0
+        if os.path.exists(self.chemin_journal):
+            valide = 0
+            with open(self.chemin_journal, "rb") as fichier:
+                for ligne in fichier:
+                    if not ligne.endswith(b"\n"):
+                        break
+                    try:
+                        changements = json.loads(ligne)
+                    except ValueError:
+                        break
+                    generation = changements.get("generation", 0)
+                    if generation > self.generation + 1:
+                        break
+                    if generation == self.generation + 1:
+                        appliquer_changements(environnement, changements)
+                        self.generation = generation
+                        self._lignes += 1
+                    valide += len(ligne)
+                fin = fichier.seek(0, os.SEEK_END)
+            if valide < fin:
+                os.truncate(self.chemin_journal, valide)
+        self.retenir(environnement)
+        return environnement
+
+    def __call__(self, environnement: Environnement) -> None:
+        """Sauvegarde l'environnement: une ligne de journal si possible, sinon un nouvel instantané.
+
+        Args:
+            environnement (Environnement): L'environnement de la partie.
+        """
+        changements = self.changements(environnement)
+        if changements is None or self._lignes >= self.compaction:
+            self.compacter(environnement)
+        elif changements:
+            self.generation += 1
+            ligne = json.dumps({"generation": self.generation, **changements}, ensure_ascii=False)
+            with open(self.chemin_journal, "a", encoding="utf-8") as fichier:
+                fichier.write(ligne + "\n")
+                fichier.flush()
+                if self.synchroniser:
+                    os.fsync(fichier.fileno())
+            self._lignes += 1
+            self.retenir(environnement)
+
+    def compacter(self, environnement: Environnement) -> None:
+        """Écrit un nouvel instantané complet et vide le journal.
+
+        Args:
+            environnement (Environnement): L'environnement de la partie.
+        """
+        self.generation += 1
+        instantane = environnement.vers_dict()
+        instantane["generation"] = self.generation
+        ecrire_atomiquement(self.chemin, json.dumps(instantane, ensure_ascii=False, indent=2), self.synchroniser)
+        # Si l'arrêt survient ici, les lignes du journal sont toutes d'une génération déjà dans l'instantané.
+        with open(self.chemin_journal, "w", encoding="utf-8"):
+            pass
+        self._lignes = 0
+        self.retenir(environnement)
+
+
+def appliquer_changements(environnement: Environnement, changements: Dict[str, Any]) -> None:
+    """Fonction qui rejoue une ligne du journal sur un environnement.
+
+    Args:
+        environnement (Environnement): L'environnement à mettre à jour.
+        changements (Dict[str, Any]): Une ligne du journal.
+
+    Exemples:
+        >>> appliquer_changements(environnement, {"generation": 3, "vie": 88, "lieux_accomplis": ["temple oublié"]})
+    """
+    joueur = environnement.joueur
+    if "force" in changements:
+        joueur.force = changements["force"]
+    if "vie" in changements:
+        joueur.vie = changements["vie"]
+    joueur.inventaire.appliquer(changements.get("inventaire", {}))
+    for nom in changements.get("allies_recrutes", ()):
+        environnement.allies.retirer(nom)
+    for nom in changements.get("lieux_accomplis", ()):
+        environnement.lieux.retirer(nom)
+
+
+def jouer_une_session(filename: str, fichier_sauvegarde: str = FICHIER_INSTANTANE) -> None:
+    """Fonction qui permet de jouer au jeu avec la sauvegarde journalisée."""
+    sauvegarde = SauvegardeJournalisee(fichier_sauvegarde)
+    environnement = sauvegarde.charger()
+    if environnement is None:
+        environnement = creation_environnement(filename, fichier_sauvegarde)
+    executer_partie(partie(environnement, sauvegarde))
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: joue une partie avec la sauvegarde journalisée."""
+    # Import local: argparse ne sert qu'en ligne de commande, pas aux modules qui importent celui-ci.
+    import argparse
+
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("monde", nargs="?", default="data.json", help="le fichier de données du jeu")
+    analyseur.add_argument("--sauvegarde", default=FICHIER_INSTANTANE, help="le fichier de l'instantané")
+    options = analyseur.parse_args(arguments)
+    jouer_une_session(options.monde, options.sauvegarde)
+
+
+if __name__ == "__main__":
+    main()
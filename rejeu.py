@@ -0,0 +1,542 @@
+"""Journal de rejeu: chaque choix du joueur est noté, pour rejouer une session à l'identique et sans console.
+
+Le jeu est déterministe: le monde de départ et les choix du joueur suffisent à refaire toute une session.
+L'EnregistreurRejeu se place entre le jeu et la console et note chaque choix, le nom de l'avatar compris,
+avec le nom du menu qui l'attendait, au moment où il est fait: après un plantage, le journal s'arrête sur le
+choix qui l'a provoqué.
+
+Le journal est en json, une ligne par entrée, et ne fait que grandir:
+    - l'en-tête d'une session: {"rejeu":2,"monde":"data.json","empreinte":"...","depart":null}; pour une
+      partie reprise, "depart" désigne la sauvegarde reprise, gardée à côté du journal, et son empreinte:
+      {"sauvegarde":"partie.json.rejeu.3f2a...","empreinte":"..."};
+    - un choix: ["village","2"];
+    - un point de reprise: {"etape":120,"vie":88,"lieux_accomplis":[...]}, ce qui a changé depuis le point
+      précédent, dans le format du journal des sauvegardes (voir journal.SuiviChangements).
+
+Les points de reprise sont pris quand le jeu attend au village, au plus tous les INTERVALLE_POINTS choix: à
+ce moment, une partie neuve créée avec partie() sur le même environnement est exactement dans le même état.
+Le Rejoueur y saute directement au lieu de tout rejouer depuis le début. Les sessions jouées avec la même
+sauvegarde se suivent dans le même journal. Rien n'est écrit pour une session qui s'arrête avant le premier
+choix noté après son en-tête.
+
+Exemple:
+    python rejeu.py partie_sauvegarder.json.rejeu --etape 120 --afficher
+"""
+
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+import bisect
+import contextlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from Projet_Epopée_des_cité import (
+    MENU_NOM,
+    MENU_VILLAGE,
+    Environnement,
+    Sortie,
+    SortieNulle,
+    SortieTampon,
+    afficher,
+    creation_environnement,
+    lire_choix,
+    modele_monde,
+    partie,
+    rediriger_sortie,
+    restaurer_environnement,
+)
+from journal import SuiviChangements, appliquer_changements
+from simulation import ResultatSession
+
+
+VERSION_REJEU = 2
+VERSIONS_LISIBLES = (1, VERSION_REJEU)
+SUFFIXE_REJEU = ".rejeu"
+INTERVALLE_POINTS = 100
+
+Choix = Tuple[str, str]
+"""Un choix du joueur: le nom du menu qui l'attendait et la ligne tapée."""
+
+
+class ErreurRejeu(ValueError):
+    """Erreur levée quand un journal ne peut pas être rejoué: il est illisible, il a été écrit avec un autre
+    monde, ou le jeu ne demande plus les choix qu'il contient."""
+
+
+def empreinte_fichier(chemin: str) -> Optional[str]:
+    """Fonction qui donne l'empreinte sha256 d'un fichier, ou None s'il n'existe pas."""
+    # Import local: hashlib charge openssl, qui ne sert qu'aux nouvelles parties.
+    import hashlib
+
+    if not os.path.exists(chemin):
+        return None
+    empreinte = hashlib.sha256()
+    with open(chemin, "rb") as fichier:
+        for bloc in iter(lambda: fichier.read(1 << 20), b""):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def garder_depart(sauvegarde: str, journal: str) -> Dict[str, str]:
+    """Fonction qui garde la sauvegarde reprise par une session à côté de son journal de rejeu.
+
+    La copie est nommée d'après l'empreinte de la sauvegarde: les sessions reprises du même état la partagent.
+    C'est un lien quand c'est possible, sans rien copier: le jeu remplace la sauvegarde par renommage (voir
+    ecrire_atomiquement), jamais en la réécrivant, et le lien garde le contenu de départ. La copie est écrite
+    puis renommée: elle existe toujours en entier, et le Rejoueur vérifie son empreinte.
+
+    Args:
+        sauvegarde (str): La sauvegarde reprise, json ou instantané binaire.
+        journal (str): Le fichier du journal.
+
+    Returns:
+        Dict[str, str]: La copie, relative au dossier du journal, et l'empreinte de la sauvegarde.
+
+    Raises:
+        FileNotFoundError: Si la sauvegarde n'existe pas.
+    """
+    empreinte = empreinte_fichier(sauvegarde)
+    if empreinte is None:
+        raise FileNotFoundError(sauvegarde)
+    copie = f"{journal}.{empreinte[:16]}"
+    if not os.path.exists(copie):
+        temporaire = copie + ".tmp"
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporaire)
+        try:
+            os.link(sauvegarde, temporaire)
+        except OSError:
+            shutil.copyfile(sauvegarde, temporaire)
+        os.replace(temporaire, copie)
+    return {"sauvegarde": os.path.basename(copie), "empreinte": empreinte}
+
+
+def _ligne(valeur: Any) -> str:
+    """Met une entrée du journal sur une ligne json compacte."""
+    return json.dumps(valeur, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class EnregistreurRejeu:
+    """Classe qui note les choix du joueur dans un journal de rejeu.
+
+    Un EnregistreurRejeu s'utilise comme fonction entree de creation_environnement et de executer_partie: il
+    demande le choix à la fonction qu'il enveloppe et le note avant de le rendre. Les choix faits avant
+    commencer (le nom de l'avatar) sont gardés en mémoire. Le journal n'est ouvert qu'au premier choix noté
+    après commencer: l'en-tête de la session y est écrit, puis les choix gardés. Chaque ligne est ensuite
+    écrite dès qu'elle est complète.
+
+    Attributes:
+        chemin (str): Le fichier du journal.
+        monde (str): Le fichier de données du jeu.
+        intervalle (int): Le nombre de choix minimum entre deux points de reprise.
+        etape (int): Le nombre de choix notés depuis le début de la session.
+
+    Exemples:
+        >>> with EnregistreurRejeu("partie.json.rejeu", "data.json") as enregistreur:
+        ...     environnement = creation_environnement("data.json", "partie.json", entree=enregistreur)
+        ...     enregistreur.commencer(environnement, "partie.json")
+        ...     executer_partie(partie(environnement), enregistreur)
+    """
+
+    __slots__ = (
+        "chemin",
+        "monde",
+        "intervalle",
+        "etape",
+        "_entree",
+        "_fichier",
+        "_sauvegarde",
+        "_en_attente",
+        "_environnement",
+        "_suivi",
+        "_point",
+    )
+
+    def __init__(
+        self,
+        chemin: str,
+        monde: str,
+        entree: Callable[[str], str] = lire_choix,
+        intervalle: int = INTERVALLE_POINTS,
+    ):
+        """Initialise l'enregistreur, sans rien écrire.
+
+        Args:
+            chemin (str): Le fichier du journal, complété s'il existe déjà.
+            monde (str): Le fichier de données du jeu.
+            entree (Callable[[str], str]): La fonction qui donne le choix du joueur pour un menu.
+            intervalle (int): Le nombre de choix minimum entre deux points de reprise.
+        """
+        self.chemin = chemin
+        self.monde = monde
+        self.intervalle = intervalle
+        self.etape = 0
+        self._entree = entree
+        self._fichier: Optional[TextIO] = None
+        self._sauvegarde: Optional[str] = None
+        self._en_attente: List[str] = []
+        self._environnement: Optional[Environnement] = None
+        self._suivi = SuiviChangements()
+        self._point = 0
+
+    def __enter__(self) -> "EnregistreurRejeu":
+        """Donne l'enregistreur, qui sera fermé à la sortie du bloc with."""
+        return self
+
+    def __exit__(self, *exception) -> None:
+        """Ferme le journal."""
+        self.fermer()
+
+    def __call__(self, menu: str) -> str:
+        """Demande le choix du joueur pour un menu et le note.
+
+        Args:
+            menu (str): Le nom du menu qui attend le choix.
+
+        Returns:
+            str: Le choix du joueur.
+        """
+        environnement = self._environnement
+        if menu == MENU_VILLAGE and environnement is not None and self.etape - self._point >= self.intervalle:
+            changements = self._suivi.changements(environnement)
+            if changements is None:
+                changements = {"etat": environnement.vers_dict()}
+            self._ecrire(_ligne({"etape": self.etape, **changements}))
+            self._suivi.retenir(environnement)
+            self._point = self.etape
+        choix = self._entree(menu)
+        self._ecrire(_ligne([menu, choix]))
+        self.etape += 1
+        return choix
+
+    def commencer(self, environnement: Environnement, sauvegarde: Optional[str] = None) -> None:
+        """Commence la session: les choix suivants seront notés à la suite de son en-tête.
+
+        Une session qui a commencé par demander le nom de l'avatar est une nouvelle partie: elle se rejoue
+        avec le monde, dont l'empreinte est notée. Sinon, c'est une partie reprise: elle se rejoue depuis la
+        sauvegarde reprise, gardée à côté du journal par garder_depart au premier choix noté.
+
+        Args:
+            environnement (Environnement): L'environnement de la partie, tel que le jeu va commencer.
+            sauvegarde (Optional[str]): La sauvegarde dont la partie est reprise, inutile pour une nouvelle
+                partie.
+
+        Raises:
+            ValueError: Si la partie est reprise et que sauvegarde n'est pas donnée.
+        """
+        if sauvegarde is None and not self._nouvelle():
+            raise ValueError("Une partie reprise se rejoue depuis sa sauvegarde, qui doit être donnée.")
+        self._sauvegarde = sauvegarde
+        self._environnement = environnement
+        self._suivi.retenir(environnement)
+        self._point = self.etape
+
+    def fermer(self) -> None:
+        """Ferme le journal."""
+        if self._fichier is not None:
+            self._fichier.close()
+            self._fichier = None
+
+    def _nouvelle(self) -> bool:
+        """Dit si la session a commencé par demander le nom de l'avatar."""
+        return any(entree.startswith(f'["{MENU_NOM}"') for entree in self._en_attente)
+
+    def _ouvrir(self) -> None:
+        """Ouvre le journal et y écrit l'en-tête de la session, puis les choix déjà faits."""
+        nouvelle = self._nouvelle()
+        entete = {
+            "rejeu": VERSION_REJEU,
+            "monde": self.monde,
+            "empreinte": empreinte_fichier(self.monde) if nouvelle else None,
+            "depart": None if nouvelle else garder_depart(self._sauvegarde, self.chemin),
+        }
+        # Un fichier ligne à ligne: chaque entrée est sur le disque dès qu'elle est notée.
+        self._fichier = open(self.chemin, "a", encoding="utf-8", buffering=1)
+        self._fichier.write(_ligne(entete))
+        self._fichier.writelines(self._en_attente)
+        self._en_attente = []
+
+    def _ecrire(self, ligne: str) -> None:
+        """Écrit une ligne dans le journal, ou la garde pour après l'en-tête."""
+        if self._fichier is None and self._environnement is not None:
+            self._ouvrir()
+        if self._fichier is None:
+            self._en_attente.append(ligne)
+        else:
+            self._fichier.write(ligne)
+
+
+class SessionEnregistree:
+    """Classe qui représente une session lue dans un journal de rejeu.
+
+    Attributes:
+        monde (str): Le fichier de données du jeu de la session.
+        empreinte (Optional[str]): L'empreinte sha256 du monde pour une nouvelle partie, None sinon.
+        depart (Optional[Dict[str, Any]]): La sauvegarde reprise, None pour une nouvelle partie: son chemin
+            (la clé "sauvegarde") et son empreinte, ou, dans un journal de la version 1, la sauvegarde au
+            format de Environnement.vers_dict.
+        choix (List[Choix]): Les choix du joueur, dans l'ordre.
+        points (List[Tuple[int, Dict[str, Any]]]): Les points de reprise: le nombre de choix faits avant le
+            point, et les changements depuis le point précédent.
+    """
+
+    __slots__ = ("monde", "empreinte", "depart", "choix", "points")
+
+    def __init__(self, monde: str, empreinte: Optional[str], depart: Optional[Dict[str, Any]]):
+        self.monde = monde
+        self.empreinte = empreinte
+        self.depart = depart
+        self.choix: List[Choix] = []
+        self.points: List[Tuple[int, Dict[str, Any]]] = []
+
+
+def lire_rejeu(chemin: str) -> List[SessionEnregistree]:
+    """Fonction qui lit toutes les sessions d'un journal de rejeu.
+
+    Une dernière ligne écrite à moitié, laissée par un arrêt brutal, est ignorée.
+
+    Args:
+        chemin (str): Le fichier du journal.
+
+    Returns:
+        List[SessionEnregistree]: Les sessions, dans l'ordre où elles ont été jouées.
+
+    Raises:
+        FileNotFoundError: Si le journal n'existe pas.
+        ErreurRejeu: Si une ligne du journal est illisible.
+    """
+    sessions: List[SessionEnregistree] = []
+    with open(chemin, "rb") as fichier:
+        for numero, ligne in enumerate(fichier, 1):
+            if not ligne.endswith(b"\n"):
+                break
+            try:
+                entree = json.loads(ligne)
+                if isinstance(entree, list):
+                    menu, choix = entree
+                    sessions[-1].choix.append((menu, choix))
+                elif "rejeu" in entree:
+                    if entree["rejeu"] not in VERSIONS_LISIBLES:
+                        raise ValueError(f"version {entree['rejeu']} inconnue")
+                    depart = entree["depart"]
+                    if depart is not None and "sauvegarde" in depart:
+                        depart["sauvegarde"] = os.path.join(os.path.dirname(chemin), depart["sauvegarde"])
+                    sessions.append(SessionEnregistree(entree["monde"], entree["empreinte"], depart))
+                else:
+                    sessions[-1].points.append((entree.pop("etape"), entree))
+            except (ValueError, TypeError, KeyError, IndexError) as e:
+                raise ErreurRejeu(f"{chemin}:{numero}: entrée illisible ({e!r}).") from None
+    return sessions
+
+
+def _sans_sauvegarde(environnement: Environnement) -> None:
+    """Une session rejouée ne touche jamais au fichier de sauvegarde."""
+
+
+class Rejoueur:
+    """Classe qui rejoue une session enregistrée, sans console ni sauvegarde, jusqu'à n'importe quelle étape.
+
+    Le rejoueur avance en donnant au jeu les choix du journal, et vérifie que le jeu attend chaque fois le
+    menu noté. Pour aller à une étape, il repart du dernier point de reprise qui la précède, s'il est plus
+    proche que l'étape où il est déjà.
+
+    Attributes:
+        session (SessionEnregistree): La session rejouée.
+        monde (str): Le fichier de données du jeu utilisé pour une nouvelle partie.
+        sortie (Sortie): Où vont les affichages du jeu.
+        afficher_choix (bool): Si chaque choix rejoué est affiché dans la sortie, comme tapé au clavier.
+        etape (int): Le nombre de choix rejoués.
+        environnement (Optional[Environnement]): L'environnement de la partie, None tant que le nom de
+            l'avatar n'est pas connu.
+        menu (Optional[str]): Le menu qui attend le prochain choix, None quand la partie est finie.
+
+    Exemples:
+        >>> rejoueur = Rejoueur(lire_rejeu("partie_sauvegarder.json.rejeu")[-1])
+        >>> rejoueur.aller_a(120)
+        >>> rejoueur.environnement.joueur.vie
+        88
+    """
+
+    def __init__(
+        self,
+        session: SessionEnregistree,
+        monde: Optional[str] = None,
+        sortie: Optional[Sortie] = None,
+        afficher_choix: bool = False,
+        verifier_empreinte: bool = True,
+    ):
+        """Initialise le rejoueur au début de la session.
+
+        Args:
+            session (SessionEnregistree): La session à rejouer.
+            monde (Optional[str]): Le fichier de données du jeu; par défaut, celui noté dans la session.
+            sortie (Optional[Sortie]): Où vont les affichages du jeu; par défaut, nulle part.
+            afficher_choix (bool): Si chaque choix rejoué est affiché dans la sortie.
+            verifier_empreinte (bool): Si le monde, ou la sauvegarde reprise, doit être exactement celui de
+                la session.
+
+        Raises:
+            ErreurRejeu: Si le monde n'est pas celui avec lequel la session a été jouée, ou si la sauvegarde
+                reprise n'est plus celle de la session.
+        """
+        self.session = session
+        self.monde = monde or session.monde
+        self.sortie = sortie or SortieNulle()
+        self.afficher_choix = afficher_choix
+        self.etape = 0
+        self.environnement: Optional[Environnement] = None
+        self.menu: Optional[str] = MENU_NOM
+        if session.depart is None and verifier_empreinte and empreinte_fichier(self.monde) != session.empreinte:
+            raise ErreurRejeu(f"Le monde {self.monde} n'est pas celui avec lequel la session a été jouée.")
+        depart = session.depart
+        if depart is not None and "sauvegarde" in depart and verifier_empreinte:
+            if empreinte_fichier(depart["sauvegarde"]) != depart["empreinte"]:
+                raise ErreurRejeu(f"La sauvegarde {depart['sauvegarde']} n'est plus celle dont la session est reprise.")
+        self._etapes_points = [etape for etape, _ in session.points]
+        self._recommencer(0)
+
+    def _recommencer(self, points: int) -> None:
+        """Repart du début de la session, avec les points de reprise donnés déjà appliqués.
+
+        Args:
+            points (int): Le nombre de points de reprise à appliquer.
+        """
+        session = self.session
+        self.etape = 0
+        self.environnement = None
+        self.menu = MENU_NOM
+        if session.depart is not None and "sauvegarde" in session.depart:
+            self.environnement = creation_environnement(self.monde, session.depart["sauvegarde"])
+        elif session.depart is not None:
+            self.environnement = restaurer_environnement(session.depart)
+        elif session.choix and session.choix[0][0] == MENU_NOM:
+            self.environnement = modele_monde(self.monde).nouvelle_partie(session.choix[0][1])
+            self.etape = 1
+        if self.environnement is None:
+            return
+        for etape, changements in session.points[:points]:
+            if "etat" in changements:
+                self.environnement = restaurer_environnement(changements["etat"])
+            else:
+                appliquer_changements(self.environnement, changements)
+            self.etape = etape
+        self._partie = partie(self.environnement, _sans_sauvegarde)
+        with rediriger_sortie(self.sortie):
+            self.menu = next(self._partie, None)
+
+    def aller_a(self, etape: int) -> None:
+        """Rejoue la session jusqu'à ce que etape choix aient été faits, ou jusqu'à la fin du journal.
+
+        Args:
+            etape (int): Le nombre de choix à avoir rejoués.
+
+        Raises:
+            ErreurRejeu: Si le jeu ne demande pas les choix notés dans le journal.
+        """
+        etape = max(0, min(etape, len(self.session.choix)))
+        points = bisect.bisect_right(self._etapes_points, etape)
+        if etape < self.etape or (points and self._etapes_points[points - 1] > self.etape):
+            self._recommencer(points)
+        self.avancer(etape - self.etape)
+
+    def jusqu_a_la_fin(self) -> None:
+        """Rejoue tous les choix du journal.
+
+        Raises:
+            ErreurRejeu: Si le jeu ne demande pas les choix notés dans le journal.
+        """
+        self.aller_a(len(self.session.choix))
+
+    def avancer(self, nombre: int = 1) -> None:
+        """Rejoue les choix suivants du journal.
+
+        Une erreur levée par le jeu pendant un choix est relayée telle quelle: etape compte alors le choix qui
+        l'a provoquée, et la partie est finie.
+
+        Args:
+            nombre (int): Le nombre de choix à rejouer, au plus ce qu'il en reste dans le journal.
+
+        Raises:
+            ErreurRejeu: Si le jeu ne demande pas les choix notés dans le journal.
+        """
+        choix = self.session.choix
+        fin = min(self.etape + nombre, len(choix))
+        with rediriger_sortie(self.sortie):
+            while self.etape < fin:
+                menu, reponse = choix[self.etape]
+                if self.menu != menu:
+                    attendu = "rien, la partie est finie" if self.menu is None else f"le menu {self.menu!r}"
+                    raise ErreurRejeu(f"Étape {self.etape}: le journal répond au menu {menu!r}, le jeu attend {attendu}.")
+                if self.afficher_choix:
+                    afficher(f"> {reponse}")
+                self.etape += 1
+                if self.environnement is None:
+                    self._recommencer(0)
+                    continue
+                try:
+                    self.menu = self._partie.send(reponse)
+                except StopIteration:
+                    self.menu = None
+                except Exception:
+                    self.menu = None
+                    raise
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande: rejoue une session d'un journal et donne où elle en est.
+
+    Returns:
+        int: 1 si la session ne peut pas être rejouée ou si le jeu lève une erreur pendant le rejeu, 0 sinon.
+    """
+    # Import local: argparse et traceback ne servent qu'en ligne de commande, pas aux modules qui importent celui-ci.
+    import argparse
+    import traceback
+
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("journal", help="le journal de rejeu")
+    analyseur.add_argument("--monde", help="le fichier de données du jeu, par défaut celui noté dans le journal")
+    analyseur.add_argument("--session", type=int, default=-1, help="la session à rejouer, par défaut la dernière")
+    analyseur.add_argument("--etape", type=int, help="le nombre de choix à rejouer, par défaut tous")
+    analyseur.add_argument("--afficher", action="store_true", help="afficher le jeu et les choix rejoués")
+    analyseur.add_argument("--sans-empreinte", action="store_true", help="accepter un monde différent")
+    options = analyseur.parse_args(arguments)
+
+    sessions = lire_rejeu(options.journal)
+    session = sessions[options.session]
+    print(
+        f"{len(sessions)} session(s) dans le journal; session {options.session % len(sessions)}: "
+        f"{len(session.choix)} choix, {len(session.points)} points de reprise"
+    )
+    debut = time.perf_counter()
+    try:
+        rejoueur = Rejoueur(
+            session,
+            monde=options.monde,
+            sortie=SortieTampon(sys.stdout) if options.afficher else None,
+            afficher_choix=options.afficher,
+            verifier_empreinte=not options.sans_empreinte,
+        )
+    except ErreurRejeu as e:
+        print(e)
+        return 1
+    try:
+        rejoueur.aller_a(len(session.choix) if options.etape is None else options.etape)
+    except ErreurRejeu as e:
+        print(e)
+        return 1
+    except Exception:
+        menu, choix = session.choix[rejoueur.etape - 1]
+        print(f"Le choix {rejoueur.etape - 1} ({choix!r} au menu {menu!r}) lève une erreur dans le jeu:")
+        traceback.print_exc()
+        return 1
+    duree = time.perf_counter() - debut
+    print(f"{rejoueur.etape} choix rejoués en {duree * 1000:.1f} ms")
+    if rejoueur.environnement is not None:
+        print(ResultatSession(rejoueur.environnement, rejoueur.etape, interrompue=rejoueur.menu is not None))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
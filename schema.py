@@ -0,0 +1,409 @@
+"""Validation des mondes et des sauvegardes par schéma, compilée une fois et faite en un seul parcours.
+
+Un schéma décrit un document json avec des valeurs Python:
+    - str, int, bool: une valeur de ce type; un booléen n'est pas un entier;
+    - Entier(minimum): un entier, au moins égal à minimum;
+    - Parmi(valeur, ...): une des valeurs données;
+    - [schema]: une liste dont chaque élément respecte schema;
+    - {"cle": schema, ...}: un objet qui a toutes ces clés, chacune avec sa valeur; Optionnel(schema) pour
+      une clé qui peut manquer. Les autres clés sont permises;
+    - Dictionnaire(schema): un objet aux clés quelconques, dont chaque valeur respecte schema;
+    - Choix(schema, ...): une valeur qui respecte au moins un des schémas.
+
+compiler() transforme un schéma en une fonction de vérification, une fois pour toutes: les schémas du jeu
+sont compilés à l'import du module. La vérification parcourt le document une seule fois et ne s'arrête pas à
+la première erreur: chaque erreur est notée avec le chemin json de l'élément en cause, dans la notation de
+ErreurChargement (par exemple "lieux[12].ennemis[0]"). Le chemin n'est construit que pour les éléments en
+erreur: un document correct ne coûte que les tests de type.
+
+Exemples:
+    >>> verifier_monde(load_json("data.json"), "data.json")
+    >>> verifier_sauvegarde({"joueur": {"nom": "Talion", "force": 10, "vie": "100"}, "allies": []}, "partie.json")
+    Traceback (most recent call last):
+        ...
+    schema.ErreurSchema: partie.json: 3 erreurs
+        joueur.vie: attendu un entier, trouvé '100'
+        joueur: clé 'inventaire' manquante
+        la racine: clé 'lieux' manquante
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+class ErreurSchema(ValueError):
+    """Erreur levée quand un document ne respecte pas son schéma, avec toutes les erreurs trouvées.
+
+    Attributes:
+        document (str): Le document vérifié, en général le nom de son fichier.
+        erreurs (List[Tuple[str, str]]): Chaque erreur, dans l'ordre du document: le chemin json de l'élément
+            en cause, vide pour la racine, et la description du problème.
+    """
+
+    AFFICHEES = 20
+    """Le nombre d'erreurs détaillées dans le message; toutes restent dans erreurs."""
+
+    def __init__(self, document: str, erreurs: List[Tuple[str, str]]):
+        """Initialise l'erreur.
+
+        Args:
+            document (str): Le document vérifié.
+            erreurs (List[Tuple[str, str]]): Les erreurs trouvées, au moins une.
+        """
+        lignes = [f"{document}: {len(erreurs)} erreur{'s' if len(erreurs) > 1 else ''}"]
+        lignes += [f"    {chemin or 'la racine'}: {message}" for chemin, message in erreurs[: self.AFFICHEES]]
+        if len(erreurs) > self.AFFICHEES:
+            lignes.append(f"    ... et {len(erreurs) - self.AFFICHEES} autres")
+        super().__init__("\n".join(lignes))
+        self.document = document
+        self.erreurs = erreurs
+
+
+class Entier:
+    """Un entier, qui n'est pas un booléen, au moins égal à minimum s'il est donné."""
+
+    __slots__ = ("minimum",)
+
+    def __init__(self, minimum: Optional[int] = None):
+        self.minimum = minimum
+
+
+class Parmi:
+    """Une des valeurs données."""
+
+    __slots__ = ("valeurs",)
+
+    def __init__(self, *valeurs: Any):
+        self.valeurs = valeurs
+
+
+class Optionnel:
+    """Une clé d'objet qui peut manquer, et dont la valeur respecte schema quand elle est là."""
+
+    __slots__ = ("schema",)
+
+    def __init__(self, schema: Any):
+        self.schema = schema
+
+
+class Dictionnaire:
+    """Un objet aux clés quelconques, dont chaque valeur respecte schema."""
+
+    __slots__ = ("schema",)
+
+    def __init__(self, schema: Any):
+        self.schema = schema
+
+
+class Choix:
+    """Une valeur qui respecte au moins un des schémas."""
+
+    __slots__ = ("schemas",)
+
+    def __init__(self, *schemas: Any):
+        self.schemas = schemas
+
+
+Chemin = Optional[Tuple[Any, Union[str, int]]]
+"""Le chemin d'un élément, en liste chaînée (chemin du parent, clé ou indice); None pour la racine."""
+
+Erreurs = List[Tuple[str, str]]
+
+Verificateur = Callable[[Any, Chemin, Union[str, int, None], Erreurs], None]
+"""Vérifie une valeur, désignée par le chemin de son parent et sa clé ou son indice dans le parent (None pour la
+racine), et ajoute ses erreurs à la liste."""
+
+_ABSENT = object()
+
+_TYPES = {str: "une chaîne", int: "un entier", bool: "un booléen"}
+
+
+def formater_chemin(parent: Chemin, segment: Union[str, int, None]) -> str:
+    """Donne le chemin json d'un élément, par exemple "lieux[12].ennemis".
+
+    Args:
+        parent (Chemin): Le chemin du parent de l'élément.
+        segment (Union[str, int, None]): La clé ou l'indice de l'élément dans son parent, None pour la racine.
+
+    Returns:
+        str: Le chemin, vide pour la racine.
+    """
+    segments = []
+    chemin: Chemin = (parent, segment)
+    while chemin is not None:
+        chemin, segment = chemin
+        if segment is not None:
+            segments.append(f"[{segment}]" if isinstance(segment, int) else f".{segment}")
+    return "".join(reversed(segments)).lstrip(".")
+
+
+def decrire_valeur(valeur: Any) -> str:
+    """Décrit brièvement une valeur trouvée dans un document, pour un message d'erreur."""
+    if isinstance(valeur, dict):
+        return "un objet"
+    if isinstance(valeur, list):
+        return "une liste"
+    if valeur is None:
+        return "null"
+    texte = repr(valeur)
+    return texte if len(texte) <= 40 else texte[:37] + "..."
+
+
+def decrire_schema(schema: Any) -> str:
+    """Décrit ce qu'attend un schéma, pour un message d'erreur.
+
+    Exemples:
+        >>> decrire_schema(Choix(str, Entier(0)))
+        'une chaîne ou un entier positif ou nul'
+    """
+    if isinstance(schema, Entier):
+        if schema.minimum is None:
+            return "un entier"
+        if schema.minimum == 0:
+            return "un entier positif ou nul"
+        return f"un entier d'au moins {schema.minimum}"
+    if isinstance(schema, Parmi):
+        return "une valeur parmi " + ", ".join(repr(valeur) for valeur in schema.valeurs)
+    if isinstance(schema, Choix):
+        return " ou ".join(decrire_schema(alternative) for alternative in schema.schemas)
+    if isinstance(schema, list):
+        return "une liste"
+    if isinstance(schema, (dict, Dictionnaire)):
+        return "un objet"
+    return _TYPES[schema]
+
+
+def _signaler(erreurs: Erreurs, parent: Chemin, segment: Union[str, int, None], attendu: str, valeur: Any) -> None:
+    """Note une valeur qui n'est pas celle attendue."""
+    erreurs.append((formater_chemin(parent, segment), f"attendu {attendu}, trouvé {decrire_valeur(valeur)}"))
+
+
+def _type_simple(schema: Any) -> Optional[type]:
+    """Donne le type d'un schéma qui n'est qu'un test de type."""
+    return schema if isinstance(schema, type) and schema in _TYPES else None
+
+
+def _test_rapide(schema: Any) -> Tuple[Optional[type], Optional[int]]:
+    """Donne le type et le minimum d'un schéma simple, pour que le parent le teste lui-même sans appel.
+
+    Le test rapide ne fait que laisser passer les valeurs correctes: une valeur qui y échoue est confiée au
+    vérificateur compilé, qui note l'erreur. Un schéma qui n'est pas simple donne (None, None).
+    """
+    if isinstance(schema, Entier):
+        return int, schema.minimum
+    return _type_simple(schema), None
+
+
+def compiler(schema: Any) -> Verificateur:
+    """Fonction qui transforme un schéma en fonction de vérification.
+
+    Args:
+        schema (Any): Le schéma, décrit dans la documentation du module.
+
+    Returns:
+        Verificateur: La fonction qui vérifie une valeur et note ses erreurs.
+
+    Raises:
+        TypeError: Si le schéma n'est pas écrit avec les formes permises.
+    """
+    if isinstance(schema, Optionnel):
+        raise TypeError("Optionnel ne s'emploie que pour la valeur d'une clé d'objet.")
+    if _type_simple(schema) is not None:
+        return _compiler_type(schema, _TYPES[schema])
+    if isinstance(schema, Entier):
+        return _compiler_entier(schema.minimum, decrire_schema(schema))
+    if isinstance(schema, Parmi):
+        return _compiler_parmi(schema.valeurs, decrire_schema(schema))
+    if isinstance(schema, list) and len(schema) == 1:
+        return _compiler_liste(schema[0])
+    if isinstance(schema, dict):
+        return _compiler_objet(schema)
+    if isinstance(schema, Dictionnaire):
+        return _compiler_dictionnaire(schema.schema)
+    if isinstance(schema, Choix):
+        return _compiler_choix(schema.schemas, decrire_schema(schema))
+    raise TypeError(f"Schéma inconnu: {schema!r}.")
+
+
+def _compiler_type(attendu_type: type, attendu: str) -> Verificateur:
+    """Compile le test de type d'une chaîne, d'un entier ou d'un booléen."""
+
+    def verifier_type(valeur: Any, parent: Chemin, segment: Union[str, int, None], erreurs: Erreurs) -> None:
+        if type(valeur) is not attendu_type:
+            _signaler(erreurs, parent, segment, attendu, valeur)
+
+    return verifier_type
+
+
+def _compiler_entier(minimum: Optional[int], attendu: str) -> Verificateur:
+    """Compile le test d'un entier borné."""
+
+    def verifier_entier(valeur: Any, parent: Chemin, segment: Union[str, int, None], erreurs: Erreurs) -> None:
+        if type(valeur) is not int or (minimum is not None and valeur < minimum):
+            _signaler(erreurs, parent, segment, attendu, valeur)
+
+    return verifier_entier
+
+
+def _compiler_parmi(valeurs: Tuple, attendu: str) -> Verificateur:
+    """Compile le test d'une valeur parmi d'autres."""
+    types = {type(valeur) for valeur in valeurs}
+    permises = set(valeurs)
+
+    def verifier_parmi(valeur: Any, parent: Chemin, segment: Union[str, int, None], erreurs: Erreurs) -> None:
+        # Le test de type d'abord: un objet ou une liste ne peuvent pas être cherchés dans un ensemble.
+        if type(valeur) not in types or valeur not in permises:
+            _signaler(erreurs, parent, segment, attendu, valeur)
+
+    return verifier_parmi
+
+
+def _compiler_liste(schema_element: Any) -> Verificateur:
+    """Compile le test d'une liste et de chacun de ses éléments."""
+    simple, minimum = _test_rapide(schema_element)
+    verifier_element = compiler(schema_element)
+
+    def verifier_liste(valeur: Any, parent: Chemin, segment: Union[str, int, None], erreurs: Erreurs) -> None:
+        if type(valeur) is not list:
+            _signaler(erreurs, parent, segment, "une liste", valeur)
+            return
+        ici = (parent, segment)
+        if simple is not None:
+            for indice, element in enumerate(valeur):
+                if type(element) is not simple or (minimum is not None and element < minimum):
+                    verifier_element(element, ici, indice, erreurs)
+        else:
+            for indice, element in enumerate(valeur):
+                verifier_element(element, ici, indice, erreurs)
+
+    return verifier_liste
+
+
+def _compiler_objet(schema: Dict[str, Any]) -> Verificateur:
+    """Compile le test d'un objet et des valeurs de ses clés."""
+    champs = []
+    for cle, schema_valeur in schema.items():
+        optionnel = isinstance(schema_valeur, Optionnel)
+        if optionnel:
+            schema_valeur = schema_valeur.schema
+        champs.append((cle, optionnel, *_test_rapide(schema_valeur), compiler(schema_valeur)))
+
+    def verifier_objet(valeur: Any, parent: Chemin, segment: Union[str, int, None], erreurs: Erreurs) -> None:
+        if type(valeur) is not dict:
+            _signaler(erreurs, parent, segment, "un objet", valeur)
+            return
+        for cle, optionnel, simple, minimum, verifier_valeur in champs:
+            valeur_cle = valeur.get(cle, _ABSENT)
+            if type(valeur_cle) is simple and (minimum is None or valeur_cle >= minimum):
+                continue
+            if valeur_cle is not _ABSENT:
+                verifier_valeur(valeur_cle, (parent, segment), cle, erreurs)
+            elif not optionnel:
+                erreurs.append((formater_chemin(parent, segment), f"clé {cle!r} manquante"))
+
+    return verifier_objet
+
+
+def _compiler_dictionnaire(schema_valeur: Any) -> Verificateur:
+    """Compile le test d'un objet aux clés quelconques et de chacune de ses valeurs."""
+    verifier_valeur = compiler(schema_valeur)
+
+    def verifier_dictionnaire(valeur: Any, parent: Chemin, segment: Union[str, int, None], erreurs: Erreurs) -> None:
+        if type(valeur) is not dict:
+            _signaler(erreurs, parent, segment, "un objet", valeur)
+            return
+        ici = (parent, segment)
+        for cle, valeur_cle in valeur.items():
+            verifier_valeur(valeur_cle, ici, cle, erreurs)
+
+    return verifier_dictionnaire
+
+
+def _compiler_choix(schemas: Tuple, attendu: str) -> Verificateur:
+    """Compile le test d'une valeur qui doit respecter au moins un des schémas."""
+    alternatives = [compiler(schema) for schema in schemas]
+
+    def verifier_choix(valeur: Any, parent: Chemin, segment: Union[str, int, None], erreurs: Erreurs) -> None:
+        for verifier in alternatives:
+            essai: Erreurs = []
+            verifier(valeur, parent, segment, essai)
+            if not essai:
+                return
+        _signaler(erreurs, parent, segment, attendu, valeur)
+
+    return verifier_choix
+
+
+def verifier(verificateur: Verificateur, donnees: Any, document: str = "document") -> None:
+    """Fonction qui vérifie un document avec un schéma compilé.
+
+    Args:
+        verificateur (Verificateur): Le schéma compilé avec compiler().
+        donnees (Any): Le document, tel que le donne json.load.
+        document (str): Le nom du document pour le message d'erreur, en général celui de son fichier.
+
+    Raises:
+        ErreurSchema: Si le document ne respecte pas le schéma, avec toutes ses erreurs.
+    """
+    erreurs: Erreurs = []
+    verificateur(donnees, None, None, erreurs)
+    if erreurs:
+        raise ErreurSchema(document, erreurs)
+
+
+_RESSOURCE = {"nom": str, "quantite": Entier(0), "utilite": str}
+
+SCHEMA_MONDE = {
+    "lieux": [{"nom": str, "description": str, "ressources": [str], "ennemis": [str]}],
+    "personnages": [{"nom": str, "type": Parmi("allié", "ennemi"), "force": Entier(0), "dialogue": str}],
+    "ressources": [_RESSOURCE],
+}
+"""Le schéma d'un fichier de monde, comme data.json."""
+
+SCHEMA_SAUVEGARDE = {
+    "joueur": {
+        # Les sauvegardes écrites avant la correction de Joueur.__init__ ont le nom et la force inversés.
+        "nom": Choix(str, Entier(0)),
+        "force": Choix(Entier(0), str),
+        "vie": int,
+        "inventaire": Dictionnaire(Entier(0)),
+    },
+    "allies": [{"nom": str, "force": Entier(0), "dialogue": str}],
+    "lieux": [
+        {
+            "nom": str,
+            "description": str,
+            "ressources": [_RESSOURCE],
+            "ennemis": [{"nom": str, "force": Entier(0), "dialogue": str}],
+        }
+    ],
+}
+"""Le schéma d'une sauvegarde json, telle que la donnent Environnement.vers_dict et charger_sauvegarde."""
+
+_VERIFIER_MONDE = compiler(SCHEMA_MONDE)
+_VERIFIER_SAUVEGARDE = compiler(SCHEMA_SAUVEGARDE)
+
+
+def verifier_monde(donnees: Any, document: str = "monde") -> None:
+    """Fonction qui vérifie un monde chargé avec load_json avant d'en faire un environnement.
+
+    Args:
+        donnees (Any): Le monde.
+        document (str): Le nom du fichier du monde, pour le message d'erreur.
+
+    Raises:
+        ErreurSchema: Si le monde ne respecte pas SCHEMA_MONDE, avec toutes ses erreurs.
+    """
+    verifier(_VERIFIER_MONDE, donnees, document)
+
+
+def verifier_sauvegarde(donnees: Any, document: str = "sauvegarde") -> None:
+    """Fonction qui vérifie une sauvegarde relue avant de la donner à restaurer_environnement.
+
+    Args:
+        donnees (Any): La sauvegarde.
+        document (str): Le nom du fichier de sauvegarde, pour le message d'erreur.
+
+    Raises:
+        ErreurSchema: Si la sauvegarde ne respecte pas SCHEMA_SAUVEGARDE, avec toutes ses erreurs.
+    """
+    verifier(_VERIFIER_SAUVEGARDE, donnees, document)
@@ -0,0 +1,346 @@
+"""Serveur de jeu asyncio: beaucoup de joueurs en même temps, chacun avec sa partie et sa sauvegarde.
+
+Chaque connexion est une session qui a son propre Environnement et son propre fichier de sauvegarde, dans
+le dossier des sauvegardes et nommé d'après le nom du joueur. Les menus du jeu (partie, menu_allies,
+menu_lieux, choix_allies, choix_lieux) sont des générateurs: le serveur les fait avancer d'un choix à la
+fois, sans jamais bloquer, et une session qui attend le joueur ne coûte qu'un générateur suspendu.
+
+Le protocole est fait de lignes de texte: le serveur envoie les affichages du jeu suivis d'une invite qui
+nomme le menu en attente (par exemple "village> "), et le joueur répond par une ligne. Une session coupée
+en pleine partie est sauvegardée.
+
+Avec --mesures, le serveur est instrumenté (voir le module instrumentation): les mesures de chaque session
+sont écrites à côté de sa sauvegarde et les mesures de toutes les sessions dans le fichier donné, à l'arrêt.
+--profiler profile la prochaine session d'un joueur avec cProfile.
+
+Exemples:
+    python serveur.py data.json --port 8765       (puis: nc localhost 8765)
+    python serveur.py data.json --unix /tmp/epopee.sock
+    python serveur.py data.json --console         (une session sur l'entrée et la sortie standard)
+    python serveur.py data.json --mesures mesures.json --profiler Talion
+"""
+
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import contextlib
+import os
+import sys
+
+from Projet_Epopée_des_cité import (
+    MENU_ALLIES,
+    MENU_LIEUX,
+    MENU_NOM,
+    MENU_VILLAGE,
+    Environnement,
+    Partie,
+    SortieCapture,
+    creation_environnement,
+    ecriture_sauvegarde,
+    modele_monde,
+    partie,
+    rediriger_sortie,
+)
+import instrumentation
+
+
+DOSSIER_SAUVEGARDES = "sauvegardes"
+MENUS_NUMERIQUES = (MENU_VILLAGE, MENU_ALLIES, MENU_LIEUX)
+"""Les menus qui attendent un numéro d'action: une autre réponse est refusée avant d'atteindre le jeu."""
+
+Lire = Callable[[], Awaitable[Optional[str]]]
+"""Lit la prochaine ligne du joueur, sans le saut de ligne; None quand le joueur est parti."""
+Ecrire = Callable[[str], Awaitable[None]]
+"""Envoie du texte au joueur."""
+
+
+def invite(menu: str) -> str:
+    """Donne l'invite envoyée au joueur quand le menu attend son choix."""
+    return f"{menu}> "
+
+
+def avancer(deroulement: Partie, choix: Optional[str]) -> Tuple[Optional[str], str]:
+    """Fonction qui fait avancer une partie d'un choix et récupère ce qu'elle affiche.
+
+    Les affichages sont capturés dans la sortie du contexte courant: ceux des autres sessions ne peuvent pas
+    s'y mélanger.
+
+    Args:
+        deroulement (Partie): La partie en cours.
+        choix (Optional[str]): Le choix du joueur, ou None pour démarrer la partie.
+
+    Returns:
+        Tuple[Optional[str], str]: Le menu qui attend le choix suivant, ou None si la partie est finie, et
+        le texte affiché par la partie.
+    """
+    capture = SortieCapture()
+    with rediriger_sortie(capture):
+        try:
+            menu = next(deroulement) if choix is None else deroulement.send(choix)
+        except StopIteration:
+            menu = None
+    return menu, capture.texte()
+
+
+class Session:
+    """Classe qui représente la partie d'un joueur connecté.
+
+    Attributes:
+        nom (str): Le nom du joueur.
+        chemin (str): Le fichier de sauvegarde du joueur.
+        environnement (Environnement): La partie du joueur.
+        deroulement (Partie): Les menus de la partie, suspendus sur le choix attendu.
+        a_sauvegarder (bool): Si le jeu a demandé une sauvegarde qui n'est pas encore écrite.
+    """
+
+    __slots__ = ("nom", "chemin", "environnement", "deroulement", "a_sauvegarder", "_ecrire")
+
+    def __init__(self, nom: str, chemin: str, environnement: Environnement):
+        """Initialise la session et sa partie.
+
+        Args:
+            nom (str): Le nom du joueur.
+            chemin (str): Le fichier de sauvegarde du joueur.
+            environnement (Environnement): La partie du joueur.
+        """
+        self.nom = nom
+        self.chemin = chemin
+        self.environnement = environnement
+        self.a_sauvegarder = False
+        self._ecrire = ecriture_sauvegarde(chemin)
+        self.deroulement = partie(environnement, self._demander_sauvegarde)
+
+    def en_cours(self) -> bool:
+        """Indique si la partie n'est ni gagnée ni perdue."""
+        return len(self.environnement.lieux) > 0 and self.environnement.joueur.vie > 0
+
+    def _demander_sauvegarde(self, environnement: Environnement) -> None:
+        """Fonction de sauvegarde donnée au jeu: la sauvegarde est écrite par le serveur, hors de la boucle."""
+        self.a_sauvegarder = True
+
+    async def sauvegarder(self) -> None:
+        """Écrit la sauvegarde dans un fil à part, pour ne pas bloquer les autres sessions."""
+        self.a_sauvegarder = False
+        await asyncio.to_thread(self._ecrire, self.chemin, self.environnement)
+
+
+class ServeurJeu:
+    """Classe qui représente le serveur de jeu et les sessions en cours.
+
+    Le monde est lu une seule fois et partagé par toutes les nouvelles parties (voir ModeleMonde): une
+    session ne garde en propre que son joueur et ce qu'elle a changé au monde.
+
+    Attributes:
+        monde (str): Le fichier de données du jeu.
+        dossier (str): Le dossier des sauvegardes des joueurs.
+        sessions (Dict[str, Session]): Les sessions en cours, par nom de joueur.
+        a_profiler (Set[str]): Les joueurs dont la prochaine session sera profilée avec cProfile.
+
+    Exemples:
+        >>> serveur = ServeurJeu("data.json")
+        >>> asyncio.run(serveur.servir_tcp("127.0.0.1", 8765))
+    """
+
+    def __init__(self, monde: str, dossier: str = DOSSIER_SAUVEGARDES):
+        """Initialise le serveur.
+
+        Args:
+            monde (str): Le fichier de données du jeu.
+            dossier (str): Le dossier des sauvegardes des joueurs, créé s'il n'existe pas.
+
+        Raises:
+            ErreurChargement: Si le monde est mal formé, avec la ligne, la colonne et le chemin de chaque erreur.
+        """
+        self.monde = monde
+        self.dossier = dossier
+        self.sessions: Dict[str, Session] = {}
+        self.a_profiler: Set[str] = set()
+        self._modele = modele_monde(monde)
+        os.makedirs(dossier, exist_ok=True)
+
+    def chemin_sauvegarde(self, nom: str) -> str:
+        """Donne le fichier de sauvegarde d'un joueur.
+
+        Le nom est encodé pour donner un nom de fichier valide, différent pour chaque nom de joueur.
+
+        Args:
+            nom (str): Le nom du joueur.
+
+        Returns:
+            str: Le fichier de sauvegarde du joueur.
+        """
+        # Import local: urllib.parse n'est utile qu'à l'ouverture d'une session.
+        from urllib.parse import quote
+
+        return os.path.join(self.dossier, quote(nom, safe="") + ".json")
+
+    async def ouvrir_session(self, nom: str) -> Session:
+        """Reprend la partie sauvegardée d'un joueur, ou lui en crée une nouvelle.
+
+        Args:
+            nom (str): Le nom du joueur.
+
+        Returns:
+            Session: La session du joueur.
+
+        Raises:
+            ValueError: Si le joueur est déjà connecté.
+        """
+        if nom in self.sessions:
+            raise ValueError(f"{nom} joue déjà.")
+        chemin = self.chemin_sauvegarde(nom)
+        if os.path.exists(chemin):
+            environnement = await asyncio.to_thread(creation_environnement, self.monde, chemin, nom)
+        else:
+            environnement = self._modele.nouvelle_partie(nom)
+        if nom in self.sessions:
+            raise ValueError(f"{nom} joue déjà.")
+        session = self.sessions[nom] = Session(nom, chemin, environnement)
+        return session
+
+    async def jouer(self, lire: Lire, ecrire: Ecrire) -> None:
+        """Déroule la session d'un joueur, du choix de son nom à la fin de sa partie.
+
+        Args:
+            lire (Lire): Lit la prochaine ligne du joueur.
+            ecrire (Ecrire): Envoie du texte au joueur.
+        """
+        session = None
+        while session is None:
+            await ecrire("Veuillez choisir un nom. Attention vous ne pourrez pas le changer.\n" + invite(MENU_NOM))
+            nom = await lire()
+            if nom is None:
+                return
+            nom = nom.strip()
+            if not nom:
+                continue
+            try:
+                session = await self.ouvrir_session(nom)
+            except ValueError as e:
+                await ecrire(f"{e}\n")
+        base = os.path.splitext(session.chemin)[0]
+        profil = None
+        if session.nom in self.a_profiler:
+            self.a_profiler.discard(session.nom)
+            profil = base + ".prof"
+        with instrumentation.session(session.nom, base + ".mesures.json", profil):
+            await self._derouler(session, lire, ecrire)
+
+    async def _derouler(self, session: Session, lire: Lire, ecrire: Ecrire) -> None:
+        """Fait avancer la partie d'une session au rythme des choix du joueur, puis ferme la session."""
+        try:
+            menu, sortie = avancer(session.deroulement, None)
+            while menu is not None:
+                if session.a_sauvegarder:
+                    await session.sauvegarder()
+                await ecrire(sortie + invite(menu))
+                choix = await lire()
+                if choix is None:
+                    session.a_sauvegarder = session.en_cours()
+                    break
+                if menu in MENUS_NUMERIQUES and not _est_entier(choix):
+                    sortie = "Commande non reconnue.\n"
+                    continue
+                menu, sortie = avancer(session.deroulement, choix)
+            else:
+                await ecrire(sortie)
+            if session.a_sauvegarder:
+                await session.sauvegarder()
+        finally:
+            session.deroulement.close()
+            del self.sessions[session.nom]
+
+    async def _gerer_connexion(self, lecteur: asyncio.StreamReader, ecrivain: asyncio.StreamWriter) -> None:
+        """Relie une connexion tcp ou unix à une session."""
+
+        async def lire() -> Optional[str]:
+            try:
+                ligne = await lecteur.readline()
+            except (ConnectionError, ValueError):
+                return None
+            if not ligne:
+                return None
+            return ligne.decode("utf-8", errors="replace").rstrip("\r\n")
+
+        async def ecrire(texte: str) -> None:
+            ecrivain.write(texte.encode("utf-8"))
+            await ecrivain.drain()
+
+        try:
+            await self.jouer(lire, ecrire)
+        except ConnectionError:
+            pass
+        finally:
+            ecrivain.close()
+
+    async def servir_tcp(self, hote: str = "127.0.0.1", port: int = 8765) -> None:
+        """Sert les joueurs sur un port tcp, jusqu'à l'arrêt du programme."""
+        serveur = await asyncio.start_server(self._gerer_connexion, hote, port)
+        async with serveur:
+            await serveur.serve_forever()
+
+    async def servir_unix(self, chemin: str) -> None:
+        """Sert les joueurs sur une socket unix locale, jusqu'à l'arrêt du programme."""
+        serveur = await asyncio.start_unix_server(self._gerer_connexion, chemin)
+        async with serveur:
+            await serveur.serve_forever()
+
+    async def servir_console(self) -> None:
+        """Sert un seul joueur sur l'entrée et la sortie standard, à la place d'une connexion."""
+
+        async def lire() -> Optional[str]:
+            ligne = await asyncio.to_thread(sys.stdin.readline)
+            return ligne.rstrip("\r\n") if ligne else None
+
+        async def ecrire(texte: str) -> None:
+            sys.stdout.write(texte)
+            sys.stdout.flush()
+
+        await self.jouer(lire, ecrire)
+
+
+def _est_entier(choix: str) -> bool:
+    """Indique si un choix peut être lu par int(), comme le font les menus numériques."""
+    try:
+        int(choix)
+    except ValueError:
+        return False
+    return True
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: lance le serveur de jeu."""
+    # Import local: argparse ne sert qu'en ligne de commande, pas aux modules qui importent celui-ci.
+    import argparse
+
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("monde", nargs="?", default="data.json", help="le fichier de données du jeu")
+    analyseur.add_argument("--dossier", default=DOSSIER_SAUVEGARDES, help="le dossier des sauvegardes des joueurs")
+    analyseur.add_argument("--hote", default="127.0.0.1", help="l'adresse d'écoute")
+    analyseur.add_argument("--port", type=int, default=8765, help="le port d'écoute")
+    analyseur.add_argument("--unix", help="écouter sur cette socket unix plutôt qu'en tcp")
+    analyseur.add_argument("--console", action="store_true", help="une seule session sur l'entrée standard")
+    analyseur.add_argument("--mesures", help="instrumenter le serveur et écrire les mesures dans ce fichier à l'arrêt")
+    analyseur.add_argument(
+        "--profiler", action="append", default=[], metavar="NOM", help="profiler la prochaine session de ce joueur"
+    )
+    options = analyseur.parse_args(arguments)
+
+    if options.mesures or options.profiler:
+        instrumentation.activer()
+    serveur = ServeurJeu(options.monde, options.dossier)
+    serveur.a_profiler.update(options.profiler)
+    try:
+        if options.console:
+            asyncio.run(serveur.servir_console())
+        elif options.unix:
+            asyncio.run(serveur.servir_unix(options.unix))
+        else:
+            asyncio.run(serveur.servir_tcp(options.hote, options.port))
+    finally:
+        if options.mesures:
+            instrumentation.REGISTRE.exporter(options.mesures)
+
+
+if __name__ == "__main__":
+    with contextlib.suppress(KeyboardInterrupt):
+        main()
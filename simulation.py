@@ -0,0 +1,278 @@
+"""Moteur de simulation sans console pour rejouer des parties en masse.
+
+Le moteur déroule exactement les mêmes menus que le jeu interactif (partie, menu_allies, menu_lieux,
+choix_allies et choix_lieux) sur les mêmes objets Environnement, Joueur et Lieu, mais les choix viennent
+d'un script ou d'une politique au lieu de la console et rien n'est affiché ni sauvegardé.
+
+Exemple en ligne de commande:
+    python simulation.py data.json --sessions 20000 --choix "2,1,temple oublié,1,forêt maudite"
+"""
+
+from typing import List, Dict, Union, Callable, Optional, Sequence, Iterable
+import time
+
+from Projet_Epopée_des_cité import (
+    Environnement,
+    MENU_VILLAGE,
+    MENU_ALLIES,
+    MENU_CHOIX_ALLIE,
+    MENU_LIEUX,
+    MENU_CHOIX_LIEU,
+    ModeleMonde,
+    SortieNulle,
+    load_json,
+    partie,
+    rediriger_sortie,
+)
+
+
+NOM_PAR_DEFAUT = "Talion"
+MAX_ETAPES = 10_000
+
+Politique = Callable[[Environnement, str], str]
+"""Une politique reçoit l'environnement et le nom du menu qui attend un choix, et renvoie le choix."""
+
+
+class ResultatSession:
+    """Classe qui représente l'issue d'une session simulée.
+
+    Attributes:
+        etat (str): "gagnee", "perdue", "abandonnee" (le joueur a quitté) ou "interrompue" (trop d'étapes).
+        etapes (int): Le nombre de choix donnés à la partie.
+        vie (int): Les points de vie du joueur à la fin de la session.
+        force (int): Les points de force du joueur à la fin de la session.
+        inventaire (Dict[str, int]): L'inventaire du joueur à la fin de la session.
+        lieux_restants (int): Le nombre de lieux non accomplis.
+        allies_restants (int): Le nombre d'alliés non recrutés.
+    """
+
+    def __init__(self, environnement: Environnement, etapes: int, interrompue: bool):
+        """Initialise le résultat à partir de l'environnement en fin de session.
+
+        Args:
+            environnement (Environnement): L'environnement à la fin de la session.
+            etapes (int): Le nombre de choix donnés à la partie.
+            interrompue (bool): Si la session a été arrêtée parce qu'elle dépassait le nombre d'étapes maximum.
+        """
+        joueur = environnement.joueur
+        if interrompue:
+            self.etat = "interrompue"
+        elif len(environnement.lieux) == 0:
+            self.etat = "gagnee"
+        elif joueur.vie <= 0:
+            self.etat = "perdue"
+        else:
+            self.etat = "abandonnee"
+        self.etapes = etapes
+        self.vie = joueur.vie
+        self.force = joueur.force
+        self.inventaire = dict(joueur.inventaire)
+        self.lieux_restants = len(environnement.lieux)
+        self.allies_restants = len(environnement.allies)
+
+    def __str__(self) -> str:
+        """Donne une représentation lisible du résultat."""
+        return (
+            f"{self.etat} en {self.etapes} étapes, vie: {self.vie}, force: {self.force}, "
+            f"inventaire: {self.inventaire}"
+        )
+
+
+class RapportDebit:
+    """Classe qui résume une série de sessions simulées et le débit obtenu.
+
+    Attributes:
+        resultats (List[ResultatSession]): Les résultats de chaque session, dans l'ordre.
+        duree (float): La durée totale de la simulation en secondes.
+    """
+
+    def __init__(self, resultats: List[ResultatSession], duree: float):
+        """Initialise le rapport.
+
+        Args:
+            resultats (List[ResultatSession]): Les résultats de chaque session, dans l'ordre.
+            duree (float): La durée totale de la simulation en secondes.
+        """
+        self.resultats = resultats
+        self.duree = duree
+
+    @property
+    def sessions_par_seconde(self) -> float:
+        """Le nombre de sessions jouées par seconde."""
+        return len(self.resultats) / self.duree if self.duree else float("inf")
+
+    @property
+    def etapes_par_seconde(self) -> float:
+        """Le nombre de choix traités par seconde."""
+        etapes = sum(resultat.etapes for resultat in self.resultats)
+        return etapes / self.duree if self.duree else float("inf")
+
+    def repartition(self) -> Dict[str, int]:
+        """Donne le nombre de sessions pour chaque état final."""
+        compte: Dict[str, int] = {}
+        for resultat in self.resultats:
+            compte[resultat.etat] = compte.get(resultat.etat, 0) + 1
+        return compte
+
+    def __str__(self) -> str:
+        """Donne une représentation lisible du rapport."""
+        return (
+            f"{len(self.resultats)} sessions en {self.duree:.3f} s: "
+            f"{self.sessions_par_seconde:,.0f} sessions/s, {self.etapes_par_seconde:,.0f} étapes/s, "
+            f"issues: {self.repartition()}"
+        )
+
+
+def _sans_sauvegarde(environnement: Environnement) -> None:
+    """Les sessions simulées ne touchent jamais au fichier de sauvegarde."""
+
+
+def simuler_session(
+    donnees: Dict[str, List[Dict[str, Union[str, List[str], int]]]],
+    choix: Optional[Sequence[str]] = None,
+    politique: Optional[Politique] = None,
+    nom: str = NOM_PAR_DEFAUT,
+    max_etapes: int = MAX_ETAPES,
+) -> ResultatSession:
+    """Fonction qui joue une nouvelle partie sans console.
+
+    Les choix sont pris dans l'ordre dans choix, puis demandés à politique quand le script est épuisé.
+    Sans politique, un script épuisé répond "-1" à chaque menu, ce qui ramène au village et quitte la partie.
+    Les affichages du jeu sont ignorés.
+
+    Args:
+        donnees (Dict[str, List[Dict[str, Union[str, List[str], int]]]]): Les données du jeu chargées avec load_json.
+        choix (Optional[Sequence[str]]): Les choix du joueur, exactement comme ils seraient tapés dans la console.
+        politique (Optional[Politique]): La fonction qui choisit quand le script est épuisé.
+        nom (str): Le nom de l'avatar du joueur.
+        max_etapes (int): Le nombre de choix au-delà duquel la session est interrompue.
+
+    Returns:
+        ResultatSession: L'issue de la session.
+
+    Exemples:
+        >>> donnees = load_json("data.json")
+        >>> print(simuler_session(donnees, ["2", "1", "temple oublié"]))
+        perdue en ...
+    """
+    with rediriger_sortie(SortieNulle()):
+        return _simuler(ModeleMonde(donnees), choix or (), politique, nom, max_etapes)
+
+
+def _simuler(
+    modele: ModeleMonde,
+    choix: Sequence[str],
+    politique: Optional[Politique],
+    nom: str,
+    max_etapes: int,
+) -> ResultatSession:
+    """Corps de simuler_session, sans la redirection des affichages."""
+    environnement = modele.nouvelle_partie(nom)
+    deroulement = partie(environnement, _sans_sauvegarde)
+    etapes = 0
+    try:
+        menu = next(deroulement)
+        while etapes < max_etapes:
+            if etapes < len(choix):
+                reponse = choix[etapes]
+            elif politique is not None:
+                reponse = politique(environnement, menu)
+            else:
+                reponse = "-1"
+            etapes += 1
+            menu = deroulement.send(reponse)
+    except StopIteration:
+        return ResultatSession(environnement, etapes, interrompue=False)
+    deroulement.close()
+    return ResultatSession(environnement, etapes, interrompue=True)
+
+
+def simuler_lot(
+    donnees: Dict[str, List[Dict[str, Union[str, List[str], int]]]],
+    sessions: Iterable[Union[Sequence[str], Politique]],
+    nom: str = NOM_PAR_DEFAUT,
+    max_etapes: int = MAX_ETAPES,
+) -> RapportDebit:
+    """Fonction qui joue une série de sessions et mesure le débit.
+
+    Le monde est construit une seule fois et partagé par toutes les sessions (voir ModeleMonde).
+
+    Args:
+        donnees (Dict[str, List[Dict[str, Union[str, List[str], int]]]]): Les données du jeu chargées avec load_json.
+        sessions (Iterable[Union[Sequence[str], Politique]]): Pour chaque session, soit un script de choix,
+            soit une politique.
+        nom (str): Le nom de l'avatar du joueur.
+        max_etapes (int): Le nombre de choix au-delà duquel une session est interrompue.
+
+    Returns:
+        RapportDebit: Les résultats de chaque session et le débit obtenu.
+
+    Exemples:
+        >>> rapport = simuler_lot(load_json("data.json"), [politique_gloutonne] * 1000)
+        >>> print(rapport)
+        1000 sessions en ... s: ... sessions/s, ... étapes/s, issues: {'gagnee': 1000}
+    """
+    resultats = []
+    debut = time.perf_counter()
+    modele = ModeleMonde(donnees)
+    with rediriger_sortie(SortieNulle()):
+        for session in sessions:
+            if callable(session):
+                resultats.append(_simuler(modele, (), session, nom, max_etapes))
+            else:
+                resultats.append(_simuler(modele, session, None, nom, max_etapes))
+    return RapportDebit(resultats, time.perf_counter() - debut)
+
+
+def politique_gloutonne(environnement: Environnement, menu: str) -> str:
+    """Politique simple: recruter tous les alliés abordables, puis attaquer le lieu le plus faible.
+
+    Args:
+        environnement (Environnement): L'environnement de la session.
+        menu (str): Le nom du menu qui attend un choix.
+
+    Returns:
+        str: Le choix à donner au menu.
+    """
+    if menu == MENU_CHOIX_LIEU:
+        return min(environnement.lieux, key=lambda lieu: lieu.force_ennemis).nom
+    abordables = environnement.allies_abordables()
+    if menu == MENU_VILLAGE:
+        return "1" if abordables else "2"
+    if menu == MENU_ALLIES:
+        return "1" if abordables else "-1"
+    if menu == MENU_CHOIX_ALLIE:
+        return abordables[0].nom if abordables else "-1"
+    if menu == MENU_LIEUX:
+        return "-1" if abordables else "1"
+    return "-1"
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Point d'entrée en ligne de commande: joue des sessions et affiche le rapport de débit."""
+    # Import local: argparse ne sert qu'en ligne de commande, pas aux modules qui importent celui-ci.
+    import argparse
+
+    analyseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    analyseur.add_argument("monde", nargs="?", default="data.json", help="le fichier de données du jeu")
+    analyseur.add_argument("--sessions", "-n", type=int, default=10_000, help="nombre de sessions à jouer")
+    analyseur.add_argument(
+        "--choix",
+        help="script de choix séparés par des virgules; sans script, la politique gloutonne est utilisée",
+    )
+    analyseur.add_argument("--nom", default=NOM_PAR_DEFAUT, help="nom de l'avatar")
+    options = analyseur.parse_args(arguments)
+
+    donnees = load_json(options.monde)
+    if options.choix is not None:
+        session = [choix.strip() for choix in options.choix.split(",")]
+    else:
+        session = politique_gloutonne
+    rapport = simuler_lot(donnees, [session] * options.sessions, nom=options.nom)
+    print(rapport)
+    if rapport.resultats:
+        print("Exemple de session:", rapport.resultats[0])
+
+
+if __name__ == "__main__":
+    main()